@@ -1,17 +1,22 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
-import numpy as np
 
 # Import custom components
 from components.dashboard import render_dashboard
-from components.nest_form import render_nest_form
+from components.nest_form import (
+    render_nest_form, render_hatch_outcome_form, render_predator_sightings
+)
 from components.reports import render_reports
 from components.statistics_view import render_statistics
-from utils.data_handler import load_data, save_data, get_nest_data
-from utils.statistics import *
+from components.guardian_view import render_guardians
+from components.patrol_view import render_patrol_planner
+from utils.data_handler import (
+    load_data, load_cube, load_assessments, load_hatch_aggregates, get_store,
+    get_offline_queue, sync_pending, get_metrics_server, track_session,
+    PARTITION_KEY, current_partition, list_partitions
+)
+from utils.nest import Particao, NinhoInvalido, ORGANIZACAO_PADRAO, PROJETO_PADRAO
+from utils.metrics import EXECUCOES, PAGINAS, medir
+from utils.statistics import contar_total_ninhos, ninhos_prestes_a_eclodir
 
 # Configure page
 st.set_page_config(
@@ -26,14 +31,95 @@ def load_css():
     with open("assets/style.css") as f:
         st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
 
-# Initialize session state
-if 'nest_data' not in st.session_state:
-    st.session_state.nest_data = get_nest_data()
+# Seconds between refreshes of the sidebar stats (writes from other replicas and the worker)
+SIDEBAR_REFRESH_SECONDS = 60
+
+@st.fragment(run_every=SIDEBAR_REFRESH_SECONDS)
+def render_sidebar_stats():
+    """Render the sidebar quick stats; refreshes on its own, apart from the page"""
+    st.markdown("---")
+    st.markdown("### 📈 Resumo Rápido")
+    
+    cube = load_cube()
+    total_nests = contar_total_ninhos(cube)
+    high_risk = cube.total(risco='🔴')
+    hatching_soon = ninhos_prestes_a_eclodir(cube)
+    
+    st.metric("Total de Ninhos", total_nests)
+    st.metric("🔴 Alto Risco", high_risk)
+    st.metric("🐣 Eclosão em ≤5 dias", hatching_soon)
+    
+    pending = get_offline_queue().contar()
+    if pending:
+        st.warning(f"📡 {pending} registro(s) aguardando sincronização")
+
+def partition_from_query_params():
+    """Partition given in the URL (?organizacao=...&projeto=...), or the default one"""
+    try:
+        return Particao.validar(
+            st.query_params.get("organizacao", ORGANIZACAO_PADRAO),
+            st.query_params.get("projeto", PROJETO_PADRAO)
+        )
+    except NinhoInvalido:
+        return current_partition()
+
+# Pages that only make sense with at least one nest in the partition
+PAGES_NEEDING_NESTS = {"dashboard", "statistics", "reports", "patrol"}
+
+def open_partition():
+    """Switch to the organization and project typed in the form (runs before the rerun)"""
+    try:
+        st.session_state[PARTITION_KEY] = Particao.validar(
+            st.session_state.new_organization, st.session_state.new_project
+        )
+    except NinhoInvalido as error:
+        st.session_state.partition_error = str(error)
+
+def render_partition_selector():
+    """Render the organization and project selector; every page shows only the selected one"""
+    if PARTITION_KEY not in st.session_state:
+        st.session_state[PARTITION_KEY] = partition_from_query_params()
+    
+    partitions = [row['particao'] for row in list_partitions()]
+    current = current_partition()
+    if current not in partitions:
+        # A new project has no nests until the first one is added
+        partitions.append(current)
+    
+    st.sidebar.selectbox(
+        "🏢 Organização / Projeto",
+        partitions,
+        key=PARTITION_KEY,
+        format_func=str
+    )
+    
+    with st.sidebar.expander("➕ Novo projeto"):
+        with st.form("new_partition_form", clear_on_submit=True):
+            st.text_input("Organização", value=current.organizacao, key="new_organization")
+            st.text_input("Projeto", key="new_project")
+            st.form_submit_button("Abrir projeto", on_click=open_partition)
+        if "partition_error" in st.session_state:
+            st.error(f"❌ {st.session_state.pop('partition_error')}")
+    
+    # The URL always points at the partition on screen, so it can be shared
+    st.query_params.update(organizacao=current_partition().organizacao,
+                           projeto=current_partition().projeto)
 
 def main():
     # Load custom styling
     load_css()
     
+    # Every read below is scoped to the selected organization and project
+    render_partition_selector()
+    
+    # Nests captured while the store was unreachable are retried on every run
+    sync_pending()
+    
+    # Nest data comes from the shared read cache, not from per-session copies
+    nest_data = load_data()
+    cube = load_cube()
+    assessments = load_assessments()
+    
     # Header with ocean theme
     st.markdown("""
     <div class="main-header">
@@ -53,7 +139,11 @@ def main():
         "🏖️ Dashboard Principal": "dashboard",
         "📊 Estatísticas": "statistics", 
         "➕ Adicionar Ninho": "add_nest",
-        "📋 Relatório Completo": "reports"
+        "🐣 Pós-Eclosão": "hatch_outcome",
+        "🦅 Avistamentos": "predator_sightings",
+        "📋 Relatório Completo": "reports",
+        "👥 Guardiões": "guardians",
+        "🧭 Patrulha": "patrol"
     }
     
     selected_page = st.sidebar.selectbox(
@@ -63,28 +153,41 @@ def main():
     )
     
     # Quick stats in sidebar
-    st.sidebar.markdown("---")
-    st.sidebar.markdown("### 📈 Resumo Rápido")
-    
-    total_nests = len(st.session_state.nest_data)
-    high_risk = sum(1 for nest in st.session_state.nest_data if nest['risco'] == '🔴')
-    hatching_soon = ninhos_prestes_a_eclodir(st.session_state.nest_data)
-    
-    st.sidebar.metric("Total de Ninhos", total_nests)
-    st.sidebar.metric("🔴 Alto Risco", high_risk)
-    st.sidebar.metric("🐣 Eclosão em ≤5 dias", hatching_soon)
+    with st.sidebar:
+        render_sidebar_stats()
     
     # Render selected page
     page_key = menu_options[selected_page]
     
-    if page_key == "dashboard":
-        render_dashboard(st.session_state.nest_data)
-    elif page_key == "statistics":
-        render_statistics(st.session_state.nest_data)
-    elif page_key == "add_nest":
-        render_nest_form()
-    elif page_key == "reports":
-        render_reports(st.session_state.nest_data)
+    # Timed per page for the /metrics endpoint
+    with medir(PAGINAS, page_key, pagina=page_key):
+        if page_key in PAGES_NEEDING_NESTS and not nest_data:
+            # A project just opened has no nests until the first one is added
+            st.info(f"🐢 Nenhum ninho registrado em {current_partition()} ainda. "
+                    "Use ➕ Adicionar Ninho para registrar o primeiro.")
+        elif page_key == "dashboard":
+            render_dashboard(nest_data, cube, assessments)
+        elif page_key == "statistics":
+            render_statistics(nest_data, cube, load_hatch_aggregates())
+        elif page_key == "add_nest":
+            render_nest_form()
+        elif page_key == "hatch_outcome":
+            render_hatch_outcome_form()
+        elif page_key == "predator_sightings":
+            render_predator_sightings()
+        elif page_key == "reports":
+            render_reports(nest_data, cube, assessments)
+        elif page_key == "guardians":
+            render_guardians(get_store(), current_partition())
+        elif page_key == "patrol":
+            render_patrol_planner(nest_data, assessments)
+
+def run():
+    """Run the app once, timed for the /metrics endpoint"""
+    get_metrics_server()
+    track_session()
+    with medir(EXECUCOES, 'main'):
+        main()
 
 if __name__ == "__main__":
-    main()
+    run()
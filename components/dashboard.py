@@ -3,67 +3,71 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from utils.statistics import *
+from utils.risk import avaliacao_do_ninho
 
-def render_dashboard(nest_data):
+def render_dashboard(nest_data, cube, assessments):
     """Render the main dashboard with overview and nest cards"""
     
     # Critical alerts section
-    render_alerts(nest_data)
+    render_alerts(cube, assessments)
     
     # Key metrics
-    render_key_metrics(nest_data)
+    render_key_metrics(cube)
     
     # Charts section
     col1, col2 = st.columns(2)
     
     with col1:
-        render_risk_distribution(nest_data)
+        render_risk_distribution(cube)
         
     with col2:
-        render_region_distribution(nest_data)
+        render_region_distribution(cube)
     
     # Nest cards grid
     st.markdown("---")
     st.markdown("## 🏖️ Ninhos por Região")
     
-    render_nest_cards(nest_data)
+    render_nest_cards(nest_data, assessments)
 
-def render_alerts(nest_data):
+def render_alerts(cube, assessments):
     """Render critical alerts"""
-    hatching_soon = [n for n in nest_data if n['dias_para_eclosao'] <= 2]
-    critical_risk = [n for n in nest_data if n['risco'] == '🔴']
+    hatching_soon = ninhos_prestes_a_eclodir(cube, dias_limite=2)
+    # Same band as the alert engine: the computed one, not the one entered on registration
+    critical_risk = sum(assessment.risco == '🔴' for assessment in assessments.values())
     
     if hatching_soon or critical_risk:
         st.markdown("### 🚨 Alertas Críticos")
         
         if hatching_soon:
-            st.error(f"⏰ {len(hatching_soon)} ninho(s) prestes a eclodir em ≤2 dias!")
+            st.error(f"⏰ {hatching_soon} ninho(s) prestes a eclodir em ≤2 dias!")
             
         if critical_risk:
-            st.error(f"🔴 {len(critical_risk)} ninho(s) em risco crítico necessitam atenção imediata!")
+            st.error(f"🔴 {critical_risk} ninho(s) na faixa de risco crítico (calculada) necessitam atenção imediata!")
+        
+        st.caption("🧭 Planeje a ronda desses ninhos na seção **Patrulha**.")
 
-def render_key_metrics(nest_data):
+def render_key_metrics(cube):
     """Render key metrics in columns"""
     st.markdown("### 📊 Métricas Principais")
     
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_nests = len(nest_data)
+        total_nests = contar_total_ninhos(cube)
         st.metric(
             label="🐢 Total de Ninhos",
             value=total_nests
         )
     
     with col2:
-        total_eggs = get_total_ovos(nest_data)
+        total_eggs = get_total_ovos(cube)
         st.metric(
             label="🥚 Total de Ovos",
             value=f"{total_eggs:,}"
         )
     
     with col3:
-        hatching_soon = ninhos_prestes_a_eclodir(nest_data)
+        hatching_soon = ninhos_prestes_a_eclodir(cube)
         st.metric(
             label="🐣 Eclosão em ≤5 dias",
             value=hatching_soon,
@@ -71,20 +75,18 @@ def render_key_metrics(nest_data):
         )
     
     with col4:
-        with_predators = sum(1 for n in nest_data if n['predadores'])
+        with_predators = cube.total(predadores=True)
         st.metric(
             label="🦅 Com Predadores",
             value=with_predators,
             delta="Atenção" if with_predators > 0 else None
         )
 
-def render_risk_distribution(nest_data):
+def render_risk_distribution(cube):
     """Render risk distribution chart"""
-    st.markdown("#### 🚦 Distribuição por Nível de Risco")
+    st.markdown("#### 🚦 Distribuição por Risco Informado")
     
-    risk_counts = {"🟢": 0, "🟡": 0, "🔴": 0}
-    for nest in nest_data:
-        risk_counts[nest['risco']] += 1
+    risk_counts = cube.por('risco')
     
     colors = ['#4CAF50', '#FFC107', '#F44336']
     
@@ -105,11 +107,11 @@ def render_risk_distribution(nest_data):
     
     st.plotly_chart(fig, use_container_width=True)
 
-def render_region_distribution(nest_data):
+def render_region_distribution(cube):
     """Render region distribution chart"""
     st.markdown("#### 🏖️ Ninhos por Região")
     
-    region_counts = contar_ninhos_por_regiao(nest_data)
+    region_counts = contar_ninhos_por_regiao(cube)
     
     fig = px.bar(
         x=list(region_counts.keys()),
@@ -127,7 +129,7 @@ def render_region_distribution(nest_data):
     
     st.plotly_chart(fig, use_container_width=True)
 
-def render_nest_cards(nest_data):
+def render_nest_cards(nest_data, assessments):
     """Render nest cards in a grid layout"""
     # Group nests by region
     regions = {}
@@ -145,9 +147,9 @@ def render_nest_cards(nest_data):
         
         for i, nest in enumerate(nests):
             with cols[i % 3]:
-                render_nest_card(nest, i + 1)
+                render_nest_card(nest, i + 1, assessments.get(nest['id']))
 
-def render_nest_card(nest, nest_id):
+def render_nest_card(nest, nest_id, assessment=None):
     """Render individual nest card"""
     risk_color = {
         '🟢': '#4CAF50',
@@ -166,10 +168,13 @@ def render_nest_card(nest, nest_id):
     # Get guardian name
     guardian_name = nest.get('guardiao', 'Guardião não identificado')
     
-    # Card styling with risk color border and gray background
+    # Score precomputed by the risk engine (computed here for a nest saved this instant)
+    assessment = assessment or avaliacao_do_ninho(nest, {})
+    
+    # Card styling with the computed risk color border and gray background
     card_style = f"""
     <div style="
-        border: 3px solid {risk_color[nest['risco']]};
+        border: 3px solid {risk_color[assessment.risco]};
         border-radius: 10px;
         padding: 15px;
         margin: 10px 0;
@@ -180,7 +185,8 @@ def render_nest_card(nest, nest_id):
         <p style="margin: 3px 0; color: #0D47A1; font-size: 0.9em;"><strong>👤 Guardião:</strong> {guardian_name}</p>
         <p style="margin: 5px 0; color: #0D47A1;"><strong>🥚 Ovos:</strong> {nest['quantidade_ovos']}</p>
         <p style="margin: 5px 0; color: #0D47A1;"><strong>Status:</strong> {status_icon[nest['status']]} {nest['status'].title()}</p>
-        <p style="margin: 5px 0; color: #0D47A1;"><strong>Risco:</strong> {nest['risco']}</p>
+        <p style="margin: 5px 0; color: #0D47A1;"><strong>🎯 Risco Calculado:</strong> {assessment.risco} ({assessment.pontuacao:.0f})</p>
+        <p style="margin: 5px 0; color: #0D47A1;"><strong>🚦 Risco Informado:</strong> {nest['risco']}</p>
         <p style="margin: 5px 0; color: #0D47A1;"><strong>🐣 Eclosão:</strong> {nest['dias_para_eclosao']} dias</p>
         <p style="margin: 5px 0; color: #0D47A1;"><strong>Predadores:</strong> {predator_icon}</p>
     </div>
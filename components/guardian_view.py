@@ -0,0 +1,113 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+
+def render_guardians(store, partition):
+    """Render guardian workload view of one partition from the aggregates kept by the nest store"""
+
+    st.markdown("## 👥 Carga de Trabalho dos Guardiões")
+    st.markdown("### 🌊 Ninhos, ovos e prioridades por guardião")
+
+    # Aggregates are maintained on each insert, so no full scan is needed here
+    guardian_stats = store.agregados_por_guardiao(partition)
+
+    if not guardian_stats:
+        st.info("👤 Nenhum guardião com ninhos registrados ainda.")
+        return
+
+    render_guardian_overview(guardian_stats)
+    render_guardian_table(guardian_stats)
+    render_guardian_details(store, partition, guardian_stats)
+
+def render_guardian_overview(guardian_stats):
+    """Render overview metrics and workload chart"""
+
+    col1, col2, col3 = st.columns(3)
+
+    total_nests = sum(g['ninhos'] for g in guardian_stats)
+
+    with col1:
+        st.metric("👥 Guardiões Ativos", len(guardian_stats))
+
+    with col2:
+        st.metric("🐢 Média de Ninhos/Guardião", f"{total_nests / len(guardian_stats):.1f}")
+
+    with col3:
+        busiest = guardian_stats[0]
+        st.metric("🏋️ Maior Carga", busiest['guardiao'], f"{busiest['ninhos']} ninhos")
+
+    st.markdown("#### 📊 Ninhos por Guardião (Top 20)")
+
+    top_guardians = guardian_stats[:20]
+
+    fig = px.bar(
+        x=[g['guardiao'] for g in top_guardians],
+        y=[g['ninhos'] for g in top_guardians],
+        color=[g['alto_risco'] for g in top_guardians],
+        color_continuous_scale='Reds',
+        labels={'color': '🔴 Alto Risco'}
+    )
+
+    fig.update_layout(
+        xaxis_title="Guardião",
+        yaxis_title="Número de Ninhos",
+        height=350
+    )
+
+    st.plotly_chart(fig, use_container_width=True)
+
+def render_guardian_table(guardian_stats):
+    """Render table with per-guardian aggregates"""
+
+    st.markdown("---")
+    st.markdown("### 📋 Resumo por Guardião")
+
+    df = pd.DataFrame(guardian_stats).rename(columns={
+        'guardiao': '👤 Guardião',
+        'ninhos': '🐢 Ninhos',
+        'ovos': '🥚 Ovos',
+        'alto_risco': '🔴 Alto Risco',
+        'eclosao_proxima': '🐣 Eclosão ≤5 dias'
+    })
+
+    st.dataframe(df, use_container_width=True, hide_index=True)
+
+@st.fragment
+def render_guardian_details(store, partition, guardian_stats):
+    """Render hatching-soon and high-risk lists for one guardian"""
+
+    st.markdown("---")
+    st.markdown("### 🔍 Prioridades do Guardião")
+
+    selected_guardian = st.selectbox(
+        "👤 Selecione um guardião",
+        [g['guardiao'] for g in guardian_stats]
+    )
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.markdown("#### 🐣 Eclosão nos Próximos 5 Dias")
+        hatching_soon = store.ninhos_eclosao_proxima_do_guardiao(
+            selected_guardian, particao=partition
+        )
+        if hatching_soon:
+            for nest in hatching_soon:
+                st.write(
+                    f"- {nest['regiao']}: {nest['dias_para_eclosao']} dia(s), "
+                    f"{nest['quantidade_ovos']} ovos {nest['risco']}"
+                )
+        else:
+            st.success("✅ Nenhum ninho com eclosão próxima.")
+
+    with col2:
+        st.markdown("#### 🔴 Ninhos em Alto Risco")
+        high_risk = store.ninhos_alto_risco_do_guardiao(selected_guardian, partition)
+        if high_risk:
+            for nest in high_risk:
+                st.write(
+                    f"- {nest['regiao']}: {nest['status'].title()}, "
+                    f"eclosão em {nest['dias_para_eclosao']} dia(s)"
+                )
+        else:
+            st.success("✅ Nenhum ninho em alto risco.")
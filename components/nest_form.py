@@ -1,5 +1,12 @@
+from datetime import date, datetime
 import streamlit as st
-from utils.data_handler import add_nest
+from utils.data_handler import (
+    add_nest, load_nests_awaiting_outcome, record_hatch_outcome,
+    record_predator_sighting, import_predator_sightings
+)
+from utils.predators import ESPECIES, COLUNAS_CSV
+from utils.photos import MAX_FOTOS_POR_ENVIO
+from utils.nest import REGIOES, STATUS, RISCOS, MIN_OVOS, MAX_OVOS, MIN_DIAS_ECLOSAO, MAX_DIAS_ECLOSAO
 
 def render_nest_form():
     """Render the form to add new nests"""
@@ -72,6 +79,15 @@ def render_nest_form():
     </style>
     """, unsafe_allow_html=True)
     
+    render_nest_entry()
+    
+    # Show form guidelines
+    render_form_guidelines()
+
+@st.fragment
+def render_nest_entry():
+    """Render guardian identification and the nest form; typing reruns only this fragment"""
+    
     # Use a container with specific class for better CSS targeting
     guardian_container = st.container()
     with guardian_container:
@@ -97,36 +113,36 @@ def render_nest_form():
         with col1:
             regiao = st.selectbox(
                 "🏖️ Região da Praia",
-                ["Praia Norte", "Praia Sul", "Praia Leste", "Praia Oeste", "Praia Central"],
+                list(REGIOES),
                 help="Selecione a região onde o ninho foi encontrado"
             )
             
             quantidade_ovos = st.number_input(
                 "🥚 Quantidade de Ovos",
-                min_value=1,
-                max_value=200,
+                min_value=MIN_OVOS,
+                max_value=MAX_OVOS,
                 value=100,
                 help="Número total de ovos no ninho"
             )
             
             status = st.selectbox(
                 "📊 Status do Ninho",
-                ["intacto", "ameacado", "danificado"],
+                list(STATUS),
                 help="Condição atual do ninho"
             )
         
         with col2:
             risco = st.selectbox(
                 "🚦 Nível de Risco",
-                ["🟢", "🟡", "🔴"],
+                list(RISCOS),
                 format_func=lambda x: f"{x} {'Baixo' if x=='🟢' else 'Médio' if x=='🟡' else 'Alto'}",
                 help="Avaliação do risco para o ninho"
             )
             
             dias_para_eclosao = st.number_input(
                 "🐣 Dias para Eclosão",
-                min_value=0,
-                max_value=60,
+                min_value=MIN_DIAS_ECLOSAO,
+                max_value=MAX_DIAS_ECLOSAO,
                 value=15,
                 help="Estimativa de dias até a eclosão"
             )
@@ -146,6 +162,13 @@ def render_nest_form():
             height=100
         )
         
+        photos = st.file_uploader(
+            "📷 Fotos (opcional)",
+            type=["jpg", "jpeg", "png", "webp"],
+            accept_multiple_files=True,
+            help=f"Danos no ninho, rastros de predadores... até {MAX_FOTOS_POR_ENVIO} fotos"
+        )
+        
         # Submit button
         submitted = st.form_submit_button(
             "🐢 Registrar Ninho",
@@ -158,6 +181,10 @@ def render_nest_form():
             if not regiao:
                 st.error("Por favor, selecione uma região.")
                 return
+            
+            if len(photos) > MAX_FOTOS_POR_ENVIO:
+                st.error(f"📷 Envie no máximo {MAX_FOTOS_POR_ENVIO} fotos por ninho.")
+                return
                 
             # Create new nest dictionary
             new_nest = {
@@ -175,10 +202,147 @@ def render_nest_form():
                 new_nest["observacoes"] = observacoes.strip()
             
             # Add the nest
-            add_nest(new_nest)
+            add_nest(new_nest, [photo.getvalue() for photo in photos])
+
+@st.fragment
+def render_hatch_outcome_form():
+    """Render the post-hatch form to record the excavation outcome of a nest"""
     
-    # Show form guidelines
-    render_form_guidelines()
+    st.markdown("## 🐣 Registrar Resultado da Eclosão")
+    st.markdown("### 🌊 Escavação do ninho após a eclosão dos filhotes")
+    
+    pending = load_nests_awaiting_outcome()
+    if not pending:
+        st.info("🐢 Nenhum ninho eclodido aguardando o registro da escavação.")
+        return
+    
+    nests = {nest.id: nest for nest in pending}
+    
+    with st.form("hatch_outcome_form", clear_on_submit=True):
+        nest_id = st.selectbox(
+            "🏖️ Ninho Escavado",
+            list(nests),
+            format_func=lambda i: (
+                f"{nests[i].regiao} · {nests[i].quantidade_ovos} ovos · "
+                f"{nests[i].guardiao} · #{i[:8]}"
+            ),
+            help="Ninhos já eclodidos (0 dias para eclosão) ainda sem resultado"
+        )
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            hatched = st.number_input(
+                "🐣 Filhotes Eclodidos",
+                min_value=0,
+                max_value=MAX_OVOS,
+                value=0,
+                help="Cascas vazias encontradas na escavação"
+            )
+            
+            emerged = st.number_input(
+                "🌊 Filhotes Emergidos",
+                min_value=0,
+                max_value=MAX_OVOS,
+                value=0,
+                help="Filhotes que chegaram sozinhos à superfície (eclodidos menos os encontrados no ninho)"
+            )
+        
+        with col2:
+            dead_eggs = st.number_input(
+                "💀 Ovos Mortos",
+                min_value=0,
+                max_value=MAX_OVOS,
+                value=0,
+                help="Ovos que não eclodiram"
+            )
+            
+            excavation_date = st.date_input(
+                "📅 Data da Escavação",
+                value=date.today(),
+                max_value=date.today()
+            )
+        
+        submitted = st.form_submit_button(
+            "🐢 Registrar Resultado",
+            type="primary",
+            use_container_width=True
+        )
+        
+        if submitted:
+            record_hatch_outcome(nest_id, hatched, emerged, dead_eggs, excavation_date)
+
+def render_predator_sightings():
+    """Render the predator sighting page: quick entry form and bulk import"""
+    
+    st.markdown("## 🦅 Avistamentos de Predadores")
+    st.markdown("### 🌊 Registre quais predadores foram vistos, onde e quando")
+    
+    render_sighting_form()
+    render_sighting_import()
+
+@st.fragment
+def render_sighting_form():
+    """Render the quick entry form for a single predator sighting"""
+    
+    with st.form("predator_sighting_form", clear_on_submit=True):
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            species = st.selectbox("🦅 Espécie", ESPECIES)
+            region = st.selectbox("🏖️ Região", REGIOES)
+        
+        with col2:
+            sighting_date = st.date_input(
+                "📅 Data do Avistamento",
+                value=date.today(),
+                max_value=date.today()
+            )
+            sighting_time = st.time_input(
+                "🕐 Horário",
+                value=datetime.now().time().replace(second=0, microsecond=0)
+            )
+        
+        with st.expander("📍 Coordenadas (opcional)"):
+            col1, col2 = st.columns(2)
+            with col1:
+                latitude = st.number_input(
+                    "Latitude", min_value=-90.0, max_value=90.0, value=None, format="%.6f"
+                )
+            with col2:
+                longitude = st.number_input(
+                    "Longitude", min_value=-180.0, max_value=180.0, value=None, format="%.6f"
+                )
+        
+        submitted = st.form_submit_button(
+            "🦅 Registrar Avistamento",
+            type="primary",
+            use_container_width=True
+        )
+        
+        if submitted:
+            record_predator_sighting(
+                species, region, datetime.combine(sighting_date, sighting_time), latitude, longitude
+            )
+
+@st.fragment
+def render_sighting_import():
+    """Render the bulk import of predator sightings from a CSV file"""
+    
+    st.markdown("---")
+    st.markdown("### 📥 Importar Avistamentos em Lote")
+    st.markdown(
+        f"Arquivo CSV com as colunas `{'`, `'.join(COLUNAS_CSV)}` "
+        "(momento no formato `AAAA-MM-DD HH:MM`; coordenadas opcionais)."
+    )
+    
+    with st.form("predator_sighting_import", clear_on_submit=True):
+        uploaded = st.file_uploader("📄 Arquivo CSV", type=["csv"])
+        submitted = st.form_submit_button("📥 Importar", use_container_width=True)
+        
+        if submitted and uploaded is not None:
+            with st.spinner("Importando avistamentos..."):
+                import_predator_sightings(uploaded)
 
 def render_form_guidelines():
     """Render guidelines for filling the form"""
@@ -0,0 +1,160 @@
+import streamlit as st
+import pandas as pd
+from utils.patrol import (
+    planejar_patrulha, DIAS_ECLOSAO_PADRAO, VELOCIDADE_KMH, MINUTOS_POR_NINHO, MINUTOS_TURNO
+)
+from utils.risk import avaliacao_do_ninho
+
+def render_patrol_planner(nest_data, assessments):
+    """Render the patrol planner for nests hatching soon and critical nests"""
+
+    st.markdown("## 🧭 Planejamento da Patrulha")
+    st.markdown("### 🌊 Rotas da ronda para os ninhos que mais precisam de visita")
+
+    render_patrol_form(nest_data, assessments)
+
+@st.fragment
+def render_patrol_form(nest_data, assessments):
+    """Render the planning options and the resulting routes"""
+
+    guardians = sorted({nest['guardiao'] for nest in nest_data})
+
+    with st.form("patrol_form"):
+        col1, col2 = st.columns(2)
+
+        with col1:
+            days = st.slider(
+                "🐣 Eclosão em até (dias)",
+                min_value=0,
+                max_value=15,
+                value=DIAS_ECLOSAO_PADRAO
+            )
+            include_critical = st.checkbox(
+                "🔴 Incluir ninhos em risco crítico",
+                value=True,
+                help="Pela faixa de risco calculada, não pela informada no cadastro"
+            )
+            available = st.multiselect(
+                "👥 Guardiões disponíveis",
+                guardians,
+                default=guardians,
+                help="Ninhos de guardiões ausentes são repassados a quem patrulha a mesma praia"
+            )
+
+        with col2:
+            shift_hours = st.number_input(
+                "🕐 Duração da ronda (horas)",
+                min_value=0.5,
+                max_value=24.0,
+                value=MINUTOS_TURNO / 60,
+                step=0.5
+            )
+            minutes_per_nest = st.number_input(
+                "🔍 Minutos por ninho",
+                min_value=1.0,
+                max_value=120.0,
+                value=MINUTOS_POR_NINHO,
+                step=1.0
+            )
+            speed = st.number_input(
+                "🚶 Velocidade (km/h)",
+                min_value=0.5,
+                max_value=30.0,
+                value=VELOCIDADE_KMH,
+                step=0.5,
+                help="Sem coordenadas dos ninhos, as distâncias são entre os centros das praias"
+            )
+
+        submitted = st.form_submit_button(
+            "🧭 Planejar Rotas",
+            type="primary",
+            use_container_width=True
+        )
+
+    if not submitted:
+        return
+    if not available:
+        st.warning("👥 Selecione ao menos um guardião disponível.")
+        return
+
+    plan = planejar_patrulha(
+        nest_data,
+        guardioes=available,
+        dias=days,
+        criticos=include_critical,
+        pontuacoes={nest_id: assessment.pontuacao for nest_id, assessment in assessments.items()},
+        velocidade_kmh=speed,
+        minutos_por_ninho=minutes_per_nest,
+        minutos_turno=shift_hours * 60
+    )
+    render_patrol_plan(plan, assessments)
+
+def render_patrol_plan(plan, assessments):
+    """Render plan metrics, one expander per route and the plan download"""
+
+    planned = sum(route.total_ninhos for route in plan.rotas)
+
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.metric("🐢 Ninhos na Patrulha", planned)
+
+    with col2:
+        st.metric("⚠️ Sem Cobertura", len(plan.sem_cobertura))
+
+    with col3:
+        st.metric("🚶 Distância Total", f"{sum(r.distancia_km for r in plan.rotas):.1f} km")
+
+    with col4:
+        st.metric("⚡ Tempo de Cálculo", f"{plan.segundos * 1000:.0f} ms")
+
+    if not plan.rotas:
+        st.info("🐢 Nenhum ninho precisa de visita com esses critérios.")
+        return
+
+    # One table per route, in visiting order
+    route_tables = {}
+    for route in plan.rotas:
+        rows = route_tables.setdefault(route.guardiao, [])
+        for stop_number, stop in enumerate(route.paradas, 1):
+            for nest in stop.ninhos:
+                rows.append({
+                    '📍 Parada': stop_number,
+                    '🏖️ Região': stop.regiao,
+                    '🚦 Risco Informado': nest['risco'],
+                    '🎯 Risco Calculado': avaliacao_do_ninho(nest, assessments).risco,
+                    '🐣 Dias p/ Eclosão': nest['dias_para_eclosao'],
+                    '🥚 Ovos': nest['quantidade_ovos'],
+                    '👤 Responsável': nest['guardiao'],
+                })
+
+    st.markdown("#### 🗺️ Rotas por Guardião")
+    for route in plan.rotas:
+        with st.expander(
+            f"👤 {route.guardiao} · {route.total_ninhos} ninho(s) · "
+            f"{route.distancia_km:.1f} km · {route.minutos / 60:.1f} h"
+        ):
+            st.write(" → ".join(stop.regiao for stop in route.paradas))
+            st.dataframe(
+                pd.DataFrame(route_tables[route.guardiao]),
+                use_container_width=True,
+                hide_index=True
+            )
+
+    if plan.sem_cobertura:
+        st.warning(
+            f"⚠️ {len(plan.sem_cobertura)} ninho(s) não couberam nas rondas: "
+            "aumente a duração da ronda ou o número de guardiões."
+        )
+
+    plan_df = pd.concat(
+        [pd.DataFrame(rows).assign(**{'👤 Guardião da Ronda': guardian})
+         for guardian, rows in route_tables.items()],
+        ignore_index=True
+    )
+    st.download_button(
+        label="📥 Baixar Plano (CSV)",
+        data=plan_df.to_csv(index=False).encode('utf-8'),
+        file_name="plano_patrulha.csv",
+        mime="text/csv"
+    )
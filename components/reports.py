@@ -2,26 +2,36 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 from utils.statistics import *
+from utils.artifacts import TIPOS_RELATORIO, gerar_conteudo, tipo_regional
+from utils.executive_report import FORMATOS_EXECUTIVOS, guardar_relatorios_executivos, tipo_executivo
+from utils.regional_reports import gerar_relatorios_regionais
+from utils.risk import avaliacao_do_ninho
+from utils.data_handler import (
+    current_partition, get_cache, get_artifact_store, get_search, get_session_memory,
+    load_nest_index, load_photos, load_photo
+)
+from utils.photos import PILLOW_DISPONIVEL
+from utils.search import RESULTADOS_POR_PAGINA
 
-def render_reports(nest_data):
+def render_reports(nest_data, cube, assessments):
     """Render comprehensive reports view"""
     
     st.markdown("## 📋 Relatório Completo dos Ninhos")
     st.markdown("### 🌊 Análise Detalhada de Todos os Ninhos Registrados")
     
     # Generate report summary
-    render_report_summary(nest_data)
+    render_report_summary(cube, assessments)
     
-    # Filter options
-    render_filters(nest_data)
+    # Full-text search
+    render_search()
     
-    # Detailed nest table
-    render_detailed_table(nest_data)
+    # Filter options and the detailed nest table they drive
+    render_filtered_table(assessments)
     
     # Export options
-    render_export_options(nest_data)
+    render_export_options(nest_data, cube)
 
-def render_report_summary(nest_data):
+def render_report_summary(cube, assessments):
     """Render report summary statistics"""
     
     st.markdown("### 📊 Resumo Executivo")
@@ -29,11 +39,11 @@ def render_report_summary(nest_data):
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_nests = len(nest_data)
+        total_nests = contar_total_ninhos(cube)
         st.metric("🐢 Total de Ninhos", total_nests)
     
     with col2:
-        total_eggs = sum(nest['quantidade_ovos'] for nest in nest_data)
+        total_eggs = get_total_ovos(cube)
         st.metric("🥚 Total de Ovos", f"{total_eggs:,}")
     
     with col3:
@@ -41,11 +51,69 @@ def render_report_summary(nest_data):
         st.metric("📈 Média de Ovos/Ninho", f"{avg_eggs:.1f}")
     
     with col4:
-        critical_nests = sum(1 for nest in nest_data if nest['risco'] == '🔴')
-        st.metric("🚨 Ninhos Críticos", critical_nests)
+        critical_nests = sum(assessment.risco == '🔴' for assessment in assessments.values())
+        st.metric("🚨 Ninhos Críticos", critical_nests, help="Pela faixa de risco calculada")
 
-def render_filters(nest_data):
-    """Render filter options for the report"""
+# Each interactive section is a fragment: its widgets rerun only that section,
+# not the sidebar, the summary or the other sections of the page
+@st.fragment
+def render_search():
+    """Render the full-text search over observations, guardians and regions"""
+    
+    st.markdown("---")
+    st.markdown("### 🔎 Buscar Ninhos")
+    
+    query = st.text_input(
+        "Buscar nas observações, guardiões e regiões",
+        placeholder="Ex.: raposa, conceicao, praia sul",
+        key="search_query"
+    )
+    if not query.strip():
+        return
+    
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        page = st.number_input("Página", min_value=1, value=1, step=1, key="search_page")
+    
+    results, total = get_search().buscar(query, page, particao=current_partition())
+    pages = max(1, -(-total // RESULTADOS_POR_PAGINA))
+    
+    with col2:
+        st.markdown(f"**{total:,}** resultado(s) · página {page} de {pages}")
+    
+    if not results:
+        st.info("🔍 Nenhum ninho encontrado para a busca.")
+        return
+    
+    for nest, excerpt in results:
+        line = (f"🏖️ **{nest['regiao']}** · 👤 {nest['guardiao']} · {nest['risco']} "
+                f"{nest['status'].title()} · 🐣 {nest['dias_para_eclosao']} dias")
+        if excerpt:
+            line += f"  \n📝 {excerpt}"
+        st.markdown(line)
+
+@st.fragment
+def render_filtered_table(assessments):
+    """Render the filters together with the table they drive"""
+    
+    # Shared by every session; sessions only keep the selected row positions
+    index = load_nest_index()
+    filters = render_filters(index)
+    render_detailed_table(index, assessments, filters)
+
+# Session memory key of the rows selected by the report filters
+FILTER_SELECTION_KEY = "report_filter_selection"
+
+def filter_selection_key(filters):
+    """
+    Selections are row positions of one partition's index (partitions may share
+    a data version), kept per combination of filters
+    """
+    values = "|".join(str(filters[field]) for field in ('regiao', 'status', 'risco'))
+    return f"{FILTER_SELECTION_KEY}:{current_partition()}:{values}"
+
+def render_filters(index):
+    """Render filter options for the report; returns the chosen filters (None = any)"""
     
     st.markdown("---")
     st.markdown("### 🔍 Filtros de Visualização")
@@ -53,7 +121,7 @@ def render_filters(nest_data):
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        regions = ["Todas"] + list(set(nest['regiao'] for nest in nest_data))
+        regions = ["Todas"] + list(index.regioes)
         selected_region = st.selectbox("🏖️ Filtrar por Região", regions)
     
     with col2:
@@ -62,58 +130,136 @@ def render_filters(nest_data):
     
     with col3:
         risks = ["Todos"] + ["🟢", "🟡", "🔴"]
-        selected_risk = st.selectbox("🚦 Filtrar por Risco", risks)
-    
-    # Apply filters
-    filtered_data = nest_data.copy()
+        selected_risk = st.selectbox("🚦 Filtrar por Risco Informado", risks)
     
-    if selected_region != "Todas":
-        filtered_data = [n for n in filtered_data if n['regiao'] == selected_region]
-    
-    if selected_status != "Todos":
-        filtered_data = [n for n in filtered_data if n['status'] == selected_status]
-    
-    if selected_risk != "Todos":
-        filtered_data = [n for n in filtered_data if n['risco'] == selected_risk]
-    
-    st.session_state.filtered_nest_data = filtered_data
+    return {
+        'regiao': None if selected_region == "Todas" else selected_region,
+        'status': None if selected_status == "Todos" else selected_status,
+        'risco': None if selected_risk == "Todos" else selected_risk,
+    }
+
+def filtered_selection(index, filters):
+    """
+    Return the rows matching the filters, kept as compact row positions in the
+    session memory; recomputed from the filters whenever it was evicted
+    """
+    memory = get_session_memory(len(index))
+    key = filter_selection_key(filters)
+    selection = memory.obter(key, index.versao)
+    if selection is None:
+        # Vectorized over the shared index
+        selection = index.selecionar(**filters)
+        memory.guardar(key, selection, index.versao)
+    return selection
 
-def render_detailed_table(nest_data):
-    """Render detailed table of all nests"""
+# Table columns: nest field -> header shown in the table
+TABLE_COLUMNS = {
+    'regiao': '🏖️ Região',
+    'quantidade_ovos': '🥚 Ovos',
+    'status': '📊 Status',
+    'risco': '🚦 Risco Informado',
+    'pontuacao': '🎯 Risco Calculado',
+    'dias_para_eclosao': '🐣 Dias p/ Eclosão',
+    'predadores': '🦅 Predadores',
+    'guardiao': '👤 Guardião'
+}
+
+# Rows per page offered by the table; only the visible page is sent to the browser
+PAGE_SIZES = [25, 50, 100, 250]
+
+def render_detailed_table(index, assessments, filters):
+    """Render one sorted page of the filtered nests, built on the server"""
     
-    filtered_data = getattr(st.session_state, 'filtered_nest_data', nest_data)
+    selection = filtered_selection(index, filters)
     
     st.markdown("---")
-    st.markdown(f"### 📋 Detalhes dos Ninhos ({len(filtered_data)} registros)")
+    st.markdown(f"### 📋 Detalhes dos Ninhos ({len(selection)} registros)")
     
-    if not filtered_data:
+    if not len(selection):
         st.warning("🔍 Nenhum ninho encontrado com os filtros aplicados.")
         return
     
-    # Convert to DataFrame for better display
-    df = pd.DataFrame(filtered_data)
+    # Table view: sort column and direction, projected columns, page size and page
+    col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
     
-    # Rename columns for better presentation
-    column_names = {
-        'regiao': '🏖️ Região',
-        'quantidade_ovos': '🥚 Ovos',
-        'status': '📊 Status',
-        'risco': '🚦 Risco',
-        'dias_para_eclosao': '🐣 Dias p/ Eclosão',
-        'predadores': '🦅 Predadores',
-        'guardiao': '👤 Guardião'
-    }
+    with col1:
+        sort_column = st.selectbox(
+            "↕️ Ordenar por:",
+            [None] + list(TABLE_COLUMNS),
+            format_func=lambda column: "Ordem de cadastro" if column is None else TABLE_COLUMNS[column],
+            key="report_sort_column"
+        )
+    
+    with col2:
+        descending = st.toggle("⬇️ Decrescente", key="report_sort_descending")
+    
+    with col3:
+        page_size = st.selectbox("📄 Linhas por página:", PAGE_SIZES, key="report_page_size")
     
-    df = df.rename(columns=column_names)
+    page_count = (len(selection) - 1) // page_size + 1
+    # The filters or the page size may have shrunk the table below the current page
+    if st.session_state.get("report_page", 1) > page_count:
+        st.session_state.report_page = page_count
+    
+    with col4:
+        page = st.number_input(
+            f"Página (de {page_count}):", min_value=1, max_value=page_count, key="report_page"
+        )
+    
+    visible_columns = st.multiselect(
+        "🧾 Colunas:",
+        list(TABLE_COLUMNS),
+        default=list(TABLE_COLUMNS),
+        format_func=TABLE_COLUMNS.get,
+        key="report_columns"
+    )
+    
+    # Only the visible page is materialized, using the shared precomputed sort orders
+    start = (page - 1) * page_size
+    page_data = index.pagina(selection, start, page_size, sort_column, descending)
+    
+    if visible_columns:
+        render_table_page(page_data, visible_columns, assessments)
+    
+    st.caption(
+        f"Exibindo {start + 1}–{start + len(page_data)} de {len(selection)} ninhos"
+    )
+    
+    # Show individual nest details for the same page
+    render_nest_details(page_data, assessments, start=start + 1)
+
+def render_table_page(page_data, visible_columns, assessments):
+    """Render the projected columns of one table page"""
+    
+    # Convert to DataFrame for better display (internal ids are not shown)
+    rows = []
+    page_assessments = [avaliacao_do_ninho(nest, assessments) for nest in page_data]
+    for nest, assessment in zip(page_data, page_assessments):
+        row = {column: nest[column] for column in visible_columns if column != 'pontuacao'}
+        if 'pontuacao' in visible_columns:
+            row['pontuacao'] = f"{assessment.risco} {assessment.pontuacao:.0f}"
+        rows.append(row)
+    df = pd.DataFrame(rows, columns=visible_columns)
+    
+    # Rename columns for better presentation
+    df = df.rename(columns=TABLE_COLUMNS)
     
     # Format predadores column
-    df['🦅 Predadores'] = df['🦅 Predadores'].map({True: '✅ Sim', False: '❌ Não'})
+    if '🦅 Predadores' in df:
+        df['🦅 Predadores'] = df['🦅 Predadores'].map({True: '✅ Sim', False: '❌ Não'})
     
     # Style the dataframe with better formatting
-    styled_df = df.style.apply(style_risk_rows, axis=1).format({
+    formats = {
         '🥚 Ovos': '{:,}',
         '🐣 Dias p/ Eclosão': '{} dias'
-    })
+    }
+    styled_df = df.style.format(
+        {column: fmt for column, fmt in formats.items() if column in df}, na_rep='—'
+    )
+    # Rows are colored by the computed band, whichever columns are visible
+    styled_df = styled_df.apply(
+        lambda row: style_risk_rows(page_assessments[row.name].risco, len(row)), axis=1
+    )
     
     # Add custom CSS for the dataframe
     st.markdown("""
@@ -134,36 +280,37 @@ def render_detailed_table(nest_data):
         use_container_width=True,
         hide_index=True
     )
-    
-    # Show individual nest details
-    render_nest_details(filtered_data)
 
-def style_risk_rows(row):
-    """Style rows based on risk level with proper contrast"""
-    risk = row['🚦 Risco']
+def style_risk_rows(risk, cells):
+    """Style a row based on its risk band with proper contrast"""
     if risk == '🔴':
-        return ['background-color: #F44336; color: white; font-weight: 500'] * len(row)
+        return ['background-color: #F44336; color: white; font-weight: 500'] * cells
     elif risk == '🟡':
-        return ['background-color: #FFC107; color: white; font-weight: 500'] * len(row)
+        return ['background-color: #FFC107; color: white; font-weight: 500'] * cells
     elif risk == '🟢':
-        return ['background-color: #4CAF50; color: white; font-weight: 500'] * len(row)
-    return ['background-color: #E0E0E0; color: #212121'] * len(row)
+        return ['background-color: #4CAF50; color: white; font-weight: 500'] * cells
+    return ['background-color: #E0E0E0; color: #212121'] * cells
 
-def render_nest_details(filtered_data):
-    """Render expandable details for each nest"""
+def render_nest_details(filtered_data, assessments, start=1):
+    """Render expandable details for each nest, numbered from start"""
     
     st.markdown("---")
     st.markdown("### 🔍 Detalhes Individuais dos Ninhos")
     
-    for i, nest in enumerate(filtered_data, 1):
-        # Define risk colors and background
+    # Photos of the visible page only, in one query; thumbnails are read as each nest is drawn
+    photos = load_photos([nest['id'] for nest in filtered_data])
+    
+    for i, nest in enumerate(filtered_data, start):
+        assessment = avaliacao_do_ninho(nest, assessments)
+        
+        # Define risk colors and background, by the computed band
         risk_colors = {
             '🟢': '#4CAF50',
             '🟡': '#FFC107', 
             '🔴': '#F44336'
         }
         
-        risk_bg = risk_colors.get(nest['risco'], '#4CAF50')
+        risk_bg = risk_colors.get(assessment.risco, '#4CAF50')
         
         # Create custom styled container
         nest_detail_html = f"""
@@ -175,7 +322,7 @@ def render_nest_details(filtered_data):
             margin: 10px 0;
             box-shadow: 0 4px 12px rgba(0,0,0,0.2);
         ">
-            <h4 style="margin: 0 0 15px 0; color: white; font-weight: 700;">🐢 Ninho #{i} - {nest['regiao']} ({nest['risco']})</h4>
+            <h4 style="margin: 0 0 15px 0; color: white; font-weight: 700;">🐢 Ninho #{i} - {nest['regiao']} ({assessment.risco})</h4>
             <p style="margin: 8px 0; color: white; font-weight: 600; border-bottom: 1px solid rgba(255,255,255,0.3); padding-bottom: 8px;"><strong>👤 Guardião:</strong> {nest.get('guardiao', 'Guardião não identificado')}</p>
             <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 20px;">
                 <div>
@@ -184,7 +331,8 @@ def render_nest_details(filtered_data):
                     <p style="margin: 8px 0; color: white;"><strong>📊 Status:</strong> {nest['status'].title()}</p>
                 </div>
                 <div>
-                    <p style="margin: 8px 0; color: white;"><strong>🚦 Nível de Risco:</strong> {nest['risco']}</p>
+                    <p style="margin: 8px 0; color: white;"><strong>🎯 Risco Calculado:</strong> {assessment.risco} ({assessment.pontuacao:.0f})</p>
+                    <p style="margin: 8px 0; color: white;"><strong>🚦 Risco Informado:</strong> {nest['risco']}</p>
                     <p style="margin: 8px 0; color: white;"><strong>🐣 Dias para Eclosão:</strong> {nest['dias_para_eclosao']}</p>
                     <p style="margin: 8px 0; color: white;"><strong>🦅 Predadores:</strong> {'Sim' if nest['predadores'] else 'Não'}</p>
                 </div>
@@ -199,16 +347,54 @@ def render_nest_details(filtered_data):
         
         st.markdown(nest_detail_html, unsafe_allow_html=True)
         
+        render_nest_photos(nest['id'], photos.get(nest['id'], []))
+        
         # Risk assessment with custom styling
-        render_nest_risk_assessment_custom(nest)
+        render_nest_risk_assessment_custom(assessment)
+
+# Thumbnails per row in the nest details
+PHOTOS_PER_ROW = 6
+
+def render_nest_photos(nest_id, photos):
+    """Render a nest's photo thumbnails; the preview and the original load only on request"""
+    
+    if not photos:
+        return
+    
+    columns = st.columns(PHOTOS_PER_ROW)
+    for number, photo in enumerate(photos):
+        with columns[number % PHOTOS_PER_ROW]:
+            thumbnail = load_photo(photo, 'miniatura')
+            if thumbnail is not None:
+                st.image(thumbnail, use_container_width=True)
+            elif not PILLOW_DISPONIVEL:
+                st.caption("📷 Miniaturas indisponíveis: instale o pacote `pillow`.")
+            elif photo.estado == 'falhou':
+                st.caption("📷 Não foi possível ler esta foto.")
+            else:
+                st.caption("⏳ Preparando miniatura...")
+            if st.button("🔍 Ampliar", key=f"photo_{nest_id}_{photo.hash[:16]}"):
+                render_photo_preview(photo)
 
-def render_nest_risk_assessment_custom(nest):
-    """Render custom styled risk assessment for individual nest"""
+@st.dialog("📷 Foto do Ninho", width="large")
+def render_photo_preview(photo):
+    """Show the preview of a photo, with the full-size original as a download"""
     
-    risk_level = nest['risco']
-    days_to_hatch = nest['dias_para_eclosao']
-    has_predators = nest['predadores']
-    status = nest['status']
+    preview = load_photo(photo, 'previa')
+    if preview is not None:
+        st.image(preview, use_container_width=True)
+    else:
+        st.info("⏳ A prévia ainda está sendo preparada.")
+    
+    st.download_button(
+        label=f"⬇️ Baixar Original ({photo.tamanho / (1024 * 1024):.1f} MB)",
+        data=load_photo(photo) or b"",
+        file_name=f"ninho_{photo.ninho_id[:8]}_{photo.hash[:8]}.{photo.extensao}",
+        mime=f"image/{'jpeg' if photo.extensao == 'jpg' else photo.extensao}"
+    )
+
+def render_nest_risk_assessment_custom(assessment):
+    """Render the risk assessment messages of a nest"""
     
     # Define colors for different alert types
     alert_colors = {
@@ -217,25 +403,8 @@ def render_nest_risk_assessment_custom(nest):
         'success': '#4CAF50'
     }
     
-    assessments = []
-    
-    if risk_level == '🔴':
-        assessments.append(('critical', "⚠️ **ATENÇÃO CRÍTICA NECESSÁRIA** - Este ninho requer intervenção imediata!"))
-    elif risk_level == '🟡':
-        assessments.append(('warning', "⚠️ **Monitoramento Frequente** - Este ninho necessita acompanhamento regular."))
-    else:
-        assessments.append(('success', "✅ **Situação Estável** - Continue o monitoramento de rotina."))
-    
-    if days_to_hatch <= 2:
-        assessments.append(('critical', "🐣 **ECLOSÃO IMINENTE** - Prepare-se para a eclosão nas próximas 48 horas!"))
-    elif days_to_hatch <= 5:
-        assessments.append(('warning', "🐣 **Eclosão Próxima** - Aumentar frequência de monitoramento."))
-    
-    if has_predators and status == 'danificado':
-        assessments.append(('critical', "🦅 **ALTA PRIORIDADE** - Ninho com predadores e danos necessita proteção urgente!"))
-    
     # Render assessments with colored backgrounds
-    for alert_type, message in assessments:
+    for alert_type, message in assessment.mensagens:
         color = alert_colors[alert_type]
         assessment_html = f"""
         <div style="
@@ -252,98 +421,149 @@ def render_nest_risk_assessment_custom(nest):
         """
         st.markdown(assessment_html, unsafe_allow_html=True)
 
-def render_nest_risk_assessment(nest):
-    """Render risk assessment for individual nest"""
-    
-    risk_level = nest['risco']
-    days_to_hatch = nest['dias_para_eclosao']
-    has_predators = nest['predadores']
-    status = nest['status']
-    
-    st.markdown("**🎯 Avaliação de Risco:**")
-    
-    if risk_level == '🔴':
-        st.error("⚠️ **ATENÇÃO CRÍTICA NECESSÁRIA** - Este ninho requer intervenção imediata!")
-    elif risk_level == '🟡':
-        st.warning("⚠️ **Monitoramento Frequente** - Este ninho necessita acompanhamento regular.")
-    else:
-        st.success("✅ **Situação Estável** - Continue o monitoramento de rotina.")
-    
-    if days_to_hatch <= 2:
-        st.error("🐣 **ECLOSÃO IMINENTE** - Prepare-se para a eclosão nas próximas 48 horas!")
-    elif days_to_hatch <= 5:
-        st.warning("🐣 **Eclosão Próxima** - Aumentar frequência de monitoramento.")
-    
-    if has_predators and status == 'danificado':
-        st.error("🦅 **ALTA PRIORIDADE** - Ninho com predadores e danos necessita proteção urgente!")
-
-def render_export_options(nest_data):
+@st.fragment
+def render_export_options(nest_data, cube):
     """Render export options for the report"""
     
     st.markdown("---")
     st.markdown("### 📤 Opções de Exportação")
     
-    col1, col2 = st.columns(2)
+    # Reports pre-generated by the worker for the current data version are served as-is
+    data_version, snapshot = get_cache().instantaneo()
+    
+    col1, col2, col3 = st.columns(3)
     
     with col1:
-        if st.button("📊 Gerar Relatório CSV", type="secondary"):
-            generate_csv_report(nest_data)
+        render_report_download("csv", "📊 Gerar Relatório CSV", "⬇️ Baixar Relatório CSV",
+                               "relatorio_ninhos", data_version, snapshot, cube)
     
     with col2:
-        if st.button("📋 Gerar Relatório Resumido", type="secondary"):
-            generate_summary_report(nest_data)
+        render_report_download("resumo", "📋 Gerar Relatório Resumido",
+                               "⬇️ Baixar Relatório Resumido", "resumo_ninhos",
+                               data_version, snapshot, cube)
+    
+    with col3:
+        render_report_download("parquet", "🗃️ Gerar Relatório Parquet",
+                               "⬇️ Baixar Relatório Parquet", "relatorio_ninhos",
+                               data_version, snapshot, cube)
+    
+    render_executive_report_download(data_version, snapshot, cube)
+    
+    render_regional_reports(data_version, cube)
+
+def render_report_download(kind, generate_label, download_label, file_prefix,
+                           data_version, nest_data, cube):
+    """Offer the cached report for the data version, generating it on demand when missing"""
+    
+    artifacts = get_artifact_store()
+    partition = current_partition()
+    cached = artifacts.buscar(kind, data_version, partition)
+    
+    if cached is None:
+        if not st.button(generate_label, type="secondary", key=f"generate_{kind}"):
+            return
+        content = gerar_conteudo(kind, nest_data, cube)
+        if content is None:
+            st.info("ℹ️ Exportação Parquet indisponível: instale o pacote `pyarrow`.")
+            return
+        artifacts.guardar(kind, data_version, content, TIPOS_RELATORIO[kind][0],
+                          partition)
+        cached = artifacts.buscar(kind, data_version, partition)
+        if cached is None:
+            return
+    
+    extension, mime = TIPOS_RELATORIO[kind]
+    render_cached_download(cached, download_label, file_prefix, extension, mime, f"download_{kind}")
 
-def generate_csv_report(nest_data):
-    """Generate CSV report for download"""
+def render_cached_download(cached, label, file_prefix, extension, mime, key):
+    """Render the download button for a stored report, named after its creation time"""
     
-    df = pd.DataFrame(nest_data)
-    csv = df.to_csv(index=False)
+    content, metadata = cached
+    created_at = datetime.fromisoformat(metadata['criado_em'])
     
     st.download_button(
-        label="⬇️ Baixar Relatório CSV",
-        data=csv,
-        file_name=f"relatorio_ninhos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-        mime="text/csv"
+        label=label,
+        data=content,
+        file_name=f"{file_prefix}_{created_at.strftime('%Y%m%d_%H%M%S')}.{extension}",
+        mime=mime,
+        key=key
     )
 
-def generate_summary_report(nest_data):
-    """Generate summary report"""
-    
-    total_nests = contar_total_ninhos(nest_data)
-    total_eggs = get_total_ovos(nest_data)
-    hatching_soon = ninhos_prestes_a_eclodir(nest_data)
-    region_risk, risk_count = regiao_com_mais_ninhos_sob_risco(nest_data)
-    predator_damage = ninhos_com_predadores_e_danificados(nest_data)
-    
-    summary = f"""
-# 🐢 Relatório Resumido - Guardiões das Tartaruguinhas
-**Data:** {datetime.now().strftime('%d/%m/%Y %H:%M')}
-
-## 📊 Estatísticas Gerais
-- **Total de Ninhos:** {total_nests}
-- **Total de Ovos:** {total_eggs:,}
-- **Média de Ovos por Ninho:** {total_eggs/total_nests:.1f}
-
-## 🚨 Alertas Importantes
-- **Ninhos com Eclosão ≤ 5 dias:** {hatching_soon}
-- **Região com Mais Risco:** {region_risk} ({risk_count} ninhos)
-- **Ninhos com Predadores e Danificados:** {predator_damage}
-
-## 📈 Distribuição por Status
-"""
+def render_executive_report_download(data_version, nest_data, cube):
+    """Offer the executive report (HTML with charts, PDF when available) for one or all regions"""
     
-    status_counts = contar_ninhos_por_status(nest_data)
-    for status, count in status_counts.items():
-        summary += f"- **{status.title()}:** {count}\n"
+    st.markdown("#### 📑 Relatório Executivo")
     
-    summary += "\n## 🏖️ Distribuição por Região\n"
-    region_counts = contar_ninhos_por_regiao(nest_data)
-    for region, count in region_counts.items():
-        summary += f"- **{region}:** {count}\n"
+    scopes = ["Todas"] + list(cube.rotulos['regiao'])
+    selected_scope = st.selectbox("🏖️ Região do relatório", scopes, key="executive_scope")
+    region = None if selected_scope == "Todas" else selected_scope
     
-    st.download_button(
-        label="⬇️ Baixar Relatório Resumido",
-        data=summary,
-        file_name=f"resumo_ninhos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md",
-        mime="text/markdown"
-    )
+    artifacts = get_artifact_store()
+    partition = current_partition()
+    cached = artifacts.buscar(tipo_executivo("html", region), data_version, partition)
+    
+    if cached is None:
+        if not st.button("📑 Gerar Relatório Executivo", type="secondary", key="generate_executive"):
+            return
+        with st.spinner("Renderizando gráficos..."):
+            guardar_relatorios_executivos(artifacts, data_version, nest_data, cube, [region],
+                                          partition)
+    
+    file_prefix = f"relatorio_executivo_{region_slug(region)}"
+    col1, col2 = st.columns(2)
+    for column, (extension, mime) in zip((col1, col2), FORMATOS_EXECUTIVOS.items()):
+        cached = artifacts.buscar(tipo_executivo(extension, region), data_version, partition)
+        if cached is None:
+            continue
+        with column:
+            render_cached_download(cached, f"⬇️ Baixar Relatório Executivo ({extension.upper()})",
+                                   file_prefix, extension, mime, f"download_executive_{extension}")
+
+def region_slug(region):
+    """File-name friendly region name ('geral' for all regions)"""
+    return (region or 'geral').lower().replace(' ', '_')
+
+# Reports offered for each region: (artifact type, label, file prefix, extension, mime)
+REGIONAL_REPORTS = [
+    ("resumo", "📋 Resumo", "resumo_ninhos", *TIPOS_RELATORIO["resumo"]),
+    ("csv", "📊 CSV", "relatorio_ninhos", *TIPOS_RELATORIO["csv"]),
+    ("executivo-html", "📑 Executivo", "relatorio_executivo", "html", FORMATOS_EXECUTIVOS["html"]),
+]
+
+def render_regional_reports(data_version, cube):
+    """Generate every region's reports at once and offer the downloads"""
+    
+    st.markdown("#### 🏖️ Relatórios por Região")
+    
+    artifacts = get_artifact_store()
+    partition = current_partition()
+    regions = list(cube.rotulos['regiao'])
+    generated = set(artifacts.tipos_gerados(data_version, partition))
+    missing = [
+        region for region in regions
+        if any(tipo_regional(kind, region) not in generated for kind, *_ in REGIONAL_REPORTS)
+    ]
+    
+    if missing:
+        if not st.button("🗂️ Gerar Relatórios de Todas as Regiões", type="secondary", key="generate_regional"):
+            return
+        progress = st.progress(0.0, text="Gerando relatórios regionais...")
+        gerar_relatorios_regionais(
+            artifacts,
+            missing,
+            progresso=lambda done, total, region: progress.progress(
+                done / total, text=f"🏖️ {done}/{total} regiões concluídas ({region})"
+            ),
+            particao=partition
+        )
+    
+    for region in regions:
+        columns = st.columns([2] + [1] * len(REGIONAL_REPORTS))
+        columns[0].markdown(f"**{region}**")
+        for column, (kind, label, file_prefix, extension, mime) in zip(columns[1:], REGIONAL_REPORTS):
+            cached = artifacts.buscar(tipo_regional(kind, region), data_version, partition)
+            if cached is None:
+                continue
+            with column:
+                render_cached_download(cached, f"⬇️ {label}", f"{file_prefix}_{region_slug(region)}",
+                                       extension, mime, f"download_{kind}_{region_slug(region)}")
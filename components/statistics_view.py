@@ -1,37 +1,42 @@
-import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import streamlit as st
 from utils.statistics import *
+from utils.charts import *
+from utils.data_handler import (
+    load_sighting_counts, load_recent_sightings, load_hatch_forecast, load_chart_figures
+)
+from utils.nest import REGIOES
 
-def render_statistics(nest_data):
+def render_statistics(nest_data, cube, hatch_aggregates):
     """Render comprehensive statistics view"""
     
     st.markdown("## 📊 Estatísticas Avançadas")
     st.markdown("### 🌊 Análise Detalhada dos Dados de Monitoramento")
     
+    # Built once per data version and shared by every session of the partition
+    figures = load_chart_figures(build_chart_figures)
+    
     # Key statistics overview
-    render_statistics_overview(nest_data)
+    render_statistics_overview(cube)
     
     # Charts section
-    render_advanced_charts(nest_data)
+    render_advanced_charts(figures, cube, hatch_aggregates)
     
     # Detailed analytics
-    render_detailed_analytics(nest_data)
+    render_detailed_analytics(cube)
 
-def render_statistics_overview(nest_data):
+def render_statistics_overview(cube):
     """Render key statistics overview"""
     
     st.markdown("### 📈 Resumo Estatístico")
     
     # Calculate key metrics
-    total_nests = contar_total_ninhos(nest_data)
-    total_eggs = get_total_ovos(nest_data)
+    total_nests = contar_total_ninhos(cube)
+    total_eggs = get_total_ovos(cube)
     avg_eggs = total_eggs / total_nests if total_nests > 0 else 0
-    hatching_soon = ninhos_prestes_a_eclodir(nest_data)
-    region_risk, risk_count = regiao_com_mais_ninhos_sob_risco(nest_data)
-    predator_damage = ninhos_com_predadores_e_danificados(nest_data)
+    hatching_soon = ninhos_prestes_a_eclodir(cube)
+    region_risk, risk_count = regiao_com_mais_ninhos_sob_risco(cube)
+    predator_damage = ninhos_com_predadores_e_danificados(cube)
     
     # Display metrics in columns
     col1, col2, col3 = st.columns(3)
@@ -48,322 +53,307 @@ def render_statistics_overview(nest_data):
         st.metric("🚨 Região Mais Crítica", region_risk)
         st.metric("⚠️ Ninhos Críticos", risk_count)
 
-def render_advanced_charts(nest_data):
-    """Render advanced statistical charts"""
+# Figures built for each tab, in display order; all but the scatter slice the cube
+CHART_BUILDERS = {
+    'risco_status': figura_risco_por_status,
+    'media_ovos_risco': figura_media_ovos_por_risco,
+    'ninhos_regiao': figura_ninhos_por_regiao,
+    'ovos_regiao': figura_ovos_por_regiao,
+    'cronograma': figura_cronograma_eclosao,
+    'predadores_status': figura_predadores_por_status,
+    'impacto_predadores': figura_impacto_predadores,
+}
+
+# Built from the nest records themselves
+RECORD_CHART_BUILDERS = {
+    'eclosao_vs_ovos': figura_eclosao_vs_ovos,
+}
+
+# Built from the hatch-success aggregates kept by the store
+HATCH_CHART_BUILDERS = {
+    'sucesso_regiao': figura_sucesso_por_regiao,
+    'sucesso_risco': figura_sucesso_por_risco,
+}
+
+def build_chart_figures(nest_data, cube, hatch_aggregates):
+    """Build every chart of the tabs, keyed by chart name"""
+    figures = {name: builder(cube) for name, builder in CHART_BUILDERS.items()}
+    for name, builder in RECORD_CHART_BUILDERS.items():
+        figures[name] = builder(nest_data)
+    for name, builder in HATCH_CHART_BUILDERS.items():
+        figures[name] = builder(hatch_aggregates)
+    return figures
+
+@st.fragment
+def render_advanced_charts(figures, cube, hatch_aggregates):
+    """Render advanced statistical charts (a fragment: it reruns apart from the overview)"""
     
     st.markdown("---")
     st.markdown("### 📊 Visualizações Avançadas")
     
     # Create tabs for different chart categories
-    tab1, tab2, tab3, tab4 = st.tabs(["🚦 Análise de Risco", "🏖️ Análise Regional", "🐣 Cronograma de Eclosão", "🦅 Análise de Predadores"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["🚦 Análise de Risco", "🏖️ Análise Regional", "🐣 Cronograma de Eclosão", "🦅 Análise de Predadores", "🐢 Sucesso de Eclosão"])
     
     with tab1:
-        render_risk_analysis_charts(nest_data)
+        render_risk_analysis_charts(figures)
     
     with tab2:
-        render_regional_analysis_charts(nest_data)
+        render_regional_analysis_charts(figures)
     
     with tab3:
-        render_hatching_timeline_charts(nest_data)
+        render_hatching_timeline_charts(figures)
     
     with tab4:
-        render_predator_analysis_charts(nest_data)
+        render_predator_analysis_charts(figures, cube)
+    
+    with tab5:
+        render_hatch_success_charts(figures, hatch_aggregates)
 
-def render_risk_analysis_charts(nest_data):
+def render_risk_analysis_charts(figures):
     """Render risk analysis charts"""
     
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown("#### 🚦 Distribuição de Risco vs Status")
-        
-        # Create risk vs status matrix
-        risk_status_data = []
-        for nest in nest_data:
-            risk_status_data.append({
-                'risco': nest['risco'],
-                'status': nest['status'],
-                'quantidade_ovos': nest['quantidade_ovos']
-            })
-        
-        df_risk_status = pd.DataFrame(risk_status_data)
-        
-        # Create heatmap
-        pivot_table = df_risk_status.pivot_table(
-            index='risco', 
-            columns='status', 
-            values='quantidade_ovos', 
-            aggfunc='count', 
-            fill_value=0
-        )
-        
-        fig = px.imshow(
-            pivot_table.values,
-            labels=dict(x="Status", y="Risco", color="Número de Ninhos"),
-            x=pivot_table.columns,
-            y=pivot_table.index,
-            color_continuous_scale='Reds'
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(figures['risco_status'], use_container_width=True)
     
     with col2:
         st.markdown("#### 📊 Média de Ovos por Nível de Risco")
-        
-        risk_avg_eggs = media_ovos_por_risco(nest_data)
-        
-        fig = go.Figure(data=[
-            go.Bar(
-                x=list(risk_avg_eggs.keys()),
-                y=list(risk_avg_eggs.values()),
-                marker_color=['#4CAF50', '#FFC107', '#F44336']
-            )
-        ])
-        
-        fig.update_layout(
-            xaxis_title="Nível de Risco",
-            yaxis_title="Média de Ovos",
-            showlegend=False
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(figures['media_ovos_risco'], use_container_width=True)
 
-def render_regional_analysis_charts(nest_data):
+def render_regional_analysis_charts(figures):
     """Render regional analysis charts"""
     
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown("#### 🏖️ Ninhos por Região")
-        
-        region_counts = contar_ninhos_por_regiao(nest_data)
-        
-        fig = px.pie(
-            values=list(region_counts.values()),
-            names=list(region_counts.keys()),
-            color_discrete_sequence=px.colors.qualitative.Set3
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(figures['ninhos_regiao'], use_container_width=True)
     
     with col2:
         st.markdown("#### 📊 Total de Ovos por Região")
-        
-        region_eggs = {}
-        for nest in nest_data:
-            region = nest['regiao']
-            region_eggs[region] = region_eggs.get(region, 0) + nest['quantidade_ovos']
-        
-        fig = px.bar(
-            x=list(region_eggs.keys()),
-            y=list(region_eggs.values()),
-            color=list(region_eggs.values()),
-            color_continuous_scale='Blues'
-        )
-        
-        fig.update_layout(
-            xaxis_title="Região",
-            yaxis_title="Total de Ovos",
-            showlegend=False
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(figures['ovos_regiao'], use_container_width=True)
 
-def render_hatching_timeline_charts(nest_data):
+def render_hatching_timeline_charts(figures):
     """Render hatching timeline analysis"""
     
     st.markdown("#### 🐣 Cronograma de Eclosão")
     
-    # Group nests by hatching days
-    hatching_groups = {
-        'Imediato (≤2 dias)': [],
-        'Próximo (3-5 dias)': [],
-        'Curto prazo (6-15 dias)': [],
-        'Médio prazo (16-30 dias)': [],
-        'Longo prazo (>30 dias)': []
-    }
-    
-    for nest in nest_data:
-        days = nest['dias_para_eclosao']
-        if days <= 2:
-            hatching_groups['Imediato (≤2 dias)'].append(nest)
-        elif days <= 5:
-            hatching_groups['Próximo (3-5 dias)'].append(nest)
-        elif days <= 15:
-            hatching_groups['Curto prazo (6-15 dias)'].append(nest)
-        elif days <= 30:
-            hatching_groups['Médio prazo (16-30 dias)'].append(nest)
-        else:
-            hatching_groups['Longo prazo (>30 dias)'].append(nest)
-    
     col1, col2 = st.columns(2)
     
     with col1:
         # Timeline bar chart
-        timeline_counts = {k: len(v) for k, v in hatching_groups.items()}
-        
-        fig = px.bar(
-            x=list(timeline_counts.values()),
-            y=list(timeline_counts.keys()),
-            orientation='h',
-            color=list(timeline_counts.values()),
-            color_continuous_scale='RdYlGn_r'
-        )
-        
-        fig.update_layout(
-            xaxis_title="Número de Ninhos",
-            yaxis_title="Período de Eclosão",
-            showlegend=False
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(figures['cronograma'], use_container_width=True)
     
     with col2:
         # Scatter plot: Days to hatch vs Number of eggs
-        df_scatter = pd.DataFrame(nest_data)
-        
-        fig = px.scatter(
-            df_scatter,
-            x='dias_para_eclosao',
-            y='quantidade_ovos',
-            color='risco',
-            size='quantidade_ovos',
-            hover_data=['regiao', 'status'],
-            color_discrete_map={'🟢': '#4CAF50', '🟡': '#FFC107', '🔴': '#F44336'}
+        st.plotly_chart(figures['eclosao_vs_ovos'], use_container_width=True)
+    
+    render_hatch_forecast()
+
+# Measures offered by the hatching forecast chart
+FORECAST_MEASURES = {'filhotes': "🐢 Filhotes", 'ninhos': "🐣 Eclosões"}
+
+def render_hatch_forecast():
+    """Render the day-by-day hatching forecast per region, with uncertainty bands"""
+    
+    # Built from the cube once per data version, so it does not grow with the nests
+    forecast = load_hatch_forecast()
+    horizon = len(forecast.dias)
+    
+    st.markdown(f"#### 📅 Previsão de Eclosões (próximos {horizon} dias)")
+    
+    measure = st.radio(
+        "Medida:",
+        list(FORECAST_MEASURES),
+        format_func=FORECAST_MEASURES.get,
+        horizontal=True,
+        key="forecast_measure"
+    )
+    st.plotly_chart(figura_previsao_eclosao(forecast, measure), use_container_width=True)
+    
+    nests, _, nests_max = forecast.faixa('ninhos')
+    hatchlings, hatchlings_min, hatchlings_max = forecast.faixa('filhotes')
+    peak = int(hatchlings.argmax())
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("🐣 Eclosões Esperadas", f"{nests.sum():,.0f}")
+    
+    with col2:
+        st.metric(
+            "🐢 Filhotes Esperados", f"{hatchlings.sum():,.0f}",
+            help=f"No dia de pico: de {hatchlings_min[peak]:,.0f} a {hatchlings_max[peak]:,.0f}"
         )
-        
-        fig.update_layout(
-            xaxis_title="Dias para Eclosão",
-            yaxis_title="Quantidade de Ovos"
+    
+    with col3:
+        st.metric(
+            "📈 Dia de Pico", forecast.dias[peak].strftime('%d/%m'),
+            help=f"Até {nests_max[peak]:,.0f} eclosões e {hatchlings_max[peak]:,.0f} filhotes"
         )
-        
-        st.plotly_chart(fig, use_container_width=True)
+    
+    st.caption(
+        "Datas com ±{:.0f} dias de incerteza; filhotes = ovos × taxa de eclosão das "
+        "escavações registradas em cada região e risco.".format(forecast.desvio_dias)
+    )
+    st.download_button(
+        label="📥 Baixar Previsão (JSON)",
+        data=forecast.para_json().encode('utf-8'),
+        file_name="previsao_eclosao.json",
+        mime="application/json"
+    )
+
+# Windows offered for the sighting correlations, in days
+SIGHTING_WINDOWS = [7, 30, 90, 365]
 
-def render_predator_analysis_charts(nest_data):
+def render_predator_analysis_charts(figures, cube):
     """Render predator analysis charts"""
     
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown("#### 🦅 Presença de Predadores por Status")
-        
-        predator_status_data = []
-        for nest in nest_data:
-            predator_status_data.append({
-                'status': nest['status'],
-                'predadores': 'Com Predadores' if nest['predadores'] else 'Sem Predadores',
-                'count': 1
-            })
-        
-        df_predator = pd.DataFrame(predator_status_data)
-        predator_pivot = df_predator.pivot_table(
-            index='status',
-            columns='predadores',
-            values='count',
-            aggfunc='sum',
-            fill_value=0
-        )
-        
-        fig = px.bar(
-            predator_pivot,
-            barmode='group',
-            color_discrete_map={
-                'Com Predadores': '#F44336',
-                'Sem Predadores': '#4CAF50'
-            }
-        )
-        
-        fig.update_layout(
-            xaxis_title="Status do Ninho",
-            yaxis_title="Número de Ninhos"
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(figures['predadores_status'], use_container_width=True)
     
     with col2:
         st.markdown("#### 📊 Impacto dos Predadores")
-        
-        # Calculate predator impact statistics
-        with_predators = [n for n in nest_data if n['predadores']]
-        without_predators = [n for n in nest_data if not n['predadores']]
-        
-        predator_stats = {
-            'Categoria': ['Com Predadores', 'Sem Predadores'],
-            'Quantidade': [len(with_predators), len(without_predators)],
-            'Média de Ovos': [
-                sum(n['quantidade_ovos'] for n in with_predators) / len(with_predators) if with_predators else 0,
-                sum(n['quantidade_ovos'] for n in without_predators) / len(without_predators) if without_predators else 0
+        st.plotly_chart(figures['impacto_predadores'], use_container_width=True)
+    
+    render_sighting_correlations(cube)
+
+def render_sighting_correlations(cube):
+    """Render the correlation between logged predator sightings and nests"""
+    
+    st.markdown("#### 🔭 Avistamentos de Predadores × Ninhos")
+    
+    days = st.selectbox(
+        "📅 Janela:",
+        SIGHTING_WINDOWS,
+        index=1,
+        format_func=lambda d: f"Últimos {d} dias",
+        key="sighting_window"
+    )
+    # Read from the daily counts, so the cost does not grow with the number of sightings
+    counts = load_sighting_counts(days)
+    if not counts:
+        st.info("🦅 Nenhum avistamento de predador registrado nesta janela.")
+        return
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("##### 🐢 Ninhos Afetados por Espécie")
+        st.plotly_chart(figura_ninhos_afetados_por_especie(counts, cube), use_container_width=True)
+    
+    with col2:
+        st.markdown("##### 🏖️ Avistamentos por Região")
+        st.plotly_chart(figura_avistamentos_por_regiao(counts), use_container_width=True)
+    
+    # Nests have no coordinates: the sightings near a nest are those of its region
+    region = st.selectbox(
+        "🏖️ Avistamentos recentes perto dos ninhos de:", REGIOES, key="sighting_region"
+    )
+    recent = load_recent_sightings(region, days)
+    if not recent:
+        st.write(f"Nenhum avistamento em {region} nos últimos {days} dias.")
+        return
+    st.caption(
+        f"{avistamentos_por_regiao(counts).get(region, 0):,} avistamento(s) em {region}; "
+        f"{contar_ninhos_por_regiao(cube).get(region, 0)} ninho(s) na região. "
+        f"Mais recentes:"
+    )
+    st.dataframe(
+        pd.DataFrame({
+            '🕐 Momento': [s.momento.strftime('%d/%m/%Y %H:%M') for s in recent],
+            '🦅 Espécie': [s.especie for s in recent],
+            '📍 Coordenadas': [
+                f"{s.latitude:.5f}, {s.longitude:.5f}" if s.latitude is not None else '—'
+                for s in recent
             ],
-            'Ninhos Danificados': [
-                sum(1 for n in with_predators if n['status'] == 'danificado'),
-                sum(1 for n in without_predators if n['status'] == 'danificado')
-            ]
-        }
-        
-        df_stats = pd.DataFrame(predator_stats)
-        
-        fig = make_subplots(
-            rows=1, cols=2,
-            subplot_titles=('Quantidade de Ninhos', 'Ninhos Danificados'),
-            specs=[[{"type": "bar"}, {"type": "bar"}]]
-        )
-        
-        fig.add_trace(
-            go.Bar(x=df_stats['Categoria'], y=df_stats['Quantidade'], name='Total'),
-            row=1, col=1
-        )
-        
-        fig.add_trace(
-            go.Bar(x=df_stats['Categoria'], y=df_stats['Ninhos Danificados'], name='Danificados'),
-            row=1, col=2
-        )
-        
-        fig.update_layout(showlegend=False)
-        
-        st.plotly_chart(fig, use_container_width=True)
+        }),
+        use_container_width=True,
+        hide_index=True
+    )
 
-def render_detailed_analytics(nest_data):
+def render_hatch_success_charts(figures, hatch_aggregates):
+    """Render hatch and emergence success rates from the precomputed aggregates"""
+    
+    summary = resumo_sucesso_eclosao(hatch_aggregates)
+    if summary['ninhos'] == 0:
+        st.info("🐣 Nenhum resultado de escavação registrado ainda.")
+        return
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("🏖️ Ninhos Escavados", summary['ninhos'])
+        st.metric("🥚 Ovos Avaliados", f"{summary['ovos']:,}")
+    
+    with col2:
+        st.metric("🐣 Taxa de Eclosão", f"{summary['taxa_eclosao']:.1f}%")
+        st.metric("🐢 Filhotes Eclodidos", f"{summary['eclodidos']:,}")
+    
+    with col3:
+        st.metric("🌊 Taxa de Emergência", f"{summary['taxa_emergencia']:.1f}%")
+        st.metric("💀 Ovos Mortos", f"{summary['ovos_mortos']:,}")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("#### 🏖️ Sucesso por Região")
+        st.plotly_chart(figures['sucesso_regiao'], use_container_width=True)
+    
+    with col2:
+        st.markdown("#### 🚦 Sucesso por Nível de Risco")
+        st.plotly_chart(figures['sucesso_risco'], use_container_width=True)
+
+def render_detailed_analytics(cube):
     """Render detailed analytics section"""
     
     st.markdown("---")
     st.markdown("### 🔍 Análises Detalhadas")
     
+    total_nests = contar_total_ninhos(cube)
+    if total_nests == 0:
+        st.info("🐢 Nenhum ninho registrado ainda.")
+        return
+    
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown("#### 📊 Estatísticas por Categoria")
         
         # Status distribution
-        status_counts = contar_ninhos_por_status(nest_data)
+        status_counts = contar_ninhos_por_status(cube)
         st.write("**Distribuição por Status:**")
         for status, count in status_counts.items():
-            percentage = (count / len(nest_data)) * 100
+            percentage = (count / total_nests) * 100
             st.write(f"- {status.title()}: {count} ({percentage:.1f}%)")
         
         # Risk distribution
-        risk_counts = {"🟢": 0, "🟡": 0, "🔴": 0}
-        for nest in nest_data:
-            risk_counts[nest['risco']] += 1
+        risk_counts = cube.por('risco')
         
         st.write("**Distribuição por Risco:**")
         risk_labels = {"🟢": "Baixo", "🟡": "Médio", "🔴": "Alto"}
         for risk, count in risk_counts.items():
-            percentage = (count / len(nest_data)) * 100
+            percentage = (count / total_nests) * 100
             st.write(f"- {risk} {risk_labels[risk]}: {count} ({percentage:.1f}%)")
     
     with col2:
         st.markdown("#### 🎯 Indicadores de Performance")
         
         # Calculate performance indicators
-        total_eggs = get_total_ovos(nest_data)
-        avg_eggs = total_eggs / len(nest_data)
-        critical_ratio = sum(1 for n in nest_data if n['risco'] == '🔴') / len(nest_data) * 100
-        predator_ratio = sum(1 for n in nest_data if n['predadores']) / len(nest_data) * 100
+        total_eggs = get_total_ovos(cube)
+        avg_eggs = total_eggs / total_nests
+        critical_ratio = cube.total(risco='🔴') / total_nests * 100
+        predator_ratio = cube.total(predadores=True) / total_nests * 100
         
         st.metric("📊 Média de Ovos por Ninho", f"{avg_eggs:.1f}")
         st.metric("🚨 Taxa de Risco Crítico", f"{critical_ratio:.1f}%")
         st.metric("🦅 Taxa de Presença de Predadores", f"{predator_ratio:.1f}%")
         
         # Efficiency indicator
-        intact_ratio = sum(1 for n in nest_data if n['status'] == 'intacto') / len(nest_data) * 100
+        intact_ratio = cube.total(status='intacto') / total_nests * 100
         st.metric("✅ Taxa de Ninhos Intactos", f"{intact_ratio:.1f}%")
@@ -0,0 +1,86 @@
+"""
+Sobe várias réplicas do app (e o worker) compartilhando o mesmo banco de ninhos.
+
+    python deploy/run_replicas.py --replicas 4 --porta-inicial 5000 --porta-metricas-inicial 9464
+
+Cada réplica é um servidor Streamlit independente com seu próprio cache de
+leitura; as escritas de qualquer réplica chegam às demais pelo
+`PRAGMA data_version` do SQLite (ver utils/nest_cache.py). Coloque um
+balanceador com sessões fixas na frente (exemplo em deploy/nginx.conf.example).
+Cada réplica serve /metrics na própria porta (porta de métricas inicial + índice),
+e o worker na porta seguinte à da última réplica. Cada réplica tem também a sua
+fila de sincronização (`fila_offline_<n>.db`, ao lado do banco): a fila é um
+buffer local do processo e não pode ser compartilhada.
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def porta_metricas(args, indice: int) -> int:
+    return args.porta_metricas_inicial + indice if args.porta_metricas_inicial else 0
+
+
+def caminho_fila(args, indice: int) -> str:
+    pasta = os.path.dirname(os.path.abspath(args.db))
+    return os.path.join(pasta, f"fila_offline_{indice + 1}.db")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Réplicas dos Guardiões das Tartaruguinhas")
+    parser.add_argument("--replicas", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--porta-inicial", type=int, default=5000)
+    parser.add_argument("--porta-metricas-inicial", type=int, default=9464,
+                        help="Porta do /metrics da primeira réplica (0 = desligado)")
+    parser.add_argument("--db", default=os.path.join(RAIZ, "data", "ninhos.db"))
+    parser.add_argument("--sem-worker", action="store_true", help="Não inicia o worker.py")
+    args = parser.parse_args()
+
+    ambiente = dict(os.environ, GUARDIOES_DB=os.path.abspath(args.db))
+    processos = []
+
+    for indice in range(args.replicas):
+        porta = args.porta_inicial + indice
+        processos.append(subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", "app.py", "--server.port", str(porta)],
+            cwd=RAIZ,
+            env=dict(
+                ambiente,
+                GUARDIOES_FILA=caminho_fila(args, indice),
+                GUARDIOES_METRICAS_PORTA=str(porta_metricas(args, indice)),
+            ),
+        ))
+        print(f"🐢 Réplica {indice + 1} em http://0.0.0.0:{porta}")
+
+    if not args.sem_worker:
+        processos.append(subprocess.Popen(
+            [sys.executable, "worker.py",
+             "--porta-metricas", str(porta_metricas(args, args.replicas))],
+            cwd=RAIZ,
+            env=ambiente,
+        ))
+        print("🚨 Worker de alertas iniciado")
+
+    def encerrar(*_):
+        for processo in processos:
+            processo.terminate()
+        for processo in processos:
+            processo.wait()
+        sys.exit(0)
+
+    signal.signal(signal.SIGINT, encerrar)
+    signal.signal(signal.SIGTERM, encerrar)
+
+    # Se algum processo cair, derruba todos para o supervisor reiniciar o conjunto
+    while all(processo.poll() is None for processo in processos):
+        time.sleep(1)
+    encerrar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+"""
+Teste de carga dos Guardiões das Tartaruguinhas.
+
+Simula muitas sessões simultâneas do app, sem rede nem navegador, usando o
+AppTest do Streamlit: cada sessão executa `app.py` (o `main()` completo, com
+a barra lateral e a página escolhida) e segue uma mistura de trocas de
+página, trocas de organização/projeto, cadastros de ninho e recarregamentos.
+Os ninhos sintéticos são divididos entre várias partições e cada sessão abre
+numa delas, como os links compartilhados de cada projeto.
+
+As sessões são distribuídas entre processos, cada um no papel de uma réplica
+do app. Dentro de uma réplica, as sessões são threads que compartilham os
+caches de `st.cache_resource` e executam um rerun por vez (o AppTest usa um
+runtime global; no servidor real, o GIL tem efeito parecido). A latência de
+cada rerun inclui a espera na fila da réplica.
+
+Para cada nível de concorrência, informa os percentis de latência, a vazão
+e a memória de cada processo:
+
+    python loadtest.py                             # 1, 10, 50 sessões
+    python loadtest.py --sessoes 10 100 300 --processos 4 --ninhos 20000 --particoes 8
+
+Os dados vão para um banco temporário (nunca o banco real), a menos que
+`--db` seja informado.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+SCRIPT_APP = os.path.join(RAIZ, "app.py")
+
+# Páginas do menu lateral e o peso de cada uma na navegação simulada
+PAGINAS = {
+    "🏖️ Dashboard Principal": 25,
+    "📊 Estatísticas": 15,
+    "📋 Relatório Completo": 15,
+    "👥 Guardiões": 10,
+    "➕ Adicionar Ninho": 10,
+    "🐣 Pós-Eclosão": 10,
+    "🦅 Avistamentos": 10,
+    "🧭 Patrulha": 5,
+}
+
+# Mistura de interações de cada sessão: nome -> peso
+INTERACOES = {
+    "navegar": 60,
+    "trocar_particao": 10,
+    "cadastrar": 15,
+    "recarregar": 15,
+}
+
+PERCENTIS = (50, 90, 99)
+
+
+def memoria_processo() -> float:
+    """Memória residente atual do processo, em MB."""
+    try:
+        with open("/proc/self/statm") as arquivo:
+            paginas = int(arquivo.read().split()[1])
+        return paginas * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except (OSError, ValueError):
+        # Fora do Linux, usa o pico
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def particoes_de_carga(quantidade: int) -> list:
+    """A partição padrão (com os ninhos iniciais) e mais `quantidade - 1` projetos de teste."""
+    from utils.nest import Particao, PARTICAO_PADRAO
+
+    return [PARTICAO_PADRAO] + [
+        Particao(f"ONG Carga {numero}", "Temporada") for numero in range(1, quantidade)
+    ]
+
+
+def preparar_banco(caminho: str, ninhos: int, semente: int, particoes: int = 1):
+    """
+    Cria o banco do teste com `ninhos` ninhos sintéticos (além dos iniciais),
+    sorteados entre as partições de carga.
+    """
+    from utils.nest import REGIOES, STATUS, RISCOS, MAX_DIAS_ECLOSAO
+    from utils.nest_store import NestStore
+
+    sorteio = random.Random(semente)
+    particoes = particoes_de_carga(particoes)
+    store = NestStore(caminho)
+    try:
+        lote = [
+            {
+                **sorteio.choice(particoes)._asdict(),
+                "regiao": sorteio.choice(REGIOES),
+                "quantidade_ovos": sorteio.randint(40, 160),
+                "status": sorteio.choice(STATUS),
+                "risco": sorteio.choice(RISCOS),
+                "dias_para_eclosao": sorteio.randint(0, MAX_DIAS_ECLOSAO),
+                "predadores": sorteio.random() < 0.3,
+                "guardiao": f"Guardião {sorteio.randint(1, 300)}",
+                "observacoes": sorteio.choice([None, "Pegadas de caranguejo", "Maré alta"]),
+            }
+            for _ in range(ninhos)
+        ]
+        for inicio in range(0, len(lote), 5000):
+            store.inserir_varios(lote[inicio:inicio + 5000])
+    finally:
+        store.fechar()
+
+
+class SessaoSimulada:
+    """Uma sessão do app, com o próprio estado, conduzida por um AppTest."""
+
+    def __init__(
+        self, numero: int, semente: int, timeout: float, vez: threading.Lock, particoes: list
+    ):
+        from streamlit.testing.v1 import AppTest
+
+        self.numero = numero
+        self.sorteio = random.Random(semente * 100_003 + numero)
+        self.app = AppTest.from_file(SCRIPT_APP, default_timeout=timeout)
+        # Abre num projeto sorteado, como quem chega por um link compartilhado
+        particao = self.sorteio.choice(particoes)
+        self.app.query_params["organizacao"] = particao.organizacao
+        self.app.query_params["projeto"] = particao.projeto
+        self.vez = vez
+        self.latencias: List[float] = []
+        self.erros: List[str] = []
+
+    def _executar(self, acao):
+        inicio = time.perf_counter()
+        try:
+            with self.vez:
+                acao().run()
+        except Exception as erro:
+            self.erros.append(f"{type(erro).__name__}: {erro}")
+            return
+        self.latencias.append(time.perf_counter() - inicio)
+        if self.app.exception:
+            self.erros.append(str(self.app.exception[0].value))
+
+    def _menu(self):
+        # O primeiro seletor da barra lateral é o de organização/projeto
+        return self.app.sidebar.selectbox[1]
+
+    def navegar(self):
+        paginas = list(PAGINAS)
+        pagina = self.sorteio.choices(paginas, weights=list(PAGINAS.values()))[0]
+        self._executar(lambda: self._menu().select(pagina))
+
+    def trocar_particao(self):
+        seletor = self.app.sidebar.selectbox[0]
+        indice = self.sorteio.randrange(len(seletor.options))
+        self._executar(lambda: seletor.select_index(indice))
+
+    def cadastrar(self):
+        if self._menu().value != "➕ Adicionar Ninho":
+            self._executar(lambda: self._menu().select("➕ Adicionar Ninho"))
+        try:
+            guardiao = self.app.text_input(key="guardian_name_input")
+        except KeyError:
+            self.erros.append("Formulário de cadastro não encontrado")
+            return
+        if not guardiao.value:
+            self._executar(lambda: guardiao.input(f"Guardião de Carga {self.numero}"))
+        botoes = [botao for botao in self.app.button if botao.label == "🐢 Registrar Ninho"]
+        if botoes:
+            self._executar(botoes[0].click)
+
+    def recarregar(self):
+        self._executar(lambda: self.app)
+
+    def rodar(self, interacoes: int):
+        """Abre a sessão e executa a sequência de interações sorteadas."""
+        self._executar(lambda: self.app)
+        if not self.app.sidebar.selectbox:
+            return
+        nomes = list(INTERACOES)
+        for _ in range(interacoes):
+            getattr(self, self.sorteio.choices(nomes, weights=list(INTERACOES.values()))[0])()
+
+
+def rodar_replica(
+    numeros: List[int],
+    interacoes: int,
+    particoes: int,
+    semente: int,
+    timeout: float,
+    pasta: str,
+    largada,
+) -> Dict:
+    """
+    Roda, num processo, as sessões de uma réplica em threads e retorna as
+    latências, os erros, o intervalo de execução e a memória do processo.
+    """
+    # Processo novo (spawn): o app importa components/ e utils/ da raiz
+    os.chdir(RAIZ)
+    if RAIZ not in sys.path:
+        sys.path.insert(0, RAIZ)
+    # Cada réplica tem a própria fila offline, como cada instalação do app
+    os.environ["GUARDIOES_FILA"] = os.path.join(pasta, f"fila_{os.getpid()}.db")
+    # Várias réplicas na mesma máquina: sem o servidor de /metrics, que disputaria a porta
+    os.environ["GUARDIOES_METRICAS_PORTA"] = "0"
+
+    vez = threading.Lock()
+    particoes = particoes_de_carga(particoes)
+    # Aquecimento fora da medição: importações e caches compartilhados da réplica
+    for particao in particoes:
+        SessaoSimulada(-1, semente, timeout, vez, [particao]).recarregar()
+
+    memoria_inicial = memoria_processo()
+    sessoes = [SessaoSimulada(numero, semente, timeout, vez, particoes) for numero in numeros]
+    # Todas as réplicas começam juntas, como no pico do fim de tarde
+    largada.wait()
+
+    inicio = time.time()
+    with ThreadPoolExecutor(max_workers=len(sessoes), thread_name_prefix="sessao") as executor:
+        list(executor.map(lambda sessao: sessao.rodar(interacoes), sessoes))
+    fim = time.time()
+
+    # Com as sessões ainda abertas
+    memoria_final = memoria_processo()
+    return {
+        "latencias": [l for sessao in sessoes for l in sessao.latencias],
+        "erros": [erro for sessao in sessoes for erro in sessao.erros],
+        "inicio": inicio,
+        "fim": fim,
+        "memoria_mb": memoria_final,
+        "kb_por_sessao": (memoria_final - memoria_inicial) * 1024 / len(sessoes),
+    }
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil p (0-100) por interpolação linear; 0 se não houver valores."""
+    if not valores:
+        return 0.0
+    if len(valores) == 1:
+        return valores[0]
+    return statistics.quantiles(valores, n=100, method="inclusive")[int(p) - 1]
+
+
+def medir_nivel(
+    sessoes: int,
+    processos: int,
+    interacoes: int,
+    particoes: int,
+    semente: int,
+    timeout: float,
+    pasta: str,
+) -> Dict:
+    """Roda `sessoes` sessões simultâneas em `processos` réplicas e resume as medidas."""
+    processos = max(1, min(processos, sessoes))
+    distribuicao = [list(range(sessoes))[i::processos] for i in range(processos)]
+
+    contexto = multiprocessing.get_context("spawn")
+    with contexto.Manager() as gerente:
+        largada = gerente.Barrier(processos)
+        with ProcessPoolExecutor(max_workers=processos, mp_context=contexto) as executor:
+            replicas = list(executor.map(
+                rodar_replica,
+                distribuicao,
+                [interacoes] * processos,
+                [particoes] * processos,
+                [semente] * processos,
+                [timeout] * processos,
+                [pasta] * processos,
+                [largada] * processos,
+            ))
+
+    latencias = sorted(l for replica in replicas for l in replica["latencias"])
+    erros = [erro for replica in replicas for erro in replica["erros"]]
+    duracao = max(r["fim"] for r in replicas) - min(r["inicio"] for r in replicas)
+    memorias = [replica["memoria_mb"] for replica in replicas]
+    return {
+        "sessoes": sessoes,
+        "processos": processos,
+        "execucoes": len(latencias),
+        "erros": len(erros),
+        "primeiro_erro": erros[0] if erros else None,
+        "latencia_ms": {
+            f"p{p}": round(percentil(latencias, p) * 1000, 1) for p in PERCENTIS
+        } | {"max": round(latencias[-1] * 1000, 1) if latencias else 0.0},
+        "vazao": round(len(latencias) / duracao, 1) if duracao else 0.0,
+        "duracao_s": round(duracao, 2),
+        "memoria_mb_por_processo": round(max(memorias), 1),
+        "kb_por_sessao": round(statistics.mean(r["kb_por_sessao"] for r in replicas), 1),
+    }
+
+
+def imprimir(resultados: List[Dict]):
+    colunas = ["sessões", "processos", "reruns", "erros"] + [f"p{p} ms" for p in PERCENTIS]
+    colunas += ["máx ms", "reruns/s", "RSS MB", "KB/sessão"]
+    print(" | ".join(f"{coluna:>9}" for coluna in colunas))
+    for r in resultados:
+        valores = [r["sessoes"], r["processos"], r["execucoes"], r["erros"]]
+        valores += [r["latencia_ms"][f"p{p}"] for p in PERCENTIS]
+        valores += [r["latencia_ms"]["max"], r["vazao"], r["memoria_mb_por_processo"]]
+        valores += [r["kb_por_sessao"]]
+        print(" | ".join(f"{valor:>9}" for valor in valores))
+    for r in resultados:
+        if r["primeiro_erro"]:
+            print(f"⚠️ {r['sessoes']} sessões, primeiro erro: {r['primeiro_erro']}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Teste de carga do app dos Guardiões")
+    parser.add_argument(
+        "--sessoes", type=int, nargs="+", default=[1, 10, 50],
+        help="Níveis de concorrência (sessões simultâneas)",
+    )
+    parser.add_argument(
+        "--processos", type=int, default=os.cpu_count() or 1,
+        help="Réplicas do app (processos) entre as quais as sessões são divididas",
+    )
+    parser.add_argument(
+        "--interacoes", type=int, default=10, help="Interações por sessão após a abertura"
+    )
+    parser.add_argument(
+        "--ninhos", type=int, default=1000, help="Ninhos sintéticos no banco de teste"
+    )
+    parser.add_argument(
+        "--particoes", type=int, default=3,
+        help="Organizações/projetos entre os quais os ninhos e as sessões são divididos",
+    )
+    parser.add_argument("--db", help="Banco já existente (padrão: banco temporário)")
+    parser.add_argument("--semente", type=int, default=42, help="Semente do sorteio")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Limite de cada rerun (s)")
+    parser.add_argument("--json", help="Grava os resultados neste arquivo JSON")
+    args = parser.parse_args(argv)
+
+    # O app lê assets/ com caminho relativo à raiz do projeto
+    os.chdir(RAIZ)
+    sys.path.insert(0, RAIZ)
+
+    pasta = tempfile.mkdtemp(prefix="guardioes-carga-")
+    # Herdado pelas réplicas: o caminho padrão do banco é lido na importação
+    if args.db:
+        os.environ["GUARDIOES_DB"] = os.path.abspath(args.db)
+    else:
+        os.environ["GUARDIOES_DB"] = os.path.join(pasta, "ninhos.db")
+        preparar_banco(os.environ["GUARDIOES_DB"], args.ninhos, args.semente, args.particoes)
+
+    resultados = []
+    for sessoes in args.sessoes:
+        resultado = medir_nivel(
+            sessoes, args.processos, args.interacoes, args.particoes, args.semente,
+            args.timeout, pasta,
+        )
+        resultados.append(resultado)
+        print(
+            f"… {sessoes} sessões: {resultado['execucoes']} reruns em "
+            f"{resultado['duracao_s']} s", file=sys.stderr,
+        )
+
+    imprimir(resultados)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as arquivo:
+            json.dump(resultados, arquivo, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
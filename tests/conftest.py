@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+
+# Os módulos são importados como no app (`from utils...`), a partir da raiz do repositório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.nest_store import NestStore  # noqa: E402
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = NestStore(str(tmp_path / "ninhos.db"))
+    yield store
+    store.fechar()
+
+
+@pytest.fixture
+def ninho():
+    """Fábrica de ninhos válidos (dicionários), com os campos que o teste quiser trocar."""
+
+    def criar(**campos):
+        dados = {
+            "regiao": "Praia Norte",
+            "quantidade_ovos": 100,
+            "status": "intacto",
+            "risco": "🟢",
+            "dias_para_eclosao": 10,
+            "predadores": False,
+            "guardiao": "Ana Souza",
+        }
+        dados.update(campos)
+        return dados
+
+    return criar
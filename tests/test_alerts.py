@@ -0,0 +1,92 @@
+from utils.alerts import MotorAlertas
+
+
+def _alterar(store, ninho_id, carimbo, **campos):
+    store.aplicar_alteracoes(
+        [{"id": ninho_id, "carimbo": carimbo, "dispositivo": "sessao", "campos": campos}]
+    )
+
+
+def _regras(motor):
+    return sorted((alerta["ninho_id"], alerta["regra"]) for alerta in motor.pendentes())
+
+
+def test_alerta_dispara_uma_vez_e_avanca_o_cursor(store, ninho):
+    motor = MotorAlertas(store)
+    ninho_id = store.inserir(ninho(dias_para_eclosao=1))
+
+    assert motor.avaliar() == 1
+    assert motor.cursor() == store.versao_atual()
+    assert _regras(motor) == [(ninho_id, "eclosao_iminente")]
+    # Sem novas versões, nada é relido nem disparado de novo
+    assert motor.avaliar() == 0
+
+
+def test_alteracao_que_mantem_a_regra_nao_duplica(store, ninho):
+    motor = MotorAlertas(store)
+    _alterar(store, "n1", 1, **ninho(dias_para_eclosao=2))
+    motor.avaliar()
+
+    # Nova versão do ninho, mesma regra ainda valendo
+    _alterar(store, "n1", 2, dias_para_eclosao=1)
+    assert motor.avaliar() == 0
+    assert len(motor.pendentes()) == 1
+
+
+def test_regra_que_deixa_de_valer_pode_disparar_de_novo(store, ninho):
+    motor = MotorAlertas(store)
+    _alterar(store, "n1", 1, **ninho(dias_para_eclosao=2))
+    motor.avaliar()
+
+    _alterar(store, "n1", 2, dias_para_eclosao=10)
+    assert motor.avaliar() == 0
+    _alterar(store, "n1", 3, dias_para_eclosao=1)
+    assert motor.avaliar() == 1
+    assert _regras(motor) == [("n1", "eclosao_iminente")] * 2
+
+
+def test_reinicio_retoma_do_cursor_gravado(store, ninho):
+    MotorAlertas(store).avaliar()
+    store.inserir(ninho(dias_para_eclosao=0))
+    assert MotorAlertas(store).avaliar() == 1
+
+    # Um novo processo (motor novo sobre o mesmo banco) não dispara de novo
+    reiniciado = MotorAlertas(store)
+    assert reiniciado.cursor() == store.versao_atual()
+    assert reiniciado.avaliar() == 0
+    assert len(reiniciado.pendentes()) == 1
+
+
+def test_outbox_esvazia_depois_da_entrega(store, ninho):
+    motor = MotorAlertas(store)
+    store.inserir_varios([ninho(dias_para_eclosao=1), ninho(predadores=True, status="danificado")])
+    motor.avaliar()
+
+    pendentes = motor.pendentes()
+    assert [alerta["id"] for alerta in pendentes] == sorted(alerta["id"] for alerta in pendentes)
+    motor.marcar_entregues([pendentes[0]["id"]])
+    assert [alerta["id"] for alerta in motor.pendentes()] == [p["id"] for p in pendentes[1:]]
+
+    motor.marcar_entregues([alerta["id"] for alerta in motor.pendentes()])
+    assert motor.pendentes() == []
+    # Entregar não reabre a deduplicação: o ninho continua com os alertas ativos
+    assert motor.avaliar() == 0
+
+
+def test_lote_nao_corta_uma_versao_ao_meio(store, ninho):
+    motor = MotorAlertas(store)
+    store.inserir_varios([ninho(dias_para_eclosao=1) for _ in range(5)])
+    store.inserir(ninho(dias_para_eclosao=1))
+
+    assert motor.avaliar(limite=2) == 6
+    assert motor.cursor() == store.versao_atual()
+
+
+def test_dados_do_alerta_guardam_o_ninho(store, ninho):
+    motor = MotorAlertas(store)
+    ninho_id = store.inserir(ninho(dias_para_eclosao=1, guardiao="Bia Lima"))
+    motor.avaliar()
+
+    (alerta,) = motor.pendentes()
+    assert alerta["ninho"]["id"] == ninho_id
+    assert alerta["ninho"]["guardiao"] == "Bia Lima"
@@ -0,0 +1,141 @@
+import json
+import os
+
+import pytest
+
+from utils.archive import ArquivoTemporadas, TemporadaArquivada, arquivar_temporada
+from utils.cube import CuboNinhos
+from utils.nest import Ninho, PARTICAO_PADRAO, Particao, REGIOES, RISCOS, STATUS
+
+ORG_A = Particao("Org A", "p1")
+ORG_B = Particao("Org B", "p1")
+
+
+def _arquivar_duas_organizacoes(store, ninho, pasta):
+    store.inserir_varios([ninho(**ORG_A._asdict()), ninho(**ORG_A._asdict(), risco="🔴")])
+    id_b = store.inserir(ninho(**ORG_B._asdict(), quantidade_ovos=60, dias_para_eclosao=0))
+    store.registrar_resultado(id_b, 50, 45, 10, "2025-11-01")
+    return arquivar_temporada(pasta, "2025", store.listar(), store.resultados_eclosao())
+
+
+def test_temporada_arquivada_mantem_as_particoes(store, ninho, tmp_path):
+    temporada = TemporadaArquivada(
+        _arquivar_duas_organizacoes(store, ninho, str(tmp_path / "temporadas"))
+    )
+
+    assert [temporada.ninho(i).particao for i in range(temporada.total)] == [ORG_A, ORG_A, ORG_B]
+    assert temporada.cubo().total() == 3
+    assert temporada.cubo(ORG_A).total() == 2
+    assert temporada.cubo(ORG_B).total("ovos") == 60
+    assert temporada.cubo(PARTICAO_PADRAO).total() == 0
+
+    assert temporada.agregados_eclosao(ORG_A) == []
+    (agregado,) = temporada.agregados_eclosao(ORG_B)
+    assert agregado["eclodidos"] == 50
+
+
+def test_arquivo_filtra_a_particao_em_todas_as_temporadas(store, ninho, tmp_path):
+    pasta = str(tmp_path / "temporadas")
+    _arquivar_duas_organizacoes(store, ninho, pasta)
+    arquivo = ArquivoTemporadas(pasta)
+
+    assert arquivo.cubo(particao=ORG_A).total() == 2
+    assert arquivo.agregados_eclosao(particao=ORG_A) == []
+    assert len(arquivo.agregados_eclosao(particao=ORG_B)) == 1
+
+
+def test_temporada_anterior_as_particoes_fica_na_padrao(store, ninho, tmp_path):
+    destino = _arquivar_duas_organizacoes(store, ninho, str(tmp_path / "temporadas"))
+    # Simula um arquivo gravado antes das partições
+    os.remove(os.path.join(destino, "codigo_particao.npy"))
+    caminho_meta = os.path.join(destino, "meta.json")
+    with open(caminho_meta, encoding="utf-8") as arquivo:
+        meta = json.load(arquivo)
+    del meta["particoes"]
+    with open(caminho_meta, "w", encoding="utf-8") as arquivo:
+        json.dump(meta, arquivo)
+
+    temporada = TemporadaArquivada(destino)
+    assert temporada.ninho(2).particao == PARTICAO_PADRAO
+    assert temporada.cubo(PARTICAO_PADRAO).total() == 3
+    assert temporada.cubo(ORG_A).total() == 0
+
+
+def _temporada_variada(store, ninho):
+    """Ninhos com todos os campos variando, parte com resultado de escavação."""
+    dados = [
+        ninho(
+            **(ORG_A if i % 2 else PARTICAO_PADRAO)._asdict(),
+            regiao=REGIOES[i % len(REGIOES)],
+            quantidade_ovos=60 + i,
+            status=STATUS[i % len(STATUS)],
+            risco=RISCOS[i % len(RISCOS)],
+            dias_para_eclosao=0 if i % 4 == 0 else i,
+            predadores=i % 3 == 0,
+            guardiao=f"Guardião {i % 4}",
+            observacoes=f"Ninho nº {i}: ovos à vista 🐢" if i % 5 else "",
+        )
+        for i in range(20)
+    ]
+    ids = store.inserir_varios(dados)
+    for i, ninho_id in enumerate(ids):
+        if i % 4 == 0:
+            store.registrar_resultado(ninho_id, 40 + i, 30 + i, 5, f"2025-11-{i + 1:02d}")
+    return store.listar(), store.resultados_eclosao()
+
+
+def test_ida_e_volta_preserva_cada_ninho(store, ninho, tmp_path):
+    ninhos, resultados = _temporada_variada(store, ninho)
+    temporada = TemporadaArquivada(
+        arquivar_temporada(str(tmp_path / "temporadas"), "2025", ninhos, resultados)
+    )
+
+    assert temporada.total == len(ninhos)
+    for posicao, original in enumerate(ninhos):
+        restaurado = temporada.ninho(posicao)
+        assert restaurado.para_dict() == original.para_dict()
+        assert restaurado.particao == original.particao
+
+
+def test_ida_e_volta_preserva_cubo_e_agregados(store, ninho, tmp_path):
+    ninhos, resultados = _temporada_variada(store, ninho)
+    temporada = TemporadaArquivada(
+        arquivar_temporada(str(tmp_path / "temporadas"), "2025", ninhos, resultados)
+    )
+
+    def ordenar(linhas):
+        return sorted(linhas, key=lambda linha: (linha["regiao"], linha["risco"]))
+
+    for particao in (None, ORG_A, PARTICAO_PADRAO):
+        esperado = CuboNinhos.de_ninhos([n.para_dict() for n in store.listar(particao)])
+        cubo = temporada.cubo(particao)
+        for dimensao in ("regiao", "status", "risco", "predadores"):
+            assert cubo.por(dimensao) == esperado.por(dimensao)
+            assert cubo.por(dimensao, "ovos") == esperado.por(dimensao, "ovos")
+        assert ordenar(temporada.agregados_eclosao(particao)) == ordenar(
+            store.agregados_eclosao(particao)
+        )
+
+
+def test_temporada_ja_arquivada_nao_e_sobrescrita(store, ninho, tmp_path):
+    pasta = str(tmp_path / "temporadas")
+    ninhos, resultados = _temporada_variada(store, ninho)
+    arquivar_temporada(pasta, "2025", ninhos, resultados)
+
+    with pytest.raises(FileExistsError):
+        arquivar_temporada(pasta, "2025", ninhos[:1])
+    assert TemporadaArquivada(os.path.join(pasta, "2025")).total == len(ninhos)
+    # Nenhuma pasta temporária fica para trás
+    assert ArquivoTemporadas(pasta).temporadas() == ["2025"]
+    assert sorted(os.listdir(pasta)) == ["2025"]
+
+
+def test_arquivo_soma_temporadas_com_regioes_diferentes(store, ninho, tmp_path):
+    pasta = str(tmp_path / "temporadas")
+    arquivar_temporada(pasta, "2024", store.listar() + [Ninho(**ninho(regiao="Praia Sul"))])
+    arquivar_temporada(pasta, "2025", [Ninho(**ninho()), Ninho(**ninho(quantidade_ovos=50))])
+
+    cubo = ArquivoTemporadas(pasta).cubo()
+    assert cubo.por("regiao") == {"Praia Sul": 1, "Praia Norte": 2}
+    assert cubo.total("ovos") == 250
+    assert ArquivoTemporadas(pasta).cubo(["2025"]).total() == 2
@@ -0,0 +1,99 @@
+import sqlite3
+
+from utils.artifacts import ArmazemArtefatos, gerar_relatorios
+from utils.nest import Particao, PARTICAO_PADRAO
+from utils.nest_cache import CacheNinhos
+from utils.sync import FilaOffline, ServidorSincronizacao, sincronizar
+
+ORG_A = Particao("Org A", "p1")
+ORG_B = Particao("Org B", "p2")
+
+
+def test_guardar_e_buscar(store, tmp_path):
+    armazem = ArmazemArtefatos(store, str(tmp_path / "artefatos"))
+    armazem.guardar("csv", 3, b"a,b\n", "csv", ORG_A)
+
+    conteudo, metadados = armazem.buscar("csv", 3, ORG_A)
+    assert conteudo == b"a,b\n"
+    assert metadados["tamanho"] == 4
+    assert armazem.buscar("csv", 4, ORG_A) is None
+    assert armazem.tipos_gerados(3, ORG_A) == ["csv"]
+
+
+def test_conteudo_igual_e_gravado_uma_vez(store, tmp_path):
+    armazem = ArmazemArtefatos(store, str(tmp_path / "artefatos"))
+    primeiro = armazem.guardar("csv", 1, b"igual", "csv", ORG_A)
+    segundo = armazem.guardar("csv", 2, b"igual", "csv", ORG_A)
+
+    assert primeiro == segundo
+    arquivos = [p for p in (tmp_path / "artefatos").rglob("*") if p.is_file()]
+    assert len(arquivos) == 1
+
+
+def test_mesma_versao_em_particoes_diferentes(store, tmp_path):
+    armazem = ArmazemArtefatos(store, str(tmp_path / "artefatos"))
+    armazem.guardar("csv", 1, b"da A", "csv", ORG_A)
+    armazem.guardar("csv", 1, b"da B", "csv", ORG_B)
+
+    assert armazem.buscar("csv", 1, ORG_A)[0] == b"da A"
+    assert armazem.buscar("csv", 1, ORG_B)[0] == b"da B"
+    assert armazem.tipos_gerados(1, PARTICAO_PADRAO) == []
+
+
+def test_lote_com_duas_particoes_nao_mistura_relatorios(store, tmp_path, ninho):
+    # Um único lote de sincronização grava as duas partições na mesma versão
+    fila = FilaOffline(str(tmp_path / "fila.db"))
+    fila.registrar(ninho(observacoes="segredo da A", **ORG_A._asdict()))
+    fila.registrar(ninho(observacoes="anotação da B", **ORG_B._asdict()))
+    sincronizar(fila, ServidorSincronizacao(store).receber)
+
+    versao_a, ninhos_a = CacheNinhos(store, ORG_A).instantaneo()
+    versao_b, ninhos_b = CacheNinhos(store, ORG_B).instantaneo()
+    assert versao_a == versao_b
+
+    armazem = ArmazemArtefatos(store, str(tmp_path / "artefatos"))
+    assert "csv" in gerar_relatorios(armazem, versao_a, ninhos_a, particao=ORG_A)
+    assert "csv" in gerar_relatorios(armazem, versao_b, ninhos_b, particao=ORG_B)
+
+    csv_b = armazem.buscar("csv", versao_b, ORG_B)[0].decode("utf-8")
+    assert "anotação da B" in csv_b
+    assert "segredo da A" not in csv_b
+
+
+def test_limpar_conta_versoes_por_particao(store, tmp_path):
+    armazem = ArmazemArtefatos(store, str(tmp_path / "artefatos"))
+    armazem.guardar("csv", 1, b"parada", "csv", ORG_A)
+    for versao in range(2, 10):
+        armazem.guardar("csv", versao, f"v{versao}".encode(), "csv", ORG_B)
+
+    armazem.limpar(reter_versoes=3)
+
+    assert armazem.buscar("csv", 1, ORG_A)[0] == b"parada"
+    assert armazem.buscar("csv", 6, ORG_B) is None
+    assert armazem.buscar("csv", 7, ORG_B)[0] == b"v7"
+    arquivos = [p for p in (tmp_path / "artefatos").rglob("*") if p.is_file()]
+    assert len(arquivos) == 4
+
+
+def test_migra_indice_sem_particao(store, tmp_path):
+    with store.transacao() as conexao:
+        conexao.execute(
+            "CREATE TABLE artefatos (tipo TEXT NOT NULL, versao_dados INTEGER NOT NULL, "
+            "hash TEXT NOT NULL, extensao TEXT NOT NULL, tamanho INTEGER NOT NULL, "
+            "criado_em TEXT NOT NULL, PRIMARY KEY (tipo, versao_dados))"
+        )
+        conexao.execute(
+            "INSERT INTO artefatos VALUES ('csv', 1, 'abc', 'csv', 3, '2026-01-01T00:00:00')"
+        )
+
+    armazem = ArmazemArtefatos(store, str(tmp_path / "artefatos"))
+
+    assert armazem.tipos_gerados(1, PARTICAO_PADRAO) == ["csv"]
+    armazem.guardar("csv", 1, b"da A", "csv", ORG_A)
+    assert armazem.buscar("csv", 1, ORG_A)[0] == b"da A"
+    try:
+        store.consultar("SELECT 1 FROM artefatos_antigos")
+    except sqlite3.OperationalError:
+        pass
+    else:
+        raise AssertionError("tabela antiga não foi removida")
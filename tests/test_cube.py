@@ -0,0 +1,88 @@
+import random
+
+import pytest
+
+from utils.cube import CuboNinhos, FAIXAS_ECLOSAO
+from utils.nest import MAX_DIAS_ECLOSAO, REGIOES, RISCOS, STATUS
+from utils.statistics import (
+    contar_ninhos_por_regiao, contar_ninhos_por_status, contar_total_ninhos, get_total_ovos,
+    media_ovos_por_risco, ninhos_com_predadores_e_danificados, ninhos_prestes_a_eclodir,
+    regiao_com_mais_ninhos_sob_risco,
+)
+
+ESTATISTICAS = (
+    contar_total_ninhos,
+    get_total_ovos,
+    ninhos_prestes_a_eclodir,
+    ninhos_com_predadores_e_danificados,
+    contar_ninhos_por_status,
+    contar_ninhos_por_regiao,
+    regiao_com_mais_ninhos_sob_risco,
+    media_ovos_por_risco,
+)
+
+
+@pytest.fixture
+def ninhos():
+    sorteio = random.Random(7)
+    return [
+        {
+            "regiao": sorteio.choice(REGIOES),
+            "quantidade_ovos": sorteio.randint(1, 200),
+            "status": sorteio.choice(STATUS),
+            "risco": sorteio.choice(RISCOS),
+            "dias_para_eclosao": sorteio.randint(0, MAX_DIAS_ECLOSAO),
+            "predadores": sorteio.random() < 0.3,
+        }
+        for _ in range(500)
+    ]
+
+
+@pytest.mark.parametrize("estatistica", ESTATISTICAS, ids=lambda f: f.__name__)
+def test_cubo_da_o_mesmo_resultado_que_a_lista(ninhos, estatistica):
+    assert estatistica(CuboNinhos.de_ninhos(ninhos)) == pytest.approx(estatistica(ninhos))
+
+
+def test_filtrar_por_rotulo_e_lista(ninhos):
+    cubo = CuboNinhos.de_ninhos(ninhos)
+
+    sul_em_risco = cubo.filtrar(regiao="Praia Sul", risco=["🟡", "🔴"])
+
+    esperado = [n for n in ninhos if n["regiao"] == "Praia Sul" and n["risco"] != "🟢"]
+    assert sul_em_risco.rotulos["regiao"] == ("Praia Sul",)
+    assert sul_em_risco.total() == len(esperado)
+    assert sul_em_risco.total("ovos") == sum(n["quantidade_ovos"] for n in esperado)
+
+
+def test_tabela_cruzada(ninhos):
+    linhas, colunas, valores = CuboNinhos.de_ninhos(ninhos).tabela("risco", "status")
+
+    assert (linhas, colunas) == (RISCOS, STATUS)
+    assert valores[RISCOS.index("🔴"), STATUS.index("danificado")] == sum(
+        1 for n in ninhos if n["risco"] == "🔴" and n["status"] == "danificado"
+    )
+
+
+def test_faixas_de_eclosao_somam_o_total(ninhos):
+    cubo = CuboNinhos.de_ninhos(ninhos)
+
+    faixas = cubo.por_faixa_eclosao()
+
+    assert list(faixas) == [rotulo for rotulo, _, _ in FAIXAS_ECLOSAO]
+    assert sum(faixas.values()) == len(ninhos)
+
+
+def test_dias_acima_do_limite_ficam_na_ultima_posicao(ninhos):
+    ninho = dict(ninhos[0], dias_para_eclosao=MAX_DIAS_ECLOSAO + 50)
+
+    cubo = CuboNinhos.de_ninhos([ninho])
+
+    assert cubo.por("dias_para_eclosao")[MAX_DIAS_ECLOSAO + 1] == 1
+    assert cubo.total(dias_max=MAX_DIAS_ECLOSAO) == 0
+
+
+def test_cubo_vazio():
+    cubo = CuboNinhos.de_ninhos([])
+
+    assert cubo.total() == 0
+    assert cubo.por("status") == dict.fromkeys(STATUS, 0)
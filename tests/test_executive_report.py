@@ -0,0 +1,17 @@
+from utils import executive_report
+from utils.cube import CuboNinhos
+from utils.nest import Ninho
+
+
+def test_relatorio_interativo_embute_o_plotly_uma_vez(monkeypatch, ninho):
+    monkeypatch.setattr(executive_report, "RASTERIZACAO_DISPONIVEL", False)
+    ninhos = [Ninho(**ninho()), Ninho(**ninho(regiao="Praia Sul", risco="🔴"))]
+    cubo = CuboNinhos.de_ninhos([n.para_dict() for n in ninhos])
+
+    relatorios = executive_report.gerar_relatorios_executivos(ninhos, cubo, [None, "Praia Sul"])
+
+    for relatorio in relatorios.values():
+        # Abre sem rede: nenhuma biblioteca vem de fora, e o plotly.js aparece uma vez só
+        assert '<script src="http' not in relatorio
+        assert relatorio.count("Plotly.newPlot") > 1
+        assert relatorio.count("plotly.js v") == 1
@@ -0,0 +1,116 @@
+import json
+from datetime import date
+
+import numpy as np
+import pytest
+
+from utils.cube import CuboNinhos
+from utils.forecast import (
+    HORIZONTE_DIAS, PESO_TAXA_PADRAO, TAXA_ECLOSAO_PADRAO, prever_eclosoes, taxas_por_regiao_risco,
+)
+
+INICIO = date(2025, 11, 1)
+
+
+def _cubo(ninho, *ninhos):
+    return CuboNinhos.de_ninhos([ninho(**campos) for campos in ninhos])
+
+
+def _agregado(regiao="Praia Norte", risco="🟢", ovos=100, eclodidos=50):
+    return {
+        "regiao": regiao, "risco": risco, "ninhos": 1, "ovos": ovos,
+        "eclodidos": eclodidos, "emergidos": eclodidos, "ovos_mortos": 0,
+    }
+
+
+def test_sem_ninhos_a_previsao_e_vazia():
+    previsao = prever_eclosoes(CuboNinhos.de_ninhos([]), [], inicio=INICIO)
+
+    assert previsao.regioes == ()
+    assert previsao.ninhos.shape == (0, HORIZONTE_DIAS)
+    esperado, minimo, maximo = previsao.faixa("filhotes")
+    assert not esperado.any() and not minimo.any() and not maximo.any()
+    assert json.loads(previsao.para_json())["dias"] == HORIZONTE_DIAS
+
+
+def test_sem_incerteza_a_eclosao_cai_no_dia_informado(ninho):
+    cubo = _cubo(ninho, {"dias_para_eclosao": 5, "quantidade_ovos": 100})
+    previsao = prever_eclosoes(cubo, [], desvio_dias=0, inicio=INICIO)
+
+    esperado, minimo, maximo = previsao.faixa("ninhos", "Praia Norte")
+    assert np.flatnonzero(esperado).tolist() == [5]
+    assert esperado[5] == minimo[5] == maximo[5] == 1.0
+    # Sem escavações, a taxa padrão
+    assert previsao.filhotes[0, 5] == pytest.approx(TAXA_ECLOSAO_PADRAO * 100)
+    assert previsao.dias[5] == date(2025, 11, 6)
+
+
+def test_ninhos_ja_eclodidos_ficam_de_fora(ninho):
+    cubo = _cubo(ninho, {"dias_para_eclosao": 0}, {"dias_para_eclosao": 0})
+    previsao = prever_eclosoes(cubo, [], inicio=INICIO)
+
+    assert previsao.ninhos.sum() == 0
+    assert previsao.filhotes.sum() == 0
+
+
+def test_eclosao_antes_de_hoje_conta_hoje_e_depois_do_horizonte_sai(ninho):
+    cubo = _cubo(ninho, {"dias_para_eclosao": 1}, {"dias_para_eclosao": 30})
+    previsao = prever_eclosoes(cubo, [], inicio=INICIO)
+    # Toda a probabilidade dos dois ninhos cai dentro do horizonte
+    assert previsao.ninhos.sum() == pytest.approx(2.0)
+    assert previsao.ninhos[0, 0] > previsao.ninhos[0, 2]
+
+    # No fim do horizonte, só a parte de antes do último dia é prevista
+    fim = prever_eclosoes(_cubo(ninho, {"dias_para_eclosao": 60}), [], inicio=INICIO)
+    assert 0 < fim.ninhos.sum() < 0.5
+    assert prever_eclosoes(
+        _cubo(ninho, {"dias_para_eclosao": 60}), [], desvio_dias=0, inicio=INICIO
+    ).ninhos.sum() == 0
+
+
+def test_horizonte_de_um_dia(ninho):
+    previsao = prever_eclosoes(_cubo(ninho, {"dias_para_eclosao": 1}), [], horizonte=1)
+    assert previsao.ninhos.shape == (1, 1)
+    assert len(previsao.para_dict()["previsao"]) == 1
+
+
+def test_poucas_escavacoes_mexem_pouco_na_taxa():
+    regioes = ("Praia Norte", "Praia Sul")
+    # Praia Sul: uma escavação ruim (10%) e pequena; Praia Norte: muitas boas
+    agregados = [
+        _agregado("Praia Norte", ovos=10_000, eclodidos=9_000),
+        _agregado("Praia Sul", ovos=20, eclodidos=2),
+    ]
+    taxa, variancia = taxas_por_regiao_risco(regioes, agregados)
+    geral = 9_002 / 10_020
+
+    assert taxa[0, 0] == pytest.approx((9_000 + geral * PESO_TAXA_PADRAO) / 10_200)
+    assert taxa[1, 0] == pytest.approx((2 + geral * PESO_TAXA_PADRAO) / 220)
+    assert taxa[1, 0] > 0.8
+    # Células sem escavações ficam na taxa geral, com mais incerteza
+    assert taxa[1, 2] == pytest.approx(geral)
+    assert variancia[1, 2] > variancia[0, 0]
+
+
+def test_agregados_de_regioes_sem_ninhos_sao_ignorados(ninho):
+    cubo = _cubo(ninho, {"dias_para_eclosao": 5})
+    previsao = prever_eclosoes(cubo, [_agregado("Praia Sul", eclodidos=0)], inicio=INICIO)
+    # A Praia Sul entra só na taxa geral, que ela puxa para zero
+    assert previsao.regioes == ("Praia Norte",)
+    assert previsao.taxas["Praia Norte"] == pytest.approx(0.0)
+
+
+def test_faixa_nunca_fica_negativa_e_soma_as_regioes(ninho):
+    cubo = _cubo(
+        ninho,
+        {"dias_para_eclosao": 10},
+        {"dias_para_eclosao": 10, "regiao": "Praia Sul", "quantidade_ovos": 40},
+    )
+    previsao = prever_eclosoes(cubo, [], inicio=INICIO)
+
+    for medida in ("ninhos", "filhotes"):
+        esperado, minimo, maximo = previsao.faixa(medida)
+        assert (minimo >= 0).all()
+        assert (minimo <= esperado).all() and (esperado <= maximo).all()
+        por_regiao = sum(previsao.faixa(medida, regiao)[0] for regiao in previsao.regioes)
+        assert esperado == pytest.approx(por_regiao)
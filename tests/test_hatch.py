@@ -0,0 +1,122 @@
+import random
+
+import pytest
+
+from utils.nest import NinhoInvalido, Particao, REGIOES, RISCOS
+from utils.nest_store import NestStore
+from utils.statistics import CAMPOS_ECLOSAO, resumo_sucesso_eclosao, taxas_de_sucesso
+
+ORG_A = Particao("Org A", "p1")
+
+
+def _recontagem(store, particao=None):
+    """Agregados recontados do zero, a partir dos ninhos e dos resultados gravados."""
+    ninhos = {n.id: n for n in store.listar(particao)}
+    soma = {}
+    for ninho_id, resultado in store.resultados_eclosao(particao).items():
+        ninho = ninhos[ninho_id]
+        linha = soma.setdefault(
+            (ninho.regiao, ninho.risco),
+            {"regiao": ninho.regiao, "risco": ninho.risco, **dict.fromkeys(CAMPOS_ECLOSAO, 0)},
+        )
+        linha["ninhos"] += 1
+        linha["ovos"] += ninho.quantidade_ovos
+        linha["eclodidos"] += resultado.eclodidos
+        linha["emergidos"] += resultado.emergidos
+        linha["ovos_mortos"] += resultado.ovos_mortos
+    return [soma[chave] for chave in sorted(soma)]
+
+
+def _alterar(store, ninho_id, carimbo, **campos):
+    store.aplicar_alteracoes(
+        [{"id": ninho_id, "carimbo": carimbo, "dispositivo": "sessao", "campos": campos}]
+    )
+
+
+def test_agregados_batem_com_a_recontagem(store, ninho):
+    aleatorio = random.Random(7)
+    ids = []
+    for i in range(40):
+        particao = ORG_A if i % 3 == 0 else Particao("padrao", "padrao")
+        ninho_id = f"n{i}"
+        _alterar(store, ninho_id, 1, **ninho(
+            **particao._asdict(),
+            regiao=aleatorio.choice(REGIOES),
+            risco=aleatorio.choice(RISCOS),
+            quantidade_ovos=aleatorio.randint(60, 140),
+            dias_para_eclosao=0,
+        ))
+        ids.append(ninho_id)
+
+    for carimbo in range(2, 200):
+        ninho_id = aleatorio.choice(ids)
+        if aleatorio.random() < 0.6:
+            # Registro ou correção do resultado
+            eclodidos = aleatorio.randint(0, 50)
+            store.registrar_resultado(
+                ninho_id, eclodidos, aleatorio.randint(0, eclodidos),
+                aleatorio.randint(0, 10), "2025-11-01",
+            )
+        else:
+            # O resultado acompanha o ninho quando a região ou o risco mudam
+            _alterar(
+                store, ninho_id, carimbo,
+                regiao=aleatorio.choice(REGIOES), risco=aleatorio.choice(RISCOS),
+            )
+
+    assert store.agregados_eclosao() == _recontagem(store)
+    assert store.agregados_eclosao(ORG_A) == _recontagem(store, ORG_A)
+
+
+def test_correcao_substitui_o_resultado_anterior(store, ninho):
+    ninho_id = store.inserir(ninho(dias_para_eclosao=0))
+    store.registrar_resultado(ninho_id, 80, 70, 10, "2025-11-01")
+    store.registrar_resultado(ninho_id, 60, 50, 20, "2025-11-02")
+
+    (agregado,) = store.agregados_eclosao()
+    assert (agregado["ninhos"], agregado["eclodidos"], agregado["ovos_mortos"]) == (1, 60, 20)
+    assert store.agregados_eclosao() == _recontagem(store)
+
+
+def test_resultado_rejeitado_nao_altera_os_agregados(store, ninho):
+    ninho_id = store.inserir(ninho(dias_para_eclosao=0))
+    store.registrar_resultado(ninho_id, 50, 40, 10, "2025-11-01")
+    antes = store.agregados_eclosao()
+
+    with pytest.raises(NinhoInvalido):
+        store.registrar_resultado(ninho_id, 95, 90, 10, "2025-11-02")
+    with pytest.raises(NinhoInvalido):
+        store.registrar_resultado(store.inserir(ninho(dias_para_eclosao=3)), 1, 1, 0, "2025-11-02")
+
+    assert store.agregados_eclosao() == antes
+
+
+def test_agregados_fora_de_sincronia_sao_reconstruidos(tmp_path, ninho):
+    caminho = str(tmp_path / "ninhos.db")
+    store = NestStore(caminho)
+    for regiao in REGIOES[:3]:
+        ninho_id = store.inserir(ninho(regiao=regiao, dias_para_eclosao=0))
+        store.registrar_resultado(ninho_id, 50, 40, 5, "2025-11-01")
+    with store.transacao() as conexao:
+        conexao.execute("DELETE FROM eclosao_agregados WHERE regiao = ?", (REGIOES[0],))
+    store.fechar()
+
+    store = NestStore(caminho)
+    try:
+        assert store.agregados_eclosao() == _recontagem(store)
+    finally:
+        store.fechar()
+
+
+def test_taxas_sobre_os_agregados():
+    agregados = [
+        {"regiao": "Praia Norte", "risco": "🟢", "ninhos": 2, "ovos": 200,
+         "eclodidos": 150, "emergidos": 100, "ovos_mortos": 20},
+        {"regiao": "Praia Norte", "risco": "🔴", "ninhos": 1, "ovos": 100,
+         "eclodidos": 30, "emergidos": 20, "ovos_mortos": 50},
+    ]
+
+    resumo = resumo_sucesso_eclosao(agregados)
+    assert (resumo["taxa_eclosao"], resumo["taxa_emergencia"]) == (60.0, 40.0)
+    assert taxas_de_sucesso(agregados, por="risco")["🔴"]["taxa_eclosao"] == 30.0
+    assert resumo_sucesso_eclosao([])["taxa_eclosao"] == 0.0
@@ -0,0 +1,135 @@
+import sys
+
+import pandas as pd
+import pytest
+
+from utils.cube import CuboNinhos
+from utils.nest import (
+    MAX_DIAS_ECLOSAO,
+    MAX_OVOS,
+    MAX_TAMANHO_PARTICAO,
+    MIN_DIAS_ECLOSAO,
+    MIN_OVOS,
+    Ninho,
+    NinhoInvalido,
+    Particao,
+    PARTICAO_PADRAO,
+)
+
+
+@pytest.mark.parametrize(
+    "campos",
+    [
+        {"regiao": "Praia Nova"},
+        {"status": "perdido"},
+        {"risco": "🟠"},
+        {"quantidade_ovos": MIN_OVOS - 1},
+        {"quantidade_ovos": MAX_OVOS + 1},
+        {"quantidade_ovos": 10.5},
+        {"quantidade_ovos": True},
+        {"dias_para_eclosao": MIN_DIAS_ECLOSAO - 1},
+        {"dias_para_eclosao": MAX_DIAS_ECLOSAO + 1},
+        {"dias_para_eclosao": "3"},
+        {"predadores": "sim"},
+        {"guardiao": "   "},
+        {"organizacao": ""},
+        {"projeto": "x" * (MAX_TAMANHO_PARTICAO + 1)},
+    ],
+)
+def test_dados_fora_do_formulario_sao_recusados(ninho, campos):
+    with pytest.raises(NinhoInvalido):
+        Ninho(**ninho(**campos))
+
+
+def test_limites_do_formulario_sao_aceitos(ninho):
+    for ovos, dias in ((MIN_OVOS, MIN_DIAS_ECLOSAO), (MAX_OVOS, MAX_DIAS_ECLOSAO)):
+        registro = Ninho(**ninho(quantidade_ovos=ovos, dias_para_eclosao=dias))
+        assert (registro.quantidade_ovos, registro.dias_para_eclosao) == (ovos, dias)
+
+
+def test_campo_obrigatorio_ausente(ninho):
+    dados = ninho()
+    del dados["risco"]
+    with pytest.raises(NinhoInvalido, match="risco"):
+        Ninho.de_dict(dados)
+
+
+def test_acesso_como_dicionario(ninho):
+    registro = Ninho(**ninho(status="ameacado", risco="🟡", guardiao="  Bia  "))
+
+    assert registro["status"] == registro.status == "ameacado"
+    assert registro["risco"] == "🟡"
+    assert registro.get("guardiao") == "Bia"
+    assert registro.particao == PARTICAO_PADRAO
+    # Observações e id vazios se comportam como chaves ausentes
+    assert "observacoes" not in registro and "id" not in registro
+    assert registro.get("observacoes", "-") == "-"
+    with pytest.raises(KeyError):
+        registro["observacoes"]
+    with pytest.raises(KeyError):
+        registro["codigo_risco"]
+    assert "observacoes" in Ninho(**ninho(observacoes=" cerca quebrada "))
+    assert Ninho(**ninho(observacoes="   ")).observacoes is None
+
+
+def test_ida_e_volta_pelo_dicionario(ninho):
+    registro = Ninho(**ninho(id="n1", observacoes="ok", organizacao="Org A", projeto="p1"))
+
+    dados = registro.para_dict()
+    assert list(dados) == [
+        "id", "regiao", "quantidade_ovos", "status", "risco", "dias_para_eclosao",
+        "predadores", "guardiao", "observacoes", "organizacao", "projeto",
+    ]
+    assert Ninho.de_dict(dados) == registro
+    assert Ninho.de_dict(registro) is registro
+    assert registro.particao == Particao("Org A", "p1")
+
+
+def test_registro_e_compacto(ninho):
+    dados = ninho(id="n1")
+    registro = Ninho(**dados)
+
+    assert not hasattr(registro, "__dict__")
+    assert sys.getsizeof(registro) * 2 < sys.getsizeof(dados)
+    # Strings repetidas são compartilhadas entre os registros
+    outro = Ninho(**ninho(regiao="".join("Praia Norte"), guardiao="".join(["Ana ", "Souza"])))
+    assert outro.regiao is registro.regiao
+    assert outro.guardiao is registro.guardiao
+
+
+def test_store_valida_antes_de_gravar(store, ninho):
+    with pytest.raises(NinhoInvalido):
+        store.inserir_varios([ninho(), ninho(quantidade_ovos=0)])
+
+    assert store.listar() == []
+
+
+def test_leitura_do_banco_devolve_o_mesmo_registro(store, ninho):
+    dados = ninho(observacoes="rastros de cachorro", status="danificado", risco="🔴")
+    ninho_id = store.inserir(dados)
+
+    (lido,) = store.listar()
+    assert lido == Ninho(**dados, id=ninho_id)
+    assert lido.codigo_status == 2 and lido.codigo_risco == 2
+
+
+def test_graficos_e_exportacao_aceitam_os_registros(store, ninho):
+    dados = [
+        ninho(regiao="Praia Sul", status="ameacado", risco="🟡", predadores=True),
+        ninho(quantidade_ovos=80, dias_para_eclosao=2, observacoes="perto da duna"),
+        ninho(regiao="Praia Sul", status="danificado", risco="🔴", dias_para_eclosao=0),
+    ]
+    store.inserir_varios(dados)
+    registros = store.listar()
+
+    # O cubo que alimenta os gráficos é o mesmo montado a partir dos dicionários
+    do_banco, dos_dados = CuboNinhos.de_ninhos(registros), CuboNinhos.de_ninhos(dados)
+    for dimensao in ("regiao", "status", "risco", "predadores"):
+        assert do_banco.por(dimensao) == dos_dados.por(dimensao)
+        assert do_banco.por(dimensao, "ovos") == dos_dados.por(dimensao, "ovos")
+    assert do_banco.por_faixa_eclosao() == dos_dados.por_faixa_eclosao()
+
+    # A tabela e o CSV usam os dicionários simples dos registros
+    tabela = pd.DataFrame([registro.para_dict() for registro in registros])
+    assert tabela["status"].tolist() == ["ameacado", "intacto", "danificado"]
+    assert tabela["observacoes"].isna().tolist() == [True, False, True]
@@ -0,0 +1,36 @@
+import threading
+import time
+
+from utils.nest import Particao
+from utils.nest_cache import CacheNinhos, ObservadorCaches
+
+ORG_A = Particao("Org A", "p1")
+ORG_B = Particao("Org B", "p2")
+
+
+def test_uma_thread_para_todas_as_particoes(store):
+    observador = ObservadorCaches(store, intervalo=0.01)
+    antes = threading.active_count()
+    for particao in (ORG_A, ORG_B, ORG_A):
+        cache = CacheNinhos(store, particao)
+        observador.acompanhar(cache)
+        observador.acompanhar(cache)
+
+    assert threading.active_count() == antes + 1
+    observador.encerrar()
+    assert threading.active_count() == antes
+
+
+def test_atualiza_so_os_caches_em_uso(store, ninho):
+    observador = ObservadorCaches(store, intervalo=3600, ocioso=60)
+    em_uso, ocioso = CacheNinhos(store, ORG_A), CacheNinhos(store, ORG_B)
+    observador.acompanhar(em_uso)
+    observador.acompanhar(ocioso)
+    ocioso.ultimo_acesso = time.monotonic() - 120
+
+    store.inserir_varios([ninho(**ORG_A._asdict()), ninho(**ORG_B._asdict())])
+
+    assert observador.atualizar() == 1
+    assert em_uso.versao > 0 and ocioso.versao == 0
+    # O cache ocioso se atualiza sozinho na próxima leitura
+    assert len(ocioso.ninhos()) == 1
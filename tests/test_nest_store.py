@@ -0,0 +1,104 @@
+import sqlite3
+
+from utils.nest import PARTICAO_PADRAO, Particao
+from utils.nest_store import NestStore
+
+ORG_A = Particao("Org A", "p1")
+
+
+def _plano(store, sql, parametros):
+    return " ".join(
+        linha["detail"] for linha in store.consultar(f"EXPLAIN QUERY PLAN {sql}", parametros)
+    )
+
+
+def test_consultas_do_guardiao_usam_indice_da_particao(store):
+    plano = _plano(
+        store,
+        "SELECT * FROM ninhos WHERE guardiao = ? AND dias_para_eclosao <= ? "
+        "AND organizacao = ? AND projeto = ?",
+        ("Ana Souza", 5, *ORG_A),
+    )
+    assert "idx_ninhos_particao_guardiao_eclosao" in plano
+
+    plano = _plano(
+        store,
+        "SELECT * FROM ninhos WHERE guardiao = ? AND risco = '🔴' "
+        "AND organizacao = ? AND projeto = ?",
+        ("Ana Souza", *ORG_A),
+    )
+    assert "idx_ninhos_particao_guardiao_risco" in plano
+
+
+def test_indices_antigos_do_guardiao_sao_removidos(tmp_path):
+    caminho = str(tmp_path / "ninhos.db")
+    NestStore(caminho).fechar()
+    conexao = sqlite3.connect(caminho)
+    conexao.executescript(
+        "CREATE INDEX idx_ninhos_guardiao_eclosao ON ninhos(guardiao, dias_para_eclosao);"
+        "CREATE INDEX idx_ninhos_guardiao_risco ON ninhos(guardiao, risco);"
+    )
+    conexao.close()
+
+    store = NestStore(caminho)
+    indices = {linha["name"] for linha in store.consultar("PRAGMA index_list(ninhos)")}
+    store.fechar()
+
+    assert "idx_ninhos_guardiao_eclosao" not in indices
+    assert "idx_ninhos_guardiao_risco" not in indices
+    assert "idx_ninhos_particao_guardiao_risco" in indices
+
+
+ESQUEMA_SEM_PARTICOES = """
+CREATE TABLE ninhos (
+    id TEXT PRIMARY KEY, regiao TEXT NOT NULL, quantidade_ovos INTEGER NOT NULL,
+    status TEXT NOT NULL, risco TEXT NOT NULL, dias_para_eclosao INTEGER NOT NULL,
+    predadores INTEGER NOT NULL, guardiao TEXT NOT NULL, observacoes TEXT,
+    versao INTEGER NOT NULL
+);
+CREATE TABLE guardioes_agregados (
+    guardiao TEXT PRIMARY KEY, ninhos INTEGER NOT NULL, ovos INTEGER NOT NULL,
+    alto_risco INTEGER NOT NULL, eclosao_proxima INTEGER NOT NULL
+);
+INSERT INTO ninhos VALUES ('n1', 'Praia Norte', 100, 'intacto', '🔴', 3, 0, 'Ana Souza', NULL, 1);
+INSERT INTO ninhos VALUES ('n2', 'Praia Sul', 80, 'intacto', '🟢', 20, 1, 'Ana Souza', NULL, 2);
+INSERT INTO guardioes_agregados VALUES ('Ana Souza', 2, 180, 1, 1);
+"""
+
+
+def test_banco_sem_particoes_migra_para_a_padrao(tmp_path, ninho):
+    caminho = str(tmp_path / "ninhos.db")
+    conexao = sqlite3.connect(caminho)
+    conexao.executescript(ESQUEMA_SEM_PARTICOES)
+    conexao.close()
+
+    store = NestStore(caminho)
+    try:
+        assert [linha["particao"] for linha in store.particoes()] == [PARTICAO_PADRAO]
+        assert store.contar(PARTICAO_PADRAO) == 2
+        (agregado,) = store.agregados_por_guardiao(PARTICAO_PADRAO)
+        assert (agregado["ninhos"], agregado["ovos"], agregado["alto_risco"]) == (2, 180, 1)
+
+        # Depois da migração, uma nova partição não enxerga os ninhos antigos
+        store.inserir(ninho(**ORG_A._asdict()))
+        assert store.contar(ORG_A) == 1
+        assert [n["id"] for n in store.listar(PARTICAO_PADRAO)] == ["n1", "n2"]
+        assert store.agregados_por_guardiao(ORG_A)[0]["ninhos"] == 1
+    finally:
+        store.fechar()
+
+
+def test_migracao_e_feita_uma_vez(tmp_path):
+    caminho = str(tmp_path / "ninhos.db")
+    conexao = sqlite3.connect(caminho)
+    conexao.executescript(ESQUEMA_SEM_PARTICOES)
+    conexao.close()
+
+    NestStore(caminho).fechar()
+    store = NestStore(caminho)
+    try:
+        assert store.contar() == 2
+        indices = {linha["name"] for linha in store.consultar("PRAGMA index_list(ninhos)")}
+        assert "idx_ninhos_particao_versao" in indices
+    finally:
+        store.fechar()
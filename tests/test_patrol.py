@@ -0,0 +1,122 @@
+import random
+
+import numpy as np
+import pytest
+
+from utils.nest import Ninho, REGIOES
+from utils.patrol import distribuir, planejar_patrulha
+
+
+def _ninhos(ninho, quantidade, semente=1, guardioes=("Ana", "Bia", "Caio")):
+    aleatorio = random.Random(semente)
+    return [
+        Ninho(**ninho(
+            id=f"n{i}",
+            regiao=aleatorio.choice(REGIOES),
+            guardiao=aleatorio.choice(guardioes),
+            dias_para_eclosao=aleatorio.randint(0, 5),
+            status=aleatorio.choice(["intacto", "ameacado", "danificado"]),
+        ))
+        for i in range(quantidade)
+    ]
+
+
+def _ids(ninhos):
+    return sorted(n.id for n in ninhos)
+
+
+def test_toda_ronda_cabe_no_turno(ninho):
+    ninhos = _ninhos(ninho, 300)
+    plano = planejar_patrulha(
+        ninhos, minutos_turno=120, minutos_por_ninho=10, velocidade_kmh=4.0
+    )
+
+    assert plano.rotas
+    for rota in plano.rotas:
+        assert rota.minutos <= 120 + 1e-9
+        # O tempo da rota é o deslocamento mais as inspeções
+        assert rota.minutos == pytest.approx(rota.distancia_km / 4.0 * 60 + rota.total_ninhos * 10)
+        assert rota.total_ninhos <= 12
+
+
+def test_nenhum_ninho_some_ou_se_repete(ninho):
+    ninhos = _ninhos(ninho, 200)
+    plano = planejar_patrulha(ninhos, guardioes=["Ana", "Bia"], minutos_turno=90)
+
+    planejados = [n for rota in plano.rotas for parada in rota.paradas for n in parada.ninhos]
+    escolhidos = [n for n in ninhos if n.dias_para_eclosao <= 5]
+    assert _ids(planejados + plano.sem_cobertura) == _ids(escolhidos)
+    assert len({n.id for n in planejados}) == len(planejados)
+
+
+def test_sem_cobertura_ficam_os_menos_prioritarios(ninho):
+    # Um guardião, tudo na mesma praia: o turno só comporta 3 inspeções
+    ninhos = [Ninho(**ninho(id=f"n{i}", dias_para_eclosao=1)) for i in range(5)]
+    pontuacoes = {n.id: float(i) for i, n in enumerate(ninhos)}
+    plano = planejar_patrulha(ninhos, pontuacoes=pontuacoes, minutos_turno=30)
+
+    (rota,) = plano.rotas
+    assert _ids(rota.paradas[0].ninhos) == _ids(ninhos[2:])
+    assert _ids(plano.sem_cobertura) == _ids(ninhos[:2])
+    # Na parada, do mais prioritário ao menos
+    assert [n.id for n in rota.paradas[0].ninhos] == [n.id for n in ninhos[:1:-1]]
+
+
+def test_turno_curto_demais_para_a_proxima_praia(ninho):
+    perto = Ninho(**ninho(id="perto", regiao="Praia Central", dias_para_eclosao=1))
+    longe = Ninho(**ninho(id="longe", regiao="Praia Norte", dias_para_eclosao=1))
+    # 6 km a 4 km/h são 90 minutos: não cabem num turno de 60
+    plano = planejar_patrulha(
+        [perto, longe], pontuacoes={perto.id: 50.0, longe.id: 10.0}, minutos_turno=60
+    )
+
+    (rota,) = plano.rotas
+    assert [parada.regiao for parada in rota.paradas] == ["Praia Central"]
+    assert rota.distancia_km == 0.0
+    assert plano.sem_cobertura == [longe]
+
+
+def test_rota_comeca_pelo_ninho_mais_prioritario(ninho):
+    ninhos = [
+        Ninho(**ninho(id=regiao, regiao=regiao, dias_para_eclosao=1)) for regiao in REGIOES
+    ]
+    prioritario = ninhos[3]
+    plano = planejar_patrulha(ninhos, pontuacoes={prioritario.id: 99.0})
+
+    assert plano.rotas[0].paradas[0].ninhos == [prioritario]
+
+
+def test_orfaos_respeitam_a_capacidade_e_a_praia(ninho):
+    ninhos = [
+        Ninho(**ninho(regiao="Praia Sul", guardiao="Ana")),
+        Ninho(**ninho(regiao="Praia Norte", guardiao="Bia")),
+    ] + [Ninho(**ninho(regiao="Praia Sul", guardiao="Ausente")) for _ in range(4)]
+    prioridades = np.array([0.0, 0.0, 10.0, 40.0, 30.0, 20.0])
+
+    atribuidos, sobras = distribuir(ninhos, prioridades, ["Ana", "Bia"], capacidade=3)
+    # Ana já patrulha a Praia Sul e recebe os órfãos mais prioritários até a capacidade;
+    # o excedente vai para a Bia, e o que passa da capacidade dos dois sobra
+    assert atribuidos["Ana"] == [0, 3, 4]
+    assert atribuidos["Bia"] == [1, 5, 2]
+    assert sobras == []
+
+    atribuidos, sobras = distribuir(ninhos, prioridades, ["Ana", "Bia"], capacidade=2)
+    assert atribuidos == {"Ana": [0, 3], "Bia": [1, 4]}
+    assert sobras == [5, 2]
+
+
+def test_guardiao_sem_ninhos_nao_ganha_rota(ninho):
+    ninhos = [Ninho(**ninho(dias_para_eclosao=1, guardiao="Ana"))]
+    plano = planejar_patrulha(ninhos, guardioes=["Ana", "Bia"])
+
+    assert [rota.guardiao for rota in plano.rotas] == ["Ana"]
+    assert planejar_patrulha([], guardioes=["Ana"]).rotas == []
+
+
+def test_sem_tempo_de_inspecao_nao_ha_limite_de_visitas(ninho):
+    ninhos = [Ninho(**ninho(id=f"n{i}", dias_para_eclosao=1)) for i in range(100)]
+    plano = planejar_patrulha(ninhos, minutos_por_ninho=0, minutos_turno=30)
+
+    assert plano.rotas[0].total_ninhos == 100
+    assert plano.rotas[0].minutos == 0.0
+    assert plano.sem_cobertura == []
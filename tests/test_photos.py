@@ -0,0 +1,86 @@
+import io
+import threading
+
+import pytest
+
+from utils.photos import FALHOU, PENDENTE, PRONTA, ArmazemFotos, FilaMiniaturas, FotoInvalida
+
+PNG_MINIMO = b"\x89PNG\r\n\x1a\n" + b"\x00" * 32
+
+
+def _png(cor=(255, 0, 0), tamanho=(40, 30)):
+    Image = pytest.importorskip("PIL.Image")
+    saida = io.BytesIO()
+    Image.new("RGB", tamanho, cor).save(saida, "PNG")
+    return saida.getvalue()
+
+
+class ArmazemInstantaneo:
+    """Armazém falso cujo processamento termina (ou falha) na hora."""
+
+    def __init__(self, falhar: bool):
+        self.falhar = falhar
+
+    def processar(self, hash_foto, extensao):
+        if self.falhar:
+            raise RuntimeError("arquivo corrompido")
+        return PRONTA
+
+    def pendentes(self, limite=100):
+        return [(f"{numero:064x}", "jpg") for numero in range(limite)]
+
+
+@pytest.fixture(autouse=True)
+def pillow_disponivel(monkeypatch):
+    monkeypatch.setattr("utils.photos.PILLOW_DISPONIVEL", True)
+
+
+@pytest.mark.parametrize("falhar", [False, True])
+def test_tarefas_que_terminam_antes_do_callback_nao_travam(falhar):
+    fila = FilaMiniaturas(ArmazemInstantaneo(falhar), trabalhadores=2)
+    resultado = []
+    rodando = threading.Thread(
+        target=lambda: resultado.append(fila.enviar_pendentes(50)), daemon=True
+    )
+    rodando.start()
+    rodando.join(timeout=10)
+    assert not rodando.is_alive(), "enviar travou com o lock"
+
+    (futuros,) = resultado
+    for futuro in futuros:
+        futuro.exception()
+    fila.encerrar()
+    assert fila.em_andamento() == set()
+
+
+def test_mesma_foto_entra_uma_vez_na_fila(store, tmp_path):
+    armazem = ArmazemFotos(store, str(tmp_path / "fotos"))
+    foto = armazem.guardar("n1", _png())
+    armazem.guardar("n2", _png())
+    fila = FilaMiniaturas(armazem, trabalhadores=1)
+
+    futuros = [fila.enviar(foto.hash, foto.extensao) for _ in range(3)]
+    estados = fila.aguardar(futuros)
+    fila.encerrar()
+
+    assert estados == [PRONTA]
+    fotos = armazem.fotos_de(["n1", "n2"])
+    assert [f.estado for f in fotos["n1"] + fotos["n2"]] == [PRONTA, PRONTA]
+    assert armazem.ler(fotos["n1"][0], "miniatura").startswith(b"\xff\xd8")
+
+
+def test_foto_corrompida_fica_marcada_como_falha(store, tmp_path):
+    armazem = ArmazemFotos(store, str(tmp_path / "fotos"))
+    foto = armazem.guardar("n1", PNG_MINIMO)
+    assert foto.estado == PENDENTE
+
+    fila = FilaMiniaturas(armazem, trabalhadores=1)
+    assert fila.aguardar(fila.enviar_pendentes()) == [FALHOU]
+    fila.encerrar()
+    assert armazem.contar_pendentes() == 0
+
+
+def test_arquivo_que_nao_e_foto_e_recusado(store, tmp_path):
+    armazem = ArmazemFotos(store, str(tmp_path / "fotos"))
+    with pytest.raises(FotoInvalida):
+        armazem.guardar("n1", b"%PDF-1.7")
@@ -0,0 +1,134 @@
+import io
+import sqlite3
+from datetime import date
+
+import pytest
+
+from utils.nest import PARTICAO_PADRAO, Particao
+from utils.nest_store import NestStore
+from utils.predators import RegistroPredadores, RelatorioImportacao, ler_csv
+
+CABECALHO = b"especie,regiao,momento\n"
+LINHA = b"Raposa,Praia Norte,2025-10-01T21:30\n"
+
+
+def _linhas_com_erro_no_fim(linhas: int):
+    """Arquivo cuja decodificação falha depois de `linhas` linhas válidas."""
+    yield CABECALHO.decode()
+    for _ in range(linhas):
+        yield LINHA.decode()
+    b"\xe3".decode("utf-8")
+
+
+def test_leitura_interrompida_informa_o_que_ja_foi_gravado(store):
+    relatorio = RelatorioImportacao()
+    registro = RegistroPredadores(store)
+
+    with pytest.raises(UnicodeDecodeError):
+        avistamentos = ler_csv(_linhas_com_erro_no_fim(5), relatorio)
+        registro.importar(avistamentos, lote=2, relatorio=relatorio)
+
+    # Dois lotes completos foram confirmados antes do erro
+    assert relatorio.importados == 4
+    assert registro.contar() == 4
+
+
+def test_contagens_diarias_ausentes_sao_reconstruidas(store):
+    registro = RegistroPredadores(store)
+    registro.importar(ler_csv(io.StringIO((CABECALHO + LINHA * 3).decode()), RelatorioImportacao()))
+    with store.transacao() as conexao:
+        conexao.execute("DELETE FROM avistamentos_diarios")
+
+    assert RegistroPredadores(store).contar() == 3
+
+
+def test_conferencia_completa_e_explicita(store):
+    registro = RegistroPredadores(store)
+    registro.importar(ler_csv(io.StringIO((CABECALHO + LINHA * 3).decode()), RelatorioImportacao()))
+    with store.transacao() as conexao:
+        conexao.execute("UPDATE avistamentos_diarios SET quantidade = 1")
+
+    assert RegistroPredadores(store).contar() == 1
+    registro.verificar_agregados()
+    assert registro.contar() == 3
+
+
+ORG_A = Particao("Org A", "p1")
+ORG_B = Particao("Org B", "p1")
+
+
+def _importar(registro, linhas, particao):
+    csv = io.StringIO((CABECALHO + LINHA * linhas).decode())
+    return registro.importar(ler_csv(csv, RelatorioImportacao(), particao))
+
+
+def test_avistamentos_de_duas_organizacoes_ficam_separados(store):
+    registro = RegistroPredadores(store)
+    _importar(registro, 3, ORG_A)
+    _importar(registro, 2, ORG_B)
+    hoje = date(2025, 10, 2)
+
+    assert registro.contar(ORG_A) == 3
+    assert registro.contar(ORG_B) == 2
+    assert registro.contar(PARTICAO_PADRAO) == 0
+    assert registro.contar() == 5
+
+    # A mesma região, dia e espécie gera uma contagem diária por partição
+    (contagem,) = registro.contagens(dias=7, hoje=hoje, particao=ORG_B)
+    assert (contagem["regiao"], contagem["avistamentos"]) == ("Praia Norte", 2)
+
+    recentes = registro.recentes("Praia Norte", dias=7, hoje=hoje, particao=ORG_A)
+    assert len(recentes) == 3
+    assert {avistamento.particao for avistamento in recentes} == {ORG_A}
+
+
+def test_perto_do_ninho_usa_a_particao_do_ninho(store, ninho):
+    registro = RegistroPredadores(store)
+    _importar(registro, 2, ORG_A)
+    store.inserir(ninho(**ORG_B._asdict()))
+    (ninho_b,) = store.listar(ORG_B)
+
+    assert registro.perto_do_ninho(ninho_b, dias=10_000) == []
+
+
+ESQUEMA_SEM_PARTICOES = """
+CREATE TABLE avistamentos_predadores (
+    id INTEGER PRIMARY KEY, especie TEXT NOT NULL, regiao TEXT NOT NULL,
+    momento TEXT NOT NULL, latitude REAL, longitude REAL
+);
+CREATE INDEX idx_avistamentos_regiao_momento ON avistamentos_predadores(regiao, momento);
+CREATE TABLE avistamentos_diarios (
+    dia TEXT NOT NULL, regiao TEXT NOT NULL, especie TEXT NOT NULL, quantidade INTEGER NOT NULL,
+    PRIMARY KEY (dia, regiao, especie)
+);
+INSERT INTO avistamentos_predadores VALUES
+    (1, 'Raposa', 'Praia Norte', '2025-10-01T21:30:00', NULL, NULL),
+    (2, 'Raposa', 'Praia Norte', '2025-10-01T22:00:00', NULL, NULL);
+INSERT INTO avistamentos_diarios VALUES ('2025-10-01', 'Praia Norte', 'Raposa', 2);
+"""
+
+
+def test_banco_sem_particoes_migra_para_a_padrao(tmp_path):
+    caminho = str(tmp_path / "ninhos.db")
+    conexao = sqlite3.connect(caminho)
+    conexao.executescript(ESQUEMA_SEM_PARTICOES)
+    conexao.close()
+
+    store = NestStore(caminho)
+    try:
+        registro = RegistroPredadores(store)
+        assert registro.contar(PARTICAO_PADRAO) == 2
+        _importar(registro, 1, ORG_A)
+        assert registro.contar(ORG_A) == 1
+        assert registro.contar(PARTICAO_PADRAO) == 2
+
+        # Uma segunda abertura não migra de novo nem perde as contagens
+        assert RegistroPredadores(store).contar() == 3
+        indices = {
+            linha["name"]
+            for linha in store.consultar("PRAGMA index_list(avistamentos_predadores)")
+        }
+        assert "idx_avistamentos_particao_regiao_momento" in indices
+        assert "idx_avistamentos_regiao_momento" not in indices
+    finally:
+        store.fechar()
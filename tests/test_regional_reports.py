@@ -0,0 +1,35 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.artifacts import ArmazemArtefatos
+from utils.regional_reports import criar_executor, gerar_relatorios_regionais
+
+
+def _armazem(store, ninho, tmp_path):
+    store.inserir_varios([ninho(), ninho(regiao="Praia Sul")])
+    return ArmazemArtefatos(store, str(tmp_path / "artefatos"))
+
+
+def test_um_nucleo_gera_em_sequencia_sem_pool(store, ninho, tmp_path):
+    armazem = _armazem(store, ninho, tmp_path)
+    progresso = []
+
+    assert criar_executor(1) is None
+    resultados = gerar_relatorios_regionais(
+        armazem, processos=1, progresso=lambda *args: progresso.append(args)
+    )
+
+    assert set(resultados) == {"Praia Norte", "Praia Sul"}
+    assert all(resultados.values())
+    assert [concluidas for concluidas, _, _ in progresso] == [1, 2]
+
+
+def test_executor_compartilhado_continua_aberto_entre_chamadas(store, ninho, tmp_path):
+    armazem = _armazem(store, ninho, tmp_path)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        primeira = gerar_relatorios_regionais(armazem, executor=executor)
+        store.inserir(ninho())
+        segunda = gerar_relatorios_regionais(armazem, executor=executor)
+
+    assert set(primeira) == set(segunda) == {"Praia Norte", "Praia Sul"}
+    assert all(segunda.values())
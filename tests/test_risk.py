@@ -0,0 +1,119 @@
+import numpy as np
+
+from utils.alerts import MotorAlertas
+from utils.nest import Ninho, Particao
+from utils.patrol import candidatos
+from utils.risk import (
+    BIT_CRITICO, BIT_ESTAVEL, BIT_IMINENTE, BIT_MONITORAR, BIT_PREDADORES, MotorRisco,
+    avaliacao_do_ninho, avaliar,
+)
+
+ORG_A = Particao("Org A", "p1")
+
+
+def _avaliar(status=0, predadores=False, dias=30, risco=0, anterior=None):
+    pontuacao, faixa, mascara = avaliar(
+        np.array([status]),
+        np.array([predadores]),
+        np.array([dias]),
+        np.array([risco]),
+        None if anterior is None else np.array([anterior], dtype=float),
+    )
+    return float(pontuacao[0]), int(faixa[0]), int(mascara[0])
+
+
+def test_pontuacao_soma_os_fatores():
+    assert _avaliar() == (0.0, 0, BIT_ESTAVEL)
+    # Danificado (55) com predadores (20): crítico, com a mensagem de predadores
+    pontuacao, faixa, mascara = _avaliar(status=2, predadores=True)
+    assert (pontuacao, faixa) == (75.0, 2)
+    assert mascara == BIT_CRITICO | BIT_PREDADORES
+    # Tudo junto passa de 100 e é limitado
+    assert _avaliar(status=2, predadores=True, dias=1, risco=2)[0] == 100.0
+
+
+def test_limites_das_faixas():
+    # Ameaçado (30) fica exatamente no limite e já conta como 🟡
+    assert _avaliar(status=1)[1] == 1
+    assert _avaliar(status=1, dias=2)[:2] == (45.0, 1)
+    assert _avaliar(status=1, predadores=True, dias=2)[1] == 2
+    assert _avaliar(dias=2)[2] == BIT_ESTAVEL | BIT_IMINENTE
+
+
+def test_pontuacao_sobe_na_hora_e_desce_aos_poucos():
+    assert _avaliar(status=2, anterior=10.0)[0] == 55.0
+    # Sem fatores, mas vinda de 80: desce só até a média com a anterior
+    pontuacao, faixa, mascara = _avaliar(anterior=80.0)
+    assert (pontuacao, faixa) == (40.0, 1)
+    assert mascara == BIT_MONITORAR
+    assert _avaliar(anterior=np.nan)[0] == 0.0
+
+
+def test_motor_avalia_so_o_que_mudou(store, ninho):
+    motor = MotorRisco(store)
+    store.inserir_varios([ninho(), ninho(status="danificado", predadores=True)])
+
+    assert motor.atualizar() == 2
+    assert motor.cursor() == store.versao_atual()
+    assert motor.atualizar() == 0
+
+    store.inserir(ninho())
+    assert motor.atualizar() == 1
+    assert len(motor.avaliacoes()) == 3
+
+
+def test_motor_reiniciado_usa_o_historico_gravado(store, ninho):
+    store.aplicar_alteracoes([{
+        "id": "n1", "carimbo": 1, "dispositivo": "sessao",
+        "campos": ninho(status="danificado", predadores=True),
+    }])
+    MotorRisco(store).atualizar()
+
+    store.aplicar_alteracoes([{
+        "id": "n1", "carimbo": 2, "dispositivo": "sessao",
+        "campos": {"status": "intacto", "predadores": False},
+    }])
+    reiniciado = MotorRisco(store)
+    assert reiniciado.atualizar() == 1
+    assert reiniciado.avaliacoes()["n1"].pontuacao == 37.5
+    assert reiniciado.avaliacoes()["n1"].risco == "🟡"
+
+
+def test_avaliacoes_da_particao(store, ninho):
+    motor = MotorRisco(store)
+    (id_a,) = store.inserir_varios([ninho(**ORG_A._asdict())])
+    store.inserir(ninho())
+    motor.atualizar()
+
+    assert list(motor.avaliacoes(ORG_A)) == [id_a]
+    assert list(motor.avaliacoes_por_ids([id_a, "inexistente"])) == [id_a]
+
+
+def test_ninho_sem_avaliacao_e_calculado_na_hora(ninho):
+    novo = Ninho(**ninho(status="danificado", predadores=True))
+    assert avaliacao_do_ninho(novo, {}).risco == "🔴"
+
+
+def test_alerta_de_risco_usa_a_faixa_calculada(store, ninho):
+    informado = store.inserir(ninho(risco="🔴"))
+    calculado = store.inserir(ninho(status="danificado", predadores=True))
+    motor = MotorAlertas(store)
+    motor.avaliar()
+
+    criticos = [a["ninho_id"] for a in motor.pendentes() if a["regra"] == "risco_critico"]
+    assert criticos == [calculado]
+    assert informado not in criticos
+    (alerta,) = [a for a in motor.pendentes() if a["regra"] == "risco_critico"]
+    assert alerta["ninho"]["risco_calculado"] == "🔴"
+
+
+def test_patrulha_inclui_os_criticos_pela_faixa_calculada(ninho):
+    informado = Ninho(**ninho(risco="🔴"))
+    calculado = Ninho(**ninho(status="danificado", predadores=True))
+
+    assert candidatos([informado, calculado], dias=3) == [calculado]
+    # A pontuação pré-calculada (com histórico) prevalece sobre a da hora
+    assert candidatos([informado, calculado], dias=3, pontuacoes={informado.id: 70.0}) == [
+        informado, calculado
+    ]
+    assert candidatos([informado, calculado], dias=3, criticos=False) == []
@@ -0,0 +1,105 @@
+import random
+
+from utils.nest import Particao
+from utils.search import BuscaNinhos, consulta_fts
+
+ORG_A = Particao("Org A", "p1")
+
+
+def _alterar(store, ninho_id, carimbo, **campos):
+    store.aplicar_alteracoes(
+        [{"id": ninho_id, "carimbo": carimbo, "dispositivo": "sessao", "campos": campos}]
+    )
+
+
+def _ids(busca, texto, **kwargs):
+    resultados, total = busca.buscar(texto, **kwargs)
+    assert total == len(resultados)
+    return sorted(ninho.id for ninho, _ in resultados)
+
+
+def _conferir_indice(store):
+    """O FTS5 levanta erro se o índice não bater com o conteúdo da tabela ninhos."""
+    with store.transacao() as conexao:
+        conexao.execute("INSERT INTO ninhos_busca (ninhos_busca) VALUES ('integrity-check')")
+
+
+def test_busca_ignora_acentos_e_casa_prefixo(store, ninho):
+    busca = BuscaNinhos(store)
+    ninho_id = store.inserir(ninho(observacoes="Ninho ameaçado por caranguejos"))
+
+    assert _ids(busca, "ameacado") == [ninho_id]
+    assert _ids(busca, "carang") == [ninho_id]
+    assert _ids(busca, "ana souza") == [ninho_id]
+    assert _ids(busca, "raposa") == []
+
+
+def test_alteracao_atualiza_o_indice(store, ninho):
+    busca = BuscaNinhos(store)
+    _alterar(store, "n1", 1, **ninho(observacoes="rastros de raposa"))
+    _alterar(store, "n1", 2, observacoes="cerca refeita", guardiao="Bia Lima")
+
+    assert _ids(busca, "raposa") == []
+    assert _ids(busca, "cerca") == ["n1"]
+    assert _ids(busca, "ana") == []
+    assert _ids(busca, "bia") == ["n1"]
+    _conferir_indice(store)
+
+
+def test_remocao_tira_o_ninho_do_indice(store, ninho):
+    busca = BuscaNinhos(store)
+    ninho_id = store.inserir(ninho(observacoes="ovos expostos"))
+    with store.transacao() as conexao:
+        conexao.execute("DELETE FROM ninhos WHERE id = ?", (ninho_id,))
+
+    assert busca.buscar("ovos") == ([], 0)
+    _conferir_indice(store)
+
+
+def test_indice_segue_escritas_aleatorias(store, ninho):
+    busca = BuscaNinhos(store)
+    aleatorio = random.Random(3)
+    palavras = ["raposa", "maré", "cerca", "gaivota", "erosão"]
+    observacoes = {}
+    for carimbo in range(1, 120):
+        ninho_id = f"n{aleatorio.randrange(15)}"
+        texto = " ".join(aleatorio.sample(palavras, 2))
+        if ninho_id in observacoes and aleatorio.random() < 0.2:
+            with store.transacao() as conexao:
+                conexao.execute("DELETE FROM ninhos WHERE id = ?", (ninho_id,))
+            del observacoes[ninho_id]
+            continue
+        campos = {"observacoes": texto} if ninho_id in observacoes else ninho(observacoes=texto)
+        _alterar(store, ninho_id, carimbo, **campos)
+        observacoes[ninho_id] = texto
+
+    _conferir_indice(store)
+    for palavra in ("raposa", "mare", "erosao"):
+        esperado = sorted(
+            ninho_id for ninho_id, texto in observacoes.items()
+            if palavra in texto.replace("é", "e").replace("ã", "a")
+        )
+        assert _ids(busca, palavra) == esperado
+
+
+def test_indice_criado_depois_inclui_os_ninhos_existentes(store, ninho):
+    ninho_id = store.inserir(ninho(observacoes="gaivotas rondando"))
+    assert _ids(BuscaNinhos(store), "gaivotas") == [ninho_id]
+
+
+def test_busca_na_particao_e_paginada(store, ninho):
+    busca = BuscaNinhos(store)
+    ids_a = store.inserir_varios([ninho(**ORG_A._asdict(), observacoes="maré alta")] * 5)
+    store.inserir(ninho(observacoes="maré alta"))
+
+    assert _ids(busca, "mare", particao=ORG_A) == sorted(ids_a)
+    pagina, total = busca.buscar("mare", pagina=2, por_pagina=2, particao=ORG_A)
+    assert (len(pagina), total) == (2, 5)
+    assert busca.buscar("mare", pagina=3, por_pagina=2, particao=ORG_A)[1] == 5
+
+
+def test_consulta_ignora_operadores_digitados(store, ninho):
+    assert consulta_fts('maré "alta') == '"maré" "alta"*'
+    assert consulta_fts("  ** -- ") is None
+    ninho_id = store.inserir(ninho(observacoes="NEAR OR AND"))
+    assert _ids(BuscaNinhos(store), "near OR") == [ninho_id]
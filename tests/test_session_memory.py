@@ -0,0 +1,47 @@
+import numpy as np
+
+from utils.nest_index import SelecaoLinhas
+from utils.session_memory import ORCAMENTO_PADRAO, MemoriaSessao, orcamento_para
+
+
+def _selecao_em_bits(total: int) -> SelecaoLinhas:
+    mascara = np.zeros(total, dtype=bool)
+    mascara[::2] = True
+    return SelecaoLinhas.de_mascara(mascara)
+
+
+def test_orcamento_cresce_com_o_numero_de_ninhos():
+    assert orcamento_para(0) == ORCAMENTO_PADRAO
+    assert orcamento_para(1_000) == ORCAMENTO_PADRAO
+    assert orcamento_para(600_000) >= 2 * 75_000
+
+
+def test_selecao_grande_cabe_no_orcamento_do_indice():
+    selecao = _selecao_em_bits(600_000)
+    assert selecao.nbytes == 75_000
+
+    assert not MemoriaSessao({}).guardar("filtro", selecao, versao=1)
+    memoria = MemoriaSessao({}, orcamento_para(600_000))
+    assert memoria.guardar("filtro", selecao, versao=1)
+    assert memoria.obter("filtro", versao=1) is selecao
+
+
+def test_versao_diferente_descarta_o_valor():
+    memoria = MemoriaSessao({})
+    memoria.guardar("filtro", "valor", versao=1)
+
+    assert memoria.obter("filtro", versao=2) is None
+    assert memoria.obter("filtro", versao=1) is None
+
+
+def test_menos_usados_saem_primeiro():
+    estado = {}
+    memoria = MemoriaSessao(estado, orcamento=100)
+    memoria.guardar("a", np.zeros(40, dtype=np.uint8))
+    memoria.guardar("b", np.zeros(40, dtype=np.uint8))
+    memoria.obter("a")
+    memoria.guardar("c", np.zeros(40, dtype=np.uint8))
+
+    assert memoria.obter("a") is not None
+    assert memoria.obter("b") is None
+    assert memoria.uso() <= 100
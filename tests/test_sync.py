@@ -0,0 +1,166 @@
+from utils.nest_store import ALTERACAO_APLICADA, ALTERACAO_IGNORADA, ALTERACAO_REJEITADA
+from utils.sync import (
+    FilaOffline, ServidorSincronizacao, TransporteInstavel, codificar_lote, decodificar_lote,
+    sincronizar,
+)
+
+
+def test_registrar_enfileira_com_id_do_dispositivo(tmp_path, ninho):
+    fila = FilaOffline(str(tmp_path / "fila.db"))
+    ninho_id = fila.registrar(ninho())
+
+    (pendente,) = fila.pendentes()
+    assert pendente["id"] == ninho_id
+    assert pendente["dispositivo"] == fila.dispositivo
+    assert pendente["campos"]["regiao"] == "Praia Norte"
+    assert fila.contar() == 1
+
+
+def test_identidade_e_relogio_persistem(tmp_path, ninho):
+    caminho = str(tmp_path / "fila.db")
+    fila = FilaOffline(caminho)
+    fila.registrar(ninho())
+    carimbo = fila.pendentes()[0]["carimbo"]
+    dispositivo = fila.dispositivo
+    fila.fechar()
+
+    reaberta = FilaOffline(caminho)
+    assert reaberta.dispositivo == dispositivo
+    reaberta.registrar(ninho())
+    assert max(p["carimbo"] for p in reaberta.pendentes()) > carimbo
+
+
+def test_cada_dispositivo_tem_identidade_propria(tmp_path, ninho):
+    fila = FilaOffline(str(tmp_path / "fila.db"))
+    id_a = fila.registrar(ninho(), dispositivo="sessao-a")
+    id_b = fila.registrar(ninho(), dispositivo="sessao-b")
+
+    dispositivos = {p["id"]: p["dispositivo"] for p in fila.pendentes()}
+    assert dispositivos == {id_a: "sessao-a", id_b: "sessao-b"}
+
+
+def test_alteracoes_do_mesmo_ninho_sao_combinadas(tmp_path, ninho):
+    fila = FilaOffline(str(tmp_path / "fila.db"))
+    ninho_id = fila.registrar(ninho())
+    fila.alterar(ninho_id, {"status": "ameacado"})
+
+    (pendente,) = fila.pendentes()
+    assert pendente["campos"]["status"] == "ameacado"
+    assert pendente["campos"]["quantidade_ovos"] == 100
+
+
+def test_sincronizar_esvazia_a_fila(store, tmp_path, ninho):
+    fila = FilaOffline(str(tmp_path / "fila.db"))
+    for ovos in (80, 90, 100):
+        fila.registrar(ninho(quantidade_ovos=ovos))
+
+    resumo = sincronizar(fila, ServidorSincronizacao(store).receber, tamanho_lote=2)
+
+    assert resumo[ALTERACAO_APLICADA] == 3
+    assert fila.contar() == 0
+    assert sorted(n["quantidade_ovos"] for n in store.listar()) == [80, 90, 100]
+
+
+def test_conexao_instavel_nao_duplica(store, tmp_path, ninho):
+    fila = FilaOffline(str(tmp_path / "fila.db"))
+    for ovos in range(50, 80):
+        fila.registrar(ninho(quantidade_ovos=ovos))
+    transporte = TransporteInstavel(
+        ServidorSincronizacao(store).receber, falha_envio=0.3, falha_resposta=0.3, semente=7
+    )
+
+    while fila.contar():
+        try:
+            sincronizar(fila, transporte, tamanho_lote=7, tentativas=3, espera=0)
+        except ConnectionError:
+            pass
+
+    assert store.contar() == 30
+
+
+def test_lote_reenviado_e_ignorado(store, tmp_path, ninho):
+    fila = FilaOffline(str(tmp_path / "fila.db"))
+    fila.registrar(ninho())
+    lote = fila.pendentes()
+
+    assert store.aplicar_alteracoes(lote)[0][1] == ALTERACAO_APLICADA
+    assert store.aplicar_alteracoes(lote)[0][1] == ALTERACAO_IGNORADA
+    assert store.contar() == 1
+
+
+def test_dados_invalidos_vao_para_rejeitadas(store, tmp_path, ninho):
+    fila = FilaOffline(str(tmp_path / "fila.db"))
+    ninho_id = fila.registrar(ninho())
+    with fila._conexao:
+        fila._conexao.execute(
+            "UPDATE fila_alteracoes SET campos = ? WHERE ninho_id = ?",
+            ('{"regiao": "Praia Inexistente", "quantidade_ovos": 10}', ninho_id),
+        )
+
+    resumo = sincronizar(fila, ServidorSincronizacao(store).receber)
+
+    assert resumo[ALTERACAO_REJEITADA] == 1
+    assert fila.contar() == 0
+    assert fila.rejeitadas()[0]["id"] == ninho_id
+    assert store.contar() == 0
+
+
+def test_fila_antiga_sem_dispositivo_por_linha(tmp_path, ninho):
+    import sqlite3
+
+    caminho = str(tmp_path / "fila.db")
+    conexao = sqlite3.connect(caminho)
+    conexao.executescript(
+        "CREATE TABLE fila_alteracoes (ninho_id TEXT PRIMARY KEY, carimbo INTEGER NOT NULL, "
+        "campos TEXT NOT NULL)"
+    )
+    conexao.execute(
+        "INSERT INTO fila_alteracoes VALUES (?, ?, ?)", ("antigo", 1, '{"status": "intacto"}')
+    )
+    conexao.commit()
+    conexao.close()
+
+    fila = FilaOffline(caminho)
+    (pendente,) = fila.pendentes()
+    assert pendente["id"] == "antigo"
+    assert pendente["dispositivo"] == fila.dispositivo
+
+
+def test_lote_com_dois_dispositivos_preserva_cada_um(store, tmp_path, ninho):
+    fila = FilaOffline(str(tmp_path / "fila.db"))
+    id_a = fila.registrar(ninho(), dispositivo="sessao-a")
+    id_b = fila.registrar(ninho(), dispositivo="sessao-b")
+    lote = fila.pendentes()
+
+    decodificado = decodificar_lote(codificar_lote(lote))
+    assert {a["id"]: a["dispositivo"] for a in decodificado} == {
+        id_a: "sessao-a", id_b: "sessao-b"
+    }
+
+    sincronizar(fila, ServidorSincronizacao(store).receber)
+    relogios = {
+        linha["ninho_id"]: linha["dispositivo"]
+        for linha in store.consultar("SELECT DISTINCT ninho_id, dispositivo FROM ninhos_relogios")
+    }
+    assert relogios == {id_a: "sessao-a", id_b: "sessao-b"}
+
+
+def test_conflito_entre_dispositivos_no_mesmo_lote(store, ninho):
+    store.aplicar_alteracoes([
+        {"id": "n1", "carimbo": 1, "dispositivo": "sessao-a", "campos": ninho()}
+    ])
+    lote = [
+        {"id": "n1", "carimbo": 5, "dispositivo": "sessao-a", "campos": {"status": "ameacado"}},
+        {
+            "id": "n1",
+            "carimbo": 3,
+            "dispositivo": "sessao-b",
+            "campos": {"status": "danificado", "risco": "🔴"},
+        },
+    ]
+
+    store.aplicar_alteracoes(decodificar_lote(codificar_lote(lote)))
+
+    (atual,) = store.listar()
+    # Campo a campo: o status mais recente é o de sessao-a, o risco só sessao-b alterou
+    assert (atual["status"], atual["risco"]) == ("ameacado", "🔴")
@@ -0,0 +1,200 @@
+import json
+from datetime import datetime
+from typing import List, Dict, Any, Callable, Tuple
+
+from utils.nest import Ninho
+from utils.nest_store import NestStore
+from utils.risk import Avaliacao, MotorRisco, avaliacao_do_ninho
+
+# Regras de alerta: (código, mensagem, condição sobre o ninho e a avaliação de risco calculada)
+REGRAS_ALERTA: List[Tuple[str, str, Callable[[Ninho, Avaliacao], bool]]] = [
+    (
+        "eclosao_iminente",
+        "🐣 Eclosão iminente: ninho eclode em ≤2 dias",
+        lambda ninho, avaliacao: ninho["dias_para_eclosao"] <= 2,
+    ),
+    (
+        "risco_critico",
+        "🔴 Ninho na faixa de risco crítico (calculada) necessita atenção imediata",
+        lambda ninho, avaliacao: avaliacao.risco == "🔴",
+    ),
+    (
+        "predadores_danificado",
+        "🦅 Ninho com predadores e danos necessita proteção urgente",
+        lambda ninho, avaliacao: ninho["predadores"] and ninho["status"] == "danificado",
+    ),
+]
+
+ESQUEMA_ALERTAS = """
+CREATE TABLE IF NOT EXISTS alertas_cursor (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    versao INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS alertas_ativos (
+    ninho_id TEXT NOT NULL,
+    regra TEXT NOT NULL,
+    PRIMARY KEY (ninho_id, regra)
+);
+CREATE TABLE IF NOT EXISTS alertas_outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ninho_id TEXT NOT NULL,
+    regra TEXT NOT NULL,
+    mensagem TEXT NOT NULL,
+    dados TEXT NOT NULL,
+    criado_em TEXT NOT NULL,
+    entregue_em TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_pendentes ON alertas_outbox(entregue_em, id);
+"""
+
+# Limite de parâmetros por consulta IN (SQLite aceita no mínimo 999)
+_TAMANHO_LOTE_IN = 500
+
+
+def regras_disparadas(ninho: Ninho, avaliacao: Avaliacao) -> List[str]:
+    """Retorna os códigos das regras de alerta que o ninho dispara."""
+    return [codigo for codigo, _, condicao in REGRAS_ALERTA if condicao(ninho, avaliacao)]
+
+
+class MotorAlertas:
+    """
+    Avalia as regras de alerta de forma incremental sobre o armazenamento de ninhos.
+
+    Cada execução lê apenas os ninhos alterados desde o último cursor, compara
+    as regras disparadas com os alertas já ativos do ninho (deduplicação) e
+    grava os novos alertas na tabela `alertas_outbox`, de onde os workers de
+    notificação os consomem.
+
+    A regra de risco crítico usa a faixa calculada pelo motor de risco, não a
+    informada no cadastro: antes de cada lote, as avaliações são atualizadas
+    até a versão do lote.
+    """
+
+    def __init__(self, store: NestStore):
+        self.store = store
+        self.risco = MotorRisco(store)
+        self.store.criar_esquema(ESQUEMA_ALERTAS)
+        with self.store.transacao() as conexao:
+            conexao.execute("INSERT OR IGNORE INTO alertas_cursor (id, versao) VALUES (1, 0)")
+
+    def cursor(self) -> int:
+        """Versão do armazenamento até a qual os alertas já foram avaliados."""
+        return self.store.consultar("SELECT versao FROM alertas_cursor WHERE id = 1")[0][0]
+
+    def avaliar(self, limite: int = 5000) -> int:
+        """
+        Processa todos os ninhos alterados desde o cursor.
+        Retorna quantos alertas novos foram gravados no outbox.
+        """
+        total_novos = 0
+        while True:
+            cursor = self.cursor()
+            ninhos, nova_versao = self.store.alterados_desde(cursor, limite)
+            if not ninhos:
+                return total_novos
+            if self.risco.cursor() < nova_versao:
+                self.risco.atualizar()
+            avaliacoes = self.risco.avaliacoes_por_ids([ninho.id for ninho in ninhos])
+            total_novos += self._avaliar_lote(ninhos, avaliacoes, cursor, nova_versao)
+
+    def _avaliar_lote(
+        self,
+        ninhos: List[Ninho],
+        avaliacoes: Dict[str, Avaliacao],
+        cursor: int,
+        nova_versao: int,
+    ) -> int:
+        agora = datetime.now().isoformat(timespec="seconds")
+        novos = 0
+
+        with self.store.transacao() as conexao:
+            # Outro processo pode ter avançado o cursor enquanto líamos
+            atual = conexao.execute("SELECT versao FROM alertas_cursor WHERE id = 1").fetchone()[0]
+            if atual != cursor:
+                return 0
+
+            ativos = self._alertas_ativos(conexao, [ninho["id"] for ninho in ninhos])
+
+            for ninho in ninhos:
+                avaliacao = avaliacao_do_ninho(ninho, avaliacoes)
+                disparadas = set(regras_disparadas(ninho, avaliacao))
+                anteriores = ativos.get(ninho["id"], set())
+
+                # Regras que deixaram de valer podem disparar de novo no futuro
+                for regra in anteriores - disparadas:
+                    conexao.execute(
+                        "DELETE FROM alertas_ativos WHERE ninho_id = ? AND regra = ?",
+                        (ninho["id"], regra),
+                    )
+
+                for codigo, mensagem, _ in REGRAS_ALERTA:
+                    if codigo not in disparadas or codigo in anteriores:
+                        continue
+                    conexao.execute(
+                        "INSERT INTO alertas_ativos (ninho_id, regra) VALUES (?, ?)",
+                        (ninho["id"], codigo),
+                    )
+                    conexao.execute(
+                        "INSERT INTO alertas_outbox (ninho_id, regra, mensagem, dados, criado_em) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (
+                            ninho["id"],
+                            codigo,
+                            mensagem,
+                            json.dumps(
+                                {
+                                    **ninho.para_dict(),
+                                    "pontuacao": avaliacao.pontuacao,
+                                    "risco_calculado": avaliacao.risco,
+                                },
+                                ensure_ascii=False,
+                            ),
+                            agora,
+                        ),
+                    )
+                    novos += 1
+
+            conexao.execute("UPDATE alertas_cursor SET versao = ? WHERE id = 1", (nova_versao,))
+
+        return novos
+
+    def _alertas_ativos(self, conexao, ninho_ids: List[str]) -> Dict[str, set]:
+        ativos: Dict[str, set] = {}
+        for inicio in range(0, len(ninho_ids), _TAMANHO_LOTE_IN):
+            lote = ninho_ids[inicio:inicio + _TAMANHO_LOTE_IN]
+            marcadores = ",".join("?" * len(lote))
+            linhas = conexao.execute(
+                f"SELECT ninho_id, regra FROM alertas_ativos WHERE ninho_id IN ({marcadores})",
+                lote,
+            )
+            for ninho_id, regra in linhas:
+                ativos.setdefault(ninho_id, set()).add(regra)
+        return ativos
+
+    def pendentes(self, limite: int = 100) -> List[Dict[str, Any]]:
+        """Retorna os alertas do outbox ainda não entregues, do mais antigo ao mais novo."""
+        linhas = self.store.consultar(
+            "SELECT id, ninho_id, regra, mensagem, dados, criado_em FROM alertas_outbox "
+            "WHERE entregue_em IS NULL ORDER BY id LIMIT ?",
+            (limite,),
+        )
+        return [
+            {
+                "id": linha["id"],
+                "ninho_id": linha["ninho_id"],
+                "regra": linha["regra"],
+                "mensagem": linha["mensagem"],
+                "ninho": json.loads(linha["dados"]),
+                "criado_em": linha["criado_em"],
+            }
+            for linha in linhas
+        ]
+
+    def marcar_entregues(self, alerta_ids: List[int]):
+        """Marca alertas do outbox como entregues pelos workers de notificação."""
+        agora = datetime.now().isoformat(timespec="seconds")
+        with self.store.transacao() as conexao:
+            conexao.executemany(
+                "UPDATE alertas_outbox SET entregue_em = ? WHERE id = ?",
+                [(agora, alerta_id) for alerta_id in alerta_ids],
+            )
@@ -0,0 +1,302 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.cube import CuboNinhos
+from utils.nest import Ninho, Particao, ResultadoEclosao, RISCOS, PARTICAO_PADRAO
+
+# Temporadas encerradas, congeladas em colunas NumPy (.npy) abertas com mmap:
+#
+#   <pasta>/<temporada>/meta.json        dicionários de regiões, guardiões e partições, total
+#   <pasta>/<temporada>/<coluna>.npy     uma coluna por arquivo, tipo fixo
+#
+# Abrir uma temporada lê só o meta.json; cada coluna é mapeada na primeira
+# leitura, sem copiar nem criar objetos por ninho. Processos que abrem o
+# mesmo arquivo compartilham o cache de páginas do sistema operacional.
+PASTA_ARQUIVO = os.environ.get("GUARDIOES_ARQUIVO", os.path.join("data", "temporadas"))
+
+# Resultado de escavação ausente nas colunas de eclosão
+SEM_RESULTADO = -1
+
+# Colunas numéricas: nome -> tipo
+COLUNAS = {
+    "codigo_regiao": np.uint8,
+    "codigo_status": np.uint8,
+    "codigo_risco": np.uint8,
+    "predadores": np.bool_,
+    "dias_para_eclosao": np.uint8,
+    "quantidade_ovos": np.uint8,
+    "codigo_guardiao": np.uint32,
+    "codigo_particao": np.uint16,
+    "eclodidos": np.int16,
+    "emergidos": np.int16,
+    "ovos_mortos": np.int16,
+    "data_escavacao": "datetime64[D]",
+}
+
+_CAMPOS_SUCESSO = ("eclodidos", "emergidos", "ovos_mortos")
+
+
+def _salvar(pasta: str, nome: str, valores: np.ndarray):
+    np.save(os.path.join(pasta, f"{nome}.npy"), valores, allow_pickle=False)
+
+
+def arquivar_temporada(
+    pasta_arquivo: str,
+    temporada: str,
+    ninhos: List[Ninho],
+    resultados: Optional[Dict[str, ResultadoEclosao]] = None,
+) -> str:
+    """
+    Congela os ninhos (e os resultados de escavação) de uma temporada
+    encerrada no formato colunar. A temporada aparece de uma vez: as colunas
+    são gravadas numa pasta temporária, renomeada no final. Levanta
+    FileExistsError se a temporada já estiver arquivada.
+    Retorna a pasta da temporada.
+    """
+    destino = os.path.join(pasta_arquivo, temporada)
+    if os.path.exists(destino):
+        raise FileExistsError(f"Temporada já arquivada: {temporada}")
+    os.makedirs(pasta_arquivo, exist_ok=True)
+    resultados = resultados or {}
+
+    # Strings repetidas viram códigos em dicionários, na ordem em que aparecem
+    regioes = list(dict.fromkeys(n.regiao for n in ninhos))
+    guardioes = list(dict.fromkeys(n.guardiao for n in ninhos))
+    particoes = list(dict.fromkeys(n.particao for n in ninhos))
+    indice_regiao = {regiao: i for i, regiao in enumerate(regioes)}
+    indice_guardiao = {guardiao: i for i, guardiao in enumerate(guardioes)}
+    indice_particao = {particao: i for i, particao in enumerate(particoes)}
+
+    total = len(ninhos)
+    codigos = {
+        "codigo_regiao": (indice_regiao[n.regiao] for n in ninhos),
+        "codigo_status": (n.codigo_status for n in ninhos),
+        "codigo_risco": (n.codigo_risco for n in ninhos),
+        "predadores": (n.predadores for n in ninhos),
+        "dias_para_eclosao": (n.dias_para_eclosao for n in ninhos),
+        "quantidade_ovos": (n.quantidade_ovos for n in ninhos),
+        "codigo_guardiao": (indice_guardiao[n.guardiao] for n in ninhos),
+        "codigo_particao": (indice_particao[n.particao] for n in ninhos),
+    }
+    colunas = {
+        nome: np.fromiter(valores, COLUNAS[nome], total) for nome, valores in codigos.items()
+    }
+    for campo in _CAMPOS_SUCESSO:
+        colunas[campo] = np.fromiter(
+            (getattr(resultados[n.id], campo) if n.id in resultados else SEM_RESULTADO
+             for n in ninhos),
+            COLUNAS[campo],
+            total,
+        )
+
+    temporaria = tempfile.mkdtemp(prefix=f".{temporada}-", dir=pasta_arquivo)
+    try:
+        for nome, valores in colunas.items():
+            _salvar(temporaria, nome, valores)
+        _salvar(temporaria, "data_escavacao", np.array(
+            [resultados[n.id].data_escavacao if n.id in resultados else None for n in ninhos],
+            dtype=COLUNAS["data_escavacao"],
+        ).reshape(total))
+        ids = np.array([n.id or "" for n in ninhos], dtype="S32").reshape(total)
+        _salvar(temporaria, "id", ids)
+
+        # Observações: texto UTF-8 concatenado e posições de início (n + 1)
+        textos = [(n.observacoes or "").encode("utf-8") for n in ninhos]
+        posicoes = np.zeros(total + 1, dtype=np.int64)
+        np.cumsum([len(texto) for texto in textos], out=posicoes[1:])
+        _salvar(temporaria, "observacoes", np.frombuffer(b"".join(textos), dtype=np.uint8))
+        _salvar(temporaria, "observacoes_posicoes", posicoes)
+
+        with open(os.path.join(temporaria, "meta.json"), "w", encoding="utf-8") as arquivo:
+            json.dump(
+                {
+                    "temporada": temporada,
+                    "total": total,
+                    "regioes": regioes,
+                    "guardioes": guardioes,
+                    "particoes": [list(particao) for particao in particoes],
+                    "arquivada_em": datetime.now().isoformat(timespec="seconds"),
+                },
+                arquivo,
+                ensure_ascii=False,
+            )
+        os.rename(temporaria, destino)
+    except BaseException:
+        shutil.rmtree(temporaria, ignore_errors=True)
+        raise
+    return destino
+
+
+class TemporadaArquivada:
+    """
+    Temporada encerrada, somente leitura, aberta sobre os arquivos mapeados
+    em memória. `cubo()` entrega o mesmo CuboNinhos usado pelo app, então as
+    funções de `utils/statistics.py` servem também para o histórico.
+
+    Uma temporada guarda os ninhos de todas as organizações e projetos; as
+    leituras com `particao` veem só os ninhos dela. Temporadas arquivadas
+    antes das partições pertencem inteiras à partição padrão.
+    """
+
+    def __init__(self, pasta: str):
+        self.pasta = pasta
+        with open(os.path.join(pasta, "meta.json"), encoding="utf-8") as arquivo:
+            meta = json.load(arquivo)
+        self.temporada: str = meta["temporada"]
+        self.total: int = meta["total"]
+        self.regioes: Tuple[str, ...] = tuple(meta["regioes"])
+        self.guardioes: Tuple[str, ...] = tuple(meta["guardioes"])
+        self.particoes: Tuple[Particao, ...] = tuple(
+            Particao(*particao) for particao in meta.get("particoes", [PARTICAO_PADRAO])
+        )
+        self._colunas: Dict[str, np.ndarray] = {}
+        self._cubos: Dict[Optional[Particao], CuboNinhos] = {}
+
+    def __len__(self) -> int:
+        return self.total
+
+    def coluna(self, nome: str) -> np.ndarray:
+        """Coluna mapeada em memória (somente leitura), aberta na primeira leitura."""
+        if nome not in self._colunas:
+            caminho = os.path.join(self.pasta, f"{nome}.npy")
+            if nome == "codigo_particao" and not os.path.exists(caminho):
+                # Temporada anterior às partições: tudo na partição padrão
+                self._colunas[nome] = np.zeros(self.total, dtype=COLUNAS[nome])
+            else:
+                self._colunas[nome] = np.load(caminho, mmap_mode="r", allow_pickle=False)
+        return self._colunas[nome]
+
+    def linhas(self, particao: Optional[Particao] = None) -> Optional[np.ndarray]:
+        """Máscara dos ninhos da partição (None = todos os ninhos)."""
+        if particao is None:
+            return None
+        if particao not in self.particoes:
+            return np.zeros(self.total, dtype=bool)
+        return self.coluna("codigo_particao") == self.particoes.index(particao)
+
+    def cubo(self, particao: Optional[Particao] = None) -> CuboNinhos:
+        """Cubo de contagens da temporada (ou dos ninhos da partição), montado das colunas."""
+        if particao not in self._cubos:
+            linhas = self.linhas(particao)
+            colunas = [
+                self.coluna(nome) if linhas is None else self.coluna(nome)[linhas]
+                for nome in (
+                    "codigo_regiao", "codigo_status", "codigo_risco", "predadores",
+                    "dias_para_eclosao", "quantidade_ovos",
+                )
+            ]
+            self._cubos[particao] = CuboNinhos.de_colunas(self.regioes, *colunas)
+        return self._cubos[particao]
+
+    def agregados_eclosao(self, particao: Optional[Particao] = None) -> List[Dict[str, Any]]:
+        """Somas de sucesso de eclosão por região e risco, como `NestStore.agregados_eclosao`."""
+        escavados = self.coluna("eclodidos") != SEM_RESULTADO
+        linhas = self.linhas(particao)
+        if linhas is not None:
+            escavados &= linhas
+        forma = (len(self.regioes), len(RISCOS))
+        celula = np.ravel_multi_index(
+            (self.coluna("codigo_regiao")[escavados], self.coluna("codigo_risco")[escavados]), forma
+        )
+        tamanho = forma[0] * forma[1]
+
+        def somar(pesos: Optional[np.ndarray] = None) -> np.ndarray:
+            return np.bincount(celula, weights=pesos, minlength=tamanho).astype(np.int64)
+
+        somas = {
+            "ninhos": somar(),
+            "ovos": somar(self.coluna("quantidade_ovos")[escavados]),
+        }
+        for campo in _CAMPOS_SUCESSO:
+            somas[campo] = somar(self.coluna(campo)[escavados])
+
+        return [
+            {
+                "regiao": self.regioes[i // len(RISCOS)],
+                "risco": RISCOS[i % len(RISCOS)],
+                **{campo: int(valores[i]) for campo, valores in somas.items()},
+            }
+            for i in np.flatnonzero(somas["ninhos"])
+        ]
+
+    def ninho(self, posicao: int) -> Ninho:
+        """Materializa um único ninho da temporada (para detalhes e exportação)."""
+        posicoes = self.coluna("observacoes_posicoes")
+        inicio, fim = int(posicoes[posicao]), int(posicoes[posicao + 1])
+        observacoes = bytes(self.coluna("observacoes")[inicio:fim]).decode("utf-8")
+        particao = self.particoes[self.coluna("codigo_particao")[posicao]]
+        return Ninho.confiavel(
+            id=self.coluna("id")[posicao].decode("ascii") or None,
+            regiao=self.regioes[self.coluna("codigo_regiao")[posicao]],
+            quantidade_ovos=int(self.coluna("quantidade_ovos")[posicao]),
+            codigo_status=int(self.coluna("codigo_status")[posicao]),
+            codigo_risco=int(self.coluna("codigo_risco")[posicao]),
+            dias_para_eclosao=int(self.coluna("dias_para_eclosao")[posicao]),
+            predadores=bool(self.coluna("predadores")[posicao]),
+            guardiao=self.guardioes[self.coluna("codigo_guardiao")[posicao]],
+            observacoes=observacoes,
+            organizacao=particao.organizacao,
+            projeto=particao.projeto,
+        )
+
+
+class ArquivoTemporadas:
+    """Conjunto das temporadas arquivadas numa pasta, abertas sob demanda."""
+
+    def __init__(self, pasta: str = PASTA_ARQUIVO):
+        self.pasta = pasta
+        self._abertas: Dict[str, TemporadaArquivada] = {}
+
+    def temporadas(self) -> List[str]:
+        """Nomes das temporadas arquivadas, em ordem."""
+        if not os.path.isdir(self.pasta):
+            return []
+        return sorted(
+            nome for nome in os.listdir(self.pasta)
+            if not nome.startswith(".")
+            and os.path.isfile(os.path.join(self.pasta, nome, "meta.json"))
+        )
+
+    def abrir(self, temporada: str) -> TemporadaArquivada:
+        """Abre (uma vez por instância) a temporada arquivada."""
+        if temporada not in self._abertas:
+            self._abertas[temporada] = TemporadaArquivada(os.path.join(self.pasta, temporada))
+        return self._abertas[temporada]
+
+    def cubo(
+        self, temporadas: Optional[List[str]] = None, particao: Optional[Particao] = None
+    ) -> CuboNinhos:
+        """
+        Cubo somado de várias temporadas (padrão: todas), só com os ninhos da
+        partição, se informada. Os cubos de cada temporada são alinhados pela
+        união das regiões e somados.
+        """
+        cubos = [
+            self.abrir(nome).cubo(particao) for nome in (temporadas or self.temporadas())
+        ]
+        regioes = tuple(dict.fromkeys(r for cubo in cubos for r in cubo.rotulos["regiao"]))
+        # Cubo zerado com todas as regiões, onde cada temporada é somada
+        sem_ninhos = np.zeros(0, dtype=np.intp)
+        vazio = CuboNinhos.de_colunas(regioes, *[sem_ninhos] * 6)
+        contagem, ovos = vazio.contagem, vazio.ovos
+        for cubo in cubos:
+            posicoes = [regioes.index(regiao) for regiao in cubo.rotulos["regiao"]]
+            contagem[posicoes] += cubo.contagem
+            ovos[posicoes] += cubo.ovos
+        return CuboNinhos(vazio.rotulos, contagem, ovos)
+
+    def agregados_eclosao(
+        self, temporadas: Optional[List[str]] = None, particao: Optional[Particao] = None
+    ) -> List[Dict[str, Any]]:
+        """Agregados de sucesso de eclosão de várias temporadas (padrão: todas) e partição."""
+        return [
+            linha
+            for nome in (temporadas or self.temporadas())
+            for linha in self.abrir(nome).agregados_eclosao(particao)
+        ]
@@ -0,0 +1,247 @@
+import hashlib
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.cube import CuboNinhos
+from utils.metrics import RELATORIOS, medir
+from utils.nest import Particao, PARTICAO_PADRAO
+from utils.nest_store import NestStore
+from utils.report_builder import montar_relatorio_resumido, montar_csv, montar_parquet
+
+# A versão dos dados de uma partição é a maior versão dos seus ninhos. Um
+# mesmo lote de sincronização grava ninhos de várias partições com a mesma
+# versão, então a partição faz parte da chave de cada relatório.
+TABELA_ARTEFATOS = """
+CREATE TABLE IF NOT EXISTS artefatos (
+    organizacao TEXT NOT NULL,
+    projeto TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    versao_dados INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    extensao TEXT NOT NULL,
+    tamanho INTEGER NOT NULL,
+    criado_em TEXT NOT NULL,
+    PRIMARY KEY (organizacao, projeto, tipo, versao_dados)
+)"""
+
+INDICES_ARTEFATOS = (
+    "CREATE INDEX IF NOT EXISTS idx_artefatos_hash ON artefatos(hash)",
+    "CREATE INDEX IF NOT EXISTS idx_artefatos_particao "
+    "ON artefatos(organizacao, projeto, versao_dados)",
+)
+
+ESQUEMA_ARTEFATOS = ";\n".join((TABELA_ARTEFATOS, *INDICES_ARTEFATOS)) + ";"
+
+CHAVE_ARTEFATOS = ["organizacao", "projeto", "tipo", "versao_dados"]
+
+# Tipos de relatório pré-gerados: tipo -> (extensão, tipo MIME)
+TIPOS_RELATORIO = {
+    "resumo": ("md", "text/markdown"),
+    "csv": ("csv", "text/csv"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+# Retenção padrão: últimas versões dos dados e idade máxima
+RETER_VERSOES = 5
+IDADE_MAXIMA = timedelta(days=30)
+
+
+def tipo_regional(tipo: str, regiao: Optional[str] = None) -> str:
+    """Tipo do artefato de um relatório restrito a uma região (None = todas)."""
+    return f"{tipo}:{regiao}" if regiao else tipo
+
+
+class ArmazemArtefatos:
+    """
+    Armazém de relatórios gerados, endereçado pelo conteúdo.
+
+    Cada arquivo é gravado uma vez em `<pasta>/<hash[:2]>/<hash>.<ext>`; o
+    índice no banco liga (partição, tipo, versão dos dados) ao hash.
+    Relatórios iguais em versões diferentes compartilham o mesmo arquivo, e
+    arquivos sem referência são apagados na limpeza.
+    """
+
+    def __init__(self, store: NestStore, pasta: Optional[str] = None):
+        self.store = store
+        self.pasta = pasta or os.path.join(os.path.dirname(store.caminho) or ".", "artefatos")
+        os.makedirs(self.pasta, exist_ok=True)
+        self.store.criar_esquema(TABELA_ARTEFATOS)
+        self._migrar_particoes()
+        self.store.criar_esquema(ESQUEMA_ARTEFATOS)
+
+    def _migrar_particoes(self):
+        """
+        Índices com a chave antiga (tipo, versão) são recriados com a partição
+        na chave; os relatórios sem partição registrada são da partição padrão.
+        """
+        colunas = self.store.consultar("PRAGMA table_info(artefatos)")
+        chave = [linha["name"] for linha in sorted(colunas, key=lambda l: l["pk"]) if linha["pk"]]
+        if chave == CHAVE_ARTEFATOS:
+            return
+        nomes = {linha["name"] for linha in colunas}
+        particao = "organizacao, projeto" if "organizacao" in nomes else "'padrao', 'padrao'"
+        with self.store.transacao() as conexao:
+            conexao.execute("ALTER TABLE artefatos RENAME TO artefatos_antigos")
+            conexao.execute("DROP INDEX IF EXISTS idx_artefatos_hash")
+            conexao.execute("DROP INDEX IF EXISTS idx_artefatos_particao")
+            conexao.execute(TABELA_ARTEFATOS)
+            for indice in INDICES_ARTEFATOS:
+                conexao.execute(indice)
+            conexao.execute(
+                "INSERT INTO artefatos (organizacao, projeto, tipo, versao_dados, hash, "
+                f"extensao, tamanho, criado_em) SELECT {particao}, tipo, versao_dados, hash, "
+                "extensao, tamanho, criado_em FROM artefatos_antigos"
+            )
+            conexao.execute("DROP TABLE artefatos_antigos")
+
+    def _caminho(self, hash_conteudo: str, extensao: str) -> str:
+        return os.path.join(self.pasta, hash_conteudo[:2], f"{hash_conteudo}.{extensao}")
+
+    def guardar(
+        self,
+        tipo: str,
+        versao_dados: int,
+        conteudo: bytes,
+        extensao: str,
+        particao: Particao,
+    ) -> str:
+        """
+        Grava o conteúdo (se ainda não existir) e o registra para a versão dos
+        dados da partição.
+        """
+        hash_conteudo = hashlib.sha256(conteudo).hexdigest()
+        caminho = self._caminho(hash_conteudo, extensao)
+
+        if not os.path.exists(caminho):
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            # Grava em arquivo temporário e renomeia: leitores nunca veem arquivo pela metade
+            temporario = f"{caminho}.{os.getpid()}.tmp"
+            with open(temporario, "wb") as arquivo:
+                arquivo.write(conteudo)
+            os.replace(temporario, caminho)
+
+        with self.store.transacao() as conexao:
+            conexao.execute(
+                "INSERT OR REPLACE INTO artefatos "
+                "(organizacao, projeto, tipo, versao_dados, hash, extensao, tamanho, criado_em) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    *particao,
+                    tipo,
+                    versao_dados,
+                    hash_conteudo,
+                    extensao,
+                    len(conteudo),
+                    datetime.now().isoformat(timespec="seconds"),
+                ),
+            )
+        return hash_conteudo
+
+    def buscar(
+        self, tipo: str, versao_dados: int, particao: Particao
+    ) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+        """
+        Retorna (conteúdo, metadados) do artefato da versão dos dados da
+        partição, ou None se não houver.
+        """
+        linhas = self.store.consultar(
+            "SELECT * FROM artefatos "
+            "WHERE organizacao = ? AND projeto = ? AND tipo = ? AND versao_dados = ?",
+            (*particao, tipo, versao_dados),
+        )
+        if not linhas:
+            return None
+        metadados = dict(linhas[0])
+        try:
+            with open(self._caminho(metadados["hash"], metadados["extensao"]), "rb") as arquivo:
+                return arquivo.read(), metadados
+        except FileNotFoundError:
+            return None
+
+    def tipos_gerados(self, versao_dados: int, particao: Particao) -> List[str]:
+        """Tipos de relatório já gerados para a versão dos dados da partição."""
+        linhas = self.store.consultar(
+            "SELECT tipo FROM artefatos "
+            "WHERE organizacao = ? AND projeto = ? AND versao_dados = ?",
+            (*particao, versao_dados),
+        )
+        return [linha["tipo"] for linha in linhas]
+
+    def limpar(self, reter_versoes: int = RETER_VERSOES, idade_maxima: timedelta = IDADE_MAXIMA):
+        """
+        Remove do índice os artefatos fora das `reter_versoes` versões dos dados
+        mais recentes da sua partição ou mais antigos que `idade_maxima`, e
+        apaga os arquivos sem referência. Uma partição parada não perde seus
+        relatórios porque outra recebe escritas.
+        """
+        limite = (datetime.now() - idade_maxima).isoformat(timespec="seconds")
+        condicao = (
+            "criado_em < ? OR versao_dados < ("
+            "    SELECT MIN(versao_dados) FROM ("
+            "        SELECT DISTINCT versao_dados FROM artefatos AS recentes "
+            "        WHERE recentes.organizacao = artefatos.organizacao "
+            "        AND recentes.projeto = artefatos.projeto "
+            "        ORDER BY versao_dados DESC LIMIT ?"
+            "    )"
+            ")"
+        )
+        with self.store.transacao() as conexao:
+            removidos = conexao.execute(
+                f"SELECT hash, extensao FROM artefatos WHERE {condicao}",
+                (limite, reter_versoes),
+            ).fetchall()
+            conexao.execute(f"DELETE FROM artefatos WHERE {condicao}", (limite, reter_versoes))
+            em_uso = {
+                linha[0] for linha in conexao.execute("SELECT DISTINCT hash FROM artefatos")
+            }
+
+        for hash_conteudo, extensao in set(removidos):
+            if hash_conteudo not in em_uso:
+                try:
+                    os.remove(self._caminho(hash_conteudo, extensao))
+                except FileNotFoundError:
+                    pass
+
+
+def gerar_relatorios(
+    armazem: ArmazemArtefatos,
+    versao_dados: int,
+    ninhos: list,
+    cubo: Optional[CuboNinhos] = None,
+    regiao: Optional[str] = None,
+    particao: Particao = PARTICAO_PADRAO,
+) -> List[str]:
+    """
+    Gera e guarda os relatórios que ainda faltam para a versão, de todos os
+    ninhos da partição ou de uma região (`ninhos` já restritos a ela).
+    Retorna os tipos gerados.
+    """
+    existentes = set(armazem.tipos_gerados(versao_dados, particao))
+    cubo = cubo if cubo is not None else CuboNinhos.de_ninhos(ninhos)
+    gerados = []
+
+    for tipo_base, (extensao, _) in TIPOS_RELATORIO.items():
+        tipo = tipo_regional(tipo_base, regiao)
+        if tipo in existentes:
+            continue
+        conteudo = gerar_conteudo(tipo_base, ninhos, cubo, regiao)
+        if conteudo is None:
+            continue
+        armazem.guardar(tipo, versao_dados, conteudo, extensao, particao)
+        gerados.append(tipo)
+    return gerados
+
+
+def gerar_conteudo(
+    tipo: str, ninhos: list, cubo: CuboNinhos, regiao: Optional[str] = None
+) -> Optional[bytes]:
+    """Monta o conteúdo em bytes de um tipo de relatório (None se indisponível)."""
+    if tipo not in TIPOS_RELATORIO:
+        raise ValueError(f"Tipo de relatório desconhecido: {tipo}")
+    with medir(RELATORIOS, "gerar_conteudo", relatorio=tipo):
+        if tipo == "resumo":
+            return montar_relatorio_resumido(cubo, regiao=regiao).encode("utf-8")
+        if tipo == "csv":
+            return montar_csv(ninhos).encode("utf-8")
+        return montar_parquet(ninhos)
@@ -0,0 +1,359 @@
+import os
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from typing import List, Dict, Any
+
+from utils.cube import CuboNinhos
+from utils.forecast import PrevisaoEclosao
+from utils.nest import RISCOS
+from utils.statistics import (
+    media_ovos_por_risco, contar_ninhos_por_regiao, taxas_de_sucesso, ninhos_afetados_por_especie
+)
+
+# Construtores de gráficos sem dependência do Streamlit: podem rodar em
+# threads ou processos separados e ser reutilizados fora do dashboard.
+# Os gráficos agregados fatiam o CuboNinhos; só a dispersão usa os ninhos.
+
+CORES_RISCO = {'🟢': '#4CAF50', '🟡': '#FFC107', '🔴': '#F44336'}
+
+# Acima deste número de ninhos a dispersão troca SVG por densidade + amostra WebGL
+LIMITE_PONTOS_DISPERSAO = int(os.environ.get("GUARDIOES_LIMITE_PONTOS", "5000"))
+
+COLUNAS_DISPERSAO = ['dias_para_eclosao', 'quantidade_ovos', 'risco', 'regiao', 'status']
+
+def figura_risco_por_status(cubo: CuboNinhos) -> go.Figure:
+    """Mapa de calor com o número de ninhos por risco e status."""
+    riscos, status, contagens = cubo.tabela('risco', 'status')
+
+    return px.imshow(
+        contagens,
+        labels=dict(x="Status", y="Risco", color="Número de Ninhos"),
+        x=list(status),
+        y=list(riscos),
+        color_continuous_scale='Reds'
+    )
+
+def figura_media_ovos_por_risco(cubo: CuboNinhos) -> go.Figure:
+    """Barras com a média de ovos por nível de risco."""
+    risk_avg_eggs = media_ovos_por_risco(cubo)
+
+    fig = go.Figure(data=[
+        go.Bar(
+            x=list(risk_avg_eggs.keys()),
+            y=list(risk_avg_eggs.values()),
+            marker_color=[CORES_RISCO[risk] for risk in risk_avg_eggs]
+        )
+    ])
+
+    fig.update_layout(
+        xaxis_title="Nível de Risco",
+        yaxis_title="Média de Ovos",
+        showlegend=False
+    )
+    return fig
+
+def figura_ninhos_por_regiao(cubo: CuboNinhos) -> go.Figure:
+    """Pizza com a distribuição de ninhos por região."""
+    region_counts = contar_ninhos_por_regiao(cubo)
+
+    return px.pie(
+        values=list(region_counts.values()),
+        names=list(region_counts.keys()),
+        color_discrete_sequence=px.colors.qualitative.Set3
+    )
+
+def figura_ovos_por_regiao(cubo: CuboNinhos) -> go.Figure:
+    """Barras com o total de ovos por região."""
+    region_eggs = cubo.por('regiao', 'ovos')
+
+    fig = px.bar(
+        x=list(region_eggs.keys()),
+        y=list(region_eggs.values()),
+        color=list(region_eggs.values()),
+        color_continuous_scale='Blues'
+    )
+
+    fig.update_layout(
+        xaxis_title="Região",
+        yaxis_title="Total de Ovos",
+        showlegend=False
+    )
+    return fig
+
+def figura_cronograma_eclosao(cubo: CuboNinhos) -> go.Figure:
+    """Barras horizontais com o número de ninhos por período de eclosão."""
+    timeline_counts = cubo.por_faixa_eclosao()
+
+    fig = px.bar(
+        x=list(timeline_counts.values()),
+        y=list(timeline_counts.keys()),
+        orientation='h',
+        color=list(timeline_counts.values()),
+        color_continuous_scale='RdYlGn_r'
+    )
+
+    fig.update_layout(
+        xaxis_title="Número de Ninhos",
+        yaxis_title="Período de Eclosão",
+        showlegend=False
+    )
+    return fig
+
+def figura_previsao_eclosao(previsao: PrevisaoEclosao, medida: str = 'filhotes') -> go.Figure:
+    """
+    Previsão diária de 'ninhos' ou 'filhotes': o total com a faixa de
+    incerteza e uma linha por região.
+    """
+    dias = previsao.dias
+    esperado, minimo, maximo = previsao.faixa(medida)
+    rotulo = "Filhotes Esperados" if medida == 'filhotes' else "Eclosões Esperadas"
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=dias + dias[::-1],
+        y=np.concatenate([maximo, minimo[::-1]]),
+        fill='toself',
+        fillcolor='rgba(76, 175, 80, 0.2)',
+        line=dict(width=0),
+        hoverinfo='skip',
+        name='Faixa de 95%'
+    ))
+    fig.add_trace(go.Scatter(
+        x=dias, y=esperado, mode='lines', name='Total', line=dict(color='#2E7D32', width=3)
+    ))
+    for regiao in previsao.regioes:
+        fig.add_trace(go.Scatter(
+            x=dias, y=previsao.faixa(medida, regiao)[0], mode='lines', name=regiao,
+            line=dict(width=1, dash='dot')
+        ))
+
+    fig.update_layout(
+        xaxis_title="Data",
+        yaxis_title=rotulo,
+        hovermode='x unified'
+    )
+    return fig
+
+def figura_eclosao_vs_ovos(
+    ninhos: List[Dict[str, Any]], limite_pontos: int = LIMITE_PONTOS_DISPERSAO
+) -> go.Figure:
+    """
+    Dispersão dos dias para eclosão contra a quantidade de ovos.
+    Acima de `limite_pontos` ninhos, usa o modo para grandes volumes.
+    """
+    if len(ninhos) > limite_pontos:
+        return _figura_eclosao_vs_ovos_grande(ninhos, limite_pontos)
+
+    # Só as colunas usadas pelo gráfico são serializadas
+    df_scatter = pd.DataFrame(
+        [{column: nest[column] for column in COLUNAS_DISPERSAO} for nest in ninhos],
+        columns=COLUNAS_DISPERSAO
+    )
+
+    fig = px.scatter(
+        df_scatter,
+        x='dias_para_eclosao',
+        y='quantidade_ovos',
+        color='risco',
+        size='quantidade_ovos',
+        hover_data=['regiao', 'status'],
+        color_discrete_map=CORES_RISCO
+    )
+
+    fig.update_layout(
+        xaxis_title="Dias para Eclosão",
+        yaxis_title="Quantidade de Ovos"
+    )
+    return fig
+
+def _figura_eclosao_vs_ovos_grande(ninhos: List[Dict[str, Any]], limite_pontos: int) -> go.Figure:
+    """
+    Modo para grandes volumes: a densidade de todos os ninhos é agregada no
+    servidor (histograma 2D) e só uma amostra estratificada por risco é
+    enviada como pontos WebGL, sem codificação de tamanho.
+    """
+    total = len(ninhos)
+    dias = np.fromiter((nest['dias_para_eclosao'] for nest in ninhos), np.int32, total)
+    ovos = np.fromiter((nest['quantidade_ovos'] for nest in ninhos), np.int32, total)
+
+    # Um dia por coluna e faixas de 10 ovos por linha
+    densidade, bordas_dias, bordas_ovos = np.histogram2d(
+        dias, ovos,
+        bins=[np.arange(dias.max() + 2), np.arange(0, ovos.max() + 11, 10)]
+    )
+
+    fig = go.Figure()
+    fig.add_trace(go.Heatmap(
+        x=bordas_dias[:-1],
+        y=bordas_ovos[:-1] + 5,
+        z=densidade.T,
+        colorscale='Blues',
+        colorbar=dict(title="Ninhos"),
+        hovertemplate="Dias: %{x}<br>Ovos: ~%{y}<br>Ninhos: %{z}<extra></extra>"
+    ))
+
+    # Amostra determinística, proporcional ao tamanho de cada nível de risco
+    gerador = np.random.default_rng(0)
+    riscos = np.array([nest['risco'] for nest in ninhos])
+    for risk, color in CORES_RISCO.items():
+        indices = np.flatnonzero(riscos == risk)
+        if not len(indices):
+            continue
+        quantidade = max(1, int(limite_pontos * len(indices) / total))
+        if len(indices) > quantidade:
+            indices = np.sort(gerador.choice(indices, quantidade, replace=False))
+
+        fig.add_trace(go.Scattergl(
+            x=dias[indices],
+            y=ovos[indices],
+            mode='markers',
+            name=risk,
+            marker=dict(color=color, size=5, opacity=0.6),
+            customdata=[[ninhos[i]['regiao'], ninhos[i]['status']] for i in indices],
+            hovertemplate=(
+                "Dias: %{x}<br>Ovos: %{y}<br>Região: %{customdata[0]}"
+                "<br>Status: %{customdata[1]}<extra></extra>"
+            )
+        ))
+
+    fig.update_layout(
+        xaxis_title="Dias para Eclosão",
+        yaxis_title="Quantidade de Ovos",
+        title=dict(
+            text=f"Densidade de {total:,} ninhos (amostra de {limite_pontos:,} pontos)",
+            font=dict(size=12)
+        )
+    )
+    return fig
+
+def figura_predadores_por_status(cubo: CuboNinhos) -> go.Figure:
+    """Barras agrupadas com a presença de predadores por status."""
+    status, predators, counts = cubo.tabela('status', 'predadores')
+
+    fig = go.Figure()
+    for i, has_predators in enumerate(predators):
+        name = 'Com Predadores' if has_predators else 'Sem Predadores'
+        fig.add_trace(go.Bar(
+            x=list(status),
+            y=counts[:, i],
+            name=name,
+            marker_color='#F44336' if has_predators else '#4CAF50'
+        ))
+
+    fig.update_layout(
+        barmode='group',
+        xaxis_title="Status do Ninho",
+        yaxis_title="Número de Ninhos"
+    )
+    return fig
+
+def figura_impacto_predadores(cubo: CuboNinhos) -> go.Figure:
+    """Comparação entre ninhos com e sem predadores."""
+    totals = cubo.por('predadores')
+    damaged = cubo.por('predadores', status='danificado')
+
+    categories = ['Com Predadores', 'Sem Predadores']
+    quantities = [totals[True], totals[False]]
+    damaged = [damaged[True], damaged[False]]
+
+    fig = make_subplots(
+        rows=1, cols=2,
+        subplot_titles=('Quantidade de Ninhos', 'Ninhos Danificados'),
+        specs=[[{"type": "bar"}, {"type": "bar"}]]
+    )
+
+    fig.add_trace(
+        go.Bar(x=categories, y=quantities, name='Total'),
+        row=1, col=1
+    )
+
+    fig.add_trace(
+        go.Bar(x=categories, y=damaged, name='Danificados'),
+        row=1, col=2
+    )
+
+    fig.update_layout(showlegend=False)
+    return fig
+
+def _figura_taxas_sucesso(taxas: Dict[str, Dict[str, Any]], titulo_eixo: str) -> go.Figure:
+    """Barras agrupadas com as taxas de eclosão e de emergência (%) de cada grupo."""
+    grupos = list(taxas)
+
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=grupos,
+        y=[taxas[g]['taxa_eclosao'] for g in grupos],
+        name='Eclosão',
+        marker_color='#4FC3F7'
+    ))
+    fig.add_trace(go.Bar(
+        x=grupos,
+        y=[taxas[g]['taxa_emergencia'] for g in grupos],
+        name='Emergência',
+        marker_color='#0D47A1'
+    ))
+
+    fig.update_layout(
+        barmode='group',
+        xaxis_title=titulo_eixo,
+        yaxis_title="Taxa de Sucesso (%)",
+        yaxis_range=[0, 100]
+    )
+    return fig
+
+def figura_sucesso_por_regiao(agregados: List[Dict[str, Any]]) -> go.Figure:
+    """Taxas de eclosão e de emergência por região, a partir dos agregados de eclosão."""
+    return _figura_taxas_sucesso(taxas_de_sucesso(agregados, 'regiao'), "Região")
+
+def figura_sucesso_por_risco(agregados: List[Dict[str, Any]]) -> go.Figure:
+    """Taxas de eclosão e de emergência por nível de risco, a partir dos agregados."""
+    taxas = taxas_de_sucesso(agregados, 'risco')
+    taxas = {risco: taxas[risco] for risco in RISCOS if risco in taxas}
+    return _figura_taxas_sucesso(taxas, "Nível de Risco")
+
+def figura_ninhos_afetados_por_especie(
+    contagens: List[Dict[str, Any]], cubo: CuboNinhos
+) -> go.Figure:
+    """Ninhos nas regiões onde cada espécie foi avistada, com e sem danos."""
+    afetados = ninhos_afetados_por_especie(contagens, cubo)
+    especies = list(afetados)
+
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=especies,
+        y=[afetados[e]['ninhos'] - afetados[e]['ninhos_danificados'] for e in especies],
+        name='Demais Ninhos',
+        marker_color='#4FC3F7',
+        customdata=[afetados[e]['avistamentos'] for e in especies],
+        hovertemplate='%{x}<br>%{y} ninhos<br>%{customdata} avistamentos<extra></extra>'
+    ))
+    fig.add_trace(go.Bar(
+        x=especies,
+        y=[afetados[e]['ninhos_danificados'] for e in especies],
+        name='Danificados',
+        marker_color='#F44336'
+    ))
+
+    fig.update_layout(
+        barmode='stack',
+        xaxis_title="Espécie",
+        yaxis_title="Ninhos nas Regiões com Avistamentos"
+    )
+    return fig
+
+def figura_avistamentos_por_regiao(contagens: List[Dict[str, Any]]) -> go.Figure:
+    """Avistamentos por região na janela, empilhados por espécie."""
+    if not contagens:
+        return go.Figure()
+    df = pd.DataFrame(contagens)
+    fig = px.bar(df, x='regiao', y='avistamentos', color='especie')
+
+    fig.update_layout(
+        xaxis_title="Região",
+        yaxis_title="Avistamentos",
+        legend_title="Espécie"
+    )
+    return fig
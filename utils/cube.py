@@ -0,0 +1,151 @@
+import numpy as np
+from typing import List, Dict, Any, Tuple
+
+from utils.nest import STATUS, RISCOS, MAX_DIAS_ECLOSAO
+
+PREDADORES = (False, True)
+
+# Eixo de eclosão com um dia por posição; o último acumula tudo acima do limite
+DIAS_ECLOSAO = tuple(range(MAX_DIAS_ECLOSAO + 2))
+
+DIMENSOES = ("regiao", "status", "risco", "predadores", "dias_para_eclosao")
+
+# Faixas usadas no cronograma de eclosão: (rótulo, primeiro dia, último dia)
+FAIXAS_ECLOSAO = (
+    ("Imediato (≤2 dias)", 0, 2),
+    ("Próximo (3-5 dias)", 3, 5),
+    ("Curto prazo (6-15 dias)", 6, 15),
+    ("Médio prazo (16-30 dias)", 16, 30),
+    ("Longo prazo (>30 dias)", 31, MAX_DIAS_ECLOSAO + 1),
+)
+
+
+class CuboNinhos:
+    """
+    Cubo de contagens e somas de ovos por regiao, status, risco, predadores e
+    dias_para_eclosao (um dia por posição).
+
+    É construído uma vez por versão dos dados; gráficos e métricas fatiam o
+    cubo em vez de montar DataFrames a cada execução da página.
+    """
+
+    def __init__(self, rotulos: Dict[str, Tuple], contagem: np.ndarray, ovos: np.ndarray):
+        self.rotulos = rotulos
+        self.contagem = contagem
+        self.ovos = ovos
+
+    @classmethod
+    def de_ninhos(cls, ninhos: List[Dict[str, Any]]) -> "CuboNinhos":
+        """Monta o cubo a partir de uma lista de ninhos."""
+        # Regiões na ordem em que aparecem, como em contar_ninhos_por_regiao
+        regioes = tuple(dict.fromkeys(ninho["regiao"] for ninho in ninhos))
+        indice_regiao = {regiao: i for i, regiao in enumerate(regioes)}
+        indice_status = {status: i for i, status in enumerate(STATUS)}
+        indice_risco = {risco: i for i, risco in enumerate(RISCOS)}
+
+        total = len(ninhos)
+        codigo_regiao = np.fromiter((indice_regiao[n["regiao"]] for n in ninhos), np.intp, total)
+        codigo_status = np.fromiter((indice_status[n["status"]] for n in ninhos), np.intp, total)
+        codigo_risco = np.fromiter((indice_risco[n["risco"]] for n in ninhos), np.intp, total)
+        codigo_predadores = np.fromiter((bool(n["predadores"]) for n in ninhos), np.intp, total)
+        dias = np.fromiter((n["dias_para_eclosao"] for n in ninhos), np.intp, total)
+        ovos = np.fromiter((n["quantidade_ovos"] for n in ninhos), np.int64, total)
+
+        return cls.de_colunas(
+            regioes, codigo_regiao, codigo_status, codigo_risco, codigo_predadores, dias, ovos
+        )
+
+    @classmethod
+    def de_colunas(
+        cls,
+        regioes: Tuple[str, ...],
+        codigo_regiao: np.ndarray,
+        codigo_status: np.ndarray,
+        codigo_risco: np.ndarray,
+        codigo_predadores: np.ndarray,
+        dias: np.ndarray,
+        ovos: np.ndarray,
+    ) -> "CuboNinhos":
+        """Monta o cubo a partir de colunas já codificadas (vetorizado)."""
+        forma = (len(regioes), len(STATUS), len(RISCOS), len(PREDADORES), len(DIAS_ECLOSAO))
+        tamanho = int(np.prod(forma))
+        if tamanho:
+            dias = np.clip(dias, 0, MAX_DIAS_ECLOSAO + 1)
+            celula = np.ravel_multi_index(
+                (codigo_regiao, codigo_status, codigo_risco, codigo_predadores, dias), forma
+            )
+            contagem = np.bincount(celula, minlength=tamanho).reshape(forma)
+            soma_ovos = np.bincount(celula, weights=ovos, minlength=tamanho)
+        else:
+            contagem = np.zeros(forma, dtype=np.int64)
+            soma_ovos = np.zeros(forma)
+        rotulos = {
+            "regiao": tuple(regioes),
+            "status": STATUS,
+            "risco": RISCOS,
+            "predadores": PREDADORES,
+            "dias_para_eclosao": DIAS_ECLOSAO,
+        }
+        return cls(rotulos, contagem, soma_ovos.astype(np.int64).reshape(forma))
+
+    def filtrar(self, **filtros) -> "CuboNinhos":
+        """
+        Retorna um novo cubo restrito aos filtros, por rótulo ou lista de rótulos
+        (ex.: regiao='Praia Sul', risco=['🟡', '🔴']) ou por dias_max.
+        """
+        contagem, ovos = self.contagem, self.ovos
+        rotulos = dict(self.rotulos)
+
+        for dimensao, valor in filtros.items():
+            if dimensao == "dias_max":
+                # Mantém o eixo de dias completo, zerando os dias fora do filtro
+                manter = np.array(DIAS_ECLOSAO) <= valor
+                contagem = contagem * manter
+                ovos = ovos * manter
+                continue
+
+            eixo = DIMENSOES.index(dimensao)
+            valores = valor if isinstance(valor, (list, tuple, set)) else [valor]
+            posicoes = [i for i, rotulo in enumerate(rotulos[dimensao]) if rotulo in valores]
+            contagem = np.take(contagem, posicoes, axis=eixo)
+            ovos = np.take(ovos, posicoes, axis=eixo)
+            rotulos[dimensao] = tuple(rotulos[dimensao][i] for i in posicoes)
+
+        return CuboNinhos(rotulos, contagem, ovos)
+
+    def _medida(self, medida: str) -> np.ndarray:
+        return self.contagem if medida == "contagem" else self.ovos
+
+    def total(self, medida: str = "contagem", **filtros) -> int:
+        """Soma da medida ('contagem' ou 'ovos') nas células selecionadas."""
+        matriz = self.filtrar(**filtros)._medida(medida) if filtros else self._medida(medida)
+        return int(matriz.sum())
+
+    def por(self, dimensao: str, medida: str = "contagem", **filtros) -> Dict[Any, int]:
+        """Soma da medida por rótulo de uma dimensão."""
+        cubo = self.filtrar(**filtros) if filtros else self
+        eixo = DIMENSOES.index(dimensao)
+        outros = tuple(i for i in range(len(DIMENSOES)) if i != eixo)
+        valores = cubo._medida(medida).sum(axis=outros)
+        return {rotulo: int(valor) for rotulo, valor in zip(cubo.rotulos[dimensao], valores)}
+
+    def tabela(
+        self, linhas: str, colunas: str, medida: str = "contagem", **filtros
+    ) -> Tuple[Tuple, Tuple, np.ndarray]:
+        """Tabela cruzada de duas dimensões: (rótulos das linhas, das colunas, valores)."""
+        cubo = self.filtrar(**filtros) if filtros else self
+        eixo_linhas = DIMENSOES.index(linhas)
+        eixo_colunas = DIMENSOES.index(colunas)
+        outros = tuple(i for i in range(len(DIMENSOES)) if i not in (eixo_linhas, eixo_colunas))
+        valores = cubo._medida(medida).sum(axis=outros)
+        if eixo_linhas > eixo_colunas:
+            valores = valores.T
+        return cubo.rotulos[linhas], cubo.rotulos[colunas], valores
+
+    def por_faixa_eclosao(self, medida: str = "contagem", **filtros) -> Dict[str, int]:
+        """Soma da medida por faixa do cronograma de eclosão."""
+        por_dia = list(self.por("dias_para_eclosao", medida, **filtros).values())
+        return {
+            rotulo: int(sum(por_dia[inicio:fim + 1]))
+            for rotulo, inicio, fim in FAIXAS_ECLOSAO
+        }
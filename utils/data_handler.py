@@ -1,5 +1,32 @@
+import io
+import os
+import sqlite3
+import threading
+import uuid
 import streamlit as st
-from typing import List, Dict, Any
+from datetime import date, datetime
+from typing import Callable, List, Dict, Any, Optional
+from utils.nest_store import NestStore, CAMINHO_PADRAO
+from utils.nest_cache import CacheNinhos, ObservadorCaches
+from utils.cube import CuboNinhos
+from utils.nest import Ninho, NinhoInvalido, Particao, PARTICAO_PADRAO
+from utils.artifacts import ArmazemArtefatos
+from utils.photos import ArmazemFotos, FilaMiniaturas, Foto, FotoInvalida
+from utils.search import BuscaNinhos
+from utils.sync import FilaOffline, ServidorSincronizacao, sincronizar
+from utils.risk import MotorRisco, Avaliacao
+from utils.nest_index import IndiceNinhos
+from utils.session_memory import MemoriaSessao, orcamento_para
+from utils.forecast import PrevisaoEclosao, prever_eclosoes
+from utils.metrics import (
+    REGISTRO, SESSOES, CACHE_CONSULTAS, CACHE_CONSTRUCOES, ADICIONAR_NINHO, NINHOS_ADICIONADOS,
+    medir, iniciar_servidor
+)
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from utils.predators import (
+    RegistroPredadores, Avistamento, AvistamentoInvalido, RelatorioImportacao, ler_csv
+)
 
 def get_nest_data() -> List[Dict[str, Any]]:
     """Returns the initial nest data"""
@@ -141,18 +168,344 @@ def get_nest_data() -> List[Dict[str, Any]]:
         }
     ]
 
-def load_data() -> List[Dict[str, Any]]:
-    """Load nest data from session state"""
-    return st.session_state.get('nest_data', get_nest_data())
+@st.cache_resource
+def get_store() -> NestStore:
+    """Return the shared nest store, seeding it with the initial data when empty"""
+    store = NestStore(CAMINHO_PADRAO)
+    if store.contar() == 0:
+        store.inserir_varios(get_nest_data())
+    return store
 
-def save_data(data: List[Dict[str, Any]]):
-    """Save nest data to session state"""
-    st.session_state.nest_data = data
+# Session state key of the organization and project this session works on
+PARTITION_KEY = "partition"
 
-def add_nest(new_nest: Dict[str, Any]):
-    """Add a new nest to the data"""
-    current_data = load_data()
-    current_data.append(new_nest)
-    save_data(current_data)
+def current_partition() -> Particao:
+    """Return the partition (organization and project) selected in this session"""
+    return st.session_state.get(PARTITION_KEY, PARTICAO_PADRAO)
+
+def list_partitions() -> List[Dict[str, Any]]:
+    """Return the partitions with nests and their nest counts"""
+    return get_store().particoes()
+
+@st.cache_resource
+def _get_cache_observer() -> ObservadorCaches:
+    """Return the single background thread that keeps every partition's cache warm"""
+    return ObservadorCaches(get_store())
+
+@st.cache_resource
+def _get_partition_cache(partition: Particao) -> CacheNinhos:
+    cache = CacheNinhos(get_store(), partition)
+    # Follow writes from other replicas and the worker in the background
+    _get_cache_observer().acompanhar(cache)
+    return cache
+
+def get_cache() -> CacheNinhos:
+    """
+    Return the warm read cache of this session's partition, shared by all of
+    its sessions; each partition's version and derived structures change independently
+    """
+    return _get_partition_cache(current_partition())
+
+@st.cache_resource
+def get_artifact_store() -> ArmazemArtefatos:
+    """Return the store of generated reports (pre-generated by the worker)"""
+    return ArmazemArtefatos(get_store())
+
+@st.cache_resource
+def get_photo_store() -> ArmazemFotos:
+    """Return the content-addressed store of nest photos"""
+    return ArmazemFotos(get_store())
+
+@st.cache_resource
+def get_thumbnail_queue() -> FilaMiniaturas:
+    """Return the background pool that writes photo thumbnails and previews"""
+    queue = FilaMiniaturas(get_photo_store())
+    # Photos sent before a restart still need their thumbnails
+    queue.enviar_pendentes()
+    return queue
+
+@st.cache_resource
+def get_search() -> BuscaNinhos:
+    """Return the full-text search over the shared nest store"""
+    return BuscaNinhos(get_store())
+
+@st.cache_resource
+def get_predator_log() -> RegistroPredadores:
+    """Return the predator sighting log kept in the shared store"""
+    return RegistroPredadores(get_store())
+
+@st.cache_resource
+def get_offline_queue() -> FilaOffline:
+    """
+    Return this process's retry buffer of nests not yet written to the store.
+    It lives on the server: it covers a store that is briefly unreachable, not
+    a guardian without signal, whose submission never reaches the app.
+    """
+    return FilaOffline()
+
+# Session state key of this browser session's device identity in the sync clocks
+DEVICE_KEY = "device_id"
+
+def session_device() -> str:
+    """Return this browser session's device id, used to order its writes against others'"""
+    if DEVICE_KEY not in st.session_state:
+        st.session_state[DEVICE_KEY] = uuid.uuid4().hex
+    return st.session_state[DEVICE_KEY]
+
+@st.cache_resource
+def get_sync_server() -> ServidorSincronizacao:
+    """Return the endpoint that applies queued changes to the shared store"""
+    return ServidorSincronizacao(get_store())
+
+# Browser sessions seen by this process; closed ones are dropped when metrics are collected
+_sessions = set()
+_sessions_lock = threading.Lock()
+
+def track_session():
+    """Count this browser session once, for the session metrics"""
+    ctx = get_script_run_ctx()
+    if ctx is None or ctx.session_id in _sessions:
+        return
+    with _sessions_lock:
+        if ctx.session_id not in _sessions:
+            _sessions.add(ctx.session_id)
+            SESSOES.inc()
+
+def _active_sessions() -> int:
+    if not Runtime.exists():
+        return len(_sessions)
+    runtime = Runtime.instance()
+    with _sessions_lock:
+        _sessions.intersection_update(
+            [session_id for session_id in _sessions if runtime.is_active_session(session_id)]
+        )
+        return len(_sessions)
+
+def _store_bytes() -> int:
+    """Size of the store on disk, write-ahead log included"""
+    path = get_store().caminho
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+@st.cache_resource
+def get_metrics_server():
+    """Start this process's /metrics endpoint (None when disabled or the port is taken)"""
+    # Gauges are read only when the endpoint is scraped, never while a page renders
+    REGISTRO.medidor("guardioes_sessoes_ativas", "Sessões de navegador abertas", _active_sessions)
+    REGISTRO.medidor("guardioes_banco_bytes", "Tamanho do banco de ninhos em disco", _store_bytes)
+    REGISTRO.medidor("guardioes_versao_dados", "Versão da escrita mais recente no banco",
+                     lambda: get_store().versao_atual())
+    REGISTRO.medidor("guardioes_ninhos", "Ninhos por partição", lambda: {
+        tuple(row['particao']): row['ninhos'] for row in get_store().particoes()
+    }, ("organizacao", "projeto"))
+    REGISTRO.medidor("guardioes_fila_offline", "Registros aguardando sincronização",
+                     lambda: get_offline_queue().contar())
+    REGISTRO.medidor("guardioes_fotos_pendentes", "Fotos aguardando miniatura",
+                     lambda: get_photo_store().contar_pendentes())
+    return iniciar_servidor()
+
+def sync_pending() -> bool:
+    """Send queued nests to the store; returns False if they are still waiting for a connection"""
+    queue = get_offline_queue()
+    if queue.contar() == 0:
+        return True
+    try:
+        summary = sincronizar(queue, get_sync_server().receber, tentativas=2, espera=0.2)
+    except (ConnectionError, sqlite3.OperationalError):
+        return False
+    get_cache().atualizar()
+    if summary["rejeitada"]:
+        st.error(f"❌ {summary['rejeitada']} registro(s) recusado(s) na sincronização.")
+    return True
+
+def load_data() -> List[Ninho]:
+    """Load nest data from the shared read cache (do not modify the returned list)"""
+    return get_cache().ninhos()
+
+def _derived(name: str, build, key=()):
+    """
+    Return a structure built from this partition's nests, rebuilt only when
+    they (or the extra key) change
+    """
+    CACHE_CONSULTAS.inc(cache=name)
+
+    def counted_build(data_version, nest_data):
+        CACHE_CONSTRUCOES.inc(cache=name)
+        return build(data_version, nest_data)
+
+    return get_cache().derivado(name, counted_build, chave=key)
+
+def load_cube() -> CuboNinhos:
+    """Return the cross-tab cube of this partition, built once per data version"""
+    return _derived('cubo', lambda data_version, nest_data: CuboNinhos.de_ninhos(nest_data))
+
+def load_nest_index() -> IndiceNinhos:
+    """Return the shared filter and sort index of this partition, built once per data version"""
+    assessments = load_assessments()
+    scores = {nest_id: assessment.pontuacao for nest_id, assessment in assessments.items()}
+    return _derived('indice', lambda data_version, nest_data: IndiceNinhos(
+        data_version, nest_data, scores
+    ))
+
+def get_session_memory(rows: int = 0) -> MemoriaSessao:
+    """
+    Return this session's view state, kept under a small memory budget that
+    grows with the number of rows its selections cover
+    """
+    return MemoriaSessao(st.session_state, orcamento_para(rows))
+
+@st.cache_resource
+def get_risk_engine() -> MotorRisco:
+    """Return the risk engine that keeps the precomputed assessments up to date"""
+    return MotorRisco(get_store())
+
+def load_assessments() -> Dict[str, Avaliacao]:
+    """Return the precomputed risk assessment of every nest of this partition, by nest id"""
+    partition = current_partition()
+
+    def score(data_version, nest_data):
+        # Scores the nests changed since the last run, in every partition
+        engine = get_risk_engine()
+        engine.atualizar()
+        return engine.avaliacoes(partition)
+
+    return _derived('avaliacoes', score)
+
+def add_nest(new_nest: Dict[str, Any], photos: List[bytes] = ()):
+    """Add a new nest to the data, with its photos"""
+    with medir(ADICIONAR_NINHO, 'add_nest'):
+        try:
+            # Buffered first, with an id generated here: resending never duplicates it
+            nest_id = get_offline_queue().registrar(
+                dict(new_nest, **current_partition()._asdict()), session_device()
+            )
+        except NinhoInvalido as error:
+            # Bad data is rejected once, at write time
+            NINHOS_ADICIONADOS.inc(resultado='invalido')
+            st.error(f"❌ Ninho não registrado: {error}")
+            return
+        attach_photos(nest_id, photos)
+        if not sync_pending():
+            NINHOS_ADICIONADOS.inc(resultado='offline')
+            st.warning("📡 Ninho recebido; será gravado no banco assim que ele responder.")
+            return
+    NINHOS_ADICIONADOS.inc(resultado='sincronizado')
     st.success("🐢 Novo ninho adicionado com sucesso!")
     st.rerun()
+
+def attach_photos(nest_id: str, photos: List[bytes]):
+    """Store the photos of a nest; thumbnails are written in the background"""
+    photo_store, queue = get_photo_store(), get_thumbnail_queue()
+    for number, content in enumerate(photos, 1):
+        try:
+            photo = photo_store.guardar(nest_id, content)
+        except FotoInvalida as error:
+            st.warning(f"📷 Foto {number} não anexada: {error}")
+            continue
+        if not photo.pronta:
+            queue.enviar(photo.hash, photo.extensao)
+
+def load_photos(nest_ids: List[str]) -> Dict[str, List[Foto]]:
+    """Return the photos of the given nests (one page of them), by nest id"""
+    return get_photo_store().fotos_de(nest_ids)
+
+def load_photo(photo: Foto, version: Optional[str] = None) -> Optional[bytes]:
+    """
+    Return a photo's thumbnail or preview (None while it is being written, which
+    queues it) or, with no version, the original
+    """
+    content = get_photo_store().ler(photo, version)
+    if content is None and version is not None and not photo.pronta:
+        get_thumbnail_queue().enviar(photo.hash, photo.extensao)
+    return content
+
+def load_hatch_aggregates() -> List[Dict[str, Any]]:
+    """Return this partition's hatch-success aggregates, one row per region and risk"""
+    return get_store().agregados_eclosao(current_partition())
+
+def _hatch_key(hatch_aggregates: List[Dict[str, Any]]) -> tuple:
+    # Excavation outcomes do not change the nest version: structures built from them key on this
+    return tuple((row['regiao'], row['risco'], row['ovos'], row['eclodidos'])
+                 for row in hatch_aggregates)
+
+def load_chart_figures(build_figures: Callable[..., Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Return this partition's statistics charts, made by
+    build_figures(nest_data, cube, hatch_aggregates) once per data version for all sessions
+    """
+    hatch_aggregates = load_hatch_aggregates()
+    return _derived(
+        'graficos',
+        lambda data_version, nest_data: build_figures(nest_data, load_cube(), hatch_aggregates),
+        key=_hatch_key(hatch_aggregates),
+    )
+
+def load_hatch_forecast() -> PrevisaoEclosao:
+    """Return this partition's day-by-day hatching forecast"""
+    hatch_aggregates = load_hatch_aggregates()
+    today = date.today()
+
+    def forecast(data_version, nest_data):
+        return prever_eclosoes(load_cube(), hatch_aggregates, inicio=today)
+
+    return _derived('previsao', forecast, key=(today, _hatch_key(hatch_aggregates)))
+
+def load_nests_awaiting_outcome() -> List[Ninho]:
+    """Return this partition's hatched nests that have no excavation outcome yet"""
+    return get_store().ninhos_aguardando_resultado(current_partition())
+
+def record_hatch_outcome(
+    nest_id: str, hatched: int, emerged: int, dead_eggs: int, excavation_date: date
+):
+    """Record the excavation outcome of a hatched nest"""
+    try:
+        get_store().registrar_resultado(nest_id, hatched, emerged, dead_eggs, excavation_date)
+    except NinhoInvalido as error:
+        st.error(f"❌ Resultado não registrado: {error}")
+        return
+    st.success("🐣 Resultado da eclosão registrado com sucesso!")
+    st.rerun()
+
+def load_sighting_counts(days: int) -> List[Dict[str, Any]]:
+    """Return this partition's predator sightings per region and species over the last days"""
+    return get_predator_log().contagens(days, particao=current_partition())
+
+def load_recent_sightings(region: str, days: int, limit: int = 50) -> List[Avistamento]:
+    """Return the latest predator sightings of a region of this partition (the nests near them)"""
+    return get_predator_log().recentes(region, days, limit, particao=current_partition())
+
+def record_predator_sighting(
+    species: str, region: str, moment: datetime,
+    latitude: Optional[float] = None, longitude: Optional[float] = None
+):
+    """Record a single predator sighting in this session's partition"""
+    partition = current_partition()
+    try:
+        get_predator_log().registrar(Avistamento(
+            species, region, moment, latitude, longitude,
+            organizacao=partition.organizacao, projeto=partition.projeto,
+        ))
+    except AvistamentoInvalido as error:
+        st.error(f"❌ Avistamento não registrado: {error}")
+        return
+    st.success("🦅 Avistamento registrado com sucesso!")
+
+def import_predator_sightings(uploaded_file):
+    """Bulk-import predator sightings into this partition from a CSV, skipping invalid lines"""
+    report = RelatorioImportacao()
+    text = io.TextIOWrapper(uploaded_file, encoding="utf-8-sig", newline="")
+    try:
+        imported = get_predator_log().importar(
+            ler_csv(text, report, current_partition()), relatorio=report
+        )
+    except (AvistamentoInvalido, UnicodeDecodeError) as error:
+        if report.importados:
+            # Batches before the error are already committed
+            st.error(f"❌ Importação interrompida: {error}. {report.importados:,} "
+                     "avistamento(s) das primeiras linhas já foram gravados.")
+        else:
+            st.error(f"❌ Arquivo não importado: {error}")
+        return
+    st.success(f"🦅 {imported:,} avistamento(s) importado(s).")
+    if report.rejeitadas:
+        st.warning(f"⚠️ {report.rejeitadas:,} linha(s) inválida(s) ignorada(s).")
+        st.code("\n".join(report.erros))
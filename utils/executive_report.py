@@ -0,0 +1,356 @@
+import base64
+import hashlib
+import html
+import os
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from utils.artifacts import ArmazemArtefatos, tipo_regional
+from utils.charts import *
+from utils.cube import CuboNinhos
+from utils.metrics import RELATORIOS, cronometrado
+from utils.nest import Ninho, Particao, PARTICAO_PADRAO
+from utils.statistics import *
+
+# O rasterizador estático do Plotly (Kaleido) é opcional: sem ele, o relatório
+# HTML embute os gráficos interativos e o PDF fica indisponível.
+try:
+    import kaleido  # noqa: F401
+    RASTERIZACAO_DISPONIVEL = True
+except ImportError:
+    RASTERIZACAO_DISPONIVEL = False
+
+# Gráficos do relatório executivo, na ordem de exibição: (nome, título, construtor)
+GRAFICOS_EXECUTIVOS = (
+    ("risco_status", "🚦 Distribuição de Risco vs Status", figura_risco_por_status),
+    ("media_ovos_risco", "📊 Média de Ovos por Nível de Risco", figura_media_ovos_por_risco),
+    ("cronograma", "🐣 Cronograma de Eclosão", figura_cronograma_eclosao),
+    ("predadores_status", "🦅 Presença de Predadores por Status", figura_predadores_por_status),
+    ("impacto_predadores", "📊 Impacto dos Predadores", figura_impacto_predadores),
+)
+
+# Só fazem sentido no relatório com todas as regiões
+GRAFICOS_REGIONAIS = (
+    ("ninhos_regiao", "🏖️ Ninhos por Região", figura_ninhos_por_regiao),
+    ("ovos_regiao", "📊 Total de Ovos por Região", figura_ovos_por_regiao),
+)
+
+# Construído a partir dos próprios ninhos
+GRAFICO_DISPERSAO = ("eclosao_vs_ovos", "🥚 Dias para Eclosão × Ovos", figura_eclosao_vs_ovos)
+
+LARGURA_GRAFICO, ALTURA_GRAFICO, ESCALA_GRAFICO = 900, 450, 2
+
+# Tipos MIME dos formatos do relatório executivo
+FORMATOS_EXECUTIVOS = {"html": "text/html", "pdf": "application/pdf"}
+
+
+def tipo_executivo(formato: str = "html", regiao: Optional[str] = None) -> str:
+    """Tipo do artefato de um relatório executivo (geral ou de uma região)."""
+    return tipo_regional(f"executivo-{formato}", regiao)
+
+
+class RenderizadorGraficos:
+    """
+    Rasteriza figuras Plotly em PNG, em lote.
+
+    Todas as figuras pendentes de uma chamada são enviadas juntas ao Kaleido,
+    que abre o navegador uma única vez. Cada imagem fica no armazém de
+    artefatos, indexada pela versão dos dados e pelo hash da especificação
+    da figura: gráficos repetidos entre relatórios (ou entre execuções) não
+    são renderizados de novo.
+    """
+
+    def __init__(
+        self,
+        armazem: Optional[ArmazemArtefatos] = None,
+        versao_dados: int = 0,
+        particao: Particao = PARTICAO_PADRAO,
+    ):
+        self.armazem = armazem
+        self.versao_dados = versao_dados
+        self.particao = particao
+
+    @staticmethod
+    def especificacao(figura: go.Figure) -> str:
+        """Hash da especificação da figura e das dimensões da imagem."""
+        dimensoes = f"{LARGURA_GRAFICO}x{ALTURA_GRAFICO}@{ESCALA_GRAFICO}"
+        return hashlib.sha256((figura.to_json() + dimensoes).encode("utf-8")).hexdigest()
+
+    def renderizar(self, figuras: Dict[Any, go.Figure]) -> Dict[Any, bytes]:
+        """Retorna o PNG de cada figura, renderizando de uma vez só as que faltam no cache."""
+        especificacoes = {chave: self.especificacao(figura) for chave, figura in figuras.items()}
+        imagens: Dict[str, bytes] = {}
+        pendentes: Dict[str, go.Figure] = {}
+
+        for chave, especificacao in especificacoes.items():
+            if especificacao in imagens or especificacao in pendentes:
+                continue
+            encontrado = self._buscar(especificacao)
+            if encontrado is not None:
+                imagens[especificacao] = encontrado
+            else:
+                pendentes[especificacao] = figuras[chave]
+
+        if pendentes:
+            imagens.update(self._rasterizar_lote(pendentes))
+
+        return {chave: imagens[especificacao] for chave, especificacao in especificacoes.items()}
+
+    def _buscar(self, especificacao: str) -> Optional[bytes]:
+        if self.armazem is None:
+            return None
+        encontrado = self.armazem.buscar(
+            f"grafico:{especificacao}", self.versao_dados, self.particao
+        )
+        return encontrado[0] if encontrado else None
+
+    def _rasterizar_lote(self, pendentes: Dict[str, go.Figure]) -> Dict[str, bytes]:
+        with tempfile.TemporaryDirectory(prefix="graficos-") as pasta:
+            caminhos = [os.path.join(pasta, f"{especificacao}.png") for especificacao in pendentes]
+            pio.write_images(
+                list(pendentes.values()),
+                caminhos,
+                format="png",
+                width=LARGURA_GRAFICO,
+                height=ALTURA_GRAFICO,
+                scale=ESCALA_GRAFICO,
+            )
+            imagens = {}
+            for especificacao, caminho in zip(pendentes, caminhos):
+                with open(caminho, "rb") as arquivo:
+                    imagens[especificacao] = arquivo.read()
+
+        if self.armazem is not None:
+            for especificacao, imagem in imagens.items():
+                self.armazem.guardar(
+                    f"grafico:{especificacao}", self.versao_dados, imagem, "png", self.particao
+                )
+        return imagens
+
+
+def figuras_do_relatorio(
+    ninhos: List[Ninho], cubo: CuboNinhos, regiao: Optional[str] = None
+) -> List[Tuple[str, str, go.Figure]]:
+    """Constrói as figuras do relatório geral ou de uma região: (nome, título, figura)."""
+    if regiao is not None:
+        cubo = cubo.filtrar(regiao=regiao)
+        ninhos = [ninho for ninho in ninhos if ninho["regiao"] == regiao]
+    if not ninhos:
+        return []
+
+    graficos = GRAFICOS_EXECUTIVOS if regiao else GRAFICOS_EXECUTIVOS + GRAFICOS_REGIONAIS
+    figuras = [(nome, titulo, construtor(cubo)) for nome, titulo, construtor in graficos]
+
+    nome, titulo, construtor = GRAFICO_DISPERSAO
+    figuras.append((nome, titulo, construtor(ninhos)))
+    return figuras
+
+
+@cronometrado(RELATORIOS, relatorio="executivo")
+def gerar_relatorios_executivos(
+    ninhos: List[Ninho],
+    cubo: CuboNinhos,
+    regioes: Iterable[Optional[str]] = (None,),
+    renderizador: Optional[RenderizadorGraficos] = None,
+    gerado_em: Optional[datetime] = None,
+) -> Dict[Optional[str], str]:
+    """
+    Monta o relatório executivo HTML de cada região (None = todas as regiões).
+
+    As figuras de todas as regiões são rasterizadas num único lote e
+    embutidas no HTML. Sem o kaleido, os gráficos ficam interativos e a
+    biblioteca Plotly é embutida uma vez em cada relatório, que continua
+    abrindo sem rede.
+    """
+    regioes = list(regioes)
+    renderizador = renderizador or RenderizadorGraficos()
+    gerado_em = gerado_em or datetime.now()
+
+    # Em sequência: montar figuras Plotly é Python puro e não ganha nada com threads
+    figuras = {regiao: figuras_do_relatorio(ninhos, cubo, regiao) for regiao in regioes}
+
+    if RASTERIZACAO_DISPONIVEL:
+        imagens = renderizador.renderizar({
+            (regiao, nome): figura
+            for regiao, itens in figuras.items()
+            for nome, _, figura in itens
+        })
+        graficos = {
+            regiao: [(titulo, _imagem_html(imagens[(regiao, nome)])) for nome, titulo, _ in itens]
+            for regiao, itens in figuras.items()
+        }
+    else:
+        graficos = {
+            regiao: [
+                # Só o primeiro gráfico embute a biblioteca; os demais a reaproveitam
+                (titulo, _grafico_interativo_html(figura, indice == 0))
+                for indice, (_, titulo, figura) in enumerate(itens)
+            ]
+            for regiao, itens in figuras.items()
+        }
+
+    return {
+        regiao: montar_relatorio_executivo(
+            cubo if regiao is None else cubo.filtrar(regiao=regiao),
+            graficos[regiao],
+            regiao,
+            gerado_em,
+        )
+        for regiao in regioes
+    }
+
+
+def guardar_relatorios_executivos(
+    armazem: ArmazemArtefatos,
+    versao_dados: int,
+    ninhos: List[Ninho],
+    cubo: CuboNinhos,
+    regioes: Optional[Iterable[Optional[str]]] = None,
+    particao: Particao = PARTICAO_PADRAO,
+) -> List[str]:
+    """
+    Gera e guarda os relatórios executivos (HTML e, se possível, PDF) que ainda
+    faltam para a versão da partição: o geral e o de cada região. Retorna os
+    tipos gerados.
+    """
+    if regioes is None:
+        regioes = [None] + list(cubo.rotulos["regiao"])
+    existentes = set(armazem.tipos_gerados(versao_dados, particao))
+    faltando = [regiao for regiao in regioes if tipo_executivo("html", regiao) not in existentes]
+    if not faltando:
+        return []
+
+    relatorios = gerar_relatorios_executivos(
+        ninhos, cubo, faltando, RenderizadorGraficos(armazem, versao_dados, particao)
+    )
+
+    gerados = []
+    for regiao, relatorio in relatorios.items():
+        tipo = tipo_executivo("html", regiao)
+        armazem.guardar(tipo, versao_dados, relatorio.encode("utf-8"), "html", particao)
+        gerados.append(tipo)
+        pdf = montar_pdf(relatorio)
+        if pdf is not None:
+            armazem.guardar(tipo_executivo("pdf", regiao), versao_dados, pdf, "pdf", particao)
+            gerados.append(tipo_executivo("pdf", regiao))
+    return gerados
+
+
+@cronometrado(RELATORIOS, relatorio="pdf")
+def montar_pdf(relatorio_html: str) -> Optional[bytes]:
+    """
+    Converte o relatório HTML em PDF. Retorna None se o WeasyPrint não estiver
+    instalado ou se os gráficos não puderam ser rasterizados.
+    """
+    if not RASTERIZACAO_DISPONIVEL:
+        return None
+    try:
+        from weasyprint import HTML
+    except ImportError:
+        return None
+    return HTML(string=relatorio_html).write_pdf()
+
+
+def _imagem_html(imagem: bytes) -> str:
+    dados = base64.b64encode(imagem).decode("ascii")
+    return f'<img src="data:image/png;base64,{dados}" alt="">'
+
+
+def _grafico_interativo_html(figura: go.Figure, incluir_plotlyjs=False) -> str:
+    return pio.to_html(
+        figura,
+        full_html=False,
+        include_plotlyjs=incluir_plotlyjs,
+        default_width=f"{LARGURA_GRAFICO}px",
+        default_height=f"{ALTURA_GRAFICO}px",
+    )
+
+
+ESTILO_RELATORIO = """
+body { font-family: 'Poppins', Arial, sans-serif; color: #212121; margin: 0; background: #E3F2FD; }
+header { background: linear-gradient(135deg, #0D47A1, #1E88E5); color: white; padding: 24px 32px; }
+header h1 { margin: 0 0 8px 0; }
+main { padding: 16px 32px; }
+.metricas { display: grid; grid-template-columns: repeat(3, 1fr); gap: 12px; }
+.metrica { background: white; border-radius: 12px; padding: 12px 16px; }
+.metrica span { display: block; font-size: 0.85em; color: #1565C0; }
+.metrica strong { font-size: 1.6em; }
+.grafico { background: white; border-radius: 12px; padding: 12px; margin: 16px 0;
+           page-break-inside: avoid; }
+.grafico img { width: 100%; }
+table { border-collapse: collapse; background: white; }
+td, th { padding: 6px 16px; border-bottom: 1px solid #BBDEFB; text-align: left; }
+"""
+
+
+def montar_relatorio_executivo(
+    cubo: CuboNinhos,
+    graficos: List[Tuple[str, str]],
+    regiao: Optional[str] = None,
+    gerado_em: Optional[datetime] = None,
+) -> str:
+    """Monta o HTML do relatório a partir do cubo e dos gráficos já renderizados."""
+    gerado_em = gerado_em or datetime.now()
+    escopo = regiao or "Todas as regiões"
+
+    total_nests = contar_total_ninhos(cubo)
+    total_eggs = get_total_ovos(cubo)
+    avg_eggs = total_eggs / total_nests if total_nests > 0 else 0
+
+    metricas = [
+        ("🐢 Total de Ninhos", total_nests),
+        ("🥚 Total de Ovos", f"{total_eggs:,}"),
+        ("📈 Média de Ovos/Ninho", f"{avg_eggs:.1f}"),
+        ("🚨 Ninhos Críticos", cubo.total(risco='🔴')),
+        ("🐣 Eclosão ≤ 5 dias", ninhos_prestes_a_eclodir(cubo)),
+        ("🦅 Predadores e Danificados", ninhos_com_predadores_e_danificados(cubo)),
+    ]
+    if regiao is None:
+        region_risk, risk_count = regiao_com_mais_ninhos_sob_risco(cubo)
+        metricas.append(("🏖️ Região com Mais Risco", f"{region_risk} ({risk_count})"))
+
+    partes = [
+        "<!DOCTYPE html>",
+        '<html lang="pt-BR"><head><meta charset="utf-8">',
+        f"<title>Relatório Executivo - {html.escape(escopo)}</title>",
+        f"<style>{ESTILO_RELATORIO}</style>",
+    ]
+    partes += [
+        "</head><body>",
+        "<header><h1>🐢 Relatório Executivo - Guardiões das Tartaruguinhas</h1>",
+        f"<div>{html.escape(escopo)} · {gerado_em.strftime('%d/%m/%Y %H:%M')}</div></header>",
+        "<main><h2>📊 Resumo</h2><div class=\"metricas\">",
+    ]
+    partes += [
+        f'<div class="metrica"><span>{rotulo}</span>'
+        f'<strong>{html.escape(str(valor))}</strong></div>'
+        for rotulo, valor in metricas
+    ]
+    partes.append("</div>")
+
+    partes.append("<h2>📈 Distribuição por Status</h2>")
+    partes.append(_tabela_html(contar_ninhos_por_status(cubo), total_nests, str.title))
+    if regiao is None:
+        partes.append("<h2>🏖️ Distribuição por Região</h2>")
+        partes.append(_tabela_html(contar_ninhos_por_regiao(cubo), total_nests))
+
+    partes.append("<h2>📊 Visualizações</h2>")
+    partes += [
+        f'<div class="grafico"><h3>{html.escape(titulo)}</h3>{conteudo}</div>'
+        for titulo, conteudo in graficos
+    ]
+    partes.append("</main></body></html>")
+    return "\n".join(partes)
+
+
+def _tabela_html(contagens: Dict[str, int], total: int, formatar=str) -> str:
+    linhas = "".join(
+        f"<tr><td>{html.escape(formatar(rotulo))}</td><td>{quantidade}</td>"
+        f"<td>{quantidade / total * 100 if total else 0:.1f}%</td></tr>"
+        for rotulo, quantidade in contagens.items()
+    )
+    return f"<table><tr><th></th><th>Ninhos</th><th>%</th></tr>{linhas}</table>"
@@ -0,0 +1,215 @@
+import json
+from datetime import date, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from utils.cube import CuboNinhos, DIAS_ECLOSAO
+from utils.nest import RISCOS
+
+# Previsão diária de eclosões e filhotes por região, montada sobre o CuboNinhos
+# (o histograma de ninhos e ovos por dias_para_eclosao já está nele): o custo
+# depende do tamanho do cubo, não do número de ninhos.
+HORIZONTE_DIAS = 60
+
+# Incerteza da data informada pelo guardião: a eclosão prevista para o dia d
+# acontece entre d - 3σ e d + 3σ, com pesos de uma normal discreta
+DESVIO_DIAS = 2.0
+
+# Taxa de eclosão usada enquanto não houver escavações registradas, e o peso
+# (em ovos) dessa taxa ao combiná-la com as escavações de cada região e risco
+TAXA_ECLOSAO_PADRAO = 0.8
+PESO_TAXA_PADRAO = 200.0
+
+# Faixa de incerteza de ~95%
+Z_FAIXA = 1.96
+
+
+class PrevisaoEclosao(NamedTuple):
+    """
+    Previsão por região (linhas) e dia a partir de hoje (colunas): valor
+    esperado e faixa de incerteza de ninhos eclodindo e de filhotes.
+    """
+
+    inicio: date
+    regioes: Tuple[str, ...]
+    ninhos: np.ndarray
+    ninhos_desvio: np.ndarray
+    filhotes: np.ndarray
+    filhotes_desvio: np.ndarray
+    taxas: Dict[str, float]
+    desvio_dias: float
+
+    @property
+    def dias(self) -> List[date]:
+        return [self.inicio + timedelta(days=d) for d in range(self.ninhos.shape[1])]
+
+    def faixa(self, medida: str, regiao: Optional[str] = None) -> Tuple[np.ndarray, ...]:
+        """
+        (esperado, mínimo, máximo) por dia de 'ninhos' ou 'filhotes', de uma
+        região ou do total. No total, as variâncias das regiões são somadas.
+        """
+        valores, desvio = getattr(self, medida), getattr(self, f"{medida}_desvio")
+        if regiao is not None:
+            linha = self.regioes.index(regiao)
+            esperado, variancia = valores[linha], desvio[linha] ** 2
+        else:
+            esperado, variancia = valores.sum(axis=0), (desvio ** 2).sum(axis=0)
+        margem = Z_FAIXA * np.sqrt(variancia)
+        return esperado, np.maximum(esperado - margem, 0.0), esperado + margem
+
+    def para_dict(self) -> Dict[str, Any]:
+        """Previsão em formato JSON: uma entrada por dia com o total e cada região."""
+        total_ninhos, total_filhotes = self.faixa("ninhos"), self.faixa("filhotes")
+        por_regiao = {
+            regiao: (self.faixa("ninhos", regiao), self.faixa("filhotes", regiao))
+            for regiao in self.regioes
+        }
+
+        def valores(faixa, d):
+            esperado, minimo, maximo = (float(round(serie[d], 2)) for serie in faixa)
+            return {"esperado": esperado, "minimo": minimo, "maximo": maximo}
+
+        return {
+            "inicio": self.inicio.isoformat(),
+            "dias": len(self.dias),
+            "desvio_dias": self.desvio_dias,
+            "taxas_eclosao": {regiao: round(taxa, 4) for regiao, taxa in self.taxas.items()},
+            "previsao": [
+                {
+                    "data": dia.isoformat(),
+                    "ninhos": valores(total_ninhos, d),
+                    "filhotes": valores(total_filhotes, d),
+                    "regioes": {
+                        regiao: {
+                            "ninhos": valores(ninhos, d),
+                            "filhotes": valores(filhotes, d),
+                        }
+                        for regiao, (ninhos, filhotes) in por_regiao.items()
+                    },
+                }
+                for d, dia in enumerate(self.dias)
+            ],
+        }
+
+    def para_json(self) -> str:
+        return json.dumps(self.para_dict(), ensure_ascii=False)
+
+
+def _espalhamento(horizonte: int, desvio_dias: float) -> np.ndarray:
+    """
+    Matriz (dia previsto × dia do horizonte) com a probabilidade de a eclosão
+    prevista para um dia acontecer em cada dia do horizonte. A parte que
+    cairia antes de hoje é somada a hoje; a que passa do horizonte sai.
+    Ninhos com 0 dias para eclosão já eclodiram e ficam de fora.
+    """
+    previstos = np.array(DIAS_ECLOSAO, dtype=np.float64)
+    if desvio_dias > 0:
+        alcance = int(np.ceil(3 * desvio_dias))
+        deslocamentos = np.arange(-alcance, alcance + 1)
+        pesos = np.exp(-0.5 * (deslocamentos / desvio_dias) ** 2)
+        pesos /= pesos.sum()
+    else:
+        deslocamentos, pesos = np.zeros(1), np.ones(1)
+
+    reais = previstos[:, None] + deslocamentos[None, :]
+    espalhamento = np.zeros((len(previstos), horizonte))
+    linhas = np.broadcast_to(np.arange(len(previstos))[:, None], reais.shape)
+    colunas = np.maximum(reais, 0).astype(np.intp)
+    dentro = colunas < horizonte
+    np.add.at(
+        espalhamento,
+        (linhas[dentro], colunas[dentro]),
+        np.broadcast_to(pesos, reais.shape)[dentro],
+    )
+    espalhamento[0] = 0.0
+    return espalhamento
+
+
+def taxas_por_regiao_risco(
+    regioes: Tuple[str, ...], agregados: List[Dict[str, Any]]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Taxa de eclosão esperada (e sua variância) por região e risco. As
+    escavações de cada célula são combinadas com a taxa geral (ou a padrão),
+    que pesa como PESO_TAXA_PADRAO ovos: poucas escavações mexem pouco na taxa.
+    """
+    ovos = sum(linha["ovos"] for linha in agregados)
+    geral = (
+        sum(linha["eclodidos"] for linha in agregados) / ovos if ovos else TAXA_ECLOSAO_PADRAO
+    )
+    eclodidos_celula = np.zeros((len(regioes), len(RISCOS)))
+    ovos_celula = np.zeros((len(regioes), len(RISCOS)))
+    for linha in agregados:
+        if linha["regiao"] in regioes:
+            celula = regioes.index(linha["regiao"]), RISCOS.index(linha["risco"])
+            eclodidos_celula[celula] += linha["eclodidos"]
+            ovos_celula[celula] += linha["ovos"]
+
+    # Média e variância de uma Beta com a taxa geral como ponto de partida
+    peso = ovos_celula + PESO_TAXA_PADRAO
+    taxa = (eclodidos_celula + geral * PESO_TAXA_PADRAO) / peso
+    variancia = taxa * (1 - taxa) / (peso + 1)
+    return taxa, variancia
+
+
+def prever_eclosoes(
+    cubo: CuboNinhos,
+    agregados_eclosao: List[Dict[str, Any]],
+    horizonte: int = HORIZONTE_DIAS,
+    desvio_dias: float = DESVIO_DIAS,
+    inicio: Optional[date] = None,
+) -> PrevisaoEclosao:
+    """
+    Previsão de eclosões e filhotes (ovos × taxa de eclosão esperada) por
+    região e dia, para os próximos `horizonte` dias a partir de hoje (dia 0).
+
+    O histograma do cubo (ninhos e ovos por região, risco e dia previsto) é
+    espalhado no tempo pela incerteza da data; as taxas vêm das escavações
+    registradas (`agregados_eclosao`). As faixas somam três incertezas: a
+    data de cada eclosão, a contagem binomial de filhotes e a própria taxa.
+    Para a variância dos filhotes, os ninhos de uma célula são tratados como
+    tendo a quantidade média de ovos da célula.
+    """
+    regioes = cubo.rotulos["regiao"]
+    # (regiao, risco, dia previsto): soma sobre status e predadores
+    ninhos = cubo.contagem.sum(axis=(1, 3)).astype(np.float64)
+    ovos = cubo.ovos.sum(axis=(1, 3)).astype(np.float64)
+    ovos_quadrado = np.divide(ovos ** 2, ninhos, out=np.zeros_like(ovos), where=ninhos > 0)
+
+    espalhamento = _espalhamento(horizonte, desvio_dias)
+    # Variância de "eclode neste dia" (Bernoulli) de cada ninho
+    espalhamento_variancia = espalhamento * (1 - espalhamento)
+    taxa, taxa_variancia = taxas_por_regiao_risco(regioes, agregados_eclosao)
+
+    ninhos_dia = ninhos @ espalhamento                       # (regiao, risco, horizonte)
+    ninhos_variancia = ninhos @ espalhamento_variancia
+    ovos_dia = ovos @ espalhamento
+    filhotes_dia = taxa[..., None] * ovos_dia
+    filhotes_variancia = (
+        # Quantos filhotes saem dos ovos que eclodem no dia (binomial)
+        (taxa * (1 - taxa))[..., None] * ovos_dia
+        # Em que dia eclodem os ninhos
+        + (taxa ** 2)[..., None] * (ovos_quadrado @ espalhamento_variancia)
+        # A taxa de eclosão é uma só por região e risco
+        + taxa_variancia[..., None] * ovos_dia ** 2
+    )
+
+    ovos_regiao = ovos.sum(axis=2)
+    taxas = {
+        regiao: float(
+            (taxa[i] * ovos_regiao[i]).sum() / ovos_regiao[i].sum()
+            if ovos_regiao[i].sum() else taxa[i].mean()
+        )
+        for i, regiao in enumerate(regioes)
+    }
+    return PrevisaoEclosao(
+        inicio=inicio or date.today(),
+        regioes=regioes,
+        ninhos=ninhos_dia.sum(axis=1),
+        ninhos_desvio=np.sqrt(ninhos_variancia.sum(axis=1)),
+        filhotes=filhotes_dia.sum(axis=1),
+        filhotes_desvio=np.sqrt(filhotes_variancia.sum(axis=1)),
+        taxas=taxas,
+        desvio_dias=desvio_dias,
+    )
@@ -0,0 +1,372 @@
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Telemetria operacional no formato de texto do Prometheus. Cada processo
+# (réplica ou worker) mantém as próprias métricas em memória e as serve num
+# pequeno servidor HTTP em segundo plano; registrar uma medida custa um lock
+# e algumas somas, sem E/S no caminho da página.
+
+# Porta do endpoint /metrics (0 desliga) e interface onde ele escuta
+PORTA_PADRAO = int(os.environ.get("GUARDIOES_METRICAS_PORTA", "9464"))
+HOST_PADRAO = os.environ.get("GUARDIOES_METRICAS_HOST", "127.0.0.1")
+
+# Limites (em segundos) dos histogramas de duração
+LIMITES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+TIPO_CONTEUDO = "text/plain; version=0.0.4; charset=utf-8"
+
+Rotulos = Tuple[str, ...]
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _formatar_rotulos(nomes: Rotulos, valores: Rotulos, extra: str = "") -> str:
+    pares = [f'{nome}="{_escapar(str(valor))}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _formatar_numero(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+
+class _Metrica:
+    tipo = ""
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Rotulos = ()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._lock = threading.Lock()
+
+    def _chave(self, valores: Dict[str, str]) -> Rotulos:
+        if len(valores) != len(self.rotulos):
+            raise ValueError(
+                f"{self.nome} espera os rótulos {self.rotulos}, recebeu {tuple(valores)}"
+            )
+        return tuple(str(valores[nome]) for nome in self.rotulos)
+
+    def _cabecalho(self) -> List[str]:
+        return [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} {self.tipo}"]
+
+    def exportar(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Contador(_Metrica):
+    """Contador que só cresce (execuções, erros, registros), por combinação de rótulos."""
+
+    tipo = "counter"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Rotulos = ()):
+        super().__init__(nome, ajuda, rotulos)
+        self._valores: Dict[Rotulos, float] = {}
+
+    def inc(self, valor: float = 1, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+    def valor(self, **rotulos) -> float:
+        return self._valores.get(self._chave(rotulos), 0)
+
+    def exportar(self) -> List[str]:
+        with self._lock:
+            valores = sorted(self._valores.items())
+        return self._cabecalho() + [
+            f"{self.nome}{_formatar_rotulos(self.rotulos, chave)} {_formatar_numero(valor)}"
+            for chave, valor in valores
+        ]
+
+
+class Histograma(_Metrica):
+    """
+    Histograma de durações: contagem por faixa, soma e total, por combinação
+    de rótulos. As faixas são guardadas separadas e acumuladas só na exportação.
+    """
+
+    tipo = "histogram"
+
+    def __init__(
+        self,
+        nome: str,
+        ajuda: str,
+        rotulos: Rotulos = (),
+        limites: Tuple[float, ...] = LIMITES_SEGUNDOS,
+    ):
+        super().__init__(nome, ajuda, rotulos)
+        self.limites = tuple(sorted(limites))
+        # Por rótulos: [contagens por faixa (+ uma acima do último limite), soma]
+        self._series: Dict[Rotulos, list] = {}
+
+    def observar(self, valor: float, **rotulos):
+        chave = self._chave(rotulos)
+        faixa = bisect_left(self.limites, valor)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = [[0] * (len(self.limites) + 1), 0.0]
+            serie[0][faixa] += 1
+            serie[1] += valor
+
+    @contextmanager
+    def medir(self, **rotulos):
+        """Mede a duração do bloco, mesmo quando ele termina com exceção."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio, **rotulos)
+
+    def contagem(self, **rotulos) -> int:
+        serie = self._series.get(self._chave(rotulos))
+        return sum(serie[0]) if serie else 0
+
+    def exportar(self) -> List[str]:
+        with self._lock:
+            series = sorted(
+                (chave, list(serie[0]), serie[1]) for chave, serie in self._series.items()
+            )
+        linhas = self._cabecalho()
+        for chave, contagens, soma in series:
+            acumulado = 0
+            for limite, contagem in zip(self.limites + (float("inf"),), contagens):
+                acumulado += contagem
+                rotulos = _formatar_rotulos(self.rotulos, chave, f'le="{_formatar_numero(limite)}"')
+                linhas.append(f"{self.nome}_bucket{rotulos} {acumulado}")
+            rotulos = _formatar_rotulos(self.rotulos, chave)
+            linhas.append(f"{self.nome}_sum{rotulos} {_formatar_numero(soma)}")
+            linhas.append(f"{self.nome}_count{rotulos} {acumulado}")
+        return linhas
+
+
+class Medidor(_Metrica):
+    """
+    Valor lido no momento da coleta (sessões ativas, tamanho do banco): a
+    função só roda quando o endpoint é consultado, nunca no caminho da página.
+    Ela retorna um número ou, com rótulos, um dicionário {valores dos rótulos: número}.
+    """
+
+    tipo = "gauge"
+
+    def __init__(
+        self,
+        nome: str,
+        ajuda: str,
+        funcao: Callable[[], Union[float, Dict[Rotulos, float]]],
+        rotulos: Rotulos = (),
+    ):
+        super().__init__(nome, ajuda, rotulos)
+        self.funcao = funcao
+
+    def exportar(self) -> List[str]:
+        try:
+            valor = self.funcao()
+        except Exception:
+            logger.exception("Erro ao ler a métrica %s", self.nome)
+            return []
+        valores = valor.items() if isinstance(valor, dict) else [((), valor)]
+        return self._cabecalho() + [
+            f"{self.nome}{_formatar_rotulos(self.rotulos, tuple(chave))} {_formatar_numero(numero)}"
+            for chave, numero in sorted(valores)
+        ]
+
+
+class RegistroMetricas:
+    """Métricas de um processo, pelo nome; declarar de novo um nome devolve a mesma métrica."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metricas: Dict[str, _Metrica] = {}
+
+    def _declarar(self, classe, nome: str, *args, **kwargs):
+        with self._lock:
+            existente = self._metricas.get(nome)
+            if existente is not None:
+                if not isinstance(existente, classe):
+                    raise ValueError(f"A métrica {nome} já existe como {existente.tipo}")
+                return existente
+            metrica = self._metricas[nome] = classe(nome, *args, **kwargs)
+            return metrica
+
+    def contador(self, nome: str, ajuda: str, rotulos: Rotulos = ()) -> Contador:
+        return self._declarar(Contador, nome, ajuda, rotulos)
+
+    def histograma(
+        self,
+        nome: str,
+        ajuda: str,
+        rotulos: Rotulos = (),
+        limites: Tuple[float, ...] = LIMITES_SEGUNDOS,
+    ) -> Histograma:
+        return self._declarar(Histograma, nome, ajuda, rotulos, limites)
+
+    def medidor(
+        self,
+        nome: str,
+        ajuda: str,
+        funcao: Callable[[], Union[float, Dict[Rotulos, float]]],
+        rotulos: Rotulos = (),
+    ) -> Medidor:
+        """Declara um medidor; declarar de novo troca a função de leitura."""
+        medidor = self._declarar(Medidor, nome, ajuda, funcao, rotulos)
+        medidor.funcao = funcao
+        return medidor
+
+    def exportar(self) -> str:
+        """Todas as métricas no formato de texto do Prometheus."""
+        with self._lock:
+            metricas = sorted(self._metricas.items())
+        linhas = []
+        for _, metrica in metricas:
+            linhas.extend(metrica.exportar())
+        return "\n".join(linhas) + "\n"
+
+
+# Registro do processo, compartilhado por todas as sessões
+REGISTRO = RegistroMetricas()
+
+EXECUCOES = REGISTRO.histograma(
+    "guardioes_execucao_segundos", "Duração de cada execução completa do app (main)"
+)
+PAGINAS = REGISTRO.histograma(
+    "guardioes_pagina_segundos", "Duração da renderização de cada página", ("pagina",)
+)
+NINHOS_ADICIONADOS = REGISTRO.contador(
+    "guardioes_ninhos_adicionados_total", "Ninhos enviados pelo formulário, por resultado",
+    ("resultado",),
+)
+ADICIONAR_NINHO = REGISTRO.histograma(
+    "guardioes_adicionar_ninho_segundos", "Duração do registro de um ninho novo"
+)
+RELATORIOS = REGISTRO.histograma(
+    "guardioes_relatorio_segundos", "Duração da geração de relatórios e exportações",
+    ("relatorio",),
+)
+ERROS = REGISTRO.contador(
+    "guardioes_erros_total", "Exceções não tratadas, por etapa", ("etapa",)
+)
+CACHE_CONSULTAS = REGISTRO.contador(
+    "guardioes_cache_consultas_total", "Leituras das estruturas guardadas por versão dos dados",
+    ("cache",),
+)
+CACHE_CONSTRUCOES = REGISTRO.contador(
+    "guardioes_cache_construcoes_total",
+    "Construções das estruturas guardadas por versão (consultas - construções = acertos)",
+    ("cache",),
+)
+SESSOES = REGISTRO.contador("guardioes_sessoes_total", "Sessões de navegador iniciadas")
+
+
+@contextmanager
+def medir(histograma: Histograma, etapa: Optional[str] = None, **rotulos):
+    """
+    Mede o bloco em `histograma` e conta em ERROS as exceções que o
+    atravessam (as de controle do Streamlit, como st.rerun, não são Exception).
+    """
+    try:
+        with histograma.medir(**rotulos):
+            yield
+    except Exception:
+        ERROS.inc(etapa=etapa or histograma.nome)
+        raise
+
+
+def cronometrado(histograma: Histograma, **rotulos):
+    """Decorador: mede cada chamada da função com `medir`."""
+    def decorador(funcao):
+        @wraps(funcao)
+        def medida(*args, **kwargs):
+            with medir(histograma, funcao.__name__, **rotulos):
+                return funcao(*args, **kwargs)
+        return medida
+    return decorador
+
+
+class _Requisicao(BaseHTTPRequestHandler):
+    registro: RegistroMetricas = REGISTRO
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        corpo = self.registro.exportar().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", TIPO_CONTEUDO)
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        # Uma coleta a cada poucos segundos não deve encher o log do app
+        pass
+
+
+class ServidorMetricas:
+    """
+    Servidor HTTP do endpoint /metrics, numa thread em segundo plano do
+    próprio processo. Porta 0 em `iniciar` escolhe uma porta livre.
+    """
+
+    def __init__(
+        self,
+        registro: RegistroMetricas = REGISTRO,
+        host: str = HOST_PADRAO,
+        porta: int = PORTA_PADRAO,
+    ):
+        requisicao = type("Requisicao", (_Requisicao,), {"registro": registro})
+        self._servidor = ThreadingHTTPServer((host, porta), requisicao)
+        self._servidor.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._servidor.serve_forever, name="servidor-metricas", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def endereco(self) -> Tuple[str, int]:
+        return self._servidor.server_address[:2]
+
+    def parar(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+
+_servidores: Dict[Tuple[str, int], ServidorMetricas] = {}
+_servidores_lock = threading.Lock()
+
+
+def iniciar_servidor(
+    host: str = HOST_PADRAO, porta: int = PORTA_PADRAO
+) -> Optional[ServidorMetricas]:
+    """
+    Sobe o servidor de métricas do processo, uma vez por endereço. Retorna
+    None com a porta 0 ou quando a porta está ocupada: a telemetria nunca
+    impede o app de subir.
+    """
+    if not porta:
+        return None
+    with _servidores_lock:
+        if (host, porta) not in _servidores:
+            try:
+                _servidores[(host, porta)] = ServidorMetricas(REGISTRO, host, porta)
+            except OSError as erro:
+                logger.warning(
+                    "Endpoint de métricas não iniciado em %s:%d: %s", host, porta, erro
+                )
+                return None
+            logger.info("📈 Métricas em http://%s:%d/metrics", host, porta)
+        return _servidores[(host, porta)]
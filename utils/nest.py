@@ -0,0 +1,310 @@
+import sys
+from datetime import date
+from numbers import Integral
+from typing import Dict, Any, Iterator, NamedTuple, Optional, Tuple
+
+# Valores aceitos, os mesmos oferecidos pelo formulário de cadastro
+REGIOES = ("Praia Norte", "Praia Sul", "Praia Leste", "Praia Oeste", "Praia Central")
+STATUS = ("intacto", "ameacado", "danificado")
+RISCOS = ("🟢", "🟡", "🔴")
+
+MIN_OVOS, MAX_OVOS = 1, 200
+MIN_DIAS_ECLOSAO, MAX_DIAS_ECLOSAO = 0, 60
+
+# Partição dona do ninho (organização e projeto); os dados anteriores às
+# partições ficam na partição padrão
+ORGANIZACAO_PADRAO = PROJETO_PADRAO = "padrao"
+MAX_TAMANHO_PARTICAO = 60
+
+# Os campos de partição ficam no fim: os índices usados nos pacotes de
+# sincronização (utils/sync.py) continuam os mesmos para os campos antigos
+CAMPOS = (
+    "id",
+    "regiao",
+    "quantidade_ovos",
+    "status",
+    "risco",
+    "dias_para_eclosao",
+    "predadores",
+    "guardiao",
+    "observacoes",
+    "organizacao",
+    "projeto",
+)
+
+CODIGO_STATUS = {status: i for i, status in enumerate(STATUS)}
+CODIGO_RISCO = {risco: i for i, risco in enumerate(RISCOS)}
+
+
+class NinhoInvalido(ValueError):
+    """Erro levantado quando os dados de um ninho não passam na validação."""
+
+
+class Particao(NamedTuple):
+    """Organização e projeto donos de um conjunto de ninhos."""
+
+    organizacao: str
+    projeto: str
+
+    def __str__(self) -> str:
+        return f"{self.organizacao} / {self.projeto}"
+
+    @classmethod
+    def validar(cls, organizacao: Any, projeto: Any) -> "Particao":
+        """Cria a partição a partir de nomes informados (formulário, URL), validando-os."""
+        return cls(_nome_particao("organizacao", organizacao), _nome_particao("projeto", projeto))
+
+
+PARTICAO_PADRAO = Particao(ORGANIZACAO_PADRAO, PROJETO_PADRAO)
+
+
+def _nome_particao(nome: str, valor: Any) -> str:
+    if not isinstance(valor, str) or not valor.strip():
+        raise NinhoInvalido(f"'{nome}' não pode ficar vazio")
+    if len(valor.strip()) > MAX_TAMANHO_PARTICAO:
+        raise NinhoInvalido(f"'{nome}' com mais de {MAX_TAMANHO_PARTICAO} caracteres")
+    return sys.intern(valor.strip())
+
+
+def _inteiro(nome: str, valor: Any, minimo: int, maximo: int) -> int:
+    if isinstance(valor, bool) or not isinstance(valor, Integral):
+        raise NinhoInvalido(f"'{nome}' deve ser um número inteiro (recebido {valor!r})")
+    if not minimo <= valor <= maximo:
+        raise NinhoInvalido(f"'{nome}' deve estar entre {minimo} e {maximo} (recebido {valor})")
+    return int(valor)
+
+
+class Ninho:
+    """
+    Registro compacto de um ninho.
+
+    Usa `__slots__`, guarda status e risco como códigos inteiros e
+    compartilha as strings repetidas (região, guardião, partição). Os dados são
+    validados uma única vez, na criação; depois disso o registro se comporta
+    como o dicionário usado pelos componentes (`ninho['risco']`,
+    `ninho.get(...)`, `'observacoes' in ninho`).
+    """
+
+    __slots__ = (
+        "id",
+        "regiao",
+        "quantidade_ovos",
+        "codigo_status",
+        "codigo_risco",
+        "dias_para_eclosao",
+        "predadores",
+        "guardiao",
+        "observacoes",
+        "organizacao",
+        "projeto",
+    )
+
+    def __init__(
+        self,
+        regiao: str,
+        quantidade_ovos: int,
+        status: str,
+        risco: str,
+        dias_para_eclosao: int,
+        predadores: bool,
+        guardiao: str,
+        observacoes: Optional[str] = None,
+        id: Optional[str] = None,
+        organizacao: str = ORGANIZACAO_PADRAO,
+        projeto: str = PROJETO_PADRAO,
+    ):
+        if regiao not in REGIOES:
+            raise NinhoInvalido(f"Região desconhecida: {regiao!r}")
+        if status not in CODIGO_STATUS:
+            raise NinhoInvalido(f"Status desconhecido: {status!r}")
+        if risco not in CODIGO_RISCO:
+            raise NinhoInvalido(f"Nível de risco desconhecido: {risco!r}")
+        if not isinstance(predadores, bool):
+            raise NinhoInvalido(f"'predadores' deve ser verdadeiro ou falso ({predadores!r})")
+        if not isinstance(guardiao, str) or not guardiao.strip():
+            raise NinhoInvalido("O ninho precisa de um guardião identificado")
+
+        self.id = id
+        self.regiao = sys.intern(regiao)
+        self.quantidade_ovos = _inteiro("quantidade_ovos", quantidade_ovos, MIN_OVOS, MAX_OVOS)
+        self.codigo_status = CODIGO_STATUS[status]
+        self.codigo_risco = CODIGO_RISCO[risco]
+        self.dias_para_eclosao = _inteiro(
+            "dias_para_eclosao", dias_para_eclosao, MIN_DIAS_ECLOSAO, MAX_DIAS_ECLOSAO
+        )
+        self.predadores = predadores
+        self.guardiao = sys.intern(guardiao.strip())
+        self.observacoes = observacoes.strip() if observacoes and observacoes.strip() else None
+        self.organizacao = _nome_particao("organizacao", organizacao)
+        self.projeto = _nome_particao("projeto", projeto)
+
+    @classmethod
+    def de_dict(cls, dados: Dict[str, Any]) -> "Ninho":
+        """Cria (e valida) um ninho a partir de um dicionário com os campos do formulário."""
+        if isinstance(dados, Ninho):
+            return dados
+        try:
+            return cls(
+                regiao=dados["regiao"],
+                quantidade_ovos=dados["quantidade_ovos"],
+                status=dados["status"],
+                risco=dados["risco"],
+                dias_para_eclosao=dados["dias_para_eclosao"],
+                predadores=dados["predadores"],
+                guardiao=dados.get("guardiao", ""),
+                observacoes=dados.get("observacoes"),
+                id=dados.get("id"),
+                organizacao=dados.get("organizacao", ORGANIZACAO_PADRAO),
+                projeto=dados.get("projeto", PROJETO_PADRAO),
+            )
+        except KeyError as erro:
+            raise NinhoInvalido(f"Campo obrigatório ausente: {erro.args[0]}") from None
+
+    @classmethod
+    def confiavel(
+        cls,
+        id: str,
+        regiao: str,
+        quantidade_ovos: int,
+        codigo_status: int,
+        codigo_risco: int,
+        dias_para_eclosao: int,
+        predadores: bool,
+        guardiao: str,
+        observacoes: Optional[str],
+        organizacao: str = ORGANIZACAO_PADRAO,
+        projeto: str = PROJETO_PADRAO,
+    ) -> "Ninho":
+        """Cria um ninho sem validar, para dados já validados na escrita (leitura do banco)."""
+        ninho = cls.__new__(cls)
+        ninho.id = id
+        ninho.regiao = sys.intern(regiao)
+        ninho.quantidade_ovos = quantidade_ovos
+        ninho.codigo_status = codigo_status
+        ninho.codigo_risco = codigo_risco
+        ninho.dias_para_eclosao = dias_para_eclosao
+        ninho.predadores = predadores
+        ninho.guardiao = sys.intern(guardiao)
+        ninho.observacoes = observacoes or None
+        ninho.organizacao = sys.intern(organizacao)
+        ninho.projeto = sys.intern(projeto)
+        return ninho
+
+    @property
+    def status(self) -> str:
+        return STATUS[self.codigo_status]
+
+    @property
+    def risco(self) -> str:
+        return RISCOS[self.codigo_risco]
+
+    @property
+    def particao(self) -> Particao:
+        return Particao(self.organizacao, self.projeto)
+
+    # Acesso compatível com dicionário
+
+    def __getitem__(self, campo: str) -> Any:
+        if campo not in CAMPOS:
+            raise KeyError(campo)
+        valor = getattr(self, campo)
+        # Campos opcionais vazios se comportam como chaves ausentes
+        if valor is None and campo in ("observacoes", "id"):
+            raise KeyError(campo)
+        return valor
+
+    def __contains__(self, campo: object) -> bool:
+        try:
+            self[campo]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, campo: str, padrao: Any = None) -> Any:
+        try:
+            return self[campo]
+        except KeyError:
+            return padrao
+
+    def keys(self) -> Iterator[str]:
+        return (campo for campo in CAMPOS if campo in self)
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        return ((campo, self[campo]) for campo in self.keys())
+
+    def para_dict(self) -> Dict[str, Any]:
+        """Converte o ninho em um dicionário simples (exportação, JSON, DataFrame)."""
+        return dict(self.items())
+
+    def __eq__(self, outro: object) -> bool:
+        if not isinstance(outro, Ninho):
+            return NotImplemented
+        return all(getattr(self, campo) == getattr(outro, campo) for campo in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"Ninho({self.para_dict()!r})"
+
+
+class ResultadoEclosao:
+    """
+    Resultado da escavação de um ninho depois da eclosão: filhotes que
+    eclodiram, filhotes que emergiram até a superfície e ovos mortos.
+
+    Validado na criação contra a quantidade de ovos do ninho: emergidos não
+    passam dos eclodidos, e eclodidos mais ovos mortos não passam do total.
+    """
+
+    __slots__ = ("ninho_id", "eclodidos", "emergidos", "ovos_mortos", "data_escavacao")
+
+    def __init__(
+        self,
+        ninho_id: str,
+        quantidade_ovos: int,
+        eclodidos: int,
+        emergidos: int,
+        ovos_mortos: int,
+        data_escavacao: Any,
+    ):
+        if isinstance(data_escavacao, str):
+            try:
+                data_escavacao = date.fromisoformat(data_escavacao)
+            except ValueError:
+                raise NinhoInvalido(f"Data de escavação inválida: {data_escavacao!r}") from None
+        if not isinstance(data_escavacao, date):
+            raise NinhoInvalido(f"Data de escavação inválida: {data_escavacao!r}")
+        if data_escavacao > date.today():
+            raise NinhoInvalido("A data de escavação não pode estar no futuro")
+
+        self.ninho_id = ninho_id
+        self.eclodidos = _inteiro("eclodidos", eclodidos, 0, quantidade_ovos)
+        self.emergidos = _inteiro("emergidos", emergidos, 0, self.eclodidos)
+        self.ovos_mortos = _inteiro(
+            "ovos_mortos", ovos_mortos, 0, quantidade_ovos - self.eclodidos
+        )
+        # datetime também é date; guarda só o dia
+        self.data_escavacao = date(data_escavacao.year, data_escavacao.month, data_escavacao.day)
+
+    @classmethod
+    def confiavel(
+        cls,
+        ninho_id: str,
+        eclodidos: int,
+        emergidos: int,
+        ovos_mortos: int,
+        data_escavacao: date,
+    ) -> "ResultadoEclosao":
+        """Cria um resultado sem validar, para dados já validados na escrita (leitura do banco)."""
+        resultado = cls.__new__(cls)
+        resultado.ninho_id = ninho_id
+        resultado.eclodidos = eclodidos
+        resultado.emergidos = emergidos
+        resultado.ovos_mortos = ovos_mortos
+        resultado.data_escavacao = data_escavacao
+        return resultado
+
+    def __repr__(self) -> str:
+        return (
+            f"ResultadoEclosao(ninho_id={self.ninho_id!r}, eclodidos={self.eclodidos}, "
+            f"emergidos={self.emergidos}, ovos_mortos={self.ovos_mortos}, "
+            f"data_escavacao={self.data_escavacao.isoformat()!r})"
+        )
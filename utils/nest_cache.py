@@ -0,0 +1,179 @@
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, TypeVar
+
+from utils.nest import Ninho, Particao
+from utils.nest_store import NestStore
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CacheNinhos:
+    """
+    Cache de leitura dos ninhos mantido aquecido em cada processo (réplica).
+
+    Todas as sessões do processo compartilham a mesma lista. A cada leitura,
+    a assinatura do banco (`NestStore.assinatura`) indica se houve escrita de
+    qualquer réplica; só então os ninhos alterados desde a última versão
+    conhecida são buscados e aplicados, sem reler o banco inteiro.
+
+    Com `particao`, o cache guarda só os ninhos dela e a versão é a da última
+    escrita na partição: escritas em outras partições não mudam a versão, e
+    nada do que foi montado a partir dela (`derivado`) é reconstruído.
+    """
+
+    def __init__(self, store: NestStore, particao: Optional[Particao] = None):
+        self.store = store
+        self.particao = particao
+        self.versao = 0
+        self._lock = threading.Lock()
+        self._ninhos: List[Ninho] = []
+        self._posicao: Dict[str, int] = {}
+        self._assinatura: Optional[Tuple[int, int]] = None
+        self._observador: Optional["ObservadorCaches"] = None
+        # Última leitura de uma sessão; o observador deixa de atualizar caches ociosos
+        self.ultimo_acesso = time.monotonic()
+        # Estruturas montadas a partir dos ninhos: nome -> (versão, chave, valor)
+        self._derivados: Dict[str, Tuple[int, Hashable, Any]] = {}
+        self._locks_derivados: Dict[str, threading.Lock] = {}
+
+    def ninhos(self) -> List[Ninho]:
+        """
+        Retorna a lista atual de ninhos.
+        A lista é compartilhada entre sessões e não deve ser modificada.
+        """
+        self.ultimo_acesso = time.monotonic()
+        self.atualizar()
+        return self._ninhos
+
+    def instantaneo(self) -> Tuple[int, List[Ninho]]:
+        """Retorna a versão e a lista de ninhos correspondente, lidas juntas."""
+        self.ultimo_acesso = time.monotonic()
+        self.atualizar()
+        with self._lock:
+            return self.versao, self._ninhos
+
+    def atualizar(self) -> bool:
+        """Aplica as alterações pendentes do banco. Retorna True se algo mudou."""
+        with self._lock:
+            # Lida antes da busca: uma escrita concorrente gera nova assinatura e nova busca
+            assinatura = self.store.assinatura()
+            if assinatura == self._assinatura:
+                return False
+
+            ninhos = None
+            while True:
+                alterados, nova_versao = self.store.alterados_desde(
+                    self.versao, particao=self.particao
+                )
+                if not alterados:
+                    break
+                # Copia na escrita: quem já está renderizando continua com a lista antiga
+                if ninhos is None:
+                    ninhos = list(self._ninhos)
+                for ninho in alterados:
+                    posicao = self._posicao.get(ninho["id"])
+                    if posicao is None:
+                        self._posicao[ninho["id"]] = len(ninhos)
+                        ninhos.append(ninho)
+                    else:
+                        ninhos[posicao] = ninho
+                self.versao = nova_versao
+
+            self._assinatura = assinatura
+            if ninhos is None:
+                return False
+            self._ninhos = ninhos
+            return True
+
+    def derivado(
+        self, nome: str, construir: Callable[[int, List[Ninho]], T], chave: Hashable = ()
+    ) -> T:
+        """
+        Retorna a estrutura `nome` montada por `construir(versao, ninhos)` a
+        partir do instantâneo atual. Ela só é reconstruída quando a versão
+        (ou a `chave` extra) muda, uma vez para todas as sessões.
+        """
+        versao, ninhos = self.instantaneo()
+        guardado = self._derivados.get(nome)
+        if guardado is not None and guardado[:2] == (versao, chave):
+            return guardado[2]
+        with self._lock:
+            lock = self._locks_derivados.setdefault(nome, threading.Lock())
+        with lock:
+            # Outra sessão pode ter montado enquanto esta esperava
+            guardado = self._derivados.get(nome)
+            if guardado is not None and guardado[:2] == (versao, chave):
+                return guardado[2]
+            valor = construir(versao, ninhos)
+            self._derivados[nome] = (versao, chave, valor)
+            return valor
+
+    def observar(self, intervalo: float = 1.0):
+        """
+        Inicia uma thread que acompanha as escritas das outras réplicas e
+        aplica as alterações antes da próxima requisição chegar. Com vários
+        caches no mesmo processo, use um único `ObservadorCaches`.
+        """
+        if self._observador is not None:
+            return
+        self._observador = ObservadorCaches(self.store, intervalo)
+        self._observador.acompanhar(self)
+
+
+class ObservadorCaches:
+    """
+    Uma única thread que mantém aquecidos todos os caches de um processo (um
+    por partição). A assinatura do banco é lida uma vez por rodada e só
+    quando ela muda os caches são atualizados; caches sem leitura há mais de
+    `ocioso` segundos ficam de fora e se atualizam na próxima leitura.
+    """
+
+    def __init__(self, store: NestStore, intervalo: float = 1.0, ocioso: float = 300.0):
+        self.store = store
+        self.intervalo = intervalo
+        self.ocioso = ocioso
+        self._lock = threading.Lock()
+        self._caches: List[CacheNinhos] = []
+        self._thread: Optional[threading.Thread] = None
+        self._parar = threading.Event()
+
+    def acompanhar(self, cache: CacheNinhos):
+        """Passa a acompanhar o cache; a thread sobe no primeiro cache."""
+        with self._lock:
+            if cache in self._caches:
+                return
+            self._caches.append(cache)
+            cache._observador = self
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._rodar, name="observador-ninhos", daemon=True
+                )
+                self._thread.start()
+
+    def atualizar(self) -> int:
+        """Atualiza os caches em uso. Retorna quantos mudaram."""
+        limite = time.monotonic() - self.ocioso
+        with self._lock:
+            caches = [cache for cache in self._caches if cache.ultimo_acesso >= limite]
+        return sum(cache.atualizar() for cache in caches)
+
+    def _rodar(self):
+        assinatura = None
+        while not self._parar.wait(self.intervalo):
+            try:
+                atual = self.store.assinatura()
+                if atual != assinatura:
+                    assinatura = atual
+                    self.atualizar()
+            except sqlite3.Error:
+                logger.exception("Erro ao atualizar o cache de ninhos")
+
+    def encerrar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,190 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from utils.nest import Ninho, CODIGO_STATUS, CODIGO_RISCO
+
+
+class SelecaoLinhas:
+    """
+    Subconjunto de linhas de um IndiceNinhos, guardado da forma mais compacta:
+    nada quando todas as linhas são selecionadas, posições int32 quando são
+    poucas, ou um mapa de bits (1 bit por ninho) quando são muitas.
+    """
+
+    __slots__ = ("total", "quantidade", "_posicoes", "_bits")
+
+    def __init__(
+        self,
+        total: int,
+        quantidade: int,
+        posicoes: Optional[np.ndarray] = None,
+        bits: Optional[np.ndarray] = None,
+    ):
+        self.total = total
+        self.quantidade = quantidade
+        self._posicoes = posicoes
+        self._bits = bits
+
+    @classmethod
+    def de_mascara(cls, mascara: np.ndarray) -> "SelecaoLinhas":
+        """Cria a seleção a partir de uma máscara booleana com uma posição por ninho."""
+        total = len(mascara)
+        quantidade = int(np.count_nonzero(mascara))
+        if quantidade == total:
+            return cls(total, quantidade)
+        if quantidade * 4 <= (total + 7) // 8:
+            return cls(total, quantidade, posicoes=np.flatnonzero(mascara).astype(np.int32))
+        return cls(total, quantidade, bits=np.packbits(mascara))
+
+    def __len__(self) -> int:
+        return self.quantidade
+
+    @property
+    def nbytes(self) -> int:
+        """Memória ocupada pelas linhas selecionadas."""
+        for valores in (self._posicoes, self._bits):
+            if valores is not None:
+                return valores.nbytes
+        return 0
+
+    def mascara(self) -> np.ndarray:
+        """Máscara booleana com uma posição por ninho."""
+        if self._bits is not None:
+            return np.unpackbits(self._bits, count=self.total).astype(bool)
+        if self._posicoes is None:
+            return np.ones(self.total, dtype=bool)
+        mascara = np.zeros(self.total, dtype=bool)
+        mascara[self._posicoes] = True
+        return mascara
+
+    def posicoes(self) -> np.ndarray:
+        """Posições selecionadas, em ordem crescente."""
+        if self._posicoes is not None:
+            return self._posicoes
+        if self._bits is not None:
+            return np.flatnonzero(np.unpackbits(self._bits, count=self.total))
+        return np.arange(self.total)
+
+
+def _posto(valores: List[str]) -> np.ndarray:
+    """Posição de cada valor na ordem alfabética dos valores distintos."""
+    _, postos = np.unique(np.array(valores, dtype=object), return_inverse=True)
+    return postos.astype(np.int32)
+
+
+class IndiceNinhos:
+    """
+    Colunas codificadas dos ninhos de uma versão dos dados, montadas uma vez
+    e compartilhadas por todas as sessões. Os filtros viram comparações
+    vetorizadas, e cada sessão guarda só a SelecaoLinhas resultante.
+
+    As ordenações da tabela também são calculadas uma vez por coluna e
+    direção e reaproveitadas por todas as sessões, de modo que uma página
+    ordenada custa um recorte, e não um sort dos ninhos.
+    """
+
+    # Colunas pelas quais a tabela pode ser ordenada
+    ORDENAVEIS = (
+        "regiao", "quantidade_ovos", "status", "risco", "pontuacao",
+        "dias_para_eclosao", "predadores", "guardiao",
+    )
+
+    def __init__(
+        self,
+        versao: int,
+        ninhos: List[Ninho],
+        pontuacoes: Optional[Dict[str, float]] = None,
+    ):
+        self.versao = versao
+        self.ninhos = ninhos
+        total = len(ninhos)
+        # Regiões na ordem em que aparecem, como no CuboNinhos
+        self.regioes = tuple(dict.fromkeys(n.regiao for n in ninhos))
+        indice_regiao = {regiao: i for i, regiao in enumerate(self.regioes)}
+        self.codigo_regiao = np.fromiter((indice_regiao[n.regiao] for n in ninhos), np.uint8, total)
+        self.codigo_status = np.fromiter((n.codigo_status for n in ninhos), np.uint8, total)
+        self.codigo_risco = np.fromiter((n.codigo_risco for n in ninhos), np.uint8, total)
+        self._pontuacoes = pontuacoes or {}
+        self._ordens: Dict[tuple, np.ndarray] = {}
+
+    def _chave_ordenacao(self, coluna: str) -> np.ndarray:
+        """Valores numéricos cuja ordem é a ordem da coluna."""
+        ninhos, total = self.ninhos, len(self.ninhos)
+        if coluna == "regiao":
+            return _posto(list(self.regioes))[self.codigo_regiao]
+        if coluna == "status":
+            return self.codigo_status
+        if coluna == "risco":
+            return self.codigo_risco
+        if coluna == "guardiao":
+            return _posto([n.guardiao for n in ninhos])
+        if coluna == "pontuacao":
+            # Ninhos ainda não pontuados (NaN) ficam no fim nas duas direções
+            return np.fromiter(
+                (self._pontuacoes.get(n.id, np.nan) for n in ninhos), np.float64, total
+            )
+        if coluna in ("quantidade_ovos", "dias_para_eclosao", "predadores"):
+            return np.fromiter((getattr(n, coluna) for n in ninhos), np.int16, total)
+        raise ValueError(f"Coluna não ordenável: {coluna}")
+
+    def ordem(self, coluna: str, decrescente: bool = False) -> np.ndarray:
+        """
+        Posições de todos os ninhos ordenados pela coluna (estável: empates
+        mantêm a ordem do índice). Calculada na primeira vez e guardada.
+        """
+        chave = (coluna, decrescente)
+        if chave not in self._ordens:
+            valores = self._chave_ordenacao(coluna).astype(np.float64)
+            self._ordens[chave] = np.argsort(
+                -valores if decrescente else valores, kind="stable"
+            ).astype(np.int32)
+        return self._ordens[chave]
+
+    def pagina(
+        self,
+        selecao: SelecaoLinhas,
+        inicio: int,
+        tamanho: int,
+        coluna: Optional[str] = None,
+        decrescente: bool = False,
+    ) -> List[Ninho]:
+        """
+        Ninhos de uma página da seleção, opcionalmente ordenada por uma coluna.
+        Só os ninhos da página são materializados.
+        """
+        if coluna is None:
+            posicoes = selecao.posicoes()
+        else:
+            posicoes = self.ordem(coluna, decrescente)
+            if len(selecao) != len(self.ninhos):
+                posicoes = posicoes[selecao.mascara()[posicoes]]
+        return [self.ninhos[i] for i in posicoes[inicio:inicio + tamanho].tolist()]
+
+    def __len__(self) -> int:
+        return len(self.ninhos)
+
+    def selecionar(
+        self,
+        regiao: Optional[str] = None,
+        status: Optional[str] = None,
+        risco: Optional[str] = None,
+    ) -> SelecaoLinhas:
+        """Seleciona os ninhos que atendem a todos os filtros informados (None = qualquer)."""
+        mascara = np.ones(len(self.ninhos), dtype=bool)
+        if regiao is not None:
+            if regiao not in self.regioes:
+                mascara[:] = False
+            else:
+                mascara &= self.codigo_regiao == self.regioes.index(regiao)
+        if status is not None:
+            mascara &= self.codigo_status == CODIGO_STATUS[status]
+        if risco is not None:
+            mascara &= self.codigo_risco == CODIGO_RISCO[risco]
+        return SelecaoLinhas.de_mascara(mascara)
+
+    def ninhos_de(self, selecao: SelecaoLinhas) -> List[Ninho]:
+        """Ninhos da seleção, na ordem do índice (lista montada só para exibição)."""
+        if len(selecao) == len(self.ninhos):
+            return self.ninhos
+        return [self.ninhos[i] for i in selecao.posicoes().tolist()]
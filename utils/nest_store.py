@@ -0,0 +1,688 @@
+import os
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import date
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+
+from utils.nest import (
+    Ninho, NinhoInvalido, ResultadoEclosao, Particao, CAMPOS, CODIGO_STATUS, CODIGO_RISCO,
+    ORGANIZACAO_PADRAO, PROJETO_PADRAO
+)
+
+# Caminho padrão do banco compartilhado entre o app e os processos em segundo plano
+CAMINHO_PADRAO = os.environ.get("GUARDIOES_DB", os.path.join("data", "ninhos.db"))
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS ninhos (
+    id TEXT PRIMARY KEY,
+    regiao TEXT NOT NULL,
+    quantidade_ovos INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    risco TEXT NOT NULL,
+    dias_para_eclosao INTEGER NOT NULL,
+    predadores INTEGER NOT NULL,
+    guardiao TEXT NOT NULL,
+    observacoes TEXT,
+    versao INTEGER NOT NULL,
+    organizacao TEXT NOT NULL DEFAULT 'padrao',
+    projeto TEXT NOT NULL DEFAULT 'padrao'
+);
+CREATE INDEX IF NOT EXISTS idx_ninhos_versao ON ninhos(versao);
+CREATE INDEX IF NOT EXISTS idx_ninhos_regiao ON ninhos(regiao);
+CREATE TABLE IF NOT EXISTS ninhos_relogios (
+    ninho_id TEXT NOT NULL,
+    campo TEXT NOT NULL,
+    carimbo INTEGER NOT NULL,
+    dispositivo TEXT NOT NULL,
+    PRIMARY KEY (ninho_id, campo)
+);
+CREATE TABLE IF NOT EXISTS guardioes_agregados (
+    organizacao TEXT NOT NULL,
+    projeto TEXT NOT NULL,
+    guardiao TEXT NOT NULL,
+    ninhos INTEGER NOT NULL,
+    ovos INTEGER NOT NULL,
+    alto_risco INTEGER NOT NULL,
+    eclosao_proxima INTEGER NOT NULL,
+    PRIMARY KEY (organizacao, projeto, guardiao)
+);
+CREATE TABLE IF NOT EXISTS resultados_eclosao (
+    ninho_id TEXT PRIMARY KEY,
+    eclodidos INTEGER NOT NULL,
+    emergidos INTEGER NOT NULL,
+    ovos_mortos INTEGER NOT NULL,
+    data_escavacao TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS eclosao_agregados (
+    organizacao TEXT NOT NULL,
+    projeto TEXT NOT NULL,
+    regiao TEXT NOT NULL,
+    risco TEXT NOT NULL,
+    ninhos INTEGER NOT NULL,
+    ovos INTEGER NOT NULL,
+    eclodidos INTEGER NOT NULL,
+    emergidos INTEGER NOT NULL,
+    ovos_mortos INTEGER NOT NULL,
+    PRIMARY KEY (organizacao, projeto, regiao, risco)
+);
+"""
+
+# Índices por partição (criados depois da migração de bancos antigos): as
+# leituras de uma partição percorrem só as entradas dela, então um projeto
+# grande não deixa mais lentas as consultas de outro
+ESQUEMA_PARTICOES = """
+CREATE INDEX IF NOT EXISTS idx_ninhos_particao_versao ON ninhos(organizacao, projeto, versao);
+CREATE INDEX IF NOT EXISTS idx_ninhos_particao_regiao ON ninhos(organizacao, projeto, regiao);
+CREATE INDEX IF NOT EXISTS idx_ninhos_particao_eclosao
+    ON ninhos(organizacao, projeto, dias_para_eclosao);
+CREATE INDEX IF NOT EXISTS idx_ninhos_particao_guardiao_eclosao
+    ON ninhos(organizacao, projeto, guardiao, dias_para_eclosao);
+CREATE INDEX IF NOT EXISTS idx_ninhos_particao_guardiao_risco
+    ON ninhos(organizacao, projeto, guardiao, risco);
+DROP INDEX IF EXISTS idx_ninhos_guardiao_eclosao;
+DROP INDEX IF EXISTS idx_ninhos_guardiao_risco;
+"""
+
+# Situação de cada alteração recebida dos dispositivos de campo (ver aplicar_alteracoes)
+ALTERACAO_APLICADA, ALTERACAO_IGNORADA, ALTERACAO_REJEITADA = "aplicada", "ignorada", "rejeitada"
+
+# Relógio dos campos que nunca foram alterados por um dispositivo
+_RELOGIO_INICIAL = (0, "")
+
+_SQL_GRAVAR_NINHO = (
+    "INSERT INTO ninhos (id, regiao, quantidade_ovos, status, risco, "
+    "dias_para_eclosao, predadores, guardiao, observacoes, versao, organizacao, projeto) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+# Atualiza o ninho existente no lugar (mantém o rowid e a ordem de inserção);
+# a partição de um ninho nunca muda
+_SQL_REGRAVAR_NINHO = _SQL_GRAVAR_NINHO + (
+    " ON CONFLICT(id) DO UPDATE SET "
+    "regiao = excluded.regiao, quantidade_ovos = excluded.quantidade_ovos, "
+    "status = excluded.status, risco = excluded.risco, "
+    "dias_para_eclosao = excluded.dias_para_eclosao, predadores = excluded.predadores, "
+    "guardiao = excluded.guardiao, observacoes = excluded.observacoes, versao = excluded.versao"
+)
+
+# Limite de dias usado no agregado "eclosão próxima" (mesmo padrão de ninhos_prestes_a_eclodir)
+DIAS_ECLOSAO_PROXIMA = 5
+
+
+def _linha_para_ninho(linha: sqlite3.Row) -> Ninho:
+    """Converte uma linha do banco em Ninho, sem revalidar (já validado na escrita)."""
+    return Ninho.confiavel(
+        id=linha["id"],
+        regiao=linha["regiao"],
+        quantidade_ovos=linha["quantidade_ovos"],
+        codigo_status=CODIGO_STATUS[linha["status"]],
+        codigo_risco=CODIGO_RISCO[linha["risco"]],
+        dias_para_eclosao=linha["dias_para_eclosao"],
+        predadores=bool(linha["predadores"]),
+        guardiao=linha["guardiao"],
+        observacoes=linha["observacoes"],
+        organizacao=linha["organizacao"],
+        projeto=linha["projeto"],
+    )
+
+
+def filtro_particao(particao: Optional[Particao], tabela: str = "") -> Tuple[str, Tuple]:
+    """
+    Condição SQL (e parâmetros) que restringe uma consulta à partição; sem
+    partição, não restringe nada. `tabela` é o prefixo das colunas (ex.: "n.").
+    """
+    if particao is None:
+        return "1", ()
+    return f"{tabela}organizacao = ? AND {tabela}projeto = ?", tuple(particao)
+
+
+def _linha_para_resultado(linha: sqlite3.Row) -> ResultadoEclosao:
+    """
+    Converte uma linha de `resultados_eclosao` sem revalidar: a quantidade de
+    ovos do ninho pode ter sido corrigida depois do registro.
+    """
+    return ResultadoEclosao.confiavel(
+        linha["ninho_id"],
+        linha["eclodidos"],
+        linha["emergidos"],
+        linha["ovos_mortos"],
+        date.fromisoformat(linha["data_escavacao"]),
+    )
+
+
+def _valores_linha(ninho_id: str, ninho: Ninho, versao: int) -> Tuple:
+    """Valores de `_SQL_GRAVAR_NINHO` para o ninho."""
+    return (
+        ninho_id,
+        ninho.regiao,
+        ninho.quantidade_ovos,
+        ninho.status,
+        ninho.risco,
+        ninho.dias_para_eclosao,
+        int(ninho.predadores),
+        ninho.guardiao,
+        ninho.observacoes,
+        versao,
+        ninho.organizacao,
+        ninho.projeto,
+    )
+
+
+class NestStore:
+    """
+    Armazenamento persistente dos ninhos em SQLite.
+
+    Cada escrita recebe um número de versão crescente, o que permite que
+    processos em segundo plano leiam apenas os ninhos alterados desde a
+    última execução (ver `alterados_desde`).
+
+    Cada ninho pertence a uma partição (organização e projeto). As leituras
+    recebem `particao` e percorrem só os índices dela; sem partição, leem
+    todos os ninhos (worker, arquivo de temporadas). Os agregados são
+    mantidos por partição.
+    """
+
+    def __init__(self, caminho: str = CAMINHO_PADRAO):
+        self.caminho = caminho
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._escritas_locais = 0
+        # isolation_level=None: as transações são abertas explicitamente em `transacao`
+        self._conexao = sqlite3.connect(
+            caminho, check_same_thread=False, timeout=30, isolation_level=None
+        )
+        self._conexao.row_factory = sqlite3.Row
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("PRAGMA synchronous=NORMAL")
+        self._migrar_particoes()
+        self._conexao.executescript(ESQUEMA)
+        self._conexao.executescript(ESQUEMA_PARTICOES)
+        self._verificar_agregados_guardiao()
+        self._verificar_agregados_eclosao()
+
+    def _migrar_particoes(self):
+        """
+        Bancos anteriores às partições: os ninhos vão para a partição padrão e
+        os agregados são recriados por partição (reconstruídos logo em seguida).
+        """
+        colunas = [linha["name"] for linha in self._conexao.execute("PRAGMA table_info(ninhos)")]
+        if not colunas or "organizacao" in colunas:
+            return
+        self._conexao.execute("BEGIN IMMEDIATE")
+        try:
+            padroes = {"organizacao": ORGANIZACAO_PADRAO, "projeto": PROJETO_PADRAO}
+            for coluna, padrao in padroes.items():
+                self._conexao.execute(
+                    f"ALTER TABLE ninhos ADD COLUMN {coluna} TEXT NOT NULL DEFAULT '{padrao}'"
+                )
+            self._conexao.execute("DROP TABLE IF EXISTS guardioes_agregados")
+            self._conexao.execute("DROP TABLE IF EXISTS eclosao_agregados")
+        except BaseException:
+            self._conexao.execute("ROLLBACK")
+            raise
+        self._conexao.execute("COMMIT")
+
+    def criar_esquema(self, esquema: str):
+        """Cria tabelas auxiliares (alertas, índices etc.) no mesmo banco."""
+        with self._lock:
+            self._conexao.executescript(esquema)
+
+    @contextmanager
+    def transacao(self) -> Iterator[sqlite3.Connection]:
+        """Abre uma transação de escrita exclusiva na conexão do armazenamento."""
+        with self._lock:
+            self._conexao.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conexao
+            except BaseException:
+                self._conexao.execute("ROLLBACK")
+                raise
+            else:
+                self._conexao.execute("COMMIT")
+                self._escritas_locais += 1
+
+    def consultar(self, sql: str, parametros: Iterable[Any] = ()) -> List[sqlite3.Row]:
+        """Executa uma consulta de leitura e retorna todas as linhas."""
+        with self._lock:
+            return self._conexao.execute(sql, tuple(parametros)).fetchall()
+
+    def assinatura(self) -> Tuple[int, int]:
+        """
+        Identifica o estado atual do banco de forma barata.
+
+        `PRAGMA data_version` muda quando outro processo (outra réplica ou o
+        worker) confirma uma escrita; o contador local cobre as escritas feitas
+        por esta mesma conexão. Se a assinatura não mudou, nada mudou.
+        """
+        with self._lock:
+            data_version = self._conexao.execute("PRAGMA data_version").fetchone()[0]
+            return data_version, self._escritas_locais
+
+    def _proxima_versao(self, conexao: sqlite3.Connection) -> int:
+        return conexao.execute("SELECT COALESCE(MAX(versao), 0) + 1 FROM ninhos").fetchone()[0]
+
+    def inserir(self, ninho: Dict[str, Any]) -> str:
+        """Insere um ninho e retorna o identificador gerado."""
+        return self.inserir_varios([ninho])[0]
+
+    def inserir_varios(self, ninhos: List[Dict[str, Any]]) -> List[str]:
+        """
+        Insere vários ninhos em uma única transação e versão.
+        Levanta NinhoInvalido (sem gravar nada) se algum ninho não passar na validação.
+        """
+        # Valida tudo antes de abrir a transação
+        ninhos = [Ninho.de_dict(ninho) for ninho in ninhos]
+        ids = []
+        with self.transacao() as conexao:
+            versao = self._proxima_versao(conexao)
+            for ninho in ninhos:
+                ninho_id = ninho.id or uuid.uuid4().hex
+                conexao.execute(_SQL_GRAVAR_NINHO, _valores_linha(ninho_id, ninho, versao))
+                self._atualizar_agregados_guardiao(conexao, ninho, 1)
+                ids.append(ninho_id)
+        return ids
+
+    def aplicar_alteracoes(self, alteracoes: List[Dict[str, Any]]) -> List[Tuple[str, str, str]]:
+        """
+        Aplica, numa única transação e versão, as alterações enviadas pelos
+        dispositivos de campo (ver `utils/sync.py`).
+
+        Cada alteração traz o id do ninho (gerado no dispositivo), o relógio
+        `carimbo` + `dispositivo` e apenas os campos alterados. Cada campo
+        guarda o valor de maior relógio (o último a escrever vence, com
+        desempate pelo dispositivo): reenviar ou reordenar alterações sempre
+        leva ao mesmo resultado. Retorna (id, situação, mensagem) por alteração.
+        """
+        resultados = []
+        with self.transacao() as conexao:
+            versao = None
+            for alteracao in alteracoes:
+                ninho_id = alteracao["id"]
+                relogio = (alteracao["carimbo"], alteracao["dispositivo"])
+
+                linha = conexao.execute("SELECT * FROM ninhos WHERE id = ?", (ninho_id,)).fetchone()
+                relogios = {
+                    campo: (carimbo, dispositivo)
+                    for campo, carimbo, dispositivo in conexao.execute(
+                        "SELECT campo, carimbo, dispositivo FROM ninhos_relogios "
+                        "WHERE ninho_id = ?",
+                        (ninho_id,),
+                    )
+                }
+                vencedores = {
+                    campo: valor
+                    for campo, valor in alteracao["campos"].items()
+                    if campo in CAMPOS and campo != "id"
+                    and relogio > relogios.get(campo, _RELOGIO_INICIAL)
+                }
+                if not vencedores:
+                    resultados.append((ninho_id, ALTERACAO_IGNORADA, ""))
+                    continue
+
+                anterior = _linha_para_ninho(linha) if linha else None
+                dados = anterior.para_dict() if anterior else {}
+                dados.update(vencedores)
+                dados["id"] = ninho_id
+                try:
+                    ninho = Ninho.de_dict(dados)
+                    if anterior is not None and ninho.particao != anterior.particao:
+                        raise NinhoInvalido(f"O ninho pertence à partição {anterior.particao}")
+                except NinhoInvalido as erro:
+                    resultados.append((ninho_id, ALTERACAO_REJEITADA, str(erro)))
+                    continue
+
+                if versao is None:
+                    versao = self._proxima_versao(conexao)
+                resultado = self._resultado_eclosao(conexao, ninho_id) if anterior else None
+                if anterior is not None:
+                    self._atualizar_agregados_guardiao(conexao, anterior, -1)
+                if resultado is not None:
+                    # O resultado acompanha o ninho se a região ou o risco mudarem
+                    self._atualizar_agregados_eclosao(conexao, anterior, resultado, -1)
+                conexao.execute(_SQL_REGRAVAR_NINHO, _valores_linha(ninho_id, ninho, versao))
+                self._atualizar_agregados_guardiao(conexao, ninho, 1)
+                if resultado is not None:
+                    self._atualizar_agregados_eclosao(conexao, ninho, resultado, 1)
+                conexao.executemany(
+                    "INSERT INTO ninhos_relogios (ninho_id, campo, carimbo, dispositivo) "
+                    "VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(ninho_id, campo) DO UPDATE SET "
+                    "carimbo = excluded.carimbo, dispositivo = excluded.dispositivo",
+                    [(ninho_id, campo, *relogio) for campo in vencedores],
+                )
+                resultados.append((ninho_id, ALTERACAO_APLICADA, ""))
+        return resultados
+
+    def _atualizar_agregados_guardiao(
+        self, conexao: sqlite3.Connection, ninho: Ninho, sinal: int
+    ):
+        """Soma (sinal=1) ou subtrai (sinal=-1) um ninho dos agregados do guardião na partição."""
+        conexao.execute(
+            "INSERT INTO guardioes_agregados "
+            "(organizacao, projeto, guardiao, ninhos, ovos, alto_risco, eclosao_proxima) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(organizacao, projeto, guardiao) DO UPDATE SET "
+            "ninhos = ninhos + excluded.ninhos, "
+            "ovos = ovos + excluded.ovos, "
+            "alto_risco = alto_risco + excluded.alto_risco, "
+            "eclosao_proxima = eclosao_proxima + excluded.eclosao_proxima",
+            (
+                ninho.organizacao,
+                ninho.projeto,
+                ninho.guardiao,
+                sinal,
+                sinal * ninho.quantidade_ovos,
+                sinal * int(ninho.risco == "🔴"),
+                sinal * int(ninho.dias_para_eclosao <= DIAS_ECLOSAO_PROXIMA),
+            ),
+        )
+
+    def _verificar_agregados_guardiao(self):
+        """Reconstrói os agregados por guardião quando estão fora de sincronia (banco antigo)."""
+        with self.transacao() as conexao:
+            total_ninhos = conexao.execute("SELECT COUNT(*) FROM ninhos").fetchone()[0]
+            total_agregado = conexao.execute(
+                "SELECT COALESCE(SUM(ninhos), 0) FROM guardioes_agregados"
+            ).fetchone()[0]
+            if total_ninhos == total_agregado:
+                return
+            conexao.execute("DELETE FROM guardioes_agregados")
+            conexao.execute(
+                "INSERT INTO guardioes_agregados "
+                "(organizacao, projeto, guardiao, ninhos, ovos, alto_risco, eclosao_proxima) "
+                "SELECT organizacao, projeto, guardiao, COUNT(*), SUM(quantidade_ovos), "
+                "SUM(risco = '🔴'), SUM(dias_para_eclosao <= ?) "
+                "FROM ninhos GROUP BY organizacao, projeto, guardiao",
+                (DIAS_ECLOSAO_PROXIMA,),
+            )
+
+    def registrar_resultado(
+        self,
+        ninho_id: str,
+        eclodidos: int,
+        emergidos: int,
+        ovos_mortos: int,
+        data_escavacao: Any,
+    ) -> ResultadoEclosao:
+        """
+        Grava (ou corrige) o resultado da escavação de um ninho já eclodido e
+        atualiza, na mesma transação, os agregados de sucesso por região e risco.
+        Levanta NinhoInvalido se o ninho não existir, ainda não tiver eclodido
+        ou se os números não fecharem com a quantidade de ovos.
+        """
+        with self.transacao() as conexao:
+            linha = conexao.execute("SELECT * FROM ninhos WHERE id = ?", (ninho_id,)).fetchone()
+            if linha is None:
+                raise NinhoInvalido(f"Ninho não encontrado: {ninho_id!r}")
+            ninho = _linha_para_ninho(linha)
+            if ninho.dias_para_eclosao > 0:
+                raise NinhoInvalido("O ninho ainda não eclodiu")
+            resultado = ResultadoEclosao(
+                ninho_id, ninho.quantidade_ovos, eclodidos, emergidos, ovos_mortos, data_escavacao
+            )
+
+            anterior = self._resultado_eclosao(conexao, ninho_id)
+            if anterior is not None:
+                self._atualizar_agregados_eclosao(conexao, ninho, anterior, -1)
+            conexao.execute(
+                "INSERT INTO resultados_eclosao "
+                "(ninho_id, eclodidos, emergidos, ovos_mortos, data_escavacao) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(ninho_id) DO UPDATE SET eclodidos = excluded.eclodidos, "
+                "emergidos = excluded.emergidos, ovos_mortos = excluded.ovos_mortos, "
+                "data_escavacao = excluded.data_escavacao",
+                (
+                    ninho_id,
+                    resultado.eclodidos,
+                    resultado.emergidos,
+                    resultado.ovos_mortos,
+                    resultado.data_escavacao.isoformat(),
+                ),
+            )
+            self._atualizar_agregados_eclosao(conexao, ninho, resultado, 1)
+        return resultado
+
+    def _resultado_eclosao(
+        self, conexao: sqlite3.Connection, ninho_id: str
+    ) -> Optional[ResultadoEclosao]:
+        linha = conexao.execute(
+            "SELECT * FROM resultados_eclosao WHERE ninho_id = ?",
+            (ninho_id,),
+        ).fetchone()
+        return _linha_para_resultado(linha) if linha else None
+
+    def _atualizar_agregados_eclosao(
+        self, conexao: sqlite3.Connection, ninho: Ninho, resultado: ResultadoEclosao, sinal: int
+    ):
+        """Soma (sinal=1) ou subtrai (sinal=-1) um resultado dos agregados da região e risco."""
+        conexao.execute(
+            "INSERT INTO eclosao_agregados "
+            "(organizacao, projeto, regiao, risco, ninhos, ovos, eclodidos, emergidos, "
+            "ovos_mortos) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(organizacao, projeto, regiao, risco) DO UPDATE SET "
+            "ninhos = ninhos + excluded.ninhos, "
+            "ovos = ovos + excluded.ovos, "
+            "eclodidos = eclodidos + excluded.eclodidos, "
+            "emergidos = emergidos + excluded.emergidos, "
+            "ovos_mortos = ovos_mortos + excluded.ovos_mortos",
+            (
+                ninho.organizacao,
+                ninho.projeto,
+                ninho.regiao,
+                ninho.risco,
+                sinal,
+                sinal * ninho.quantidade_ovos,
+                sinal * resultado.eclodidos,
+                sinal * resultado.emergidos,
+                sinal * resultado.ovos_mortos,
+            ),
+        )
+
+    def _verificar_agregados_eclosao(self):
+        """Reconstrói os agregados de sucesso de eclosão quando estão fora de sincronia."""
+        with self.transacao() as conexao:
+            total_resultados = conexao.execute(
+                "SELECT COUNT(*) FROM resultados_eclosao"
+            ).fetchone()[0]
+            total_agregado = conexao.execute(
+                "SELECT COALESCE(SUM(ninhos), 0) FROM eclosao_agregados"
+            ).fetchone()[0]
+            if total_resultados == total_agregado:
+                return
+            conexao.execute("DELETE FROM eclosao_agregados")
+            conexao.execute(
+                "INSERT INTO eclosao_agregados "
+                "(organizacao, projeto, regiao, risco, ninhos, ovos, eclodidos, emergidos, "
+                "ovos_mortos) "
+                "SELECT n.organizacao, n.projeto, n.regiao, n.risco, COUNT(*), "
+                "SUM(n.quantidade_ovos), SUM(r.eclodidos), SUM(r.emergidos), SUM(r.ovos_mortos) "
+                "FROM resultados_eclosao r JOIN ninhos n ON n.id = r.ninho_id "
+                "GROUP BY n.organizacao, n.projeto, n.regiao, n.risco"
+            )
+
+    def agregados_eclosao(self, particao: Optional[Particao] = None) -> List[Dict[str, Any]]:
+        """Retorna os agregados de sucesso de eclosão mantidos por região e risco."""
+        filtro, parametros = filtro_particao(particao)
+        linhas = self.consultar(
+            "SELECT regiao, risco, SUM(ninhos) AS ninhos, SUM(ovos) AS ovos, "
+            "SUM(eclodidos) AS eclodidos, SUM(emergidos) AS emergidos, "
+            "SUM(ovos_mortos) AS ovos_mortos "
+            f"FROM eclosao_agregados WHERE {filtro} "
+            "GROUP BY regiao, risco HAVING SUM(ninhos) > 0 ORDER BY regiao, risco",
+            parametros,
+        )
+        return [dict(linha) for linha in linhas]
+
+    def resultados_eclosao(
+        self, particao: Optional[Particao] = None
+    ) -> Dict[str, ResultadoEclosao]:
+        """Retorna todos os resultados de escavação registrados, por id do ninho."""
+        filtro, parametros = filtro_particao(particao, "n.")
+        linhas = self.consultar(
+            "SELECT r.* FROM resultados_eclosao r JOIN ninhos n ON n.id = r.ninho_id "
+            f"WHERE {filtro}",
+            parametros,
+        )
+        return {linha["ninho_id"]: _linha_para_resultado(linha) for linha in linhas}
+
+    def ninhos_aguardando_resultado(self, particao: Optional[Particao] = None) -> List[Ninho]:
+        """Retorna os ninhos já eclodidos que ainda não têm resultado de escavação."""
+        filtro, parametros = filtro_particao(particao)
+        linhas = self.consultar(
+            f"SELECT * FROM ninhos WHERE {filtro} AND dias_para_eclosao = 0 "
+            "AND id NOT IN (SELECT ninho_id FROM resultados_eclosao) ORDER BY versao, rowid",
+            parametros,
+        )
+        return [_linha_para_ninho(linha) for linha in linhas]
+
+    def agregados_por_guardiao(self, particao: Optional[Particao] = None) -> List[Dict[str, Any]]:
+        """Retorna os agregados mantidos por guardião, do mais carregado ao menos carregado."""
+        filtro, parametros = filtro_particao(particao)
+        linhas = self.consultar(
+            "SELECT guardiao, SUM(ninhos) AS ninhos, SUM(ovos) AS ovos, "
+            "SUM(alto_risco) AS alto_risco, SUM(eclosao_proxima) AS eclosao_proxima "
+            f"FROM guardioes_agregados WHERE {filtro} "
+            "GROUP BY guardiao HAVING SUM(ninhos) > 0 ORDER BY ninhos DESC, guardiao",
+            parametros,
+        )
+        return [dict(linha) for linha in linhas]
+
+    def ninhos_eclosao_proxima_do_guardiao(
+        self,
+        guardiao: str,
+        dias_limite: int = DIAS_ECLOSAO_PROXIMA,
+        particao: Optional[Particao] = None,
+    ) -> List[Ninho]:
+        """Retorna os ninhos do guardião com eclosão em até `dias_limite` dias."""
+        filtro, parametros = filtro_particao(particao)
+        linhas = self.consultar(
+            f"SELECT * FROM ninhos WHERE guardiao = ? AND dias_para_eclosao <= ? AND {filtro} "
+            "ORDER BY dias_para_eclosao",
+            (guardiao, dias_limite, *parametros),
+        )
+        return [_linha_para_ninho(linha) for linha in linhas]
+
+    def ninhos_alto_risco_do_guardiao(
+        self, guardiao: str, particao: Optional[Particao] = None
+    ) -> List[Ninho]:
+        """Retorna os ninhos em risco 🔴 sob responsabilidade do guardião."""
+        filtro, parametros = filtro_particao(particao)
+        linhas = self.consultar(
+            f"SELECT * FROM ninhos WHERE guardiao = ? AND risco = '🔴' AND {filtro} "
+            "ORDER BY dias_para_eclosao",
+            (guardiao, *parametros),
+        )
+        return [_linha_para_ninho(linha) for linha in linhas]
+
+    def ninhos_por_ids(self, ids: List[str]) -> Dict[str, Ninho]:
+        """Retorna os ninhos com os identificadores dados, indexados pelo id."""
+        ninhos = {}
+        # Em lotes, abaixo do limite de parâmetros do SQLite
+        for inicio in range(0, len(ids), 500):
+            lote = ids[inicio:inicio + 500]
+            linhas = self.consultar(
+                f"SELECT * FROM ninhos WHERE id IN ({','.join('?' * len(lote))})", lote
+            )
+            ninhos.update((linha["id"], _linha_para_ninho(linha)) for linha in linhas)
+        return ninhos
+
+    def particoes(self) -> List[Dict[str, Any]]:
+        """Retorna as partições com ao menos um ninho e o número de ninhos de cada uma."""
+        linhas = self.consultar(
+            "SELECT organizacao, projeto, SUM(ninhos) AS ninhos FROM guardioes_agregados "
+            "GROUP BY organizacao, projeto HAVING SUM(ninhos) > 0 ORDER BY organizacao, projeto"
+        )
+        return [
+            {
+                "particao": Particao(linha["organizacao"], linha["projeto"]),
+                "ninhos": linha["ninhos"],
+            }
+            for linha in linhas
+        ]
+
+    def contar(self, particao: Optional[Particao] = None) -> int:
+        """Retorna o número de ninhos armazenados."""
+        filtro, parametros = filtro_particao(particao)
+        return self.consultar(f"SELECT COUNT(*) FROM ninhos WHERE {filtro}", parametros)[0][0]
+
+    def versao_atual(self, particao: Optional[Particao] = None) -> int:
+        """Retorna a versão da escrita mais recente."""
+        filtro, parametros = filtro_particao(particao)
+        return self.consultar(
+            f"SELECT COALESCE(MAX(versao), 0) FROM ninhos WHERE {filtro}", parametros
+        )[0][0]
+
+    def listar(self, particao: Optional[Particao] = None) -> List[Ninho]:
+        """Retorna todos os ninhos na ordem de inserção."""
+        filtro, parametros = filtro_particao(particao)
+        linhas = self.consultar(
+            f"SELECT * FROM ninhos WHERE {filtro} ORDER BY versao, rowid", parametros
+        )
+        return [_linha_para_ninho(linha) for linha in linhas]
+
+    def regioes(self, particao: Optional[Particao] = None) -> List[str]:
+        """Retorna as regiões com ao menos um ninho."""
+        filtro, parametros = filtro_particao(particao)
+        return [
+            linha[0]
+            for linha in self.consultar(
+                f"SELECT DISTINCT regiao FROM ninhos WHERE {filtro}", parametros
+            )
+        ]
+
+    def particao_regiao(
+        self, regiao: str, particao: Optional[Particao] = None
+    ) -> Tuple[int, List[Ninho]]:
+        """Retorna a versão atual e os ninhos da região, lidos numa mesma transação."""
+        filtro, parametros = filtro_particao(particao)
+        with self._lock:
+            self._conexao.execute("BEGIN")
+            try:
+                versao = self._conexao.execute(
+                    f"SELECT COALESCE(MAX(versao), 0) FROM ninhos WHERE {filtro}", parametros
+                ).fetchone()[0]
+                linhas = self._conexao.execute(
+                    f"SELECT * FROM ninhos WHERE regiao = ? AND {filtro} ORDER BY versao, rowid",
+                    (regiao, *parametros),
+                ).fetchall()
+            finally:
+                self._conexao.execute("COMMIT")
+        return versao, [_linha_para_ninho(linha) for linha in linhas]
+
+    def alterados_desde(
+        self, versao: int, limite: int = 5000, particao: Optional[Particao] = None
+    ) -> Tuple[List[Ninho], int]:
+        """
+        Retorna os ninhos com versão maior que `versao` (no máximo `limite`)
+        e a maior versão incluída, para ser usada como próximo cursor. Com
+        `particao`, só os ninhos dela (pelo índice da partição).
+        """
+        filtro, parametros = filtro_particao(particao)
+        linhas = self.consultar(
+            f"SELECT * FROM ninhos WHERE {filtro} AND versao > ? ORDER BY versao LIMIT ?",
+            (*parametros, versao, limite),
+        )
+        if not linhas:
+            return [], versao
+        # Nunca corta uma versão ao meio, senão o cursor pularia ninhos
+        ultima_versao = linhas[-1]["versao"]
+        if len(linhas) == limite:
+            if linhas[0]["versao"] != ultima_versao:
+                linhas = [linha for linha in linhas if linha["versao"] != ultima_versao]
+                ultima_versao = linhas[-1]["versao"]
+            else:
+                linhas = self.consultar(
+                    f"SELECT * FROM ninhos WHERE {filtro} AND versao = ?",
+                    (*parametros, ultima_versao),
+                )
+        return [_linha_para_ninho(linha) for linha in linhas], ultima_versao
+
+    def fechar(self):
+        """Fecha a conexão com o banco."""
+        with self._lock:
+            self._conexao.close()
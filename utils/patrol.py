@@ -0,0 +1,369 @@
+import heapq
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.nest import Ninho, RISCOS
+from utils.risk import avaliar_ninhos, faixa_da_pontuacao
+
+# Planejamento das rondas: escolhe os ninhos que precisam de visita, divide entre
+# os guardiões disponíveis e ordena as paradas de cada um (vizinho mais próximo
+# seguido de 2-opt), respeitando o tempo de cálculo e a duração do turno.
+#
+# As posições ficam num plano local da área monitorada, em km. Os ninhos não têm
+# coordenadas: sem posições informadas, cada ninho fica no centro da sua região,
+# e a rota passa a ordenar as praias. Ajuste os centros para as praias reais.
+CENTROS_REGIOES: Dict[str, Tuple[float, float]] = {
+    "Praia Norte": (0.0, 6.0),
+    "Praia Central": (0.0, 0.0),
+    "Praia Sul": (0.0, -6.0),
+    "Praia Leste": (3.5, 1.5),
+    "Praia Oeste": (-3.5, -1.5),
+}
+
+DIAS_ECLOSAO_PADRAO = 5
+VELOCIDADE_KMH = 4.0          # caminhada na areia
+MINUTOS_POR_NINHO = 10.0      # inspeção de um ninho
+MINUTOS_TURNO = 8 * 60.0      # duração da ronda de um guardião
+LIMITE_CALCULO = 0.5          # segundos para o 2-opt de todas as rotas
+# Acima deste número de paradas, o caminho inicial vem de uma varredura em faixas
+# (O(n log n)) em vez do vizinho mais próximo (O(n²))
+LIMITE_VIZINHO = 1000
+
+Posicao = Tuple[float, float]
+
+
+class Parada(NamedTuple):
+    """Um ponto da rota e os ninhos visitados nele, do mais prioritário ao menos."""
+
+    regiao: str
+    posicao: Posicao
+    ninhos: List[Ninho]
+
+
+class Rota(NamedTuple):
+    """Ronda de um guardião: paradas na ordem de visita."""
+
+    guardiao: str
+    paradas: List[Parada]
+    distancia_km: float
+    minutos: float
+
+    @property
+    def total_ninhos(self) -> int:
+        return sum(len(parada.ninhos) for parada in self.paradas)
+
+
+class PlanoPatrulha(NamedTuple):
+    """Rotas de todos os guardiões e os ninhos que não couberam em nenhum turno."""
+
+    rotas: List[Rota]
+    sem_cobertura: List[Ninho]
+    segundos: float
+
+
+def candidatos(
+    ninhos: Sequence[Ninho],
+    dias: int = DIAS_ECLOSAO_PADRAO,
+    criticos: bool = True,
+    pontuacoes: Optional[Dict[str, float]] = None,
+) -> List[Ninho]:
+    """
+    Ninhos que eclodem em até `dias` dias e, se `criticos`, os da faixa de
+    risco calculada 🔴 (pela pontuação de `pontuacoes`, ou calculada na hora).
+    """
+    ninhos = list(ninhos)
+    if not criticos or not ninhos:
+        return [n for n in ninhos if n.dias_para_eclosao <= dias]
+    critico = faixa_da_pontuacao(_prioridades(ninhos, pontuacoes)) == len(RISCOS) - 1
+    return [
+        n for n, e_critico in zip(ninhos, critico.tolist())
+        if n.dias_para_eclosao <= dias or e_critico
+    ]
+
+
+def _prioridades(ninhos: List[Ninho], pontuacoes: Optional[Dict[str, float]]) -> np.ndarray:
+    """Pontuação de risco de cada ninho: a pré-calculada, ou a calculada na hora."""
+    pontuacoes = pontuacoes or {}
+    prioridades = np.fromiter(
+        (pontuacoes.get(n.id, np.nan) for n in ninhos), np.float64, len(ninhos)
+    )
+    faltando = np.flatnonzero(np.isnan(prioridades))
+    if len(faltando):
+        calculada, _, _ = avaliar_ninhos([ninhos[i] for i in faltando.tolist()])
+        prioridades[faltando] = calculada
+    return prioridades
+
+
+def distribuir(
+    ninhos: List[Ninho],
+    prioridades: np.ndarray,
+    guardioes: Sequence[str],
+    capacidade: Optional[int] = None,
+) -> Tuple[Dict[str, List[int]], List[int]]:
+    """
+    Divide os ninhos (por posição na lista) entre os guardiões disponíveis.
+    Cada guardião fica com os próprios ninhos; os de guardiões ausentes vão,
+    do mais prioritário ao menos, para o guardião menos carregado que já
+    patrulha a mesma região (ou o menos carregado de todos), até cada um
+    chegar a `capacidade` ninhos. Retorna a divisão e os ninhos que sobraram.
+    """
+    atribuidos: Dict[str, List[int]] = {guardiao: [] for guardiao in guardioes}
+    orfaos = []
+    for i, ninho in enumerate(ninhos):
+        if ninho.guardiao in atribuidos:
+            atribuidos[ninho.guardiao].append(i)
+        else:
+            orfaos.append(i)
+
+    capacidade = len(ninhos) if capacidade is None else capacidade
+    carga = {guardiao: len(indices) for guardiao, indices in atribuidos.items()}
+    # Filas (carga, guardião) por região e geral; a carga só cresce, então
+    # entradas desatualizadas são corrigidas quando chegam ao topo
+    filas: Dict[Optional[str], List[Tuple[int, str]]] = {None: []}
+    for guardiao in guardioes:
+        filas[None].append((carga[guardiao], guardiao))
+        for regiao in {ninhos[i].regiao for i in atribuidos[guardiao]}:
+            filas.setdefault(regiao, []).append((carga[guardiao], guardiao))
+    for fila in filas.values():
+        heapq.heapify(fila)
+
+    def menos_carregado(fila: List[Tuple[int, str]]) -> Optional[str]:
+        while fila:
+            valor, guardiao = fila[0]
+            if valor != carga[guardiao]:
+                heapq.heapreplace(fila, (carga[guardiao], guardiao))
+            elif valor >= capacidade:
+                heapq.heappop(fila)
+            else:
+                return guardiao
+        return None
+
+    sobras = []
+    for i in sorted(orfaos, key=lambda i: -prioridades[i]):
+        regiao = ninhos[i].regiao
+        escolhido = menos_carregado(filas.get(regiao, [])) or menos_carregado(filas[None])
+        if escolhido is None:
+            sobras.append(i)
+            continue
+        atribuidos[escolhido].append(i)
+        carga[escolhido] += 1
+        if regiao not in filas:
+            filas[regiao] = []
+        heapq.heappush(filas[regiao], (carga[escolhido], escolhido))
+    return atribuidos, sobras
+
+
+# As distâncias são calculadas sob demanda a partir das posições, sem matriz
+# n × n: a memória fica linear no número de paradas.
+
+def _distancias(pontos: np.ndarray, origens, destinos) -> np.ndarray:
+    """Distâncias (km) entre pares de paradas, elemento a elemento."""
+    diferenca = pontos[destinos] - pontos[origens]
+    return np.hypot(diferenca[..., 0], diferenca[..., 1])
+
+
+def vizinho_mais_proximo(pontos: np.ndarray, inicio: int = 0) -> List[int]:
+    """Caminho aberto que sempre segue para o ponto não visitado mais próximo."""
+    # Pontos ainda não visitados; o escolhido troca de lugar com o último e sai
+    restantes = np.delete(np.arange(len(pontos)), inicio)
+    x, y = pontos[restantes, 0].copy(), pontos[restantes, 1].copy()
+    caminho = [inicio]
+    atual_x, atual_y = pontos[inicio]
+    for fim in range(len(restantes) - 1, -1, -1):
+        # O quadrado da distância basta para achar o mais próximo
+        k = int(np.argmin((x[:fim + 1] - atual_x) ** 2 + (y[:fim + 1] - atual_y) ** 2))
+        caminho.append(int(restantes[k]))
+        atual_x, atual_y = x[k], y[k]
+        restantes[k], x[k], y[k] = restantes[fim], x[fim], y[fim]
+    return caminho
+
+
+def varredura(pontos: np.ndarray, inicio: int = 0) -> List[int]:
+    """
+    Caminho aberto que percorre os pontos em faixas verticais, alternando o
+    sentido (ida e volta), começando pela faixa do ponto `inicio`.
+    """
+    total = len(pontos)
+    x, y = pontos[:, 0], pontos[:, 1]
+    faixas = max(int(np.sqrt(total / 2)), 1)
+    largura = (x.max() - x.min()) / faixas or 1.0
+    faixa = np.minimum(((x - x.min()) / largura).astype(np.int64), faixas - 1)
+    # Faixas a partir da do início; o sentido alterna a cada faixa
+    faixa = (faixa - faixa[inicio]) % faixas
+    sentido = np.where(faixa % 2 == 0, y, -y)
+    ordem = np.lexsort((sentido, faixa)).tolist()
+    ordem.remove(inicio)
+    return [inicio] + ordem
+
+
+def dois_opt(pontos: np.ndarray, caminho: List[int], prazo: float) -> List[int]:
+    """
+    Melhora um caminho aberto (com o primeiro ponto fixo) invertendo trechos
+    enquanto houver ganho e o relógio não passar do `prazo` (perf_counter).
+    Para cada início de trecho, os ganhos de todos os fins são calculados de
+    uma vez.
+    """
+    rota = np.array(caminho)
+    total = len(rota)
+    melhorou = True
+    while melhorou and time.perf_counter() < prazo:
+        melhorou = False
+        for i in range(1, total - 1):
+            if time.perf_counter() >= prazo:
+                break
+            anterior, primeiro = rota[i - 1], rota[i]
+            fins, seguintes = rota[i + 1:], rota[i + 2:]
+            # Ganho de inverter rota[i..j]: troca as arestas (i-1, i) e (j, j+1);
+            # o último fim não tem aresta seguinte
+            ganho = _distancias(pontos, anterior, primeiro) - _distancias(pontos, anterior, fins)
+            ganho[:-1] += (
+                _distancias(pontos, fins[:-1], seguintes) - _distancias(pontos, primeiro, seguintes)
+            )
+            melhor = int(np.argmax(ganho))
+            if ganho[melhor] > 1e-9:
+                j = i + 1 + melhor
+                rota[i:j + 1] = rota[i:j + 1][::-1]
+                melhorou = True
+    return rota.tolist()
+
+
+def _comprimento(pontos: np.ndarray, caminho: List[int]) -> float:
+    return float(_distancias(pontos, caminho[:-1], caminho[1:]).sum())
+
+
+def planejar_rota(
+    guardiao: str,
+    ninhos: List[Ninho],
+    prioridades: np.ndarray,
+    posicoes: List[Posicao],
+    prazo: float,
+    velocidade_kmh: float = VELOCIDADE_KMH,
+    minutos_por_ninho: float = MINUTOS_POR_NINHO,
+    minutos_turno: float = MINUTOS_TURNO,
+) -> Tuple[Rota, List[Ninho]]:
+    """
+    Ordena as paradas de um guardião e corta os ninhos menos prioritários que
+    não cabem no turno. Ninhos na mesma posição viram uma única parada.
+    Retorna a rota e os ninhos que ficaram de fora.
+    """
+    # Só as visitas em si já limitam quantos ninhos cabem no turno: os demais,
+    # menos prioritários, ficam de fora antes de montar a rota
+    por_prioridade = np.argsort(-prioridades, kind="stable").tolist()
+    if minutos_por_ninho > 0:
+        cabem = int(minutos_turno // minutos_por_ninho)
+        por_prioridade, excedentes = por_prioridade[:cabem], por_prioridade[cabem:]
+    else:
+        excedentes = []
+
+    paradas: Dict[Posicao, List[int]] = {}
+    for i in por_prioridade:
+        paradas.setdefault(posicoes[i], []).append(i)
+    pontos = list(paradas)
+    if not pontos:
+        return Rota(guardiao, [], 0.0, 0.0), [ninhos[i] for i in excedentes]
+
+    coordenadas = np.array(pontos, dtype=np.float64)
+    # Começa pela parada do ninho mais prioritário
+    if len(pontos) > LIMITE_VIZINHO:
+        caminho = varredura(coordenadas, inicio=0)
+    else:
+        caminho = vizinho_mais_proximo(coordenadas, inicio=0)
+    caminho = dois_opt(coordenadas, caminho, prazo)
+
+    # Corta do menos prioritário até a ronda caber no turno
+    ordem = [list(paradas[pontos[p]]) for p in caminho]
+    distancia = _comprimento(coordenadas, caminho)
+    visitas = sum(len(indices) for indices in ordem)
+    fora: List[int] = list(excedentes)
+    cortes = sorted(
+        ((prioridades[i], k) for k, indices in enumerate(ordem) for i in indices),
+        key=lambda item: item[0],
+    )
+    ativos = list(range(len(caminho)))
+    for _, k in cortes:
+        if distancia / velocidade_kmh * 60 + visitas * minutos_por_ninho <= minutos_turno:
+            break
+        fora.append(ordem[k].pop())
+        visitas -= 1
+        if not ordem[k]:
+            # Parada vazia sai da rota: liga a anterior direto à seguinte
+            posicao = ativos.index(k)
+            anterior = caminho[ativos[posicao - 1]] if posicao > 0 else None
+            seguinte = caminho[ativos[posicao + 1]] if posicao + 1 < len(ativos) else None
+            atual = caminho[k]
+            if anterior is not None:
+                distancia -= _distancias(coordenadas, anterior, atual)
+            if seguinte is not None:
+                distancia -= _distancias(coordenadas, atual, seguinte)
+            if anterior is not None and seguinte is not None:
+                distancia += _distancias(coordenadas, anterior, seguinte)
+            ativos.pop(posicao)
+
+    rota = [
+        Parada(ninhos[ordem[k][0]].regiao, pontos[caminho[k]], [ninhos[i] for i in ordem[k]])
+        for k in ativos
+    ]
+    minutos = distancia / velocidade_kmh * 60 + visitas * minutos_por_ninho
+    return Rota(guardiao, rota, float(distancia), float(minutos)), [ninhos[i] for i in fora]
+
+
+def planejar_patrulha(
+    ninhos: Sequence[Ninho],
+    guardioes: Optional[Sequence[str]] = None,
+    dias: int = DIAS_ECLOSAO_PADRAO,
+    criticos: bool = True,
+    pontuacoes: Optional[Dict[str, float]] = None,
+    coordenadas: Optional[Dict[str, Posicao]] = None,
+    velocidade_kmh: float = VELOCIDADE_KMH,
+    minutos_por_ninho: float = MINUTOS_POR_NINHO,
+    minutos_turno: float = MINUTOS_TURNO,
+    limite_calculo: float = LIMITE_CALCULO,
+) -> PlanoPatrulha:
+    """
+    Monta o plano de patrulha: ninhos que eclodem em até `dias` dias (e os da
+    faixa de risco calculada 🔴), divididos entre os `guardioes` disponíveis (padrão: os
+    responsáveis pelos ninhos escolhidos) e ordenados em uma rota por guardião.
+
+    `pontuacoes` (id -> pontuação de risco) define a prioridade; sem ela, a
+    pontuação é calculada na hora. `coordenadas` (id -> posição em km) é
+    opcional; ninhos sem posição ficam no centro da região. O 2-opt de todas
+    as rotas para em `limite_calculo` segundos, mantendo o que já melhorou.
+    """
+    inicio = time.perf_counter()
+    escolhidos = candidatos(ninhos, dias, criticos, pontuacoes)
+    if guardioes is None:
+        guardioes = sorted({n.guardiao for n in escolhidos})
+    if not escolhidos or not guardioes:
+        return PlanoPatrulha([], escolhidos, time.perf_counter() - inicio)
+
+    prioridades = _prioridades(escolhidos, pontuacoes)
+    coordenadas = coordenadas or {}
+    posicoes = [
+        coordenadas.get(n.id) or CENTROS_REGIOES.get(n.regiao, (0.0, 0.0)) for n in escolhidos
+    ]
+    # Nenhum guardião visita mais ninhos do que o turno comporta só em inspeções
+    capacidade = int(minutos_turno // minutos_por_ninho) if minutos_por_ninho > 0 else None
+    atribuidos, sobras = distribuir(escolhidos, prioridades, guardioes, capacidade)
+
+    prazo = inicio + limite_calculo
+    com_ninhos = [guardiao for guardiao in guardioes if atribuidos[guardiao]]
+    rotas, sem_cobertura = [], [escolhidos[i] for i in sobras]
+    for restantes, guardiao in zip(range(len(com_ninhos), 0, -1), com_ninhos):
+        indices = atribuidos[guardiao]
+        # O tempo de cálculo que sobra é dividido entre as rotas que faltam
+        agora = time.perf_counter()
+        rota, fora = planejar_rota(
+            guardiao,
+            [escolhidos[i] for i in indices],
+            prioridades[indices],
+            [posicoes[i] for i in indices],
+            agora + max(prazo - agora, 0.0) / restantes,
+            velocidade_kmh,
+            minutos_por_ninho,
+            minutos_turno,
+        )
+        rotas.append(rota)
+        sem_cobertura.extend(fora)
+    return PlanoPatrulha(rotas, sem_cobertura, time.perf_counter() - inicio)
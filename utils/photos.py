@@ -0,0 +1,284 @@
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from utils.metrics import REGISTRO, medir
+from utils.nest_store import NestStore
+
+try:
+    from PIL import Image, ImageOps
+
+    PILLOW_DISPONIVEL = True
+except ImportError:  # pragma: no cover - depende do ambiente
+    PILLOW_DISPONIVEL = False
+
+ESQUEMA_FOTOS = """
+CREATE TABLE IF NOT EXISTS fotos (
+    ninho_id TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    extensao TEXT NOT NULL,
+    tamanho INTEGER NOT NULL,
+    enviado_em TEXT NOT NULL,
+    estado TEXT NOT NULL DEFAULT 'pendente',
+    largura INTEGER,
+    altura INTEGER,
+    PRIMARY KEY (ninho_id, hash)
+);
+CREATE INDEX IF NOT EXISTS idx_fotos_hash ON fotos(hash);
+CREATE INDEX IF NOT EXISTS idx_fotos_estado ON fotos(estado);
+"""
+
+# Estados das versões reduzidas de uma foto
+PENDENTE, PRONTA, FALHOU = "pendente", "pronta", "falhou"
+
+# Fotos de celular passam fácil de 5 MB; acima disso, provavelmente não é uma foto
+MAX_BYTES_FOTO = 20 * 1024 * 1024
+MAX_FOTOS_POR_ENVIO = 6
+
+# Assinaturas aceitas: os primeiros bytes do arquivo decidem o tipo, não o nome
+ASSINATURAS = (
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+)
+
+# Versões reduzidas (lado maior em pixels, qualidade JPEG): a miniatura vai
+# nas listas, a prévia na visualização ampliada; o original só no download
+MINIATURA = ("miniatura", 320, 75)
+PREVIA = ("previa", 1280, 85)
+
+TRABALHADORES_MINIATURAS = min(2, os.cpu_count() or 1)
+
+TEMPO_MINIATURAS = REGISTRO.histograma(
+    "guardioes_miniatura_segundos", "Geração da miniatura e da prévia de uma foto"
+)
+
+
+class FotoInvalida(ValueError):
+    """Erro levantado quando o arquivo enviado não é uma foto aceita."""
+
+
+class Foto(NamedTuple):
+    ninho_id: str
+    hash: str
+    extensao: str
+    tamanho: int
+    enviado_em: str
+    estado: str
+
+    @property
+    def pronta(self) -> bool:
+        return self.estado == PRONTA
+
+
+def tipo_da_foto(conteudo: bytes) -> str:
+    """Extensão da foto a partir dos primeiros bytes; levanta FotoInvalida se não for aceita."""
+    if len(conteudo) > MAX_BYTES_FOTO:
+        raise FotoInvalida(f"Foto com mais de {MAX_BYTES_FOTO // (1024 * 1024)} MB")
+    for assinatura, extensao in ASSINATURAS:
+        if conteudo.startswith(assinatura):
+            return extensao
+    if conteudo[:4] == b"RIFF" and conteudo[8:12] == b"WEBP":
+        return "webp"
+    raise FotoInvalida("Formato não aceito: envie fotos JPEG, PNG ou WebP")
+
+
+def gerar_versoes(caminho_original: str, caminhos: Dict[str, str]) -> Tuple[int, int]:
+    """
+    Grava a miniatura e a prévia JPEG de uma foto (sem os metadados EXIF,
+    que trazem a localização do celular). Retorna (largura, altura) do original.
+    """
+    with Image.open(caminho_original) as imagem:
+        largura, altura = imagem.size
+        # JPEG: decodifica direto numa escala reduzida, bem mais rápido que a foto inteira
+        imagem.draft("RGB", (PREVIA[1], PREVIA[1]))
+        imagem = ImageOps.exif_transpose(imagem).convert("RGB")
+        if (imagem.width > imagem.height) != (largura > altura):
+            # Foto de celular em pé: a orientação do EXIF gira a imagem
+            largura, altura = altura, largura
+
+        # Da maior para a menor: cada redução parte da anterior
+        for nome, lado, qualidade in (PREVIA, MINIATURA):
+            imagem.thumbnail((lado, lado), Image.Resampling.LANCZOS)
+            saida = io.BytesIO()
+            imagem.save(saida, "JPEG", quality=qualidade, optimize=True, progressive=True)
+            _gravar(caminhos[nome], saida.getvalue())
+    return largura, altura
+
+
+def _gravar(caminho: str, conteudo: bytes):
+    """Grava em arquivo temporário e renomeia: leitores nunca veem arquivo pela metade."""
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporario, "wb") as arquivo:
+        arquivo.write(conteudo)
+    os.replace(temporario, caminho)
+
+
+class ArmazemFotos:
+    """
+    Fotos dos ninhos (danos, rastros de predadores), endereçadas pelo conteúdo.
+
+    O original é gravado uma vez em `<pasta>/<hash[:2]>/<hash>.<ext>`, ao lado
+    da miniatura e da prévia; o banco liga cada ninho aos hashes das suas
+    fotos. A mesma foto enviada de novo (ou anexada a outro ninho) não ocupa
+    espaço outra vez.
+    """
+
+    def __init__(self, store: NestStore, pasta: Optional[str] = None):
+        self.store = store
+        self.pasta = pasta or os.path.join(os.path.dirname(store.caminho) or ".", "fotos")
+        os.makedirs(self.pasta, exist_ok=True)
+        self.store.criar_esquema(ESQUEMA_FOTOS)
+
+    def caminho(self, hash_foto: str, extensao: str) -> str:
+        return os.path.join(self.pasta, hash_foto[:2], f"{hash_foto}.{extensao}")
+
+    def caminhos_versoes(self, hash_foto: str) -> Dict[str, str]:
+        return {nome: self.caminho(hash_foto, f"{nome}.jpg") for nome, _, _ in (MINIATURA, PREVIA)}
+
+    def guardar(self, ninho_id: str, conteudo: bytes) -> Foto:
+        """Grava a foto (se ainda não existir) e a anexa ao ninho."""
+        extensao = tipo_da_foto(conteudo)
+        hash_foto = hashlib.sha256(conteudo).hexdigest()
+        caminho = self.caminho(hash_foto, extensao)
+        if not os.path.exists(caminho):
+            _gravar(caminho, conteudo)
+
+        with self.store.transacao() as conexao:
+            # Uma foto já processada (de outro ninho) chega pronta
+            processada = conexao.execute(
+                "SELECT estado, largura, altura FROM fotos WHERE hash = ? LIMIT 1", (hash_foto,)
+            ).fetchone()
+            estado, largura, altura = processada or (PENDENTE, None, None)
+            foto = Foto(
+                ninho_id,
+                hash_foto,
+                extensao,
+                len(conteudo),
+                datetime.now().isoformat(timespec="seconds"),
+                estado,
+            )
+            conexao.execute(
+                "INSERT OR IGNORE INTO fotos "
+                "(ninho_id, hash, extensao, tamanho, enviado_em, estado, largura, altura) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (*foto, largura, altura),
+            )
+        return foto
+
+    def fotos_de(self, ninhos_ids: Iterable[str]) -> Dict[str, List[Foto]]:
+        """Fotos de vários ninhos (os de uma página) numa única consulta, por id do ninho."""
+        ninhos_ids = list(ninhos_ids)
+        if not ninhos_ids:
+            return {}
+        marcadores = ", ".join("?" * len(ninhos_ids))
+        linhas = self.store.consultar(
+            "SELECT ninho_id, hash, extensao, tamanho, enviado_em, estado FROM fotos "
+            f"WHERE ninho_id IN ({marcadores}) ORDER BY enviado_em, hash",
+            ninhos_ids,
+        )
+        fotos: Dict[str, List[Foto]] = {}
+        for linha in linhas:
+            fotos.setdefault(linha["ninho_id"], []).append(Foto(*linha))
+        return fotos
+
+    def ler(self, foto: Foto, versao: Optional[str] = None) -> Optional[bytes]:
+        """Bytes da miniatura, da prévia ou (sem `versao`) do original; None se não houver."""
+        if versao is None:
+            caminho = self.caminho(foto.hash, foto.extensao)
+        else:
+            caminho = self.caminhos_versoes(foto.hash)[versao]
+        try:
+            with open(caminho, "rb") as arquivo:
+                return arquivo.read()
+        except FileNotFoundError:
+            return None
+
+    def pendentes(self, limite: int = 100) -> List[Tuple[str, str]]:
+        """(hash, extensão) das fotos ainda sem miniatura."""
+        linhas = self.store.consultar(
+            "SELECT DISTINCT hash, extensao FROM fotos WHERE estado = ? LIMIT ?",
+            (PENDENTE, limite),
+        )
+        return [(linha["hash"], linha["extensao"]) for linha in linhas]
+
+    def contar_pendentes(self) -> int:
+        return self.store.consultar(
+            "SELECT COUNT(DISTINCT hash) FROM fotos WHERE estado = ?", (PENDENTE,)
+        )[0][0]
+
+    def processar(self, hash_foto: str, extensao: str) -> str:
+        """Gera a miniatura e a prévia de uma foto e registra o resultado. Retorna o estado."""
+        largura = altura = None
+        try:
+            with medir(TEMPO_MINIATURAS, "miniaturas"):
+                largura, altura = gerar_versoes(
+                    self.caminho(hash_foto, extensao), self.caminhos_versoes(hash_foto)
+                )
+            estado = PRONTA
+        except Exception:
+            # Arquivo corrompido ou truncado: não adianta tentar de novo a cada rodada
+            estado = FALHOU
+        with self.store.transacao() as conexao:
+            conexao.execute(
+                "UPDATE fotos SET estado = ?, largura = ?, altura = ? WHERE hash = ?",
+                (estado, largura, altura, hash_foto),
+            )
+        return estado
+
+
+class FilaMiniaturas:
+    """
+    Pool de threads que gera as miniaturas e prévias fora do caminho da
+    página. O Pillow libera o GIL ao decodificar e redimensionar, então as
+    threads rodam de fato em paralelo. Cada foto entra uma única vez na fila,
+    mesmo que várias sessões peçam a mesma miniatura.
+    """
+
+    def __init__(self, armazem: ArmazemFotos, trabalhadores: int = TRABALHADORES_MINIATURAS):
+        self.armazem = armazem
+        self._executor = ThreadPoolExecutor(
+            max_workers=trabalhadores, thread_name_prefix="miniaturas"
+        )
+        self._lock = threading.Lock()
+        self._em_andamento: Dict[str, Future] = {}
+
+    def enviar(self, hash_foto: str, extensao: str) -> Optional[Future]:
+        """Enfileira uma foto, se ainda não estiver na fila. Sem o Pillow, não faz nada."""
+        if not PILLOW_DISPONIVEL:
+            return None
+        with self._lock:
+            futuro = self._em_andamento.get(hash_foto)
+            if futuro is not None:
+                return futuro
+            futuro = self._executor.submit(self.armazem.processar, hash_foto, extensao)
+            self._em_andamento[hash_foto] = futuro
+        # Fora do lock: se a foto já terminou, o callback roda aqui mesmo e pega o lock
+        futuro.add_done_callback(lambda _: self._concluir(hash_foto))
+        return futuro
+
+    def _concluir(self, hash_foto: str):
+        with self._lock:
+            self._em_andamento.pop(hash_foto, None)
+
+    def em_andamento(self) -> Set[str]:
+        with self._lock:
+            return set(self._em_andamento)
+
+    def enviar_pendentes(self, limite: int = 100) -> List[Future]:
+        """Enfileira as fotos que ainda estão sem miniatura (ex.: enviadas antes de um reinício)."""
+        futuros = (self.enviar(hash_foto, extensao)
+                   for hash_foto, extensao in self.armazem.pendentes(limite))
+        return [futuro for futuro in futuros if futuro is not None]
+
+    def aguardar(self, futuros: Iterable[Future]) -> List[str]:
+        """Espera as fotos enfileiradas terminarem; retorna os estados finais."""
+        concluidos, _ = wait(list(futuros))
+        return [futuro.result() for futuro in concluidos]
+
+    def encerrar(self):
+        self._executor.shutdown(wait=True)
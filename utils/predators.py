@@ -0,0 +1,427 @@
+import csv
+import sys
+from collections import Counter
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from utils.nest import (
+    Ninho, NinhoInvalido, Particao, REGIOES, ORGANIZACAO_PADRAO, PROJETO_PADRAO, PARTICAO_PADRAO
+)
+from utils.nest_store import NestStore, filtro_particao
+
+# Espécies oferecidas pelo formulário; a importação aceita outros nomes
+ESPECIES = (
+    "Caranguejo-fantasma",
+    "Raposa",
+    "Cão doméstico",
+    "Gato doméstico",
+    "Urubu",
+    "Gaivota",
+    "Teiú",
+    "Formigas",
+    "Outro",
+)
+MAX_TAMANHO_ESPECIE = 60
+
+# Colunas do CSV de importação (latitude e longitude são opcionais)
+COLUNAS_CSV = ("especie", "regiao", "momento", "latitude", "longitude")
+
+# Janela padrão das correlações entre avistamentos e ninhos
+DIAS_PADRAO = 30
+
+# Cada organização e projeto vê só os próprios avistamentos, como os ninhos
+TABELAS_AVISTAMENTOS = """
+CREATE TABLE IF NOT EXISTS avistamentos_predadores (
+    id INTEGER PRIMARY KEY,
+    especie TEXT NOT NULL,
+    regiao TEXT NOT NULL,
+    momento TEXT NOT NULL,
+    latitude REAL,
+    longitude REAL,
+    organizacao TEXT NOT NULL DEFAULT 'padrao',
+    projeto TEXT NOT NULL DEFAULT 'padrao'
+);
+CREATE TABLE IF NOT EXISTS avistamentos_diarios (
+    organizacao TEXT NOT NULL,
+    projeto TEXT NOT NULL,
+    dia TEXT NOT NULL,
+    regiao TEXT NOT NULL,
+    especie TEXT NOT NULL,
+    quantidade INTEGER NOT NULL,
+    PRIMARY KEY (organizacao, projeto, dia, regiao, especie)
+);
+"""
+
+# Índices criados depois da migração de bancos anteriores às partições
+INDICES_AVISTAMENTOS = """
+CREATE INDEX IF NOT EXISTS idx_avistamentos_particao_regiao_momento
+    ON avistamentos_predadores(organizacao, projeto, regiao, momento);
+DROP INDEX IF EXISTS idx_avistamentos_regiao_momento;
+"""
+
+# Avistamentos gravados por transação na importação em lote
+TAMANHO_LOTE = 50_000
+# Linhas rejeitadas descritas no relatório da importação (as demais só são contadas)
+MAX_ERROS_LISTADOS = 100
+
+
+class AvistamentoInvalido(ValueError):
+    """Erro levantado quando os dados de um avistamento não passam na validação."""
+
+
+def _coordenada(nome: str, valor: Any, limite: float) -> Optional[float]:
+    if valor is None or valor == "":
+        return None
+    try:
+        valor = float(valor)
+    except (TypeError, ValueError):
+        raise AvistamentoInvalido(f"'{nome}' deve ser um número (recebido {valor!r})") from None
+    if not -limite <= valor <= limite:
+        raise AvistamentoInvalido(f"'{nome}' deve estar entre {-limite} e {limite}")
+    return valor
+
+
+class Avistamento:
+    """
+    Avistamento de um predador: espécie, região, momento e, opcionalmente,
+    coordenadas. Validado na criação, como o Ninho.
+    """
+
+    __slots__ = (
+        "id", "especie", "regiao", "momento", "latitude", "longitude", "organizacao", "projeto"
+    )
+
+    def __init__(
+        self,
+        especie: str,
+        regiao: str,
+        momento: Any,
+        latitude: Any = None,
+        longitude: Any = None,
+        id: Optional[int] = None,
+        organizacao: str = ORGANIZACAO_PADRAO,
+        projeto: str = PROJETO_PADRAO,
+    ):
+        if not isinstance(especie, str) or not especie.strip():
+            raise AvistamentoInvalido("O avistamento precisa da espécie do predador")
+        if len(especie.strip()) > MAX_TAMANHO_ESPECIE:
+            raise AvistamentoInvalido(
+                f"Nome da espécie com mais de {MAX_TAMANHO_ESPECIE} caracteres"
+            )
+        if regiao not in REGIOES:
+            raise AvistamentoInvalido(f"Região desconhecida: {regiao!r}")
+        if isinstance(momento, str):
+            try:
+                momento = datetime.fromisoformat(momento.strip())
+            except ValueError:
+                raise AvistamentoInvalido(f"Momento inválido: {momento!r}") from None
+        elif isinstance(momento, date) and not isinstance(momento, datetime):
+            momento = datetime(momento.year, momento.month, momento.day)
+        if not isinstance(momento, datetime):
+            raise AvistamentoInvalido(f"Momento inválido: {momento!r}")
+        if momento.date() > date.today():
+            raise AvistamentoInvalido("O momento do avistamento não pode estar no futuro")
+
+        self.id = id
+        self.especie = sys.intern(especie.strip())
+        self.regiao = sys.intern(regiao)
+        # Horário local, sem fuso e sem frações de segundo
+        self.momento = momento.replace(tzinfo=None, microsecond=0)
+        self.latitude = _coordenada("latitude", latitude, 90.0)
+        self.longitude = _coordenada("longitude", longitude, 180.0)
+        if (self.latitude is None) != (self.longitude is None):
+            raise AvistamentoInvalido("Informe latitude e longitude juntas (ou nenhuma)")
+        try:
+            self.organizacao, self.projeto = Particao.validar(organizacao, projeto)
+        except NinhoInvalido as erro:
+            raise AvistamentoInvalido(str(erro)) from None
+
+    @classmethod
+    def confiavel(
+        cls,
+        id: int,
+        especie: str,
+        regiao: str,
+        momento: datetime,
+        latitude: Optional[float],
+        longitude: Optional[float],
+        organizacao: str = ORGANIZACAO_PADRAO,
+        projeto: str = PROJETO_PADRAO,
+    ) -> "Avistamento":
+        """Cria um avistamento sem validar, para dados já validados na escrita (leitura do banco)."""
+        avistamento = cls.__new__(cls)
+        avistamento.id = id
+        avistamento.especie = especie
+        avistamento.regiao = regiao
+        avistamento.momento = momento
+        avistamento.latitude = latitude
+        avistamento.longitude = longitude
+        avistamento.organizacao = organizacao
+        avistamento.projeto = projeto
+        return avistamento
+
+    @property
+    def particao(self) -> Particao:
+        return Particao(self.organizacao, self.projeto)
+
+    def __repr__(self) -> str:
+        return (
+            f"Avistamento(especie={self.especie!r}, regiao={self.regiao!r}, "
+            f"momento={self.momento.isoformat()!r})"
+        )
+
+
+class RelatorioImportacao:
+    """
+    Andamento de uma importação: os avistamentos já gravados (lotes
+    confirmados, mesmo que a leitura falhe depois) e as linhas rejeitadas,
+    com a descrição das primeiras.
+    """
+
+    __slots__ = ("importados", "rejeitadas", "erros")
+
+    def __init__(self):
+        self.importados = 0
+        self.rejeitadas = 0
+        self.erros: List[str] = []
+
+    def rejeitar(self, numero: int, erro: Exception):
+        self.rejeitadas += 1
+        if len(self.erros) < MAX_ERROS_LISTADOS:
+            self.erros.append(f"Linha {numero}: {erro}")
+
+
+def ler_csv(
+    arquivo: TextIO, relatorio: RelatorioImportacao, particao: Particao = PARTICAO_PADRAO
+) -> Iterator[Avistamento]:
+    """
+    Lê avistamentos de um CSV com as colunas de COLUNAS_CSV, um de cada vez,
+    todos da partição dada. Linhas inválidas são puladas e registradas no relatório.
+    """
+    leitor = csv.DictReader(arquivo)
+    faltando = [coluna for coluna in COLUNAS_CSV[:3] if coluna not in (leitor.fieldnames or ())]
+    if faltando:
+        raise AvistamentoInvalido(f"Colunas obrigatórias ausentes no CSV: {', '.join(faltando)}")
+    for numero, linha in enumerate(leitor, start=2):
+        try:
+            yield Avistamento(
+                especie=linha["especie"] or "",
+                regiao=(linha["regiao"] or "").strip(),
+                momento=linha["momento"] or "",
+                latitude=linha.get("latitude"),
+                longitude=linha.get("longitude"),
+                organizacao=particao.organizacao,
+                projeto=particao.projeto,
+            )
+        except AvistamentoInvalido as erro:
+            relatorio.rejeitar(numero, erro)
+
+
+def _valores_linha(avistamento: Avistamento) -> tuple:
+    return (
+        avistamento.especie,
+        avistamento.regiao,
+        avistamento.momento.isoformat(),
+        avistamento.latitude,
+        avistamento.longitude,
+        avistamento.organizacao,
+        avistamento.projeto,
+    )
+
+
+def _chave_diaria(avistamento: Avistamento) -> tuple:
+    """Partição, dia, região e espécie: a chave das contagens diárias."""
+    return (
+        avistamento.organizacao,
+        avistamento.projeto,
+        avistamento.momento.date().isoformat(),
+        avistamento.regiao,
+        avistamento.especie,
+    )
+
+
+_SQL_GRAVAR_AVISTAMENTO = (
+    "INSERT INTO avistamentos_predadores "
+    "(especie, regiao, momento, latitude, longitude, organizacao, projeto) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+class RegistroPredadores:
+    """
+    Registro de avistamentos de predadores no mesmo banco dos ninhos.
+
+    Os avistamentos ficam numa tabela própria, indexada por região e momento,
+    e uma tabela de contagens diárias por região e espécie é mantida na mesma
+    transação de cada escrita. As correlações com os ninhos leem só as
+    contagens diárias da janela pedida, então continuam rápidas com milhões
+    de avistamentos.
+
+    Os ninhos não têm coordenadas: "perto de um ninho" significa na mesma
+    região (e na mesma organização e projeto) do ninho.
+    """
+
+    def __init__(self, store: NestStore):
+        self.store = store
+        self.store.criar_esquema(TABELAS_AVISTAMENTOS)
+        self._migrar_particoes()
+        self.store.criar_esquema(INDICES_AVISTAMENTOS)
+        if self._agregados_ausentes():
+            self.verificar_agregados()
+
+    def _migrar_particoes(self):
+        """
+        Bancos anteriores às partições: os avistamentos vão para a partição
+        padrão e as contagens diárias são recriadas (reconstruídas em seguida).
+        """
+        colunas = [
+            linha["name"]
+            for linha in self.store.consultar("PRAGMA table_info(avistamentos_predadores)")
+        ]
+        if "organizacao" in colunas:
+            return
+        with self.store.transacao() as conexao:
+            padroes = {"organizacao": ORGANIZACAO_PADRAO, "projeto": PROJETO_PADRAO}
+            for coluna, padrao in padroes.items():
+                conexao.execute(
+                    f"ALTER TABLE avistamentos_predadores "
+                    f"ADD COLUMN {coluna} TEXT NOT NULL DEFAULT '{padrao}'"
+                )
+            conexao.execute("DROP TABLE IF EXISTS avistamentos_diarios")
+        self.store.criar_esquema(TABELAS_AVISTAMENTOS)
+
+    def registrar(self, avistamento: Avistamento) -> int:
+        """Grava um avistamento e retorna o id dele."""
+        with self.store.transacao() as conexao:
+            cursor = conexao.execute(_SQL_GRAVAR_AVISTAMENTO, _valores_linha(avistamento))
+            self._somar_diarios(conexao, Counter([_chave_diaria(avistamento)]))
+        return cursor.lastrowid
+
+    def importar(
+        self,
+        avistamentos: Iterable[Avistamento],
+        lote: int = TAMANHO_LOTE,
+        relatorio: Optional[RelatorioImportacao] = None,
+    ) -> int:
+        """
+        Grava avistamentos em lote, `lote` por transação, e retorna quantos
+        foram gravados. As contagens diárias de cada lote são somadas antes
+        de gravar, com um UPSERT por dia, região e espécie.
+
+        Cada lote é confirmado ao ser gravado: se a leitura falhar no meio do
+        arquivo, os lotes anteriores continuam gravados e `relatorio.importados`
+        diz quantos avistamentos são.
+        """
+        total = 0
+        avistamentos = iter(avistamentos)
+        while True:
+            bloco = list(islice(avistamentos, lote))
+            if not bloco:
+                return total
+            with self.store.transacao() as conexao:
+                conexao.executemany(_SQL_GRAVAR_AVISTAMENTO, map(_valores_linha, bloco))
+                self._somar_diarios(conexao, Counter(map(_chave_diaria, bloco)))
+            total += len(bloco)
+            if relatorio is not None:
+                relatorio.importados = total
+
+    @staticmethod
+    def _somar_diarios(conexao, contagens: Counter):
+        conexao.executemany(
+            "INSERT INTO avistamentos_diarios "
+            "(organizacao, projeto, dia, regiao, especie, quantidade) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(organizacao, projeto, dia, regiao, especie) DO UPDATE SET "
+            "quantidade = quantidade + excluded.quantidade",
+            ((*chave, quantidade) for chave, quantidade in contagens.items()),
+        )
+
+    def _agregados_ausentes(self) -> bool:
+        """Há avistamentos sem nenhuma contagem diária (banco anterior às contagens)?"""
+        return self.store.consultar(
+            "SELECT EXISTS (SELECT 1 FROM avistamentos_predadores) "
+            "AND NOT EXISTS (SELECT 1 FROM avistamentos_diarios)"
+        )[0][0] == 1
+
+    def verificar_agregados(self):
+        """
+        Reconstrói as contagens diárias quando estão fora de sincronia. Conta
+        todos os avistamentos numa transação de escrita: é feito pelo worker
+        ao iniciar, não a cada abertura do registro.
+        """
+        with self.store.transacao() as conexao:
+            total = conexao.execute("SELECT COUNT(*) FROM avistamentos_predadores").fetchone()[0]
+            agregado = conexao.execute(
+                "SELECT COALESCE(SUM(quantidade), 0) FROM avistamentos_diarios"
+            ).fetchone()[0]
+            if total == agregado:
+                return
+            conexao.execute("DELETE FROM avistamentos_diarios")
+            conexao.execute(
+                "INSERT INTO avistamentos_diarios "
+                "(organizacao, projeto, dia, regiao, especie, quantidade) "
+                "SELECT organizacao, projeto, substr(momento, 1, 10), regiao, especie, COUNT(*) "
+                "FROM avistamentos_predadores GROUP BY 1, 2, 3, 4, 5"
+            )
+
+    def contar(self, particao: Optional[Particao] = None) -> int:
+        """Número total de avistamentos registrados (na partição, se informada)."""
+        filtro, parametros = filtro_particao(particao)
+        return self.store.consultar(
+            f"SELECT COALESCE(SUM(quantidade), 0) FROM avistamentos_diarios WHERE {filtro}",
+            parametros,
+        )[0][0]
+
+    def contagens(
+        self,
+        dias: int = DIAS_PADRAO,
+        hoje: Optional[date] = None,
+        particao: Optional[Particao] = None,
+    ) -> List[Dict[str, Any]]:
+        """Avistamentos por região e espécie nos últimos `dias` dias (incluindo hoje)."""
+        inicio = (hoje or date.today()) - timedelta(days=dias - 1)
+        filtro, parametros = filtro_particao(particao)
+        linhas = self.store.consultar(
+            "SELECT regiao, especie, SUM(quantidade) AS avistamentos "
+            f"FROM avistamentos_diarios WHERE {filtro} AND dia >= ? "
+            "GROUP BY regiao, especie ORDER BY regiao, especie",
+            (*parametros, inicio.isoformat()),
+        )
+        return [dict(linha) for linha in linhas]
+
+    def recentes(
+        self,
+        regiao: str,
+        dias: int = DIAS_PADRAO,
+        limite: int = 50,
+        hoje: Optional[date] = None,
+        particao: Optional[Particao] = None,
+    ) -> List[Avistamento]:
+        """Avistamentos mais recentes da região nos últimos `dias` dias (usa o índice)."""
+        inicio = (hoje or date.today()) - timedelta(days=dias - 1)
+        filtro, parametros = filtro_particao(particao)
+        linhas = self.store.consultar(
+            f"SELECT * FROM avistamentos_predadores WHERE {filtro} AND regiao = ? "
+            "AND momento >= ? ORDER BY momento DESC LIMIT ?",
+            (*parametros, regiao, inicio.isoformat(), limite),
+        )
+        return [
+            Avistamento.confiavel(
+                linha["id"],
+                linha["especie"],
+                linha["regiao"],
+                datetime.fromisoformat(linha["momento"]),
+                linha["latitude"],
+                linha["longitude"],
+                linha["organizacao"],
+                linha["projeto"],
+            )
+            for linha in linhas
+        ]
+
+    def perto_do_ninho(
+        self, ninho: Ninho, dias: int = DIAS_PADRAO, limite: int = 50
+    ) -> List[Avistamento]:
+        """Avistamentos recentes perto do ninho (na mesma região, organização e projeto)."""
+        return self.recentes(ninho.regiao, dias, limite, particao=ninho.particao)
+
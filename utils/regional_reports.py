@@ -0,0 +1,103 @@
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.artifacts import ArmazemArtefatos, gerar_relatorios
+from utils.cube import CuboNinhos
+from utils.executive_report import guardar_relatorios_executivos
+from utils.metrics import RELATORIOS, cronometrado
+from utils.nest import Particao, PARTICAO_PADRAO
+from utils.nest_store import NestStore
+
+# Chamado a cada região concluída: (concluídas, total, região)
+Progresso = Callable[[int, int, str], None]
+
+
+def criar_executor(processos: Optional[int] = None) -> Optional[ProcessPoolExecutor]:
+    """
+    Pool de processos para os relatórios regionais, a ser mantido por quem
+    gera relatórios repetidamente (o worker), ou None com um único núcleo,
+    quando o pool só somaria a partida dos processos ao tempo serial.
+    """
+    processos = processos or os.cpu_count() or 1
+    if processos <= 1:
+        return None
+    # "spawn": o processo pai (Streamlit, worker) tem threads e não deve ser copiado com fork
+    return ProcessPoolExecutor(
+        max_workers=processos, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def gerar_relatorio_regional(
+    caminho_db: str, pasta_artefatos: str, regiao: str, particao: Particao = PARTICAO_PADRAO
+) -> Tuple[str, int, List[str]]:
+    """
+    Gera todos os relatórios de uma região da partição. Roda num processo
+    separado: abre a própria conexão com o banco e lê apenas os ninhos da região.
+    Retorna (região, versão dos dados lida, tipos gerados).
+    """
+    store = NestStore(caminho_db)
+    try:
+        versao, ninhos = store.particao_regiao(regiao, particao)
+        cubo = CuboNinhos.de_ninhos(ninhos)
+        armazem = ArmazemArtefatos(store, pasta_artefatos)
+
+        gerados = gerar_relatorios(armazem, versao, ninhos, cubo, regiao, particao)
+        gerados += guardar_relatorios_executivos(
+            armazem, versao, ninhos, cubo, [regiao], particao
+        )
+        return regiao, versao, gerados
+    finally:
+        store.fechar()
+
+
+@cronometrado(RELATORIOS, relatorio="regionais")
+def gerar_relatorios_regionais(
+    armazem: ArmazemArtefatos,
+    regioes: Optional[List[str]] = None,
+    processos: Optional[int] = None,
+    progresso: Optional[Progresso] = None,
+    particao: Particao = PARTICAO_PADRAO,
+    executor: Optional[Executor] = None,
+) -> Dict[str, List[str]]:
+    """
+    Gera os relatórios de cada região da partição, uma tarefa por região.
+    Retorna os tipos gerados por região.
+
+    Com `executor` (o pool de `criar_executor`), as regiões são distribuídas
+    entre os processos dele. Sem executor, um pool é aberto só para esta
+    chamada, se houver mais de um núcleo e mais de uma região; senão as
+    regiões são geradas em sequência, neste processo. Cada processo novo
+    importa Plotly e pandas antes da primeira região, então um pool por
+    chamada só compensa com várias regiões pesadas.
+    """
+    regioes = regioes if regioes is not None else armazem.store.regioes(particao)
+    if not regioes:
+        return {}
+    argumentos = [(armazem.store.caminho, armazem.pasta, regiao, particao) for regiao in regioes]
+
+    resultados = {}
+
+    def concluir(concluidas, resultado):
+        regiao, _, gerados = resultado
+        resultados[regiao] = gerados
+        if progresso is not None:
+            progresso(concluidas, len(regioes), regiao)
+
+    proprio = None
+    if executor is None:
+        executor = proprio = criar_executor(min(len(regioes), processos or os.cpu_count() or 1))
+    if executor is None:
+        for concluidas, args in enumerate(argumentos, 1):
+            concluir(concluidas, gerar_relatorio_regional(*args))
+        return resultados
+
+    try:
+        futuros = [executor.submit(gerar_relatorio_regional, *args) for args in argumentos]
+        for concluidas, futuro in enumerate(as_completed(futuros), 1):
+            concluir(concluidas, futuro.result())
+    finally:
+        if proprio is not None:
+            proprio.shutdown()
+    return resultados
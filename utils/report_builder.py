@@ -0,0 +1,78 @@
+import io
+from datetime import datetime
+from typing import List, Optional
+
+import pandas as pd
+
+from utils.cube import CuboNinhos
+from utils.nest import Ninho
+from utils.statistics import *
+
+# Montagem dos relatórios exportados, sem dependência do Streamlit, para que
+# possam ser gerados tanto na página quanto pelo worker em segundo plano.
+
+
+def montar_relatorio_resumido(
+    cubo: CuboNinhos, gerado_em: Optional[datetime] = None, regiao: Optional[str] = None
+) -> str:
+    """Monta o relatório resumido em Markdown a partir do cubo de contagens."""
+    gerado_em = gerado_em or datetime.now()
+    titulo = f" - {regiao}" if regiao else ""
+
+    total_nests = contar_total_ninhos(cubo)
+    total_eggs = get_total_ovos(cubo)
+    avg_eggs = total_eggs / total_nests if total_nests > 0 else 0
+    hatching_soon = ninhos_prestes_a_eclodir(cubo)
+    region_risk, risk_count = regiao_com_mais_ninhos_sob_risco(cubo)
+    predator_damage = ninhos_com_predadores_e_danificados(cubo)
+
+    summary = f"""
+# 🐢 Relatório Resumido - Guardiões das Tartaruguinhas{titulo}
+**Data:** {gerado_em.strftime('%d/%m/%Y %H:%M')}
+
+## 📊 Estatísticas Gerais
+- **Total de Ninhos:** {total_nests}
+- **Total de Ovos:** {total_eggs:,}
+- **Média de Ovos por Ninho:** {avg_eggs:.1f}
+
+## 🚨 Alertas Importantes
+- **Ninhos com Eclosão ≤ 5 dias:** {hatching_soon}
+- **Região com Mais Risco:** {region_risk} ({risk_count} ninhos)
+- **Ninhos com Predadores e Danificados:** {predator_damage}
+
+## 📈 Distribuição por Status
+"""
+
+    status_counts = contar_ninhos_por_status(cubo)
+    for status, count in status_counts.items():
+        summary += f"- **{status.title()}:** {count}\n"
+
+    summary += "\n## 🏖️ Distribuição por Região\n"
+    region_counts = contar_ninhos_por_regiao(cubo)
+    for region, count in region_counts.items():
+        summary += f"- **{region}:** {count}\n"
+
+    return summary
+
+
+def montar_tabela(ninhos: List[Ninho]) -> pd.DataFrame:
+    """DataFrame com todos os campos dos ninhos, usado nas exportações."""
+    return pd.DataFrame([ninho.para_dict() for ninho in ninhos])
+
+
+def montar_csv(ninhos: List[Ninho]) -> str:
+    """Monta o relatório CSV com todos os ninhos."""
+    return montar_tabela(ninhos).to_csv(index=False)
+
+
+def montar_parquet(ninhos: List[Ninho]) -> Optional[bytes]:
+    """
+    Monta o relatório em Parquet. Retorna None se nenhum motor Parquet
+    (pyarrow ou fastparquet) estiver instalado.
+    """
+    buffer = io.BytesIO()
+    try:
+        montar_tabela(ninhos).to_parquet(buffer, index=False)
+    except ImportError:
+        return None
+    return buffer.getvalue()
@@ -0,0 +1,244 @@
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.nest import Ninho, Particao, RISCOS
+from utils.nest_store import NestStore, filtro_particao
+
+# Pontuação de risco (0 a 100) calculada a partir dos fatores observados.
+# Pesos por código de status (intacto, ameacado, danificado)
+PESO_STATUS = np.array([0.0, 30.0, 55.0])
+PESO_PREDADORES = 20.0
+# Avaliação informada pelo guardião no cadastro (🟢, 🟡, 🔴)
+PESO_RISCO_INFORMADO = np.array([0.0, 10.0, 20.0])
+# Eclosão iminente (≤2 dias) e próxima (≤5 dias)
+DIAS_ECLOSAO_IMINENTE, DIAS_ECLOSAO_PROXIMA = 2, 5
+PESO_ECLOSAO_IMINENTE, PESO_ECLOSAO_PROXIMA = 15.0, 8.0
+# Histórico: a pontuação sobe na hora, mas desce aos poucos (peso da pontuação anterior)
+PESO_HISTORICO = 0.5
+
+# Limites das faixas: abaixo de 30 🟢, abaixo de 65 🟡, a partir de 65 🔴
+LIMITES_FAIXA = np.array([30.0, 65.0])
+
+# Mensagens de avaliação, uma por bit da máscara, na ordem de exibição
+AVALIACOES = (
+    ("critical", "⚠️ **ATENÇÃO CRÍTICA NECESSÁRIA** - Este ninho requer intervenção imediata!"),
+    ("warning", "⚠️ **Monitoramento Frequente** - Este ninho necessita acompanhamento regular."),
+    ("success", "✅ **Situação Estável** - Continue o monitoramento de rotina."),
+    ("critical", "🐣 **ECLOSÃO IMINENTE** - Prepare-se para a eclosão nas próximas 48 horas!"),
+    ("warning", "🐣 **Eclosão Próxima** - Aumentar frequência de monitoramento."),
+    ("critical", "🦅 **ALTA PRIORIDADE** - Ninho com predadores e danos necessita proteção urgente!"),
+)
+BIT_CRITICO, BIT_MONITORAR, BIT_ESTAVEL, BIT_IMINENTE, BIT_PROXIMA, BIT_PREDADORES = (
+    1 << i for i in range(len(AVALIACOES))
+)
+
+# Mensagens já resolvidas para cada máscara possível: exibir não exige nenhuma decisão
+MENSAGENS_POR_MASCARA = tuple(
+    tuple(avaliacao for bit, avaliacao in enumerate(AVALIACOES) if mascara >> bit & 1)
+    for mascara in range(1 << len(AVALIACOES))
+)
+
+ESQUEMA_RISCO = """
+CREATE TABLE IF NOT EXISTS risco_cursor (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    versao INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS avaliacoes_risco (
+    ninho_id TEXT PRIMARY KEY,
+    pontuacao REAL NOT NULL,
+    faixa INTEGER NOT NULL,
+    mascara INTEGER NOT NULL,
+    versao INTEGER NOT NULL
+);
+"""
+
+_TAMANHO_LOTE_IN = 500
+
+
+class Avaliacao(NamedTuple):
+    """Avaliação de risco pré-calculada de um ninho."""
+
+    pontuacao: float
+    faixa: int
+    mascara: int
+
+    @property
+    def risco(self) -> str:
+        """Faixa de risco calculada (🟢, 🟡 ou 🔴)."""
+        return RISCOS[self.faixa]
+
+    @property
+    def mensagens(self) -> Tuple[Tuple[str, str], ...]:
+        """Mensagens de avaliação (tipo, texto) na ordem de exibição."""
+        return MENSAGENS_POR_MASCARA[self.mascara]
+
+
+def avaliar(
+    codigo_status: np.ndarray,
+    predadores: np.ndarray,
+    dias_para_eclosao: np.ndarray,
+    codigo_risco: np.ndarray,
+    anterior: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Calcula, para todos os ninhos de uma vez, a pontuação, a faixa (código de
+    RISCOS) e a máscara de mensagens de avaliação.
+    `anterior` traz a pontuação anterior de cada ninho (NaN se não houver).
+    """
+    iminente = dias_para_eclosao <= DIAS_ECLOSAO_IMINENTE
+    proxima = ~iminente & (dias_para_eclosao <= DIAS_ECLOSAO_PROXIMA)
+
+    pontuacao = (
+        PESO_STATUS[codigo_status]
+        + PESO_PREDADORES * predadores
+        + PESO_RISCO_INFORMADO[codigo_risco]
+        + PESO_ECLOSAO_IMINENTE * iminente
+        + PESO_ECLOSAO_PROXIMA * proxima
+    )
+    if anterior is not None:
+        suavizada = PESO_HISTORICO * anterior + (1 - PESO_HISTORICO) * pontuacao
+        pontuacao = np.where(np.isnan(anterior), pontuacao, np.maximum(pontuacao, suavizada))
+    pontuacao = np.clip(pontuacao, 0.0, 100.0)
+
+    faixa = faixa_da_pontuacao(pontuacao)
+    # Faixa 0/1/2 -> bit estável/monitorar/crítico
+    mascara = np.array([BIT_ESTAVEL, BIT_MONITORAR, BIT_CRITICO])[faixa]
+    mascara |= np.where(iminente, BIT_IMINENTE, 0)
+    mascara |= np.where(proxima, BIT_PROXIMA, 0)
+    mascara |= np.where(predadores & (codigo_status == 2), BIT_PREDADORES, 0)
+    return pontuacao, faixa, mascara
+
+
+def faixa_da_pontuacao(pontuacao: np.ndarray) -> np.ndarray:
+    """Código da faixa (em RISCOS) de cada pontuação."""
+    return np.searchsorted(LIMITES_FAIXA, pontuacao, side="right")
+
+
+def avaliar_ninhos(
+    ninhos: Sequence[Ninho], anterior: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """`avaliar` sobre uma lista de ninhos."""
+    quantidade = len(ninhos)
+    return avaliar(
+        np.fromiter((n.codigo_status for n in ninhos), np.int64, quantidade),
+        np.fromiter((n.predadores for n in ninhos), bool, quantidade),
+        np.fromiter((n.dias_para_eclosao for n in ninhos), np.int64, quantidade),
+        np.fromiter((n.codigo_risco for n in ninhos), np.int64, quantidade),
+        anterior,
+    )
+
+
+def avaliacao_do_ninho(ninho: Ninho, avaliacoes: Dict[str, Avaliacao]) -> Avaliacao:
+    """
+    Avaliação pré-calculada do ninho ou, se ainda não houver (ninho gravado
+    agora há pouco), a calculada na hora, sem a pontuação anterior.
+    """
+    avaliacao = avaliacoes.get(ninho.id)
+    if avaliacao is None:
+        pontuacao, faixa, mascara = avaliar_ninhos([ninho])
+        avaliacao = Avaliacao(round(float(pontuacao[0]), 1), int(faixa[0]), int(mascara[0]))
+    return avaliacao
+
+
+class MotorRisco:
+    """
+    Mantém as avaliações de risco de todos os ninhos na tabela `avaliacoes_risco`.
+
+    Como o motor de alertas, processa só os ninhos alterados desde o último
+    cursor, calculando o lote inteiro de forma vetorizada. As telas leem as
+    avaliações prontas.
+    """
+
+    def __init__(self, store: NestStore):
+        self.store = store
+        self.store.criar_esquema(ESQUEMA_RISCO)
+        with self.store.transacao() as conexao:
+            conexao.execute("INSERT OR IGNORE INTO risco_cursor (id, versao) VALUES (1, 0)")
+
+    def cursor(self) -> int:
+        """Versão do armazenamento até a qual as avaliações estão calculadas."""
+        return self.store.consultar("SELECT versao FROM risco_cursor WHERE id = 1")[0][0]
+
+    def atualizar(self, limite: int = 5000) -> int:
+        """Recalcula as avaliações dos ninhos alterados. Retorna quantos foram avaliados."""
+        total = 0
+        while True:
+            cursor = self.cursor()
+            ninhos, nova_versao = self.store.alterados_desde(cursor, limite)
+            if not ninhos:
+                return total
+            total += self._avaliar_lote(ninhos, cursor, nova_versao)
+
+    def _avaliar_lote(self, ninhos: List[Ninho], cursor: int, nova_versao: int) -> int:
+        quantidade = len(ninhos)
+        with self.store.transacao() as conexao:
+            # Outro processo pode ter avançado o cursor enquanto líamos
+            atual = conexao.execute("SELECT versao FROM risco_cursor WHERE id = 1").fetchone()[0]
+            if atual != cursor:
+                return 0
+
+            anteriores = self._pontuacoes_anteriores(conexao, [n.id for n in ninhos])
+            anterior = np.array([anteriores.get(n.id, np.nan) for n in ninhos], dtype=float)
+            pontuacao, faixa, mascara = avaliar_ninhos(ninhos, anterior)
+
+            conexao.executemany(
+                "INSERT INTO avaliacoes_risco (ninho_id, pontuacao, faixa, mascara, versao) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(ninho_id) DO UPDATE SET pontuacao = excluded.pontuacao, "
+                "faixa = excluded.faixa, mascara = excluded.mascara, versao = excluded.versao",
+                zip(
+                    (n.id for n in ninhos),
+                    pontuacao.round(1).tolist(),
+                    faixa.tolist(),
+                    mascara.tolist(),
+                    [nova_versao] * quantidade,
+                ),
+            )
+            conexao.execute("UPDATE risco_cursor SET versao = ? WHERE id = 1", (nova_versao,))
+        return quantidade
+
+    def _pontuacoes_anteriores(self, conexao, ninho_ids: List[str]) -> Dict[str, float]:
+        anteriores = {}
+        for inicio in range(0, len(ninho_ids), _TAMANHO_LOTE_IN):
+            lote = ninho_ids[inicio:inicio + _TAMANHO_LOTE_IN]
+            anteriores.update(conexao.execute(
+                "SELECT ninho_id, pontuacao FROM avaliacoes_risco "
+                f"WHERE ninho_id IN ({','.join('?' * len(lote))})",
+                lote,
+            ).fetchall())
+        return anteriores
+
+    def avaliacoes_por_ids(self, ninho_ids: List[str]) -> Dict[str, Avaliacao]:
+        """Avaliações calculadas dos ninhos informados (os ainda sem avaliação ficam de fora)."""
+        avaliacoes = {}
+        for inicio in range(0, len(ninho_ids), _TAMANHO_LOTE_IN):
+            lote = ninho_ids[inicio:inicio + _TAMANHO_LOTE_IN]
+            linhas = self.store.consultar(
+                "SELECT ninho_id, pontuacao, faixa, mascara FROM avaliacoes_risco "
+                f"WHERE ninho_id IN ({','.join('?' * len(lote))})",
+                lote,
+            )
+            avaliacoes.update(
+                (ninho_id, Avaliacao(pontuacao, faixa, mascara))
+                for ninho_id, pontuacao, faixa, mascara in linhas
+            )
+        return avaliacoes
+
+    def avaliacoes(self, particao: Optional[Particao] = None) -> Dict[str, Avaliacao]:
+        """Avaliações calculadas (só as da partição, se informada), por id do ninho."""
+        if particao is None:
+            linhas = self.store.consultar(
+                "SELECT ninho_id, pontuacao, faixa, mascara FROM avaliacoes_risco"
+            )
+        else:
+            filtro, parametros = filtro_particao(particao, "n.")
+            linhas = self.store.consultar(
+                "SELECT a.ninho_id, a.pontuacao, a.faixa, a.mascara FROM avaliacoes_risco a "
+                f"JOIN ninhos n ON n.id = a.ninho_id WHERE {filtro}",
+                parametros,
+            )
+        return {
+            ninho_id: Avaliacao(pontuacao, faixa, mascara)
+            for ninho_id, pontuacao, faixa, mascara in linhas
+        }
@@ -0,0 +1,122 @@
+import re
+import sqlite3
+from typing import List, Optional, Tuple
+
+from utils.nest import Ninho, Particao
+from utils.nest_store import NestStore, filtro_particao
+
+# Índice de texto completo (FTS5) sobre os ninhos. O conteúdo fica na própria
+# tabela `ninhos` (external content); os gatilhos mantêm o índice em dia em
+# qualquer escrita, de qualquer processo. `remove_diacritics 2` faz a busca
+# ignorar acentos: "ameacado" encontra "ameaçado".
+ESQUEMA_BUSCA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS ninhos_busca USING fts5(
+    observacoes,
+    guardiao,
+    regiao,
+    content='ninhos',
+    content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS ninhos_busca_insercao AFTER INSERT ON ninhos BEGIN
+    INSERT INTO ninhos_busca (rowid, observacoes, guardiao, regiao)
+    VALUES (new.rowid, new.observacoes, new.guardiao, new.regiao);
+END;
+CREATE TRIGGER IF NOT EXISTS ninhos_busca_remocao AFTER DELETE ON ninhos BEGIN
+    INSERT INTO ninhos_busca (ninhos_busca, rowid, observacoes, guardiao, regiao)
+    VALUES ('delete', old.rowid, old.observacoes, old.guardiao, old.regiao);
+END;
+CREATE TRIGGER IF NOT EXISTS ninhos_busca_alteracao AFTER UPDATE ON ninhos BEGIN
+    INSERT INTO ninhos_busca (ninhos_busca, rowid, observacoes, guardiao, regiao)
+    VALUES ('delete', old.rowid, old.observacoes, old.guardiao, old.regiao);
+    INSERT INTO ninhos_busca (rowid, observacoes, guardiao, regiao)
+    VALUES (new.rowid, new.observacoes, new.guardiao, new.regiao);
+END;
+"""
+
+# Pesos do ranking BM25 por coluna: observações, guardião, região
+PESOS_COLUNAS = (1.0, 2.0, 0.5)
+
+RESULTADOS_POR_PAGINA = 20
+
+# Palavras da consulta; aspas e operadores do FTS5 digitados pelo usuário são ignorados
+_PALAVRA = re.compile(r"\w+")
+
+
+def consulta_fts(texto: str) -> Optional[str]:
+    """
+    Converte o texto digitado numa consulta FTS5: todas as palavras devem
+    aparecer, e a última também casa como prefixo (busca enquanto digita).
+    Retorna None se não houver palavras.
+    """
+    palavras = _PALAVRA.findall(texto)
+    if not palavras:
+        return None
+    termos = [f'"{palavra}"' for palavra in palavras]
+    termos[-1] += "*"
+    return " ".join(termos)
+
+
+class BuscaNinhos:
+    """
+    Busca por texto nas observações, nomes de guardiões e regiões dos ninhos,
+    com ranking BM25 e paginação feitos pelo SQLite.
+    """
+
+    def __init__(self, store: NestStore):
+        self.store = store
+        novo = not self.store.consultar(
+            "SELECT 1 FROM sqlite_master WHERE name = 'ninhos_busca'"
+        )
+        self.store.criar_esquema(ESQUEMA_BUSCA)
+        if novo:
+            # Índice criado agora: indexa os ninhos gravados antes dele
+            with self.store.transacao() as conexao:
+                conexao.execute("INSERT INTO ninhos_busca (ninhos_busca) VALUES ('rebuild')")
+
+    def buscar(
+        self,
+        texto: str,
+        pagina: int = 1,
+        por_pagina: int = RESULTADOS_POR_PAGINA,
+        particao: Optional[Particao] = None,
+    ) -> Tuple[List[Tuple[Ninho, str]], int]:
+        """
+        Retorna os ninhos da página pedida, do mais ao menos relevante, cada um
+        com um trecho das observações com os termos destacados em **negrito**,
+        e o total de resultados. Com `particao`, busca só nos ninhos dela.
+        """
+        consulta = consulta_fts(texto)
+        if consulta is None:
+            return [], 0
+        filtro, parametros = filtro_particao(particao, "n.")
+
+        try:
+            total = self.store.consultar(
+                "SELECT COUNT(*) FROM ninhos_busca JOIN ninhos n ON n.rowid = ninhos_busca.rowid "
+                f"WHERE ninhos_busca MATCH ? AND {filtro}",
+                (consulta, *parametros),
+            )[0][0]
+            if total == 0:
+                return [], 0
+            linhas = self.store.consultar(
+                "SELECT n.id, snippet(ninhos_busca, 0, '**', '**', '…', 16) AS trecho "
+                "FROM ninhos_busca JOIN ninhos n ON n.rowid = ninhos_busca.rowid "
+                f"WHERE ninhos_busca MATCH ? AND {filtro} "
+                "ORDER BY bm25(ninhos_busca, ?, ?, ?) LIMIT ? OFFSET ?",
+                (
+                    consulta, *parametros, *PESOS_COLUNAS,
+                    por_pagina, (max(pagina, 1) - 1) * por_pagina,
+                ),
+            )
+        except sqlite3.OperationalError:
+            # Consulta que o FTS5 não aceita (ex.: só caracteres especiais)
+            return [], 0
+
+        ninhos = self.store.ninhos_por_ids([linha["id"] for linha in linhas])
+        resultados = [
+            (ninhos[linha["id"]], linha["trecho"] or "")
+            for linha in linhas
+            if linha["id"] in ninhos
+        ]
+        return resultados, total
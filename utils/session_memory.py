@@ -0,0 +1,99 @@
+import sys
+import time
+from typing import Any, Dict, MutableMapping, NamedTuple, Optional
+
+# Orçamento de memória das visões guardadas por sessão e tempo sem uso até o descarte
+ORCAMENTO_PADRAO = 64 * 1024
+VALIDADE_PADRAO = 30 * 60
+
+# Chave, no estado da sessão, do dicionário com as visões guardadas
+CHAVE_ESTADO = "_memoria_sessao"
+
+
+def orcamento_para(linhas: int) -> int:
+    """
+    Orçamento que comporta ao menos duas seleções de `linhas` ninhos em mapa
+    de bits (1 bit por ninho); nunca menor que ORCAMENTO_PADRAO.
+    """
+    return max(ORCAMENTO_PADRAO, 2 * ((linhas + 7) // 8))
+
+
+def tamanho(valor: Any) -> int:
+    """Tamanho aproximado de um valor guardado (arrays NumPy e seleções informam nbytes)."""
+    return getattr(valor, "nbytes", None) or sys.getsizeof(valor)
+
+
+class _Entrada(NamedTuple):
+    valor: Any
+    versao: Optional[int]
+    tamanho: int
+    acesso: float
+
+
+class MemoriaSessao:
+    """
+    Estado de visualização de uma sessão (filtros, seleções de linhas) com
+    orçamento de memória.
+
+    Cada valor é guardado com a versão dos dados em que foi calculado: ao
+    ler com outra versão, ele é descartado. Valores sem uso há mais de
+    `validade` segundos também são descartados, e, se o total passar do
+    orçamento, os menos usados recentemente saem primeiro. Quem lê deve
+    saber recalcular o valor quando ele não estiver mais guardado.
+    """
+
+    def __init__(
+        self,
+        estado: MutableMapping[str, Any],
+        orcamento: int = ORCAMENTO_PADRAO,
+        validade: float = VALIDADE_PADRAO,
+    ):
+        if CHAVE_ESTADO not in estado:
+            estado[CHAVE_ESTADO] = {}
+        self._entradas: Dict[str, _Entrada] = estado[CHAVE_ESTADO]
+        self.orcamento = orcamento
+        self.validade = validade
+
+    def guardar(self, chave: str, valor: Any, versao: Optional[int] = None) -> bool:
+        """
+        Guarda o valor calculado para a versão dos dados e aplica o orçamento.
+        Retorna False (sem guardar) se o valor sozinho não couber no orçamento.
+        """
+        tamanho_valor = tamanho(valor)
+        if tamanho_valor > self.orcamento:
+            self._entradas.pop(chave, None)
+            return False
+        self._entradas[chave] = _Entrada(valor, versao, tamanho_valor, time.monotonic())
+        self._despejar(manter=chave)
+        return True
+
+    def obter(self, chave: str, versao: Optional[int] = None, padrao: Any = None) -> Any:
+        """Valor guardado para a versão dos dados, ou `padrao` se ausente ou desatualizado."""
+        entrada = self._entradas.get(chave)
+        if entrada is None:
+            return padrao
+        agora = time.monotonic()
+        if entrada.versao != versao or agora - entrada.acesso > self.validade:
+            del self._entradas[chave]
+            return padrao
+        self._entradas[chave] = entrada._replace(acesso=agora)
+        return entrada.valor
+
+    def uso(self) -> int:
+        """Bytes ocupados pelos valores guardados."""
+        return sum(entrada.tamanho for entrada in self._entradas.values())
+
+    def _despejar(self, manter: str):
+        agora = time.monotonic()
+        for chave, entrada in list(self._entradas.items()):
+            if agora - entrada.acesso > self.validade:
+                del self._entradas[chave]
+
+        # Os menos usados recentemente saem primeiro; o valor recém-guardado fica
+        uso = self.uso()
+        for chave, entrada in sorted(self._entradas.items(), key=lambda item: item[1].acesso):
+            if uso <= self.orcamento:
+                break
+            if chave != manter:
+                del self._entradas[chave]
+                uso -= entrada.tamanho
@@ -1,7 +1,13 @@
 from typing import List, Dict, Any, Tuple
+from utils.cube import CuboNinhos
+
+# Todas as funções aceitam a lista de ninhos ou um CuboNinhos já montado;
+# com o cubo, o resultado sai de somas sobre o cubo, sem percorrer os ninhos.
 
 def contar_total_ninhos(ninhos: List[Dict[str, Any]]) -> int:
     """Retorna o número total de ninhos registrados."""
+    if isinstance(ninhos, CuboNinhos):
+        return ninhos.total()
     return len(ninhos)
 
 def media_ovos_por_risco(ninhos: List[Dict[str, Any]]) -> Dict[str, float]:
@@ -9,6 +15,15 @@ def media_ovos_por_risco(ninhos: List[Dict[str, Any]]) -> Dict[str, float]:
     Calcula a média de ovos por ninho para cada categoria de risco.
     Retorna um dicionário com o risco como chave e a média de ovos como valor.
     """
+    if isinstance(ninhos, CuboNinhos):
+        contagens = ninhos.por("risco")
+        ovos = ninhos.por("risco", "ovos")
+        return {
+            risco: ovos[risco] / contagem
+            for risco, contagem in contagens.items()
+            if contagem > 0
+        }
+
     total_ovos_por_risco = {}
     contagem_ninhos_por_risco = {}
 
@@ -33,6 +48,8 @@ def media_ovos_por_risco(ninhos: List[Dict[str, Any]]) -> Dict[str, float]:
 
 def ninhos_prestes_a_eclodir(ninhos: List[Dict[str, Any]], dias_limite: int = 5) -> int:
     """Conta quantos ninhos estão prestes a eclodir (dias_para_eclosao menor ou igual ao limite)."""
+    if isinstance(ninhos, CuboNinhos):
+        return ninhos.total(dias_max=dias_limite)
     ninhos_proximos = 0
     for ninho in ninhos:
         if ninho["dias_para_eclosao"] <= dias_limite:
@@ -46,6 +63,14 @@ def regiao_com_mais_ninhos_sob_risco(ninhos: List[Dict[str, Any]]) -> Tuple[str,
     """
     contagem_risco_por_regiao = {}
 
+    if isinstance(ninhos, CuboNinhos):
+        contagem_risco_por_regiao = {
+            regiao: contagem
+            for regiao, contagem in ninhos.por("regiao", risco=["🟡", "🔴"]).items()
+            if contagem > 0
+        }
+        ninhos = []
+
     for ninho in ninhos:
         regiao = ninho["regiao"]
         risco = ninho["risco"]
@@ -69,6 +94,8 @@ def regiao_com_mais_ninhos_sob_risco(ninhos: List[Dict[str, Any]]) -> Tuple[str,
 
 def ninhos_com_predadores_e_danificados(ninhos: List[Dict[str, Any]]) -> int:
     """Conta quantos ninhos têm a presença de predadores e estão em status 'danificado'."""
+    if isinstance(ninhos, CuboNinhos):
+        return ninhos.total(predadores=True, status="danificado")
     ninhos_afetados = 0
     for ninho in ninhos:
         if ninho["predadores"] and ninho["status"] == "danificado":
@@ -77,6 +104,8 @@ def ninhos_com_predadores_e_danificados(ninhos: List[Dict[str, Any]]) -> int:
 
 def contar_ninhos_por_status(ninhos: List[Dict[str, Any]]) -> Dict[str, int]:
     """Conta ninhos por status"""
+    if isinstance(ninhos, CuboNinhos):
+        return ninhos.por("status")
     contagem = {"intacto": 0, "ameacado": 0, "danificado": 0}
     for ninho in ninhos:
         status = ninho["status"]
@@ -86,6 +115,8 @@ def contar_ninhos_por_status(ninhos: List[Dict[str, Any]]) -> Dict[str, int]:
 
 def contar_ninhos_por_regiao(ninhos: List[Dict[str, Any]]) -> Dict[str, int]:
     """Conta ninhos por região"""
+    if isinstance(ninhos, CuboNinhos):
+        return ninhos.por("regiao")
     contagem = {}
     for ninho in ninhos:
         regiao = ninho["regiao"]
@@ -94,4 +125,75 @@ def contar_ninhos_por_regiao(ninhos: List[Dict[str, Any]]) -> Dict[str, int]:
 
 def get_total_ovos(ninhos: List[Dict[str, Any]]) -> int:
     """Retorna o total de ovos em todos os ninhos"""
+    if isinstance(ninhos, CuboNinhos):
+        return ninhos.total("ovos")
     return sum(ninho["quantidade_ovos"] for ninho in ninhos)
+
+# Sucesso de eclosão: calculado sobre os agregados mantidos pelo NestStore
+# (uma linha por região e risco), nunca sobre os ninhos.
+
+CAMPOS_ECLOSAO = ("ninhos", "ovos", "eclodidos", "emergidos", "ovos_mortos")
+
+def _com_taxas(soma: Dict[str, int]) -> Dict[str, Any]:
+    ovos = soma["ovos"]
+    soma["taxa_eclosao"] = soma["eclodidos"] / ovos * 100 if ovos else 0.0
+    soma["taxa_emergencia"] = soma["emergidos"] / ovos * 100 if ovos else 0.0
+    return soma
+
+def resumo_sucesso_eclosao(agregados: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Soma os agregados de eclosão e calcula as taxas gerais (em %):
+    eclodidos / ovos e emergidos / ovos dos ninhos escavados.
+    """
+    soma = {campo: sum(linha[campo] for linha in agregados) for campo in CAMPOS_ECLOSAO}
+    return _com_taxas(soma)
+
+def taxas_de_sucesso(
+    agregados: List[Dict[str, Any]], por: str = "regiao"
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Agrupa os agregados de eclosão por 'regiao' ou 'risco' e calcula as taxas
+    de eclosão e de emergência (em %) de cada grupo.
+    """
+    grupos = {}
+    for linha in agregados:
+        soma = grupos.setdefault(linha[por], dict.fromkeys(CAMPOS_ECLOSAO, 0))
+        for campo in CAMPOS_ECLOSAO:
+            soma[campo] += linha[campo]
+    return {chave: _com_taxas(soma) for chave, soma in grupos.items()}
+
+# Avistamentos de predadores: calculados sobre as contagens por região e
+# espécie da janela pedida (RegistroPredadores.contagens) e sobre o cubo.
+
+def ninhos_afetados_por_especie(
+    contagens: List[Dict[str, Any]], cubo: CuboNinhos
+) -> Dict[str, Dict[str, int]]:
+    """
+    Para cada espécie avistada na janela, soma os avistamentos e os ninhos
+    das regiões onde ela apareceu: total, com predadores marcados pelo
+    guardião e danificados. Ordenado do maior número de ninhos afetados.
+    """
+    ninhos_regiao = cubo.por("regiao")
+    com_predadores = cubo.por("regiao", predadores=True)
+    danificados = cubo.por("regiao", status="danificado")
+
+    especies = {}
+    for linha in contagens:
+        soma = especies.setdefault(linha["especie"], {
+            "avistamentos": 0, "regioes": 0, "ninhos": 0,
+            "ninhos_com_predadores": 0, "ninhos_danificados": 0,
+        })
+        regiao = linha["regiao"]
+        soma["avistamentos"] += linha["avistamentos"]
+        soma["regioes"] += 1
+        soma["ninhos"] += ninhos_regiao.get(regiao, 0)
+        soma["ninhos_com_predadores"] += com_predadores.get(regiao, 0)
+        soma["ninhos_danificados"] += danificados.get(regiao, 0)
+    return dict(sorted(especies.items(), key=lambda item: -item[1]["ninhos"]))
+
+def avistamentos_por_regiao(contagens: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Total de avistamentos (todas as espécies) por região na janela."""
+    regioes = {}
+    for linha in contagens:
+        regioes[linha["regiao"]] = regioes.get(linha["regiao"], 0) + linha["avistamentos"]
+    return regioes
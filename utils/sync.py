@@ -0,0 +1,405 @@
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.nest import Ninho, CAMPOS, STATUS, RISCOS, CODIGO_STATUS, CODIGO_RISCO
+from utils.nest_store import (
+    NestStore,
+    CAMINHO_PADRAO,
+    ALTERACAO_APLICADA,
+    ALTERACAO_IGNORADA,
+    ALTERACAO_REJEITADA,
+)
+
+# Captura em campo sem conexão: os ninhos registrados no dispositivo vão
+# para uma fila local (SQLite) com ids gerados no próprio dispositivo e são
+# enviados ao servidor em lotes quando a conexão volta. O servidor aplica
+# as alterações com `NestStore.aplicar_alteracoes` (upsert idempotente,
+# o último a escrever vence em cada campo).
+#
+# O app Streamlit roda no servidor: lá, a fila é só um buffer de novas
+# tentativas entre o processo do app e o banco. Um envio que não chega ao
+# servidor (conexão do navegador caída) não chega à fila. Cada sessão do
+# navegador usa a fila com a própria identidade de dispositivo.
+
+CAMINHO_FILA_PADRAO = os.environ.get(
+    "GUARDIOES_FILA", os.path.join(os.path.dirname(CAMINHO_PADRAO) or ".", "fila_offline.db")
+)
+
+ESQUEMA_FILA = """
+CREATE TABLE IF NOT EXISTS fila_alteracoes (
+    ninho_id TEXT PRIMARY KEY,
+    carimbo INTEGER NOT NULL,
+    campos TEXT NOT NULL,
+    dispositivo TEXT
+);
+CREATE TABLE IF NOT EXISTS fila_rejeitadas (
+    ninho_id TEXT NOT NULL,
+    campos TEXT NOT NULL,
+    mensagem TEXT NOT NULL,
+    rejeitada_em TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fila_estado (
+    chave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+"""
+
+TAMANHO_LOTE = 200
+
+# Transporte: envia um pacote ao servidor e devolve a resposta.
+# Levanta ConnectionError quando a conexão falha.
+Transporte = Callable[[bytes], bytes]
+
+# Códigos compactos usados nos pacotes
+_SITUACOES = (ALTERACAO_APLICADA, ALTERACAO_IGNORADA, ALTERACAO_REJEITADA)
+
+
+class FilaOffline:
+    """
+    Fila local de alterações de ninhos, guardada em disco no dispositivo.
+
+    Várias alterações do mesmo ninho antes do envio são combinadas numa só,
+    e apenas os campos alterados são enviados. Cada alteração recebe um
+    carimbo do relógio do dispositivo, que nunca anda para trás.
+
+    A fila tem uma identidade própria (`dispositivo`). Quem a usa em nome de
+    vários dispositivos (as sessões do app) informa o dispositivo de cada
+    alteração; cada um tem o próprio relógio.
+    """
+
+    def __init__(self, caminho: str = CAMINHO_FILA_PADRAO):
+        self.caminho = caminho
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conexao = sqlite3.connect(
+            caminho, check_same_thread=False, timeout=30, isolation_level=None
+        )
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.executescript(ESQUEMA_FILA)
+        colunas = [
+            linha[1] for linha in self._conexao.execute("PRAGMA table_info(fila_alteracoes)")
+        ]
+        if "dispositivo" not in colunas:
+            # Filas anteriores: as alterações pendentes são da identidade da própria fila
+            self._conexao.execute("ALTER TABLE fila_alteracoes ADD COLUMN dispositivo TEXT")
+        self.dispositivo = self._estado("dispositivo") or self._definir_estado(
+            "dispositivo", uuid.uuid4().hex
+        )
+
+    def _estado(self, chave: str) -> Optional[str]:
+        linha = self._conexao.execute(
+            "SELECT valor FROM fila_estado WHERE chave = ?", (chave,)
+        ).fetchone()
+        return linha[0] if linha else None
+
+    def _definir_estado(self, chave: str, valor: str) -> str:
+        self._conexao.execute(
+            "INSERT INTO fila_estado (chave, valor) VALUES (?, ?) "
+            "ON CONFLICT(chave) DO UPDATE SET valor = excluded.valor",
+            (chave, valor),
+        )
+        return valor
+
+    def _relogio(self, dispositivo: str) -> int:
+        """
+        Milissegundos do relógio do dispositivo, estritamente crescentes mesmo
+        se o relógio voltar.
+        """
+        chave = "relogio" if dispositivo == self.dispositivo else f"relogio:{dispositivo}"
+        ultimo = int(self._estado(chave) or 0)
+        carimbo = max(time.time_ns() // 1_000_000, ultimo + 1)
+        self._definir_estado(chave, str(carimbo))
+        return carimbo
+
+    def registrar(self, ninho: Dict[str, Any], dispositivo: Optional[str] = None) -> str:
+        """
+        Valida e enfileira um ninho novo. O id é gerado aqui, no dispositivo,
+        de modo que reenviar o mesmo registro nunca cria um ninho duplicado.
+        """
+        ninho = Ninho.de_dict(ninho)
+        ninho_id = ninho.id or uuid.uuid4().hex
+        campos = ninho.para_dict()
+        campos.pop("id", None)
+        self.alterar(ninho_id, campos, dispositivo)
+        return ninho_id
+
+    def alterar(self, ninho_id: str, campos: Dict[str, Any], dispositivo: Optional[str] = None):
+        """Enfileira a alteração de alguns campos de um ninho (feita por `dispositivo`)."""
+        dispositivo = dispositivo or self.dispositivo
+        with self._lock:
+            self._conexao.execute("BEGIN IMMEDIATE")
+            try:
+                carimbo = self._relogio(dispositivo)
+                linha = self._conexao.execute(
+                    "SELECT campos FROM fila_alteracoes WHERE ninho_id = ?", (ninho_id,)
+                ).fetchone()
+                # Combina com a alteração ainda não enviada do mesmo ninho
+                pendentes = json.loads(linha[0]) if linha else {}
+                pendentes.update(campos)
+                self._conexao.execute(
+                    "INSERT INTO fila_alteracoes (ninho_id, carimbo, campos, dispositivo) "
+                    "VALUES (?, ?, ?, ?) ON CONFLICT(ninho_id) DO UPDATE SET "
+                    "carimbo = excluded.carimbo, campos = excluded.campos, "
+                    "dispositivo = excluded.dispositivo",
+                    (ninho_id, carimbo, json.dumps(pendentes, ensure_ascii=False), dispositivo),
+                )
+            except BaseException:
+                self._conexao.execute("ROLLBACK")
+                raise
+            else:
+                self._conexao.execute("COMMIT")
+
+    def pendentes(self, limite: int = TAMANHO_LOTE) -> List[Dict[str, Any]]:
+        """Próximas alterações a enviar, das mais antigas para as mais novas."""
+        with self._lock:
+            linhas = self._conexao.execute(
+                "SELECT ninho_id, carimbo, campos, dispositivo FROM fila_alteracoes "
+                "ORDER BY carimbo LIMIT ?",
+                (limite,),
+            ).fetchall()
+        return [
+            {
+                "id": ninho_id,
+                "carimbo": carimbo,
+                "dispositivo": dispositivo or self.dispositivo,
+                "campos": json.loads(campos),
+            }
+            for ninho_id, carimbo, campos, dispositivo in linhas
+        ]
+
+    def contar(self) -> int:
+        """Número de ninhos com alterações ainda não confirmadas pelo servidor."""
+        with self._lock:
+            return self._conexao.execute("SELECT COUNT(*) FROM fila_alteracoes").fetchone()[0]
+
+    def confirmar(self, enviadas: List[Dict[str, Any]], resultados: List[Tuple[str, str, str]]):
+        """
+        Remove da fila as alterações respondidas pelo servidor. Se o ninho foi
+        alterado de novo durante o envio (carimbo diferente), a alteração nova
+        continua na fila. As rejeitadas vão para `fila_rejeitadas`.
+        """
+        por_id = {alteracao["id"]: alteracao for alteracao in enviadas}
+        agora = time.strftime("%Y-%m-%dT%H:%M:%S")
+        with self._lock:
+            self._conexao.execute("BEGIN IMMEDIATE")
+            try:
+                for ninho_id, situacao, mensagem in resultados:
+                    alteracao = por_id.get(ninho_id)
+                    if alteracao is None:
+                        continue
+                    if situacao == ALTERACAO_REJEITADA:
+                        self._conexao.execute(
+                            "INSERT INTO fila_rejeitadas "
+                            "(ninho_id, campos, mensagem, rejeitada_em) VALUES (?, ?, ?, ?)",
+                            (
+                                ninho_id,
+                                json.dumps(alteracao["campos"], ensure_ascii=False),
+                                mensagem,
+                                agora,
+                            ),
+                        )
+                    self._conexao.execute(
+                        "DELETE FROM fila_alteracoes WHERE ninho_id = ? AND carimbo = ?",
+                        (ninho_id, alteracao["carimbo"]),
+                    )
+            except BaseException:
+                self._conexao.execute("ROLLBACK")
+                raise
+            else:
+                self._conexao.execute("COMMIT")
+
+    def rejeitadas(self) -> List[Dict[str, Any]]:
+        """Alterações recusadas pelo servidor (dados inválidos), para revisão."""
+        with self._lock:
+            linhas = self._conexao.execute(
+                "SELECT ninho_id, campos, mensagem, rejeitada_em FROM fila_rejeitadas "
+                "ORDER BY rejeitada_em DESC"
+            ).fetchall()
+        return [
+            {"id": ninho_id, "campos": json.loads(campos), "mensagem": mensagem, "em": em}
+            for ninho_id, campos, mensagem, em in linhas
+        ]
+
+    def fechar(self):
+        with self._lock:
+            self._conexao.close()
+
+
+# Formato dos pacotes: JSON compacto comprimido com zlib. Os nomes dos campos
+# viram índices de CAMPOS e status/risco viram seus códigos inteiros.
+
+def _compactar_campos(campos: Dict[str, Any]) -> Dict[str, Any]:
+    compactos = {}
+    for campo, valor in campos.items():
+        if campo == "status" and valor in CODIGO_STATUS:
+            valor = CODIGO_STATUS[valor]
+        elif campo == "risco" and valor in CODIGO_RISCO:
+            valor = CODIGO_RISCO[valor]
+        compactos[str(CAMPOS.index(campo))] = valor
+    return compactos
+
+
+def _expandir_campos(compactos: Dict[str, Any]) -> Dict[str, Any]:
+    campos = {}
+    for indice, valor in compactos.items():
+        campo = CAMPOS[int(indice)]
+        if campo == "status" and isinstance(valor, int) and 0 <= valor < len(STATUS):
+            valor = STATUS[valor]
+        elif campo == "risco" and isinstance(valor, int) and 0 <= valor < len(RISCOS):
+            valor = RISCOS[valor]
+        campos[campo] = valor
+    return campos
+
+
+def _empacotar(dados: Any) -> bytes:
+    return zlib.compress(
+        json.dumps(dados, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 9
+    )
+
+
+def _desempacotar(pacote: bytes) -> Any:
+    return json.loads(zlib.decompress(pacote).decode("utf-8"))
+
+
+def codificar_lote(alteracoes: List[Dict[str, Any]]) -> bytes:
+    """
+    Codifica um lote de alterações para envio. Os dispositivos do lote vão
+    numa lista e cada alteração leva o índice do seu: a fila do app mistura
+    sessões diferentes no mesmo lote.
+    """
+    dispositivos = list(dict.fromkeys(alteracao["dispositivo"] for alteracao in alteracoes))
+    indice = {dispositivo: i for i, dispositivo in enumerate(dispositivos)}
+    return _empacotar({
+        "d": dispositivos,
+        "a": [
+            [
+                alteracao["id"],
+                alteracao["carimbo"],
+                _compactar_campos(alteracao["campos"]),
+                indice[alteracao["dispositivo"]],
+            ]
+            for alteracao in alteracoes
+        ],
+    })
+
+
+def decodificar_lote(pacote: bytes) -> List[Dict[str, Any]]:
+    """Inverso de `codificar_lote`; aceita também o formato antigo, com um só dispositivo."""
+    dados = _desempacotar(pacote)
+    if isinstance(dados["d"], str):
+        # Formato antigo: o lote inteiro era de um único dispositivo
+        return [
+            {
+                "id": ninho_id,
+                "carimbo": carimbo,
+                "dispositivo": dados["d"],
+                "campos": _expandir_campos(campos),
+            }
+            for ninho_id, carimbo, campos in dados["a"]
+        ]
+    return [
+        {
+            "id": ninho_id,
+            "carimbo": carimbo,
+            "dispositivo": dados["d"][dispositivo],
+            "campos": _expandir_campos(campos),
+        }
+        for ninho_id, carimbo, campos, dispositivo in dados["a"]
+    ]
+
+
+def codificar_resultados(resultados: List[Tuple[str, str, str]]) -> bytes:
+    return _empacotar([
+        [ninho_id, _SITUACOES.index(situacao), mensagem]
+        for ninho_id, situacao, mensagem in resultados
+    ])
+
+
+def decodificar_resultados(pacote: bytes) -> List[Tuple[str, str, str]]:
+    return [
+        (ninho_id, _SITUACOES[situacao], mensagem)
+        for ninho_id, situacao, mensagem in _desempacotar(pacote)
+    ]
+
+
+class ServidorSincronizacao:
+    """Ponto de recebimento no servidor: aplica um lote e responde com o resultado de cada item."""
+
+    def __init__(self, store: NestStore):
+        self.store = store
+
+    def receber(self, pacote: bytes) -> bytes:
+        return codificar_resultados(self.store.aplicar_alteracoes(decodificar_lote(pacote)))
+
+
+class TransporteInstavel:
+    """
+    Simula uma conexão ruim de praia para testes locais: falha antes de
+    entregar o pacote (o servidor não recebe nada) ou depois de entregar
+    (o servidor aplicou, mas a resposta se perde e o lote será reenviado).
+    """
+
+    def __init__(
+        self,
+        transporte: Transporte,
+        falha_envio: float = 0.3,
+        falha_resposta: float = 0.3,
+        semente: Optional[int] = None,
+    ):
+        self.transporte = transporte
+        self.falha_envio = falha_envio
+        self.falha_resposta = falha_resposta
+        self._aleatorio = random.Random(semente)
+        self.bytes_enviados = 0
+
+    def __call__(self, pacote: bytes) -> bytes:
+        if self._aleatorio.random() < self.falha_envio:
+            raise ConnectionError("Conexão perdida antes do envio")
+        self.bytes_enviados += len(pacote)
+        resposta = self.transporte(pacote)
+        if self._aleatorio.random() < self.falha_resposta:
+            raise ConnectionError("Conexão perdida antes da resposta")
+        return resposta
+
+
+def sincronizar(
+    fila: FilaOffline,
+    transporte: Transporte,
+    tamanho_lote: int = TAMANHO_LOTE,
+    tentativas: int = 5,
+    espera: float = 0.5,
+) -> Dict[str, int]:
+    """
+    Envia a fila em lotes até esvaziá-la. Falhas de conexão são repetidas com
+    espera crescente; depois de `tentativas` falhas seguidas, levanta
+    ConnectionError e o que não foi confirmado continua na fila.
+    Retorna quantas alterações foram aplicadas, ignoradas (já aplicadas) e rejeitadas.
+    """
+    resumo = {situacao: 0 for situacao in _SITUACOES}
+    falhas = 0
+    while True:
+        lote = fila.pendentes(tamanho_lote)
+        if not lote:
+            return resumo
+        try:
+            resultados = decodificar_resultados(transporte(codificar_lote(lote)))
+        except ConnectionError:
+            falhas += 1
+            if falhas >= tentativas:
+                raise
+            time.sleep(espera * 2 ** (falhas - 1))
+            continue
+        falhas = 0
+        fila.confirmar(lote, resultados)
+        for _, situacao, _ in resultados:
+            resumo[situacao] += 1
@@ -0,0 +1,236 @@
+"""
+Processo em segundo plano dos Guardiões das Tartaruguinhas.
+
+Executa periodicamente as tarefas que não dependem do dashboard aberto
+(avaliação de risco, alertas, pré-geração de relatórios e miniaturas das
+fotos), lendo o mesmo banco de ninhos usado pelo app:
+
+    python worker.py                   # roda continuamente (padrão: a cada 60s)
+    python worker.py --uma-vez         # executa uma rodada e sai
+    python worker.py --arquivar-temporada 2025   # congela a temporada e sai
+    python worker.py --importar-avistamentos avistamentos.csv   # importa e sai
+    python worker.py --porta-metricas 9470      # serve /metrics enquanto roda
+"""
+import argparse
+import logging
+import time
+
+from utils.nest import Particao, NinhoInvalido, ORGANIZACAO_PADRAO, PROJETO_PADRAO, PARTICAO_PADRAO
+from utils.nest_store import NestStore, CAMINHO_PADRAO
+from utils.alerts import MotorAlertas
+from utils.risk import MotorRisco
+from utils.artifacts import ArmazemArtefatos, gerar_relatorios
+from utils.nest_cache import CacheNinhos
+from utils.cube import CuboNinhos
+from utils.executive_report import guardar_relatorios_executivos
+from utils.regional_reports import criar_executor, gerar_relatorios_regionais
+from utils.archive import PASTA_ARQUIVO, arquivar_temporada
+from utils.photos import ArmazemFotos, FilaMiniaturas, FALHOU
+from utils.predators import RegistroPredadores, RelatorioImportacao, AvistamentoInvalido, ler_csv
+from utils.metrics import REGISTRO, HOST_PADRAO, medir, iniciar_servidor
+
+logger = logging.getLogger("guardioes.worker")
+
+TEMPO_TAREFAS = REGISTRO.histograma(
+    "guardioes_worker_tarefa_segundos", "Duração de cada tarefa da rodada do worker", ("tarefa",)
+)
+
+
+def executar_alertas(store: NestStore, estado: dict):
+    """Avalia as regras de alerta sobre os ninhos alterados desde a última rodada."""
+    if "motor_alertas" not in estado:
+        estado["motor_alertas"] = MotorAlertas(store)
+    novos = estado["motor_alertas"].avaliar()
+    if novos:
+        logger.info("🚨 %d alerta(s) novo(s) gravado(s) no outbox", novos)
+
+
+def executar_risco(store: NestStore, estado: dict):
+    """Recalcula as avaliações de risco dos ninhos alterados desde a última rodada."""
+    if "motor_risco" not in estado:
+        estado["motor_risco"] = MotorRisco(store)
+    avaliados = estado["motor_risco"].atualizar()
+    if avaliados:
+        logger.info("🎯 %d ninho(s) reavaliado(s)", avaliados)
+
+
+def executar_relatorios(store: NestStore, estado: dict):
+    """
+    Pré-gera os relatórios (Markdown, CSV, Parquet e executivos) de cada
+    partição cujos dados mudaram; as partições paradas não são relidas.
+    """
+    if "armazem" not in estado:
+        estado["armazem"] = ArmazemArtefatos(store)
+        estado["caches"] = {}
+        estado["versoes_relatorios"] = {}
+        # Um pool para todas as rodadas: os processos importam as bibliotecas uma vez só
+        estado["executor_regional"] = criar_executor()
+
+    for particao in (linha["particao"] for linha in store.particoes()):
+        if particao not in estado["caches"]:
+            estado["caches"][particao] = CacheNinhos(store, particao)
+        # Leitura incremental e consistente: a versão corresponde exatamente aos ninhos
+        versao, ninhos = estado["caches"][particao].instantaneo()
+        if versao == estado["versoes_relatorios"].get(particao):
+            continue
+
+        cubo = CuboNinhos.de_ninhos(ninhos)
+        gerados = gerar_relatorios(estado["armazem"], versao, ninhos, cubo, particao=particao)
+        gerados += guardar_relatorios_executivos(
+            estado["armazem"], versao, ninhos, cubo, [None], particao
+        )
+        if gerados:
+            logger.info(
+                "📋 Relatórios gerados para %s, versão %d: %s",
+                particao, versao, ", ".join(gerados),
+            )
+
+        # Relatórios de cada região, no pool do worker (em sequência com um núcleo)
+        gerar_relatorios_regionais(
+            estado["armazem"],
+            progresso=lambda concluidas, total, regiao: logger.info(
+                "🏖️ Relatórios regionais: %d/%d (%s)", concluidas, total, regiao
+            ),
+            particao=particao,
+            executor=estado["executor_regional"],
+        )
+        estado["versoes_relatorios"][particao] = versao
+    estado["armazem"].limpar()
+
+
+def executar_miniaturas(store: NestStore, estado: dict):
+    """Gera as miniaturas e prévias das fotos que o app ainda não processou."""
+    if "fila_miniaturas" not in estado:
+        estado["fila_miniaturas"] = FilaMiniaturas(ArmazemFotos(store))
+    fila = estado["fila_miniaturas"]
+    resultados = fila.aguardar(fila.enviar_pendentes())
+    if resultados:
+        logger.info(
+            "📷 %d foto(s) processada(s), %d com erro",
+            len(resultados), resultados.count(FALHOU),
+        )
+
+
+def arquivar(store: NestStore, pasta_arquivo: str, temporada: str):
+    """Congela os ninhos e resultados de escavação atuais como temporada encerrada."""
+    ninhos = store.listar()
+    destino = arquivar_temporada(pasta_arquivo, temporada, ninhos, store.resultados_eclosao())
+    logger.info("🗄️ Temporada %s arquivada em %s (%d ninhos)", temporada, destino, len(ninhos))
+
+
+def importar_avistamentos(store: NestStore, caminho: str, particao: Particao = PARTICAO_PADRAO):
+    """Importa avistamentos de um CSV para a partição, pulando as linhas inválidas."""
+    relatorio = RelatorioImportacao()
+    try:
+        with open(caminho, encoding="utf-8-sig", newline="") as arquivo:
+            importados = RegistroPredadores(store).importar(
+                ler_csv(arquivo, relatorio, particao), relatorio=relatorio
+            )
+    except UnicodeDecodeError:
+        # Os lotes anteriores ao erro já foram confirmados
+        logger.error(
+            "Importação interrompida: %d avistamento(s) já gravado(s)", relatorio.importados
+        )
+        raise
+    logger.info("🦅 %d avistamento(s) importado(s) de %s em %s", importados, caminho, particao)
+    if relatorio.rejeitadas:
+        logger.warning("%d linha(s) inválida(s) ignorada(s)", relatorio.rejeitadas)
+        for erro in relatorio.erros:
+            logger.warning("  %s", erro)
+
+
+# Tarefas executadas a cada rodada, na ordem
+TAREFAS = {
+    "risco": executar_risco,
+    "alertas": executar_alertas,
+    "relatorios": executar_relatorios,
+    "miniaturas": executar_miniaturas,
+}
+
+
+def executar_rodada(store: NestStore, estado: dict, tarefas):
+    """Executa uma rodada de todas as tarefas selecionadas."""
+    for nome in tarefas:
+        try:
+            with medir(TEMPO_TAREFAS, nome, tarefa=nome):
+                TAREFAS[nome](store, estado)
+        except Exception:
+            # Uma tarefa com erro não deve derrubar as demais
+            logger.exception("Erro ao executar a tarefa '%s'", nome)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tarefas em segundo plano dos Guardiões")
+    parser.add_argument("--db", default=CAMINHO_PADRAO, help="Caminho do banco de ninhos")
+    parser.add_argument("--intervalo", type=float, default=60.0, help="Segundos entre rodadas")
+    parser.add_argument("--uma-vez", action="store_true", help="Executa uma única rodada")
+    parser.add_argument(
+        "--tarefas",
+        nargs="+",
+        choices=list(TAREFAS),
+        default=list(TAREFAS),
+        help="Tarefas a executar",
+    )
+    parser.add_argument(
+        "--arquivar-temporada",
+        metavar="TEMPORADA",
+        help="Congela os ninhos atuais no arquivo de temporadas encerradas e sai",
+    )
+    parser.add_argument(
+        "--arquivo", default=PASTA_ARQUIVO, help="Pasta do arquivo de temporadas encerradas"
+    )
+    parser.add_argument(
+        "--importar-avistamentos",
+        metavar="CSV",
+        help="Importa avistamentos de predadores de um arquivo CSV e sai",
+    )
+    parser.add_argument(
+        "--organizacao",
+        default=ORGANIZACAO_PADRAO,
+        help="Organização dos avistamentos importados",
+    )
+    parser.add_argument(
+        "--projeto", default=PROJETO_PADRAO, help="Projeto dos avistamentos importados"
+    )
+    parser.add_argument(
+        "--porta-metricas",
+        type=int,
+        default=0,
+        help="Porta do endpoint /metrics do worker (0 = desligado)",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+
+    store = NestStore(args.db)
+    if args.arquivar_temporada:
+        try:
+            arquivar(store, args.arquivo, args.arquivar_temporada)
+        except FileExistsError as erro:
+            parser.error(str(erro))
+        return
+    if args.importar_avistamentos:
+        try:
+            particao = Particao.validar(args.organizacao, args.projeto)
+            importar_avistamentos(store, args.importar_avistamentos, particao)
+        except (OSError, AvistamentoInvalido, NinhoInvalido, UnicodeDecodeError) as erro:
+            parser.error(str(erro))
+        return
+    iniciar_servidor(HOST_PADRAO, args.porta_metricas)
+    # Conferência completa das contagens diárias, uma vez por execução do worker
+    RegistroPredadores(store).verificar_agregados()
+    estado = {}
+
+    try:
+        while True:
+            executar_rodada(store, estado, args.tarefas)
+            if args.uma_vez:
+                break
+            time.sleep(args.intervalo)
+    finally:
+        if estado.get("executor_regional") is not None:
+            estado["executor_regional"].shutdown()
+
+
+if __name__ == "__main__":
+    main()